@@ -36,9 +36,10 @@ class UnixDomainHttpConnection(httplib.HTTPConnection):
         self.sock = sock
 
 
-def create_subports(num_ports, trunk_ips, timeout=180):
+def create_subports(num_ports, trunk_ips, timeout=180, run_async=False):
     method = 'POST'
-    body = jsonutils.dumps({"trunks": trunk_ips, "num_ports": num_ports})
+    body = jsonutils.dumps({"trunks": trunk_ips, "num_ports": num_ports,
+                            "async": run_async})
     headers = {'Content-Type': 'application/json', 'Connection': 'close'}
     headers['Content-Length'] = len(body)
     path = 'http://localhost{0}'.format(constants.VIF_POOL_POPULATE)
@@ -49,9 +50,9 @@ def create_subports(num_ports, trunk_ips, timeout=180):
     print(resp.read())
 
 
-def delete_subports(trunk_ips, timeout=180):
+def delete_subports(trunk_ips, timeout=180, run_async=False):
     method = 'POST'
-    body = jsonutils.dumps({"trunks": trunk_ips})
+    body = jsonutils.dumps({"trunks": trunk_ips, "async": run_async})
     headers = {'Content-Type': 'application/json', 'Connection': 'close'}
     headers['Content-Length'] = len(body)
     path = 'http://localhost{0}'.format(constants.VIF_POOL_FREE)
@@ -88,6 +89,45 @@ def show_pool(trunk_ip, project_id, sg, timeout=180):
     print(resp.read())
 
 
+def list_pool_sizes(timeout=180):
+    method = 'GET'
+    body = jsonutils.dumps({})
+    headers = {'Context-Type': 'application/json', 'Connection': 'close'}
+    headers['Context-Length'] = len(body)
+    path = 'http://localhost{0}'.format(constants.VIF_POOL_SIZES)
+    socket_path = constants.MANAGER_SOCKET_FILE
+    conn = UnixDomainHttpConnection(socket_path, timeout)
+    conn.request(method, path, body=body, headers=headers)
+    resp = conn.getresponse()
+    print(resp.read())
+
+
+def pools_stats(timeout=180):
+    method = 'GET'
+    body = jsonutils.dumps({})
+    headers = {'Content-Type': 'application/json', 'Connection': 'close'}
+    headers['Content-Length'] = len(body)
+    path = 'http://localhost{0}'.format(constants.VIF_POOL_STATS)
+    socket_path = constants.MANAGER_SOCKET_FILE
+    conn = UnixDomainHttpConnection(socket_path, timeout)
+    conn.request(method, path, body=body, headers=headers)
+    resp = conn.getresponse()
+    print(resp.read())
+
+
+def show_jobs(job_id=None, timeout=180):
+    method = 'GET'
+    body = jsonutils.dumps({"job_id": job_id} if job_id else {})
+    headers = {'Content-Type': 'application/json', 'Connection': 'close'}
+    headers['Content-Length'] = len(body)
+    path = 'http://localhost{0}'.format(constants.VIF_POOL_JOBS)
+    socket_path = constants.MANAGER_SOCKET_FILE
+    conn = UnixDomainHttpConnection(socket_path, timeout)
+    conn.request(method, path, body=body, headers=headers)
+    resp = conn.getresponse()
+    print(resp.read())
+
+
 def _get_parser():
     parser = argparse.ArgumentParser(
         description='Tool to create/free subports from the subports pool')
@@ -114,6 +154,11 @@ def _get_parser():
         dest='timeout',
         default=180,
         type=int)
+    create_ports_parser.add_argument(
+        '--async',
+        help='run it as a background job instead of waiting for it',
+        dest='run_async',
+        action='store_true')
 
     delete_ports_parser = subparser.add_parser(
         'free',
@@ -129,6 +174,11 @@ def _get_parser():
         dest='timeout',
         default=180,
         type=int)
+    delete_ports_parser.add_argument(
+        '--async',
+        help='run it as a background job instead of waiting for it',
+        dest='run_async',
+        action='store_true')
 
     list_pools_parser = subparser.add_parser(
         'list',
@@ -166,6 +216,40 @@ def _get_parser():
         default=180,
         type=int)
 
+    pool_sizes_parser = subparser.add_parser(
+        'sizes',
+        help='List the current and target number of ports of the pools')
+    pool_sizes_parser.add_argument(
+        '-t', '--timeout',
+        help='set timeout for operation. Default is 180 sec',
+        dest='timeout',
+        default=180,
+        type=int)
+
+    pools_stats_parser = subparser.add_parser(
+        'stats',
+        help='Show the stats of the pools and the running jobs in JSON')
+    pools_stats_parser.add_argument(
+        '-t', '--timeout',
+        help='set timeout for operation. Default is 180 sec',
+        dest='timeout',
+        default=180,
+        type=int)
+
+    jobs_parser = subparser.add_parser(
+        'jobs',
+        help='Show the status of the background jobs in JSON')
+    jobs_parser.add_argument(
+        '--job-id',
+        help='id of the job to show, all of them if not set',
+        dest='job_id')
+    jobs_parser.add_argument(
+        '-t', '--timeout',
+        help='set timeout for operation. Default is 180 sec',
+        dest='timeout',
+        default=180,
+        type=int)
+
     return parser
 
 
@@ -174,13 +258,20 @@ def main():
     parser = _get_parser()
     args = parser.parse_args()
     if args.command == 'create':
-        create_subports(args.num, args.subports, args.timeout)
+        create_subports(args.num, args.subports, args.timeout,
+                        args.run_async)
     elif args.command == 'free':
-        delete_subports(args.subports, args.timeout)
+        delete_subports(args.subports, args.timeout, args.run_async)
     elif args.command == 'list':
         list_pools(args.timeout)
     elif args.command == 'show':
         show_pool(args.trunk_ip, args.project_id, args.sg, args.timeout)
+    elif args.command == 'sizes':
+        list_pool_sizes(args.timeout)
+    elif args.command == 'stats':
+        pools_stats(args.timeout)
+    elif args.command == 'jobs':
+        show_jobs(args.job_id, args.timeout)
 
 
 if __name__ == '__main__':
@@ -15,6 +15,7 @@
 
 import abc
 import errno
+import socket
 
 import os_vif
 from os_vif.objects import vif as osv_objects
@@ -29,25 +30,28 @@ from kuryr_kubernetes import utils
 _BINDING_NAMESPACE = 'kuryr_kubernetes.cni.binding'
 LOG = logging.getLogger(__name__)
 
+# Netlink handles by network namespace path, None for the host one.
+_netlink_handles = {}
+
 
 class BaseBindingDriver(object, metaclass=abc.ABCMeta):
     """Interface to attach ports to pods."""
 
-    def _remove_ifaces(self, ipdb, ifnames, netns='host'):
+    def _remove_ifaces(self, ipr, ifnames, netns='host'):
         """Check if any of `ifnames` exists and remove it.
 
-        :param ipdb: ipdb of the network namespace to check
+        :param ipr: netlink handle of the network namespace to check
         :param ifnames: iterable of interface names to remove
         :param netns: network namespace name (used for logging)
         """
         for ifname in ifnames:
-            if ifname in ipdb.interfaces:
+            link = get_link(ipr, ifname)
+            if link is not None:
                 LOG.warning('Found hanging interface %(ifname)s inside '
                             '%(netns)s netns. Most likely it is a leftover '
                             'from a kuryr-daemon restart. Trying to delete '
                             'it.', {'ifname': ifname, 'netns': netns})
-                with ipdb.interfaces[ifname] as iface:
-                    iface.remove()
+                ipr.link('del', index=link['index'])
 
     @abc.abstractmethod
     def connect(self, vif, ifname, netns, container_id):
@@ -74,6 +78,48 @@ def get_ipdb(netns=None):
     return ipdb
 
 
+def get_netlink(netns=None):
+    """Returns a netlink handle of the network namespace.
+
+    Handles are cached per network namespace, so that all the steps of a
+    request share them. The one of the host network namespace is kept for
+    the lifetime of the process, the ones of the pods are closed by
+    `release_netlink` at the end of each request.
+
+    :param netns: path of the network namespace, None for the host one
+    :returns: pyroute2.IPRoute or pyroute2.NetNS
+    """
+    if netns:
+        netns = utils.convert_netns(netns)
+    ipr = _netlink_handles.get(netns)
+    if ipr is None:
+        ipr = pyroute2.NetNS(netns) if netns else pyroute2.IPRoute()
+        _netlink_handles[netns] = ipr
+    return ipr
+
+
+def release_netlink(netns):
+    """Closes the cached netlink handle of a pod network namespace."""
+    if not netns:
+        return
+    ipr = _netlink_handles.pop(utils.convert_netns(netns), None)
+    if ipr is not None:
+        ipr.close()
+
+
+def get_link(ipr, ifname):
+    """Returns the interface with the given name, or None if it's missing.
+
+    Only the interface is requested, instead of dumping all of them.
+    """
+    try:
+        return ipr.link('get', ifname=ifname)[0]
+    except pyroute2.NetlinkError as e:
+        if e.code == errno.ENODEV:
+            return None
+        raise
+
+
 def _enable_ipv6(netns):
     # Docker disables IPv6 for --net=none containers
     # TODO(apuimedo) remove when it is no longer the case
@@ -92,30 +138,37 @@ def _enable_ipv6(netns):
 
 
 def _configure_l3(vif, ifname, netns, is_default_gateway):
-    with get_ipdb(netns) as ipdb:
-        with ipdb.interfaces[ifname] as iface:
-            for subnet in vif.network.subnets.objects:
-                if subnet.cidr.version == 6:
-                    _enable_ipv6(netns)
-                for fip in subnet.ips.objects:
-                    iface.add_ip('%s/%s' % (fip.address,
-                                            subnet.cidr.prefixlen))
-
-        routes = ipdb.routes
-        for subnet in vif.network.subnets.objects:
-            for route in subnet.routes.objects:
-                routes.add(gateway=str(route.gateway),
-                           dst=str(route.cidr)).commit()
-            if is_default_gateway and hasattr(subnet, 'gateway'):
-                try:
-                    routes.add(gateway=str(subnet.gateway),
-                               dst='default').commit()
-                except pyroute2.NetlinkError as ex:
-                    if ex.code != errno.EEXIST:
-                        raise
-                    LOG.debug("Default route already exists in pod for vif=%s."
-                              " Did not overwrite with requested gateway=%s",
-                              vif, subnet.gateway)
+    subnets = vif.network.subnets.objects
+    if any(subnet.cidr.version == 6 for subnet in subnets):
+        _enable_ipv6(netns)
+
+    # NOTE: Each address and route takes a single netlink request on the
+    #       handle of the pod netns, without dumping its interfaces or routes.
+    ipr = get_netlink(netns)
+    index = get_link(ipr, ifname)['index']
+    for subnet in subnets:
+        family = socket.AF_INET6 if subnet.cidr.version == 6 else (
+            socket.AF_INET)
+        for fip in subnet.ips.objects:
+            ipr.addr('add', index=index, address=str(fip.address),
+                     mask=subnet.cidr.prefixlen, family=family)
+
+    for subnet in subnets:
+        family = socket.AF_INET6 if subnet.cidr.version == 6 else (
+            socket.AF_INET)
+        for route in subnet.routes.objects:
+            ipr.route('add', dst=str(route.cidr),
+                      gateway=str(route.gateway), family=family)
+        if is_default_gateway and hasattr(subnet, 'gateway'):
+            try:
+                ipr.route('add', dst='default', gateway=str(subnet.gateway),
+                          family=family)
+            except pyroute2.NetlinkError as ex:
+                if ex.code != errno.EEXIST:
+                    raise
+                LOG.debug("Default route already exists in pod for vif=%s."
+                          " Did not overwrite with requested gateway=%s",
+                          vif, subnet.gateway)
 
 
 def _need_configure_l3(vif):
@@ -138,9 +191,12 @@ def connect(vif, instance_info, ifname, netns=None, report_health=None,
     if report_health:
         report_health(driver.is_alive())
     os_vif.plug(vif, instance_info)
-    driver.connect(vif, ifname, netns, container_id)
-    if _need_configure_l3(vif):
-        _configure_l3(vif, ifname, netns, is_default_gateway)
+    try:
+        driver.connect(vif, ifname, netns, container_id)
+        if _need_configure_l3(vif):
+            _configure_l3(vif, ifname, netns, is_default_gateway)
+    finally:
+        release_netlink(netns)
 
 
 @cni_utils.log_ipdb
@@ -149,18 +205,23 @@ def disconnect(vif, instance_info, ifname, netns=None, report_health=None,
     driver = _get_binding_driver(vif)
     if report_health:
         report_health(driver.is_alive())
-    driver.disconnect(vif, ifname, netns, container_id)
+    try:
+        driver.disconnect(vif, ifname, netns, container_id)
+    finally:
+        release_netlink(netns)
     os_vif.unplug(vif, instance_info)
 
 
 @cni_utils.log_ipdb
 def cleanup(ifname, netns):
     try:
-        with get_ipdb(netns) as c_ipdb:
-            if ifname in c_ipdb.interfaces:
-                with c_ipdb.interfaces[ifname] as iface:
-                    iface.remove()
+        c_ipr = get_netlink(netns)
+        link = get_link(c_ipr, ifname)
+        if link is not None:
+            c_ipr.link('del', index=link['index'])
     except Exception:
         # Just ignore cleanup errors, there's not much we can do anyway.
         LOG.warning('Error occured when attempting to clean up netns %s. '
                     'Ignoring.', netns)
+    finally:
+        release_netlink(netns)
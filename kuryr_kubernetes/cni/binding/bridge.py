@@ -36,29 +36,26 @@ class BaseBridgeDriver(health.HealthHandler, b_base.BaseBindingDriver):
         #              there's a leftover host-side vif. If so we need to
         #              remove it, its peer should get deleted automatically by
         #              the kernel.
-        with b_base.get_ipdb() as h_ipdb:
-            self._remove_ifaces(h_ipdb, (host_ifname,))
+        h_ipr = b_base.get_netlink()
+        self._remove_ifaces(h_ipr, (host_ifname,))
 
         interface_mtu = vif.network.mtu
         mtu_cfg = CONF.neutron_defaults.network_device_mtu
         if mtu_cfg and mtu_cfg < interface_mtu:
             interface_mtu = CONF.neutron_defaults.network_device_mtu
 
-        with b_base.get_ipdb(netns) as c_ipdb:
-            with c_ipdb.create(ifname=ifname, peer=host_ifname,
-                               kind='veth') as c_iface:
-                c_iface.mtu = interface_mtu
-                c_iface.address = str(vif.address)
-                c_iface.up()
+        # NOTE: The pair is created up inside the pod netns, with the host
+        #       side put straight into ours, so that only bringing the host
+        #       side up takes another request.
+        peer = {'ifname': host_ifname, 'mtu': interface_mtu}
+        if netns:
+            peer['net_ns_pid'] = os.getpid()
+        c_ipr = b_base.get_netlink(netns)
+        c_ipr.link('add', ifname=ifname, kind='veth', peer=peer,
+                   mtu=interface_mtu, address=str(vif.address), state='up')
 
-            if netns:
-                with c_ipdb.interfaces[host_ifname] as h_iface:
-                    h_iface.net_ns_pid = os.getpid()
-
-        with b_base.get_ipdb() as h_ipdb:
-            with h_ipdb.interfaces[host_ifname] as h_iface:
-                h_iface.mtu = interface_mtu
-                h_iface.up()
+        h_ipr.link('set', index=b_base.get_link(h_ipr, host_ifname)['index'],
+                   state='up')
 
     def disconnect(self, vif, ifname, netns, container_id):
         pass
@@ -73,9 +70,9 @@ class BridgeDriver(BaseBridgeDriver):
         host_ifname = vif.vif_name
         bridge_name = vif.bridge_name
 
-        with b_base.get_ipdb() as h_ipdb:
-            with h_ipdb.interfaces[bridge_name] as h_br:
-                h_br.add_port(host_ifname)
+        h_ipr = b_base.get_netlink()
+        h_ipr.link('set', index=b_base.get_link(h_ipr, host_ifname)['index'],
+                   master=b_base.get_link(h_ipr, bridge_name)['index'])
 
     def disconnect(self, vif, ifname, netns, container_id):
         # NOTE(ivc): veth pair is destroyed automatically along with the
@@ -105,11 +102,12 @@ class VIFOpenVSwitchDriver(BaseBridgeDriver):
     def is_alive(self):
         bridge_name = CONF.neutron_defaults.ovs_bridge
         try:
-            with b_base.get_ipdb() as h_ipdb:
-                h_ipdb.interfaces[bridge_name]
-            return True
+            alive = b_base.get_link(b_base.get_netlink(),
+                                    bridge_name) is not None
         except Exception:
+            alive = False
+        if not alive:
             LOG.error("The configured ovs_bridge=%s integration interface "
                       "does not exists. Reporting that driver is not healthy.",
                       bridge_name)
-            return False
+        return alive
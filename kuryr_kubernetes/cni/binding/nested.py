@@ -22,6 +22,7 @@ import pyroute2
 from pyroute2 import netlink as pyroute_netlink
 
 from kuryr_kubernetes.cni.binding import base as b_base
+from kuryr_kubernetes.cni import registry as cni_registry
 from kuryr_kubernetes import config
 from kuryr_kubernetes import exceptions
 from kuryr_kubernetes.handlers import health
@@ -31,10 +32,75 @@ VLAN_KIND = 'vlan'
 MACVLAN_KIND = 'macvlan'
 MACVLAN_MODE_BRIDGE = 'bridge'
 KUBELET_PORT = 10250
+# VLAN IDs have 12 bits, so this is enough to index all of them, and they
+# are keyed by their decimal representation.
+VLAN_INDEX_SIZE = 4096
+VLAN_INDEX_KEY_LENGTH = 4
+# Fits the pickled netns path and interface name of an entry.
+VLAN_INDEX_ENTRY_SIZE = 256
 
 LOG = logging.getLogger(__name__)
 
 
+def _get_vlan_id(link):
+    """Returns the VLAN ID of the interface, None if it's not a VLAN one."""
+    linkinfo = link.get_attr('IFLA_LINKINFO')
+    if not linkinfo or linkinfo.get_attr('IFLA_INFO_KIND') != VLAN_KIND:
+        return None
+    return linkinfo.get_attr('IFLA_INFO_DATA').get_attr('IFLA_VLAN_ID')
+
+
+class VlanIndex(object):
+    """Index of the VLAN interfaces created in the pods of the node.
+
+    Maps the VLAN ID of each interface to the netns and the name it got, so
+    that an interface left behind with the VLAN ID of a new one can be found
+    without looking into all the netns of the node. The index is only a
+    hint, entries are checked before being acted upon and a missing or
+    stale entry makes the VlanDriver rebuild the index from the netns.
+
+    The index is kept in shared memory, so the instance needs to be created
+    before forking the kuryr-daemon workers for all of them to share it. It
+    is only created up front when the nested-vlan pod VIF driver is used,
+    otherwise each worker creating a VlanDriver gets its own index.
+    """
+
+    instance = None
+
+    def __init__(self):
+        self._entries = cni_registry.SharedRegistry(
+            size=VLAN_INDEX_SIZE, entry_size=VLAN_INDEX_ENTRY_SIZE,
+            max_key_length=VLAN_INDEX_KEY_LENGTH)
+
+    @classmethod
+    def get_instance(cls):
+        if not VlanIndex.instance:
+            VlanIndex.instance = cls()
+        return VlanIndex.instance
+
+    def get(self, vlan_id):
+        """Returns the (netns, ifname) of the VLAN ID, None if unknown."""
+        return self._entries.get(str(vlan_id))
+
+    def add(self, vlan_id, netns, ifname):
+        try:
+            self._entries[str(vlan_id)] = (netns, ifname)
+        except ValueError:
+            LOG.warning(f'Not indexing VLAN ID {vlan_id} of interface '
+                        f'{ifname} in netns {netns}, the entry does not fit '
+                        f'the index.')
+
+    def remove(self, vlan_id, netns):
+        """Removes the VLAN ID, unless it's indexed for another netns."""
+        entry = self.get(vlan_id)
+        if entry is None or entry[0] != netns:
+            return
+        try:
+            del self._entries[str(vlan_id)]
+        except KeyError:
+            pass
+
+
 class NestedDriver(health.HealthHandler, b_base.BaseBindingDriver,
                    metaclass=abc.ABCMeta):
 
@@ -45,12 +111,13 @@ class NestedDriver(health.HealthHandler, b_base.BaseBindingDriver,
     def _get_iface_create_args(self, vif):
         raise NotImplementedError()
 
-    def _detect_iface_name(self, h_ipdb):
+    def _detect_iface_name(self, h_ipr):
         # Let's try config first
-        if config.CONF.binding.link_iface in h_ipdb.interfaces:
-            LOG.debug(f'Using configured interface '
-                      f'{config.CONF.binding.link_iface} as bridge interface.')
-            return config.CONF.binding.link_iface
+        link_iface = config.CONF.binding.link_iface
+        if link_iface and b_base.get_link(h_ipr, link_iface) is not None:
+            LOG.debug(f'Using configured interface {link_iface} as bridge '
+                      f'interface.')
+            return link_iface
 
         # Then let's try choosing the one where kubelet listens to
         conns = [x for x in psutil.net_connections()
@@ -58,24 +125,19 @@ class NestedDriver(health.HealthHandler, b_base.BaseBindingDriver,
                  and x.laddr.port == KUBELET_PORT]
         if len(conns) == 1:
             lookup_addr = conns[0].laddr.ip
-            for name, iface in h_ipdb.interfaces.items():
-                if type(name) is int:  # Skip ones duplicated by id
-                    continue
-
-                for addr in iface['ipaddr']:
-                    if addr[0] == lookup_addr:
-                        LOG.debug(f'Using kubelet bind interface {name} as '
-                                  f'bridge interface.')
-                        return name
+            for addr in h_ipr.get_addr(address=lookup_addr):
+                link = h_ipr.link('get', index=addr['index'])[0]
+                name = link.get_attr('IFLA_IFNAME')
+                LOG.debug(f'Using kubelet bind interface {name} as bridge '
+                          f'interface.')
+                return name
 
         # Alright, just try the first non-loopback interface
-        for name, iface in h_ipdb.interfaces.items():
-            if type(name) is int:  # Skip ones duplicated by id
-                continue
-
-            if iface['flags'] & pyroute_netlink.rtnl.ifinfmsg.IFF_LOOPBACK:
+        for link in h_ipr.get_links():
+            if link['flags'] & pyroute_netlink.rtnl.ifinfmsg.IFF_LOOPBACK:
                 continue  # Skip loopback
 
+            name = link.get_attr('IFLA_IFNAME')
             LOG.debug(f'Using interface {name} as bridge interface.')
             return name
 
@@ -95,43 +157,38 @@ class NestedDriver(health.HealthHandler, b_base.BaseBindingDriver,
         # First let's take a peek into the pod namespace and try to remove any
         # leftover interface in case we got restarted before CNI returned to
         # kubelet.
-        with b_base.get_ipdb(netns) as c_ipdb:
-            self._remove_ifaces(c_ipdb, (temp_name, ifname), netns)
+        c_ipr = b_base.get_netlink(netns)
+        self._remove_ifaces(c_ipr, (temp_name, ifname), netns)
 
         # We might also have leftover interface in the host netns, let's try to
-        # remove it too. This is outside of the main host's IPDB context
-        # manager to make sure removal is commited before starting next
-        # transaction.
-        with b_base.get_ipdb() as h_ipdb:
-            self._remove_ifaces(h_ipdb, (temp_name,))
-
-        with b_base.get_ipdb() as h_ipdb:
-            # TODO(vikasc): evaluate whether we should have stevedore
-            #               driver for getting the link device.
-            vm_iface_name = self._detect_iface_name(h_ipdb)
-            mtu = h_ipdb.interfaces[vm_iface_name].mtu
-            if mtu < vif.network.mtu:
-                # NOTE(dulek): This might happen if Neutron and DHCP agent
-                # have different MTU settings. See
-                # https://bugs.launchpad.net/kuryr-kubernetes/+bug/1863212
-                raise exceptions.CNIBindingFailure(
-                    f'MTU of interface {vm_iface_name} ({mtu}) is smaller '
-                    f'than MTU of pod network {vif.network.id} '
-                    f'({vif.network.mtu}). Please make sure pod network '
-                    f'has the same or smaller MTU as node (VM) network.')
-
-            args = self._get_iface_create_args(vif)
-            with h_ipdb.create(ifname=temp_name,
-                               link=h_ipdb.interfaces[vm_iface_name],
-                               **args) as iface:
-                iface.net_ns_fd = utils.convert_netns(netns)
-
-        with b_base.get_ipdb(netns) as c_ipdb:
-            with c_ipdb.interfaces[temp_name] as iface:
-                iface.ifname = ifname
-                iface.mtu = vif.network.mtu
-                iface.address = str(vif.address)
-                iface.up()
+        # remove it too.
+        h_ipr = b_base.get_netlink()
+        self._remove_ifaces(h_ipr, (temp_name,))
+
+        # TODO(vikasc): evaluate whether we should have stevedore
+        #               driver for getting the link device.
+        vm_iface_name = self._detect_iface_name(h_ipr)
+        vm_link = b_base.get_link(h_ipr, vm_iface_name)
+        mtu = vm_link.get_attr('IFLA_MTU')
+        if mtu < vif.network.mtu:
+            # NOTE(dulek): This might happen if Neutron and DHCP agent
+            # have different MTU settings. See
+            # https://bugs.launchpad.net/kuryr-kubernetes/+bug/1863212
+            raise exceptions.CNIBindingFailure(
+                f'MTU of interface {vm_iface_name} ({mtu}) is smaller '
+                f'than MTU of pod network {vif.network.id} '
+                f'({vif.network.mtu}). Please make sure pod network '
+                f'has the same or smaller MTU as node (VM) network.')
+
+        args = self._get_iface_create_args(vif)
+        h_ipr.link('add', ifname=temp_name, link=vm_link['index'],
+                   net_ns_fd=utils.convert_netns(netns), **args)
+
+        # NOTE: The kernel renames the interface before bringing it up, so
+        #       a single request configures it.
+        c_ipr.link('set', index=b_base.get_link(c_ipr, temp_name)['index'],
+                   ifname=ifname, mtu=vif.network.mtu,
+                   address=str(vif.address), state='up')
 
     def disconnect(self, vif, ifname, netns, container_id):
         # NOTE(dulek): Interfaces should get deleted with the netns, but it may
@@ -139,14 +196,15 @@ class NestedDriver(health.HealthHandler, b_base.BaseBindingDriver,
         #              the old netns is deleted. This might result in VLAN ID
         #              conflict. In oder to protect from that let's remove the
         #              netns ifaces here anyway.
-        with b_base.get_ipdb(netns) as c_ipdb:
-            self._remove_ifaces(c_ipdb, (vif.vif_name, ifname), netns)
+        self._remove_ifaces(b_base.get_netlink(netns), (vif.vif_name, ifname),
+                            netns)
 
 
 class VlanDriver(NestedDriver):
 
     def __init__(self):
         super(VlanDriver, self).__init__()
+        self._index = VlanIndex.get_instance()
 
     def connect(self, vif, ifname, netns, container_id):
         try:
@@ -162,8 +220,16 @@ class VlanDriver(NestedDriver):
                     f'retry.')
                 self._cleanup_conflicting_vlan(netns, args['vlan_id'])
                 super().connect(vif, ifname, netns, container_id)
-                return
-            raise
+            else:
+                raise
+
+        if vif.vlan_id is not None:
+            self._index.add(vif.vlan_id, utils.convert_netns(netns), ifname)
+
+    def disconnect(self, vif, ifname, netns, container_id):
+        super().disconnect(vif, ifname, netns, container_id)
+        if vif.vlan_id is not None:
+            self._index.remove(vif.vlan_id, utils.convert_netns(netns))
 
     def _get_iface_create_args(self, vif):
         return {'kind': VLAN_KIND, 'vlan_id': vif.vlan_id}
@@ -173,11 +239,51 @@ class VlanDriver(NestedDriver):
             # Better to not attempt that, might remove way to much.
             return
 
+        h_ipr = b_base.get_netlink()
+        vm_iface_name = self._detect_iface_name(h_ipr)
+        vm_iface_index = b_base.get_link(h_ipr, vm_iface_name)['index']
+
+        entry = self._index.get(vlan_id)
+        if entry is not None:
+            netns_path, ifname = entry
+            try:
+                if self._remove_vlan_iface(netns_path, ifname, vlan_id,
+                                           vm_iface_index):
+                    return
+            except OSError:
+                pass
+            LOG.debug(f'VLAN ID {vlan_id} is not used by {ifname} in netns '
+                      f'{netns_path} anymore.')
+            self._index.remove(vlan_id, netns_path)
+
+        # The index doesn't know the interface, e.g. as kuryr-daemon got
+        # restarted since it was created, so look for it in all the netns
+        # of the node, rebuilding the index on the way.
+        self._rebuild_index(netns, vlan_id, vm_iface_index)
+
+    def _remove_vlan_iface(self, netns_path, ifname, vlan_id, link_index):
+        """Removes the VLAN interface if it's still in the netns.
+
+        :returns: True if the interface was found and removed
+        """
+        with pyroute2.NetNS(netns_path) as c_ipr:
+            link = b_base.get_link(c_ipr, ifname)
+            if (link is None or link.get_attr('IFLA_LINK') != link_index or
+                    _get_vlan_id(link) != vlan_id):
+                return False
+            LOG.warning(f'Found offending interface {ifname} with VLAN ID '
+                        f'{vlan_id} in netns {netns_path}. Trying to remove '
+                        f'it.')
+            c_ipr.link('del', index=link['index'])
+            return True
+
+    def _rebuild_index(self, netns, vlan_id, link_index):
+        """Indexes the VLAN interfaces of all the netns of the node.
+
+        The interface with the conflicting VLAN ID is removed instead.
+        """
         netns_paths = []
         handled_netns = set()
-        with b_base.get_ipdb() as h_ipdb:
-            vm_iface_name = self._detect_iface_name(h_ipdb)
-            vm_iface_index = h_ipdb.interfaces[vm_iface_name].index
 
         if netns.startswith('/proc'):
             # Paths have /proc/<pid>/ns/net pattern, we need to iterate
@@ -215,20 +321,26 @@ class VlanDriver(NestedDriver):
             handled_netns.add(netns_id)
 
             try:
-                with b_base.get_ipdb(netns_path) as c_ipdb:
-                    for ifname, iface in c_ipdb.interfaces.items():
-                        if (iface.vlan_id == vlan_id
-                                and iface.link == vm_iface_index):
-                            LOG.warning(
-                                f'Found offending interface {ifname} with '
-                                f'VLAN ID {vlan_id} in netns {netns_path}. '
-                                f'Trying to remove it.')
-                            with c_ipdb.interfaces[ifname] as found_iface:
-                                found_iface.remove()
-                            break
+                self._index_netns(netns_path, vlan_id, link_index)
             except OSError:
                 continue
 
+    def _index_netns(self, netns_path, vlan_id, link_index):
+        with pyroute2.NetNS(netns_path) as c_ipr:
+            for link in c_ipr.get_links():
+                link_vlan_id = _get_vlan_id(link)
+                if (link_vlan_id is None or
+                        link.get_attr('IFLA_LINK') != link_index):
+                    continue
+                ifname = link.get_attr('IFLA_IFNAME')
+                if link_vlan_id != vlan_id:
+                    self._index.add(link_vlan_id, netns_path, ifname)
+                    continue
+                LOG.warning(f'Found offending interface {ifname} with VLAN '
+                            f'ID {vlan_id} in netns {netns_path}. Trying to '
+                            f'remove it.')
+                c_ipr.link('del', index=link['index'])
+
 
 class MacvlanDriver(NestedDriver):
 
@@ -18,6 +18,8 @@ from http import client as httplib
 import multiprocessing
 import os
 import queue
+import socket
+import struct
 import sys
 import threading
 import time
@@ -35,10 +37,12 @@ from oslo_log import log as logging
 from oslo_serialization import jsonutils
 
 from kuryr_kubernetes import clients
+from kuryr_kubernetes.cni.binding import nested
 from kuryr_kubernetes.cni.daemon import watcher_service
 from kuryr_kubernetes.cni import health
 from kuryr_kubernetes.cni.plugins import k8s_cni_registry
 from kuryr_kubernetes.cni import prometheus_exporter
+from kuryr_kubernetes.cni import registry as cni_registry
 from kuryr_kubernetes.cni import utils as cni_utils
 from kuryr_kubernetes import config
 from kuryr_kubernetes import exceptions
@@ -52,18 +56,86 @@ ErrTryAgainLater = 11
 ErrInternal = 999
 
 
+def _get_bind_address():
+    server_pair = CONF.cni_daemon.bind_address
+    try:
+        address, port = server_pair.split(':')
+        return address, int(port)
+    except ValueError:
+        LOG.exception('Cannot start server on %s.', server_pair)
+        raise
+
+
+def bind_server_socket():
+    """Returns the listening socket shared by the DaemonServer workers.
+
+    Connections not accepted yet by any of the workers are queued by the
+    kernel, up to [cni_daemon]request_queue_size of them.
+    """
+    if CONF.cni_daemon.worker_num <= 1:
+        msg = ('[cni_daemon]worker_num needs to be set to a value higher '
+               'than 1')
+        LOG.critical(msg)
+        raise exceptions.InvalidKuryrConfiguration(msg)
+
+    address, port = _get_bind_address()
+    family = serving.select_address_family(address, port)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(serving.get_sockaddr(address, port, family))
+    sock.listen(CONF.cni_daemon.request_queue_size)
+    LOG.info('Listening for CNI requests on %s.',
+             CONF.cni_daemon.bind_address)
+    return sock
+
+
+def get_queued_requests(sock):
+    """Returns the number of connections waiting to be accepted.
+
+    For a listening socket, Linux reports the length of its accept queue in
+    the tcpi_unacked field of the TCP_INFO, at offset 24.
+    """
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 32)
+        return struct.unpack_from('=I', info, 24)[0]
+    except (AttributeError, OSError, struct.error):
+        return float('nan')
+
+
+class CNIRequestHandler(serving.WSGIRequestHandler):
+    """Handles a CNI request, with a timeout on the connection.
+
+    As each worker handles a single request at a time, clients that don't
+    send their request or don't read the response are dropped after
+    [cni_daemon]request_timeout seconds instead of blocking the worker.
+    """
+
+    @property
+    def timeout(self):
+        return CONF.cni_daemon.request_timeout
+
+
 class DaemonServer(object):
-    def __init__(self, plugin, healthy, metrics):
+    def __init__(self, plugin, healthy, metrics, failure_count=None,
+                 active_requests=None):
         self.ctx = None
         self.plugin = plugin
         self.healthy = healthy
         self.metrics = metrics
-        self.failure_count = multiprocessing.Value('i', 0)
+        # NOTE: Both are shared by all the workers when they're passed.
+        if failure_count is None:
+            failure_count = multiprocessing.Value('i', 0)
+        if active_requests is None:
+            active_requests = multiprocessing.Value('i', 0)
+        self.failure_count = failure_count
+        self.active_requests = active_requests
         self.application = flask.Flask('kuryr-daemon')
         self.application.add_url_rule(
             '/addNetwork', methods=['POST'], view_func=self.add)
         self.application.add_url_rule(
             '/delNetwork', methods=['POST'], view_func=self.delete)
+        self.application.before_request(self._request_started)
+        self.application.teardown_request(self._request_finished)
         self.headers = {'ContentType': 'application/json',
                         'Connection': 'close'}
         self._server = None
@@ -74,6 +146,14 @@ class DaemonServer(object):
                   params.CNI_COMMAND, params)
         return params
 
+    def _request_started(self):
+        with self.active_requests.get_lock():
+            self.active_requests.value += 1
+
+    def _request_finished(self, exc):
+        with self.active_requests.get_lock():
+            self.active_requests.value -= 1
+
     def _update_metrics(self, command, error, duration):
         """Add a new metric value to the shared metrics dict"""
         labels = {'command': command, 'error': error}
@@ -177,37 +257,27 @@ class DaemonServer(object):
             return error, httplib.INTERNAL_SERVER_ERROR, self.headers
         return '', httplib.NO_CONTENT, self.headers
 
-    def run(self):
-        server_pair = CONF.cni_daemon.bind_address
-        LOG.info('Starting server on %s.', server_pair)
-        try:
-            address, port = server_pair.split(':')
-            port = int(port)
-        except ValueError:
-            LOG.exception('Cannot start server on %s.', server_pair)
-            raise
-
-        if CONF.cni_daemon.worker_num <= 1:
-            msg = ('[cni_daemon]worker_num needs to be set to a value higher '
-                   'than 1')
-            LOG.critical(msg)
-            raise exceptions.InvalidKuryrConfiguration(msg)
+    def run(self, sock):
+        """Handles the CNI requests accepted on the listening socket.
 
+        Each worker process runs its own server, handling one request at a
+        time, while the kernel distributes the connections between them.
+        """
+        address, port = _get_bind_address()
         try:
             self._server = serving.make_server(
                 address, port, self.application, threaded=False,
-                processes=CONF.cni_daemon.worker_num)
+                request_handler=CNIRequestHandler, fd=sock.fileno())
             self._server.serve_forever()
         except Exception:
             LOG.exception('Failed to start kuryr-daemon.')
             raise
 
     def stop(self):
-        LOG.info("Waiting for DaemonServer worker processes to exit...")
-        self._server._block_on_close = True
+        LOG.info("Waiting for DaemonServer worker to finish its request...")
         self._server.shutdown()
         self._server.server_close()
-        LOG.info("All DaemonServer workers finished gracefully.")
+        LOG.info("DaemonServer worker finished gracefully.")
 
     def _check_failure(self):
         with self.failure_count.get_lock():
@@ -223,14 +293,17 @@ class DaemonServer(object):
 class CNIDaemonServerService(cotyledon.Service):
     name = "server"
 
-    def __init__(self, worker_id, registry, healthy, metrics):
+    def __init__(self, worker_id, registry, healthy, metrics, sock,
+                 failure_count, active_requests):
         super(CNIDaemonServerService, self).__init__(worker_id)
         self.registry = registry
         self.healthy = healthy
         self.plugin = k8s_cni_registry.K8sCNIRegistryPlugin(registry,
                                                             self.healthy)
         self.metrics = metrics
-        self.server = DaemonServer(self.plugin, self.healthy, self.metrics)
+        self.sock = sock
+        self.server = DaemonServer(self.plugin, self.healthy, self.metrics,
+                                   failure_count, active_requests)
 
     def run(self):
         # NOTE(dulek): We might do a *lot* of pyroute2 operations, let's
@@ -239,7 +312,7 @@ class CNIDaemonServerService(cotyledon.Service):
         transactional.SYNC_TIMEOUT = CONF.cni_daemon.pyroute2_timeout
 
         # Run HTTP server
-        self.server.run()
+        self.server.run(self.sock)
 
     def terminate(self):
         self.server.stop()
@@ -259,9 +332,12 @@ class CNIDaemonHealthServerService(cotyledon.Service):
 class CNIDaemonExporterService(cotyledon.Service):
     name = "Prometheus Exporter"
 
-    def __init__(self, worker_id, metrics):
+    def __init__(self, worker_id, metrics, sock, active_requests):
         super(CNIDaemonExporterService, self).__init__(worker_id)
         self.prometheus_exporter = prometheus_exporter.CNIPrometheusExporter()
+        self.prometheus_exporter.add_requests_gauges(
+            lambda: active_requests.value,
+            lambda: get_queued_requests(sock))
         self.is_running = True
         self.metrics = metrics
         self.exporter_thread = threading.Thread(
@@ -303,17 +379,30 @@ class CNIDaemonServiceManager(cotyledon.ServiceManager):
         clients.setup_kubernetes_client()
 
         self.manager = multiprocessing.Manager()
-        registry = self.manager.dict()  # For Watcher->Server communication.
+        # For Watcher->Server communication.
+        registry = cni_registry.SharedRegistry()
+        if CONF.kubernetes.pod_vif_driver == 'nested-vlan':
+            # Shared by the server workers to find VLAN ID conflicts.
+            nested.VlanIndex.get_instance()
         healthy = multiprocessing.Value(c_bool, True)
         metrics = self.manager.Queue()
+        # NOTE: The server workers are started once and live as long as the
+        #       daemon, handling the requests accepted on a shared socket,
+        #       instead of forking a process for each request.
+        sock = bind_server_socket()
+        failure_count = multiprocessing.Value('i', 0)
+        active_requests = multiprocessing.Value('i', 0)
         self.add(watcher_service.KuryrPortWatcherService, workers=1,
                  args=(registry, healthy,))
         self.add(watcher_service.PodWatcherService, workers=1,
                  args=(registry, healthy,))
-        self._server_service = self.add(CNIDaemonServerService, workers=1,
-                                        args=(registry, healthy, metrics,))
+        self._server_service = self.add(
+            CNIDaemonServerService, workers=CONF.cni_daemon.worker_num,
+            args=(registry, healthy, metrics, sock, failure_count,
+                  active_requests))
         self.add(CNIDaemonHealthServerService, workers=1, args=(healthy,))
-        self.add(CNIDaemonExporterService, workers=1, args=(metrics,))
+        self.add(CNIDaemonExporterService, workers=1,
+                 args=(metrics, sock, active_requests))
 
         def shutdown_hook(service_id, worker_id, exit_code):
             LOG.critical(f'Child Service {service_id} had exited with code '
@@ -361,7 +450,7 @@ class CNIDaemonServiceManager(cotyledon.ServiceManager):
                 worker.terminate()
             for worker in self._running_services[self._server_service]:
                 worker.join()
-        LOG.info("Stopping registry manager...")
+        LOG.info("Stopping metrics manager...")
         self.manager.shutdown()
         LOG.info("Continuing with shutdown")
 
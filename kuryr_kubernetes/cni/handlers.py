@@ -36,9 +36,10 @@ class CNIKuryrPortHandler(k8s_base.ResourceEventHandler):
     def on_vif(self, kuryrport, vifs):
         kp_name = utils.get_res_unique_name(kuryrport)
         with lockutils.lock(kp_name, external=True):
-            if (kp_name not in self.registry or
-                    self.registry[kp_name] == k_const.CNI_DELETED_POD_SENTINEL
-                    or self.registry[kp_name]['kp']['metadata']['uid'] !=
+            entry = self.registry.get(kp_name,
+                                      k_const.CNI_DELETED_POD_SENTINEL)
+            if (entry == k_const.CNI_DELETED_POD_SENTINEL or
+                    entry['kp']['metadata']['uid'] !=
                     kuryrport['metadata']['uid']):
                 self.registry[kp_name] = {'kp': kuryrport,
                                           'vifs': vifs,
@@ -46,17 +47,15 @@ class CNIKuryrPortHandler(k8s_base.ResourceEventHandler):
                                           'vif_unplugged': False,
                                           'del_received': False}
             else:
-                old_vifs = self.registry[kp_name]['vifs']
-                for iface in vifs:
-                    if old_vifs[iface].active != vifs[iface].active:
-                        kp_dict = self.registry[kp_name]
-                        kp_dict['vifs'] = vifs
-                        self.registry[kp_name] = kp_dict
+                old_vifs = entry['vifs']
+                if any(old_vifs[iface].active != vifs[iface].active
+                       for iface in vifs):
+                    self.registry.set_fields(kp_name, vifs=vifs)
 
     def on_deleted(self, kuryrport, *args, **kwargs):
         kp_name = utils.get_res_unique_name(kuryrport)
         try:
-            if (kp_name in self.registry and self.registry[kp_name]
+            if (self.registry.get(kp_name, k_const.CNI_DELETED_POD_SENTINEL)
                     != k_const.CNI_DELETED_POD_SENTINEL):
                 # NOTE(ndesh): We need to lock here to avoid race condition
                 #              with the deletion code for CNI DEL so that
@@ -65,9 +64,7 @@ class CNIKuryrPortHandler(k8s_base.ResourceEventHandler):
                     if self.registry[kp_name]['vif_unplugged']:
                         del self.registry[kp_name]
                     else:
-                        kp_dict = self.registry[kp_name]
-                        kp_dict['del_received'] = True
-                        self.registry[kp_name] = kp_dict
+                        self.registry.set_fields(kp_name, del_received=True)
         except KeyError:
             # This means someone else removed it. It's odd but safe to ignore.
             LOG.debug('KuryrPort %s entry already removed from registry while '
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import retrying
+import time
 
 from os_vif import objects as obj_vif
 from oslo_concurrency import lockutils
@@ -29,7 +29,6 @@ from kuryr_kubernetes import utils as k_utils
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
-RETRY_DELAY = 1000  # 1 second in milliseconds
 
 
 class K8sCNIRegistryPlugin(base_cni.CNIPlugin):
@@ -69,45 +68,42 @@ class K8sCNIRegistryPlugin(base_cni.CNIPlugin):
                 raise exceptions.CNIPodGone(kp_name)
             params.args.K8S_POD_UID = pod['metadata']['uid']
 
-        vifs = self._do_work(params, b_base.connect, timeout)
+        self._do_work(params, b_base.connect, timeout)
 
         # NOTE(dulek): Saving containerid to be able to distinguish old DEL
         #              requests that we should ignore. We need a lock to
-        #              prevent race conditions and replace whole object in the
-        #              dict for multiprocessing.Manager to notice that.
+        #              prevent race conditions with the watchers.
         with lockutils.lock(kp_name, external=True):
-            d = self.registry[kp_name]
-            d['containerid'] = params.CNI_CONTAINERID
-            self.registry[kp_name] = d
+            self.registry.set_fields(kp_name,
+                                     containerid=params.CNI_CONTAINERID)
             LOG.debug('Saved containerid = %s for CRD %s',
                       params.CNI_CONTAINERID, kp_name)
 
-        # Wait for timeout sec, 1 sec between tries, retry when even one
-        # vif is not active.
-        @retrying.retry(stop_max_delay=timeout * 1000, wait_fixed=RETRY_DELAY,
-                        retry_on_result=utils.any_vif_inactive)
-        def wait_for_active(kp_name):
-            return self.registry[kp_name]['vifs']
+        # Wait for timeout sec, checking again each time the watcher updates
+        # the KuryrPort, until all the vifs are active.
+        def all_active(d):
+            if d == k_const.CNI_DELETED_POD_SENTINEL:
+                raise exceptions.CNIPodGone(kp_name)
+            return not utils.any_vif_inactive(d['vifs'])
 
         data = {'metadata': {'name': params.args.K8S_POD_NAME,
                              'namespace': params.args.K8S_POD_NAMESPACE}}
         pod = k_utils.get_referenced_object(data, 'Pod')
 
-        try:
-            self.k8s.add_event(pod, 'CNIWaitingForActiveVIFs',
-                               f'Waiting for Neutron ports of {kp_name} to '
-                               f'become ACTIVE after binding.',
-                               component='kuryr-daemon')
-            vifs = wait_for_active(kp_name)
-        except retrying.RetryError:
+        self.k8s.add_event(pod, 'CNIWaitingForActiveVIFs',
+                           f'Waiting for Neutron ports of {kp_name} to '
+                           f'become ACTIVE after binding.',
+                           component='kuryr-daemon')
+        d = self._wait_for_entry(kp_name, timeout, all_active)
+        if not all_active(d):
             self.k8s.add_event(pod, 'CNITimedOutWaitingForActiveVIFs',
                                f'Timed out waiting for Neutron ports of '
                                f'{kp_name} to become ACTIVE after binding.',
                                'Warning', 'kuryr-daemon')
-            raise exceptions.CNINeutronPortActivationTimeout(
-                kp_name, self.registry[kp_name]['vifs'])
+            raise exceptions.CNINeutronPortActivationTimeout(kp_name,
+                                                             d['vifs'])
 
-        return vifs[k_const.DEFAULT_IFNAME]
+        return d['vifs'][k_const.DEFAULT_IFNAME]
 
     def delete(self, params):
         kp_name = self._get_obj_name(params)
@@ -120,7 +116,7 @@ class K8sCNIRegistryPlugin(base_cni.CNIPlugin):
                         'KuryrPort. Ignoring.', kp_name)
                     del self.registry[kp_name]
                     return
-            reg_ci = self.registry[kp_name]['containerid']
+            reg_ci = kp['containerid']
             LOG.debug('Read containerid = %s for KuryrPort %s', reg_ci,
                       kp_name)
             if reg_ci and reg_ci != params.CNI_CONTAINERID:
@@ -157,9 +153,7 @@ class K8sCNIRegistryPlugin(base_cni.CNIPlugin):
                 if self.registry[kp_name]['del_received']:
                     del self.registry[kp_name]
                 else:
-                    kp_dict = self.registry[kp_name]
-                    kp_dict['vif_unplugged'] = True
-                    self.registry[kp_name] = kp_dict
+                    self.registry.set_fields(kp_name, vif_unplugged=True)
         except KeyError:
             # This means the kuryrport was removed before vif was unplugged.
             # This shouldn't happen, but we can't do anything about it now
@@ -173,15 +167,42 @@ class K8sCNIRegistryPlugin(base_cni.CNIPlugin):
                 LOG.debug("Reporting CNI driver not healthy.")
                 self.healthy.value = driver_healthy
 
+    def _wait_for_entry(self, kp_name, timeout, check, retry_on=()):
+        """Returns the registry entry of a KuryrPort once it passes a check.
+
+        Instead of polling the registry, the check is repeated each time the
+        registry notifies the entry changed, until the timeout.
+
+        :param kp_name: namespace/name of the KuryrPort
+        :param timeout: maximum time to wait, in seconds
+        :param check: callable getting the entry and returning if it's ready
+        :param retry_on: exceptions raised by the check meaning that the
+                         entry is not ready yet. The last one is raised if it
+                         times out.
+        :returns: the entry, that does not pass the check if it timed out
+        :raises KeyError: if there's still no entry when it times out
+        """
+        deadline = time.monotonic() + timeout
+        retry_on = (KeyError,) + tuple(retry_on)
+        while True:
+            version, d = self.registry.get_versioned(kp_name)
+            remaining = deadline - time.monotonic()
+            try:
+                if not version:
+                    raise KeyError(kp_name)
+                if check(d) or remaining <= 0:
+                    return d
+            except retry_on:
+                if remaining <= 0:
+                    raise
+            self.registry.wait(kp_name, version, remaining)
+
     def _get_vifs_from_registry(self, params, timeout):
         kp_name = self._get_obj_name(params)
 
-        # In case of KeyError retry for `timeout` s, wait 1 s between tries.
-        @retrying.retry(stop_max_delay=timeout * 1000, wait_fixed=RETRY_DELAY,
-                        retry_on_exception=lambda e: isinstance(
-                            e, (KeyError, exceptions.CNIPodUidMismatch)))
-        def find():
-            d = self.registry[kp_name]
+        # In case of KeyError or uid mismatch wait for the watcher to update
+        # the registry, for `timeout` s at most.
+        def find(d):
             if d == k_const.CNI_DELETED_POD_SENTINEL:
                 # Pod got deleted meanwhile
                 raise exceptions.CNIPodGone(kp_name)
@@ -208,10 +229,12 @@ class K8sCNIRegistryPlugin(base_cni.CNIPlugin):
                 if not static:
                     raise exceptions.CNIPodUidMismatch(
                         kp_name, params.args.K8S_POD_UID, uid)
-            return d
+            return True
 
         try:
-            d = find()
+            d = self._wait_for_entry(
+                kp_name, timeout, find,
+                retry_on=(exceptions.CNIPodUidMismatch,))
             return d['kp'], d['vifs']
         except KeyError:
             data = {'metadata': {'name': params.args.K8S_POD_NAME,
@@ -40,6 +40,25 @@ class CNIPrometheusExporter(object):
         """Observes the request duration value and count it in buckets"""
         self.cni_requests_duration.labels(**labels).observe(duration)
 
+    def add_requests_gauges(self, get_active, get_queued):
+        """Records gauges of the CNI requests being handled and queued.
+
+        :param get_active: callable returning the number of requests being
+                           handled by the server workers
+        :param get_queued: callable returning the number of requests waiting
+                           for a worker
+        """
+        active = prometheus_client.Gauge(
+            'kuryr_cni_requests_active',
+            'The number of CNI requests being handled',
+            registry=self.registry)
+        active.set_function(get_active)
+        queued = prometheus_client.Gauge(
+            'kuryr_cni_requests_queued',
+            'The number of CNI requests waiting for a worker',
+            registry=self.registry)
+        queued.set_function(get_queued)
+
     def metrics(self):
         """Provides the registered metrics"""
         collected_metric = generate_latest(self.registry)
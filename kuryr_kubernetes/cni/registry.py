@@ -0,0 +1,287 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections.abc
+import mmap
+import multiprocessing
+import pickle
+import struct
+import time
+import zlib
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from kuryr_kubernetes import exceptions
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+# Maximum length of a key, namespace (63) and name (253) of a pod plus '/'.
+MAX_KEY_LENGTH = 320
+# Number of lock-free attempts to read a key before falling back to reading
+# it with the writers lock held.
+OPTIMISTIC_READS = 3
+
+# Write sequence number, odd while a write is in progress, and the version
+# given to the last written key.
+_HEADER = struct.Struct('=QQ')
+# Version of the entry, 0 for an empty slot, key length and value length.
+_SLOT = struct.Struct('=QHI')
+
+
+class SharedRegistry(collections.abc.MutableMapping):
+    """Registry of the KuryrPorts shared by the kuryr-daemon processes.
+
+    The registry is a hash table with linear probing, kept in an anonymous
+    shared memory mapping that the watcher and server processes inherit when
+    forked, so it needs to be created before the services are started.
+    Entries are stored pickled in fixed size slots, so accessing them does
+    not involve any IPC and only copies the entry itself.
+
+    Writers are serialized with a process-shared condition and bump a
+    sequence number before and after each write, while readers do not lock
+    and retry when the sequence number changed during the read. Every write
+    also gives the key a new version, unique across the registry, and wakes
+    up the processes waiting in `wait` for a key to change.
+    """
+
+    def __init__(self, size=None, entry_size=None, max_key_length=None):
+        self._size = size or CONF.cni_daemon.registry_size
+        self._entry_size = entry_size or CONF.cni_daemon.registry_entry_size
+        self._max_key_length = max_key_length or MAX_KEY_LENGTH
+        self._max_value_length = (self._entry_size - _SLOT.size -
+                                  self._max_key_length)
+        if self._max_value_length <= 0:
+            raise ValueError(f'Registry entry size {self._entry_size} is too '
+                             f'small to hold any entry.')
+        self._mm = mmap.mmap(-1, _HEADER.size + self._size * self._entry_size)
+        self._changed = multiprocessing.Condition()
+
+    def _offset(self, index):
+        return _HEADER.size + index * self._entry_size
+
+    def _home(self, key):
+        return zlib.crc32(key) % self._size
+
+    def _encode_key(self, key):
+        encoded = key.encode('utf-8')
+        if len(encoded) > self._max_key_length:
+            raise KeyError(key)
+        return encoded
+
+    def _get_seq(self):
+        return _HEADER.unpack_from(self._mm, 0)[0]
+
+    def _get_key(self, offset, key_len):
+        start = offset + _SLOT.size
+        return self._mm[start:start + key_len]
+
+    def _find(self, key):
+        """Returns the slot index of the key and whether the key is there.
+
+        When the key is missing, the index of the slot where it would be put
+        is returned instead, or None if the registry is full.
+        """
+        index = self._home(key)
+        for probe in range(self._size):
+            offset = self._offset(index)
+            version, key_len, value_len = _SLOT.unpack_from(self._mm, offset)
+            if not version:
+                return index, False
+            if self._get_key(offset, key_len) == key:
+                return index, True
+            index = (index + 1) % self._size
+        return None, False
+
+    def _lookup(self, key):
+        """Returns the version and the pickled value of the key."""
+        index, found = self._find(key)
+        if not found:
+            return 0, None
+        offset = self._offset(index)
+        version, key_len, value_len = _SLOT.unpack_from(self._mm, offset)
+        start = offset + _SLOT.size + self._max_key_length
+        return version, self._mm[start:start + value_len]
+
+    def _read(self, key):
+        key = self._encode_key(key)
+        for attempt in range(OPTIMISTIC_READS):
+            seq = self._get_seq()
+            if seq % 2:
+                # A write is in progress, give the writer a chance to end it.
+                time.sleep(0)
+                continue
+            result = self._lookup(key)
+            if self._get_seq() == seq:
+                return result
+        with self._changed:
+            return self._lookup(key)
+
+    def _begin_write(self):
+        seq, version = _HEADER.unpack_from(self._mm, 0)
+        version += 1
+        _HEADER.pack_into(self._mm, 0, seq + 1, version)
+        return version
+
+    def _end_write(self):
+        seq, version = _HEADER.unpack_from(self._mm, 0)
+        _HEADER.pack_into(self._mm, 0, seq + 1, version)
+        self._changed.notify_all()
+
+    def _store(self, key, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self._max_value_length:
+            raise ValueError(f'Registry entry of {len(data)} bytes for '
+                             f'{key.decode("utf-8")} exceeds the maximum of '
+                             f'{self._max_value_length} bytes, increase '
+                             f'registry_entry_size.')
+        index, found = self._find(key)
+        if index is None:
+            raise exceptions.CNIRegistryFull(self._size)
+
+        offset = self._offset(index)
+        version = self._begin_write()
+        try:
+            start = offset + _SLOT.size
+            self._mm[start:start + len(key)] = key
+            start += self._max_key_length
+            self._mm[start:start + len(data)] = data
+            _SLOT.pack_into(self._mm, offset, version, len(key), len(data))
+        finally:
+            self._end_write()
+
+    def _remove(self, index):
+        """Empties the slot, moving back the entries probed past it."""
+        self._begin_write()
+        try:
+            hole = index
+            _SLOT.pack_into(self._mm, self._offset(hole), 0, 0, 0)
+            probe = hole
+            while True:
+                probe = (probe + 1) % self._size
+                offset = self._offset(probe)
+                version, key_len, value_len = _SLOT.unpack_from(self._mm,
+                                                                offset)
+                if not version:
+                    break
+                home = self._home(self._get_key(offset, key_len))
+                # Entries with their home slot cyclically in (hole, probe]
+                # are still found where they are.
+                if hole < probe:
+                    stays = hole < home <= probe
+                else:
+                    stays = home > hole or home <= probe
+                if stays:
+                    continue
+                length = _SLOT.size + self._max_key_length + value_len
+                dst = self._offset(hole)
+                self._mm[dst:dst + length] = self._mm[offset:offset + length]
+                _SLOT.pack_into(self._mm, offset, 0, 0, 0)
+                hole = probe
+        finally:
+            self._end_write()
+
+    def __getitem__(self, key):
+        version, data = self._read(key)
+        if not version:
+            raise KeyError(key)
+        return pickle.loads(data)
+
+    def __contains__(self, key):
+        try:
+            return bool(self._read(key)[0])
+        except KeyError:
+            return False
+
+    def __setitem__(self, key, value):
+        encoded = self._encode_key(key)
+        with self._changed:
+            self._store(encoded, value)
+
+    def __delitem__(self, key):
+        encoded = self._encode_key(key)
+        with self._changed:
+            index, found = self._find(encoded)
+            if not found:
+                raise KeyError(key)
+            self._remove(index)
+
+    def _keys(self):
+        keys = []
+        with self._changed:
+            for index in range(self._size):
+                offset = self._offset(index)
+                version, key_len, value_len = _SLOT.unpack_from(self._mm,
+                                                                offset)
+                if version:
+                    keys.append(self._get_key(offset, key_len).decode('utf-8'))
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def set_fields(self, key, **fields):
+        """Updates fields of a dict entry in place.
+
+        This replaces reading the entry, modifying it and writing it back,
+        and is atomic with respect to other writers of the registry.
+
+        :raises KeyError: if the key is missing or its value is not a dict
+        """
+        encoded = self._encode_key(key)
+        with self._changed:
+            version, data = self._lookup(encoded)
+            if not version:
+                raise KeyError(key)
+            value = pickle.loads(data)
+            if not isinstance(value, dict):
+                raise KeyError(key)
+            value.update(fields)
+            self._store(encoded, value)
+
+    def get_versioned(self, key):
+        """Returns the version and the value of the key, (0, None) if missing.
+
+        Both are read at once, so a `wait` for the returned version returns as
+        soon as the value changes.
+        """
+        version, data = self._read(key)
+        if not version:
+            return 0, None
+        return version, pickle.loads(data)
+
+    def get_version(self, key):
+        """Returns the current version of the key, 0 if it is missing."""
+        return self._read(key)[0]
+
+    def wait(self, key, version, timeout):
+        """Waits for the key to get a version other than the given one.
+
+        :param key: key to watch
+        :param version: version the caller knows, 0 for a missing key
+        :param timeout: maximum time to wait, in seconds
+        :returns: the version of the key after the wait, that is equal to
+                  the passed one if it timed out
+        """
+        encoded = self._encode_key(key)
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                current = self._lookup(encoded)[0]
+                remaining = deadline - time.monotonic()
+                if current != version or remaining <= 0:
+                    return current
+                self._changed.wait(remaining)
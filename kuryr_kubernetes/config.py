@@ -36,8 +36,19 @@ daemon_opts = [
                       'recommened to allow only local connections.'),
                default='127.0.0.1:5036'),
     cfg.IntOpt('worker_num',
-               help=_('Maximum number of processes that will be spawned to '
-                      'process requests from CNI driver.'),
+               help=_('Number of processes that will be started to process '
+                      'requests from CNI driver. Each process handles a '
+                      'single request at a time.'),
+               default=30),
+    cfg.IntOpt('request_queue_size',
+               help=_('Maximum number of requests from CNI driver that can '
+                      'wait for a process to handle them. Connections over '
+                      'the limit are not accepted until there is room.'),
+               default=128),
+    cfg.IntOpt('request_timeout',
+               help=_('Time (in seconds) a process handling a request from '
+                      'CNI driver waits for it to send the request or to '
+                      'read the response before dropping the connection.'),
                default=30),
     cfg.IntOpt('vif_annotation_timeout',
                help=_('Time (in seconds) the CNI daemon will wait for VIF '
@@ -72,6 +83,18 @@ daemon_opts = [
                       'when processing requests. If this number is exceeded, '
                       'kuryr-daemon will be marked as unhealthy.'),
                default=3),
+    cfg.IntOpt('registry_size',
+               help=_('Maximum number of entries of the registry in which '
+                      'kuryr-daemon keeps the KuryrPorts of the pods of the '
+                      'node. It needs to be higher than the maximum number of '
+                      'pods the node can run.'),
+               default=1024),
+    cfg.IntOpt('registry_entry_size',
+               help=_('Size (in bytes) of each entry of the registry in '
+                      'which kuryr-daemon keeps the KuryrPorts. The memory '
+                      'of the registry is shared by the kuryr-daemon '
+                      'processes and only used as it gets filled.'),
+               default=65536),
 ]
 
 k8s_opts = [
@@ -178,6 +201,24 @@ k8s_opts = [
                       'prevent Kuryr from missing events due to K8s API or '
                       'etcd issues.'),
                default=120),
+    cfg.BoolOpt('use_object_cache',
+                help=_('Keep an in-memory cache of the K8s objects watched by '
+                       'kuryr-controller, fed by the watch streams, and look '
+                       'up objects there before querying K8s API. This '
+                       'trades memory for a lower number of requests sent to '
+                       'K8s API.'),
+                default=True),
+    cfg.IntOpt('list_chunk_size',
+               help=_('Maximum number of objects fetched in a single request '
+                      'when kuryr lists whole K8s collections, e.g. for '
+                      'reconciliation. Set to 0 to fetch collections in a '
+                      'single request.'),
+               default=500, min=0),
+    cfg.IntOpt('event_workers',
+               help=_('Maximum number of K8s objects kuryr-controller handles '
+                      'events of concurrently. Events of other objects are '
+                      'queued until a worker is available.'),
+               default=100, min=1),
     cfg.ListOpt('enabled_handlers',
                 help=_("The comma-separated handlers that should be "
                        "registered for watching in the pipeline."),
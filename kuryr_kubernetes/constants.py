@@ -45,6 +45,7 @@ OPENSHIFT_OBJ_MACHINE = 'Machine'
 OPENSHIFT_API_CRD_MACHINES = '/apis/machine.openshift.io/v1beta1/machines'
 
 K8S_POD_STATUS_PENDING = 'Pending'
+K8S_POD_STATUS_RUNNING = 'Running'
 K8S_POD_STATUS_SUCCEEDED = 'Succeeded'
 K8S_POD_STATUS_FAILED = 'Failed'
 
@@ -102,6 +103,9 @@ VIF_POOL_POPULATE = '/populatePool'
 VIF_POOL_FREE = '/freePool'
 VIF_POOL_LIST = '/listPools'
 VIF_POOL_SHOW = '/showPool'
+VIF_POOL_SIZES = '/poolSizes'
+VIF_POOL_STATS = '/poolStats'
+VIF_POOL_JOBS = '/poolJobs'
 
 DEFAULT_IFNAME = 'eth0'
 
@@ -583,6 +583,22 @@ class LBaaSDriver(DriverBase):
         """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def ensure_members(self, loadbalancer, pool, members,
+                       listener_port=None):
+        """Get or create multiple members of a pool.
+
+        :param loadbalancer: `LBaaSLoadBalancer` object
+        :param pool: `LBaaSPool` object
+        :param members: list of dicts with the `subnet_id`, `ip`, `port`,
+                        `target_ref_namespace` and `target_ref_name` of the
+                        members, as accepted by `ensure_member`
+        :param listener_port: port of the listener of the pool, used to open
+                              the members security groups to it
+        :returns: list of `LBaaSMember` objects that were ensured
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def release_member(self, loadbalancer, member):
         """Release member.
@@ -16,6 +16,8 @@
 import random
 import time
 
+import eventlet
+from eventlet import event as eventlet_event
 from openstack import exceptions as os_exc
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -52,6 +54,9 @@ _OCTAVIA_ACL_VERSION = 2, 12
 _OCTAVIA_PROVIDER_VERSION = 2, 6
 _OCTAVIA_SCTP_VERSION = 2, 23
 _OCTAVIA_VERSION_WITH_TIMEOUTS = 2, 1
+# Batch member update is older, but only 2.11 allows to skip deleting the
+# members that are not listed in the request.
+_OCTAVIA_BATCH_MEMBERS_VERSION = 2, 11
 
 
 # HTTP Codes raised by Octavia when a Resource already exists
@@ -61,6 +66,96 @@ OKAY_CODES = (409, 500)
 K8S_DEFAULT_SVC_NAME = 'default/kubernetes'
 
 
+def _get_member(loadbalancer, pool, subnet_id, ip, port, target_ref_namespace,
+                target_ref_name):
+    name = ("%s/%s" % (target_ref_namespace, target_ref_name))
+    name += ":%s" % port
+    return {
+        'name': name,
+        'project_id': loadbalancer['project_id'],
+        'pool_id': pool['id'],
+        'subnet_id': subnet_id,
+        'ip': ip,
+        'port': port
+    }
+
+
+class LoadBalancerStatusWatcher(object):
+    """Shared poller of the provisioning status of the load balancers.
+
+    Rather than having each greenthread waiting for a load balancer poll it
+    on its own, waiters register here and a single greenthread lists the
+    load balancers once per interval, waking up the waiters of each load
+    balancer with its status. The poller only runs while anyone is waiting.
+    """
+
+    instance = None
+
+    def __init__(self, interval=_LB_STS_POLL_FAST_INTERVAL):
+        self._interval = interval
+        self._waiters = {}
+        self._poller = None
+
+    @classmethod
+    def get_instance(cls):
+        if not LoadBalancerStatusWatcher.instance:
+            LoadBalancerStatusWatcher.instance = cls()
+        return LoadBalancerStatusWatcher.instance
+
+    def wait(self, loadbalancer, timeout):
+        """Waits for the next poll of the load balancer status.
+
+        :param loadbalancer: `LBaaSLoadBalancer` object
+        :param timeout: maximum time to wait, in seconds
+        :returns: provisioning status of the load balancer, 'DELETED' if it
+                  no longer exists or None if the timeout expired first
+        """
+        key = (loadbalancer.get('project_id'), loadbalancer['id'])
+        event = eventlet_event.Event()
+        self._waiters.setdefault(key, set()).add(event)
+        if self._poller is None:
+            self._poller = eventlet.spawn(self._poll)
+        try:
+            return event.wait(timeout)
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._waiters[key]
+
+    def _get_statuses(self, project_ids):
+        lbaas = clients.get_loadbalancer_client()
+        statuses = {}
+        for project_id in project_ids:
+            filters = {'project_id': project_id} if project_id else {}
+            for lb in lbaas.load_balancers(**filters):
+                statuses[lb.id] = lb.provisioning_status
+        return statuses
+
+    def _poll(self):
+        try:
+            while self._waiters:
+                waiters, self._waiters = self._waiters, {}
+                # Load balancers are normally all in a single project, so
+                # this is usually just one list call.
+                try:
+                    statuses = self._get_statuses(
+                        {project_id for project_id, _ in waiters})
+                except Exception as ex:
+                    for events in waiters.values():
+                        for event in events:
+                            event.send_exception(ex)
+                else:
+                    for (_, lb_id), events in waiters.items():
+                        status = statuses.get(lb_id, 'DELETED')
+                        for event in events:
+                            event.send(status)
+                time.sleep(self._interval)
+        finally:
+            self._poller = None
+
+
 class LBaaSv2Driver(base.LBaaSDriver):
     """LBaaSv2Driver implements LBaaSDriver for Neutron LBaaSv2 API."""
 
@@ -72,6 +167,7 @@ class LBaaSv2Driver(base.LBaaSDriver):
         self._octavia_double_listeners = False
         self._octavia_providers = False
         self._octavia_sctp = False
+        self._octavia_batch_members = False
         # Check if Octavia API supports tagging.
         # TODO(dulek): *Maybe* this can be replaced with
         #         lbaas.get_api_major_version(version=_OCTAVIA_TAGGING_VERSION)
@@ -102,6 +198,9 @@ class LBaaSv2Driver(base.LBaaSDriver):
         if v >= _OCTAVIA_VERSION_WITH_TIMEOUTS:
             LOG.info('Octavia API supports Listeners Timeout.')
             self._octavia_timeouts = True
+        if v >= _OCTAVIA_BATCH_MEMBERS_VERSION:
+            LOG.info('Octavia API supports additive batch member update.')
+            self._octavia_batch_members = True
 
     def double_listeners_supported(self):
         return self._octavia_double_listeners
@@ -445,9 +544,8 @@ class LBaaSv2Driver(base.LBaaSDriver):
 
         if (pool and K8S_DEFAULT_SVC_NAME in pool['name'] and
                 loadbalancer['provider'] != 'ovn'):
-            if not self._wait_for_provisioning(
-                    loadbalancer, _ACTIVATION_TIMEOUT,
-                    _LB_STS_POLL_FAST_INTERVAL):
+            if not self._wait_for_provisioning(loadbalancer,
+                                               _ACTIVATION_TIMEOUT):
                 return
             lbaas = clients.get_loadbalancer_client()
             lbaas.create_health_monitor(
@@ -474,25 +572,8 @@ class LBaaSv2Driver(base.LBaaSDriver):
         lbaas = clients.get_loadbalancer_client()
         self._release(loadbalancer, pool, lbaas.delete_pool, pool['id'])
 
-    def ensure_member(self, loadbalancer, pool,
-                      subnet_id, ip, port, target_ref_namespace,
-                      target_ref_name, listener_port=None):
-        lbaas = clients.get_loadbalancer_client()
-        name = ("%s/%s" % (target_ref_namespace, target_ref_name))
-        name += ":%s" % port
-        member = {
-            'name': name,
-            'project_id': loadbalancer['project_id'],
-            'pool_id': pool['id'],
-            'subnet_id': subnet_id,
-            'ip': ip,
-            'port': port
-        }
-        result = self._ensure_provisioned(loadbalancer, member,
-                                          self._create_member,
-                                          self._find_member,
-                                          update=lbaas.update_member)
-
+    def _apply_pool_members_security_groups(self, loadbalancer, pool,
+                                            listener_port, port):
         network_policy = (
             'policy' in CONF.kubernetes.enabled_handlers and
             CONF.kubernetes.service_security_groups_driver == 'policy')
@@ -504,6 +585,75 @@ class LBaaSv2Driver(base.LBaaSDriver):
             self._apply_members_security_groups(loadbalancer, listener_port,
                                                 port, protocol, sg_rule_name,
                                                 listener_id)
+
+    def ensure_member(self, loadbalancer, pool,
+                      subnet_id, ip, port, target_ref_namespace,
+                      target_ref_name, listener_port=None):
+        lbaas = clients.get_loadbalancer_client()
+        member = _get_member(loadbalancer, pool, subnet_id, ip, port,
+                             target_ref_namespace, target_ref_name)
+        result = self._ensure_provisioned(loadbalancer, member,
+                                          self._create_member,
+                                          self._find_member,
+                                          update=lbaas.update_member)
+
+        self._apply_pool_members_security_groups(loadbalancer, pool,
+                                                 listener_port, port)
+        return result
+
+    def ensure_members(self, loadbalancer, pool, members,
+                       listener_port=None):
+        if not members:
+            return []
+
+        if not self._octavia_batch_members or len(members) == 1:
+            return self._ensure_members_one_by_one(
+                loadbalancer, pool, members, listener_port)
+
+        requested = [_get_member(loadbalancer, pool, **m) for m in members]
+        for remaining in self._provisioning_timer(_ACTIVATION_TIMEOUT):
+            if not self._wait_for_provisioning(loadbalancer, remaining):
+                return []
+            try:
+                self._create_members(pool, requested)
+                break
+            except os_exc.ConflictException:
+                # Load balancer got immutable in the meantime, wait for it.
+                continue
+            except os_exc.HttpException as e:
+                LOG.warning('Batch creation of %d members of pool %s failed '
+                            'with %s, falling back to creating them one by '
+                            'one.', len(members), pool['id'], e)
+                return self._ensure_members_one_by_one(
+                    loadbalancer, pool, members, listener_port)
+        else:
+            raise k_exc.ResourceNotReady(pool)
+
+        if not self._wait_for_provisioning(loadbalancer, _ACTIVATION_TIMEOUT):
+            return []
+
+        result, missing = self._find_members(pool, requested, members)
+        if missing:
+            LOG.debug('%d members of pool %s were not found after the batch '
+                      'update, ensuring them one by one.', len(missing),
+                      pool['id'])
+            result.extend(self._ensure_members_one_by_one(
+                loadbalancer, pool, missing))
+
+        self._apply_pool_members_security_groups(
+            loadbalancer, pool, listener_port, members[0]['port'])
+        return result
+
+    def _ensure_members_one_by_one(self, loadbalancer, pool, members,
+                                   listener_port=None):
+        result = []
+        for member in members:
+            # Security groups only need to be applied once per pool.
+            member = self.ensure_member(
+                loadbalancer, pool,
+                listener_port=None if result else listener_port, **member)
+            if member:
+                result.append(member)
         return result
 
     def release_member(self, loadbalancer, member):
@@ -632,9 +782,8 @@ class LBaaSv2Driver(base.LBaaSDriver):
         }
 
         # Wait for the loadbalancer to be ACTIVE
-        if not self._wait_for_provisioning(
-                loadbalancer, _ACTIVATION_TIMEOUT,
-                _LB_STS_POLL_FAST_INTERVAL):
+        if not self._wait_for_provisioning(loadbalancer,
+                                           _ACTIVATION_TIMEOUT):
             LOG.debug('Skipping ACLs update. '
                       'No Load Balancer Provisioned.')
             return
@@ -757,6 +906,46 @@ class LBaaSv2Driver(base.LBaaSDriver):
         member['id'] = response.id
         return member
 
+    def _create_members(self, pool, members):
+        request = []
+        for member in members:
+            member_request = {
+                'name': member['name'],
+                'subnet_id': member['subnet_id'],
+                'address': str(member['ip']),
+                'protocol_port': member['port'],
+            }
+            self.add_tags('member', member_request)
+            request.append(member_request)
+        lbaas = clients.get_loadbalancer_client()
+        # NOTE: openstacksdk has no call for the batch member update, so the
+        #       request is sent directly. additive_only makes Octavia keep
+        #       the pool members that are not part of the request.
+        response = lbaas.put(
+            f'/lbaas/pools/{pool["id"]}/members?additive_only=True',
+            json={'members': request}, raise_exc=False)
+        os_exc.raise_from_response(response)
+
+    def _find_members(self, pool, requested, members):
+        """Matches the requested members with the members of the pool.
+
+        :returns: tuple of the list of found members, with their IDs set, and
+                  the list of `members` entries that were not found
+        """
+        lbaas = clients.get_loadbalancer_client()
+        os_members = {(m.address, m.protocol_port): m
+                      for m in lbaas.members(pool['id'])}
+        found = []
+        missing = []
+        for member, args in zip(requested, members):
+            os_member = os_members.get((str(member['ip']), member['port']))
+            if not os_member or os_member.provisioning_status == 'ERROR':
+                missing.append(args)
+                continue
+            member['id'] = os_member.id
+            found.append(member)
+        return found, missing
+
     def _find_member(self, member, loadbalancer):
         lbaas = clients.get_loadbalancer_client()
         member = dict(member)
@@ -813,8 +1002,7 @@ class LBaaSv2Driver(base.LBaaSDriver):
                             interval=_LB_STS_POLL_FAST_INTERVAL, **kwargs):
         for remaining in self._provisioning_timer(_ACTIVATION_TIMEOUT,
                                                   interval):
-            if not self._wait_for_provisioning(
-                    loadbalancer, remaining, interval):
+            if not self._wait_for_provisioning(loadbalancer, remaining):
                 return None
             try:
                 result = self._ensure(
@@ -851,54 +1039,50 @@ class LBaaSv2Driver(base.LBaaSDriver):
 
         raise k_exc.ResourceNotReady(obj)
 
-    def _wait_for_provisioning(self, loadbalancer, timeout,
-                               interval=_LB_STS_POLL_FAST_INTERVAL):
-        lbaas = clients.get_loadbalancer_client()
+    def _wait_for_provisioning(self, loadbalancer, timeout):
+        watcher = LoadBalancerStatusWatcher.get_instance()
 
-        for remaining in self._provisioning_timer(timeout, interval):
-            try:
-                response = lbaas.get_load_balancer(loadbalancer['id'])
-            except os_exc.ResourceNotFound:
-                LOG.debug("Cleaning CRD status for deleted "
-                          "loadbalancer %s", loadbalancer['name'])
-                utils.clean_lb_crd_status(loadbalancer['name'])
-                return None
-
-            status = response.provisioning_status
-            if status == 'ACTIVE':
-                LOG.debug("Provisioning complete for %(lb)s", {
-                    'lb': loadbalancer})
-                return loadbalancer
-            elif status == 'ERROR':
-                LOG.debug("Releasing loadbalancer %s with error status",
-                          loadbalancer['id'])
-                self.release_loadbalancer(loadbalancer)
-                utils.clean_lb_crd_status(loadbalancer['name'])
-                return None
-            elif status == 'DELETED':
-                LOG.debug("Cleaning CRD status for deleted "
-                          "loadbalancer %s", loadbalancer['name'])
-                utils.clean_lb_crd_status(loadbalancer['name'])
-                return None
-            else:
-                LOG.debug("Provisioning status %(status)s for %(lb)s, "
-                          "%(rem).3gs remaining until timeout",
-                          {'status': status, 'lb': loadbalancer,
-                           'rem': remaining})
+        status = None
+        with timeutils.StopWatch(duration=timeout) as timer:
+            while not timer.expired():
+                status = watcher.wait(loadbalancer, timer.leftover())
+                if status is None:
+                    break
+                if status == 'ACTIVE':
+                    LOG.debug("Provisioning complete for %(lb)s", {
+                        'lb': loadbalancer})
+                    return loadbalancer
+                elif status == 'ERROR':
+                    LOG.debug("Releasing loadbalancer %s with error status",
+                              loadbalancer['id'])
+                    self.release_loadbalancer(loadbalancer)
+                    utils.clean_lb_crd_status(loadbalancer['name'])
+                    return None
+                elif status == 'DELETED':
+                    LOG.debug("Cleaning CRD status for deleted "
+                              "loadbalancer %s", loadbalancer['name'])
+                    utils.clean_lb_crd_status(loadbalancer['name'])
+                    return None
+                else:
+                    LOG.debug("Provisioning status %(status)s for %(lb)s, "
+                              "%(rem).3gs remaining until timeout",
+                              {'status': status, 'lb': loadbalancer,
+                               'rem': timer.leftover()})
 
         raise k_exc.LoadBalancerNotReady(loadbalancer['id'], status)
 
-    def _wait_for_deletion(self, loadbalancer, timeout,
-                           interval=_LB_STS_POLL_FAST_INTERVAL):
-        lbaas = clients.get_loadbalancer_client()
+    def _wait_for_deletion(self, loadbalancer, timeout):
+        watcher = LoadBalancerStatusWatcher.get_instance()
 
         status = 'PENDING_DELETE'
-        for remaining in self._provisioning_timer(timeout, interval):
-            try:
-                lb = lbaas.get_load_balancer(loadbalancer['id'])
-                status = lb.provisioning_status
-            except os_exc.NotFoundException:
-                return
+        with timeutils.StopWatch(duration=timeout) as timer:
+            while not timer.expired():
+                new_status = watcher.wait(loadbalancer, timer.leftover())
+                if new_status is None:
+                    break
+                status = new_status
+                if status == 'DELETED':
+                    return
 
         raise k_exc.LoadBalancerNotReady(loadbalancer['id'], status)
 
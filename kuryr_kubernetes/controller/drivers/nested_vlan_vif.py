@@ -11,11 +11,10 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
-from time import sleep
+import random
 
 from kuryr.lib import constants as kl_const
 from kuryr.lib import exceptions as kl_exc
-from kuryr.lib import segmentation_type_drivers as seg_driver
 from openstack import exceptions as os_exc
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -32,12 +31,135 @@ from kuryr_kubernetes import os_vif_util as ovu
 LOG = logging.getLogger(__name__)
 
 DEFAULT_MAX_RETRY_COUNT = 3
-DEFAULT_RETRY_INTERVAL = 1
 ACTIVE_TIMEOUT = 90
 
 CONF = cfg.CONF
 
 
+class TrunkVlanIds(object):
+    """Bitmap of the VLAN IDs in use in a trunk.
+
+    Bit N of the bitmap is set when VLAN ID N is in use. IDs are allocated
+    round robin, starting after the last one allocated, so that released IDs
+    are not reused right away, e.g. while Neutron is still detaching the
+    subport that used them. Both allocating and releasing an ID are a few
+    operations on the bitmap, regardless of how many IDs are in use.
+
+    IDs allocated are pending until they are reported attached or released,
+    so that rebuilding the bitmap from the IDs in use in Neutron keeps them.
+    """
+
+    def __init__(self, in_use=()):
+        self._bitmap = 0
+        self._pending = set()
+        # NOTE: Starting at a random ID makes conflicts with other
+        # controllers attaching subports to the same trunk less likely.
+        self._next = random.randint(kl_const.MIN_VLAN_TAG,
+                                    kl_const.MAX_VLAN_TAG)
+        self.update(in_use)
+
+    def __contains__(self, vlan_id):
+        return bool(self._bitmap >> vlan_id & 1)
+
+    def __len__(self):
+        return bin(self._bitmap).count('1')
+
+    def update(self, in_use):
+        """Marks the given VLAN IDs as in use."""
+        for vlan_id in in_use:
+            self._bitmap |= 1 << int(vlan_id)
+
+    def reset(self, in_use):
+        """Rebuilds the bitmap from the VLAN IDs in use and pending."""
+        self._bitmap = 0
+        self.update(in_use)
+        self.update(self._pending)
+
+    def _get_first_free(self, start):
+        free = ~(self._bitmap | ((1 << start) - 1))
+        # Index of the lowest bit set, i.e. the first free ID from start.
+        return (free & -free).bit_length() - 1
+
+    def allocate(self):
+        vlan_id = self._get_first_free(self._next)
+        if vlan_id > kl_const.MAX_VLAN_TAG:
+            vlan_id = self._get_first_free(kl_const.MIN_VLAN_TAG)
+            if vlan_id > kl_const.MAX_VLAN_TAG:
+                raise kl_exc.SegmentationIdAllocationFailure(
+                    'There are no vlan ids available.')
+        self._bitmap |= 1 << vlan_id
+        self._pending.add(vlan_id)
+        self._next = vlan_id + 1
+        return vlan_id
+
+    def reserve(self, vlan_id):
+        """Marks the VLAN ID as in use and pending, e.g. to reattach it."""
+        self._bitmap |= 1 << int(vlan_id)
+        self._pending.add(int(vlan_id))
+
+    def attached(self, vlan_ids):
+        """Marks the VLAN IDs as not pending anymore."""
+        self._pending.difference_update(int(v) for v in vlan_ids)
+
+    def release(self, vlan_id):
+        self._bitmap &= ~(1 << int(vlan_id))
+        self._pending.discard(int(vlan_id))
+
+
+class VlanIdAllocator(object):
+    """Tracks the VLAN IDs in use in each trunk in the controller memory.
+
+    The IDs in use in a trunk are fetched from Neutron the first time a
+    subport is attached to it and are then kept up to date as subports are
+    attached and detached, so that no Neutron call is needed to pick a VLAN
+    ID. They are only fetched again after Neutron reports a VLAN ID conflict,
+    e.g. because the subport was attached by somebody else.
+    """
+
+    instance = None
+
+    def __init__(self):
+        self._trunks = {}
+
+    @classmethod
+    def get_instance(cls):
+        if not VlanIdAllocator.instance:
+            VlanIdAllocator.instance = cls()
+        return VlanIdAllocator.instance
+
+    def get(self, trunk_id):
+        return self._trunks.get(trunk_id)
+
+    def seed(self, trunk_id, in_use):
+        """Starts tracking a trunk, unless it is already tracked."""
+        # NOTE: Another green thread might have seeded it while the IDs in
+        # use were being fetched, keep what it may have allocated since.
+        return self._trunks.setdefault(trunk_id, TrunkVlanIds(in_use))
+
+    def resync(self, trunk_id, in_use):
+        """Rebuilds the VLAN IDs in use in the trunk from Neutron ones.
+
+        The IDs freed without being released, e.g. by subports detached by
+        somebody else, become available again. The pending ones are kept.
+        """
+        vlan_ids = self.seed(trunk_id, in_use)
+        vlan_ids.reset(in_use)
+        return vlan_ids
+
+    def attached(self, trunk_id, vlan_ids):
+        trunk_vlan_ids = self._trunks.get(trunk_id)
+        if trunk_vlan_ids is not None:
+            trunk_vlan_ids.attached(vlan_ids)
+
+    def release(self, trunk_id, vlan_id):
+        vlan_ids = self._trunks.get(trunk_id)
+        if vlan_ids is not None:
+            vlan_ids.release(vlan_id)
+
+    def clear(self):
+        self._trunks = {}
+
+
 class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
     """Manages ports for nested-containers using VLANs to provide VIFs."""
 
@@ -93,7 +215,8 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
                 ports = list(os_net.create_ports(bulk_port_rq))
             except os_exc.SDKException:
                 for subport_info in subports_info:
-                    self._release_vlan_id(subport_info['segmentation_id'])
+                    self._release_vlan_id(trunk_id,
+                                          subport_info['segmentation_id'])
                 LOG.exception("Error creating bulk ports: %s", bulk_port_rq)
                 raise
         self._check_port_binding(ports)
@@ -110,15 +233,20 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
                 LOG.error("vlan ids already in use on trunk")
                 utils.delete_ports(ports)
                 for subport_info in subports_info:
-                    self._release_vlan_id(subport_info['segmentation_id'])
+                    self._release_vlan_id(trunk_id,
+                                          subport_info['segmentation_id'])
+                self._resync_vlan_ids(trunk_id)
                 return []
         except os_exc.SDKException:
             LOG.exception("Error happened during subport addition to trunk")
             utils.delete_ports(ports)
             for subport_info in subports_info:
-                self._release_vlan_id(subport_info['segmentation_id'])
+                self._release_vlan_id(trunk_id,
+                                      subport_info['segmentation_id'])
             return []
 
+        VlanIdAllocator.get_instance().attached(
+            trunk_id, [info['segmentation_id'] for info in subports_info])
         vifs = []
         for index, port in enumerate(ports):
             vlan_id = subports_info[index]['segmentation_id']
@@ -134,9 +262,11 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
                 parent_port = self._get_parent_port(pod)
                 trunk_id = self._get_trunk_id(parent_port)
                 # NOTE(dulek): We don't need a lock to prevent VLAN ID from
-                #              being taken over because the SegmentationDriver
+                #              being taken over because the VlanIdAllocator
                 #              will keep it reserved in memory unless we
-                #              release it. And we won't.
+                #              release it. And we won't. It's pending until
+                #              reattached, so resyncs keep it too.
+                self._get_vlan_ids(trunk_id).reserve(vif.vlan_id)
                 LOG.warning('Subport %s is in DOWN status for more than %d '
                             'seconds. This is a Neutron issue. Attempting to '
                             'reattach the subport to trunk %s using VLAN ID %s'
@@ -165,7 +295,7 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
             self._remove_subport(trunk_id, vif.id)
         except os_exc.NotFoundException:
             pass
-        self._release_vlan_id(vif.vlan_id)
+        self._release_vlan_id(trunk_id, vif.vlan_id)
         os_net.delete_port(vif.id)
 
     def _get_port_request(self, pod, project_id, subnets, security_groups,
@@ -198,17 +328,16 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
                               unbound=False):
         subports_info = []
 
-        in_use_vlan_ids = self._get_in_use_vlan_ids_set(trunk_id)
+        vlan_ids = self._get_vlan_ids(trunk_id)
         port_rq = self._get_port_request(pod, project_id, subnets,
                                          security_groups, unbound)
         for _ in range(num_ports):
             try:
-                vlan_id = seg_driver.allocate_segmentation_id(in_use_vlan_ids)
+                vlan_id = vlan_ids.allocate()
             except kl_exc.SegmentationIdAllocationFailure:
                 LOG.warning("There is not enough vlan ids available to "
                             "create a batch of %d subports.", num_ports)
                 break
-            in_use_vlan_ids.add(vlan_id)
 
             subports_info.append({'segmentation_id': vlan_id,
                                   'port_id': '',
@@ -227,14 +356,13 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
     def _add_subport(self, trunk_id, subport, requested_vlan_id=None):
         """Adds subport port to Neutron trunk
 
-        This method gets vlanid allocated from kuryr segmentation driver.
-        In active/active HA type deployment, possibility of vlanid conflict
-        is there. In such a case, vlanid will be requested again and subport
+        This method gets vlanid allocated from the VLAN IDs tracked for the
+        trunk. In active/active HA type deployment, possibility of vlanid
+        conflict is there. In such a case, the VLAN IDs in use are fetched
+        again from Neutron, vlanid will be requested again and subport
         addition is re-tried. This is tried DEFAULT_MAX_RETRY_COUNT times in
         case of vlanid conflict.
         """
-        # TODO(vikasc): Better approach for retrying in case of
-        # vlan-id conflict.
         os_net = clients.get_network_client()
         retry_count = 1
         while True:
@@ -254,12 +382,14 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
             try:
                 os_net.add_trunk_subports(trunk_id, subport)
             except os_exc.ConflictException:
+                # NOTE: The resync marks it again if it's in use in Neutron.
+                self._release_vlan_id(trunk_id, vlan_id)
                 if (retry_count < DEFAULT_MAX_RETRY_COUNT and
                         not requested_vlan_id):
                     LOG.error("VLAN ID already in use on trunk %s. "
                               "Retrying.", trunk_id)
                     retry_count += 1
-                    sleep(DEFAULT_RETRY_INTERVAL)
+                    self._resync_vlan_ids(trunk_id)
                     continue
                 else:
                     LOG.error("Failed to add subport %s to trunk %s due to "
@@ -267,10 +397,11 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
                               vlan_id)
                     raise
             except os_exc.SDKException:
-                self._release_vlan_id(vlan_id)
+                self._release_vlan_id(trunk_id, vlan_id)
                 LOG.exception("Error happened during subport "
                               "addition to trunk %s", trunk_id)
                 raise
+            VlanIdAllocator.get_instance().attached(trunk_id, [vlan_id])
             return vlan_id
 
     def _remove_subports(self, trunk_id, subports_id):
@@ -294,12 +425,29 @@ class NestedVlanPodVIFDriver(nested_vif.NestedPodVIFDriver):
     def _remove_subport(self, trunk_id, subport_id):
         self._remove_subports(trunk_id, [subport_id])
 
+    def _get_vlan_ids(self, trunk_id):
+        """Returns the VLAN IDs in use in the trunk, tracked in memory."""
+        allocator = VlanIdAllocator.get_instance()
+        vlan_ids = allocator.get(trunk_id)
+        if vlan_ids is None:
+            vlan_ids = allocator.seed(
+                trunk_id, self._get_in_use_vlan_ids_set(trunk_id))
+        return vlan_ids
+
+    def _resync_vlan_ids(self, trunk_id):
+        try:
+            in_use_vlan_ids = self._get_in_use_vlan_ids_set(trunk_id)
+        except os_exc.SDKException:
+            LOG.warning("Error getting the VLAN IDs in use on trunk %s.",
+                        trunk_id)
+            return
+        VlanIdAllocator.get_instance().resync(trunk_id, in_use_vlan_ids)
+
     def _get_vlan_id(self, trunk_id):
-        vlan_ids = self._get_in_use_vlan_ids_set(trunk_id)
-        return seg_driver.allocate_segmentation_id(vlan_ids)
+        return self._get_vlan_ids(trunk_id).allocate()
 
-    def _release_vlan_id(self, id):
-        return seg_driver.release_segmentation_id(id)
+    def _release_vlan_id(self, trunk_id, id):
+        VlanIdAllocator.get_instance().release(trunk_id, id)
 
     def _get_in_use_vlan_ids_set(self, trunk_id):
         vlan_ids = set()
@@ -27,6 +27,7 @@ from oslo_serialization import jsonutils
 from kuryr_kubernetes import clients
 from kuryr_kubernetes import constants
 from kuryr_kubernetes import exceptions as k_exc
+from kuryr_kubernetes import informer
 from kuryr_kubernetes import utils
 
 
@@ -37,6 +38,9 @@ LOG = log.getLogger(__name__)
 
 CONF = cfg.CONF
 
+# Maximum number of port IDs to filter by in a single ports listing.
+PORTS_ID_FILTER_CHUNK = 100
+
 
 def get_network_id(subnets):
     ids = list({net.id for net in subnets.values()})
@@ -64,6 +68,12 @@ def get_host_id(pod):
 
 
 def get_kuryrport(pod):
+    kp = informer.get_object(constants.K8S_OBJ_KURYRPORT,
+                             pod['metadata']['name'],
+                             pod['metadata']['namespace'])
+    if kp:
+        return kp
+
     k8s = clients.get_kubernetes_client()
     try:
         return k8s.get(f'{constants.K8S_API_CRD_NAMESPACES}/'
@@ -101,17 +111,26 @@ def get_pods(selector, namespace=None):
     return: k8s list object containing all matching pods
 
     """
+    svc_selector = selector.get('selector')
+    if svc_selector:
+        cache_selector = {'matchLabels': svc_selector}
+    else:
+        # Removing pod-template-hash as pods will not have it and
+        # otherwise there will be no match
+        (selector.get('matchLabels') or {}).pop('pod-template-hash', None)
+        cache_selector = selector
+    pods = get_cached_by_selector(constants.K8S_OBJ_POD, cache_selector,
+                                  namespace)
+    if pods is not None:
+        return {'items': pods}
+
     kubernetes = clients.get_kubernetes_client()
 
-    svc_selector = selector.get('selector')
     if svc_selector:
         labels = replace_encoded_characters(svc_selector)
     else:
         labels = selector.get('matchLabels', None)
         if labels:
-            # Removing pod-template-hash as pods will not have it and
-            # otherwise there will be no match
-            labels.pop('pod-template-hash', None)
             labels = replace_encoded_characters(labels)
 
         exps = selector.get('matchExpressions', None)
@@ -141,6 +160,11 @@ def get_namespaces(selector):
     return: k8s list object containing all matching namespaces
 
     """
+    namespaces = get_cached_by_selector(constants.K8S_OBJ_NAMESPACE,
+                                        selector)
+    if namespaces is not None:
+        return {'items': namespaces}
+
     kubernetes = clients.get_kubernetes_client()
     labels = selector.get('matchLabels', None)
     if labels:
@@ -162,6 +186,38 @@ def get_namespaces(selector):
     return namespaces
 
 
+def get_cached_by_selector(kind, selector, namespace=None):
+    """Return objects matching the selector out of the controller cache.
+
+    The label index of the cache is used to narrow down the candidates using
+    the matchLabels and the In and Exists matchExpressions, then the exact
+    semantics of `match_selector` are applied on them.
+
+    param kind: k8s object kind, e.g. 'Pod'
+    param selector: k8s selector of types matchLabels or matchExpressions
+    param namespace: namespace name where the selector will be applied. If
+                     None, the selector is applied in all namespaces
+    return: list of matching objects or None if the kind is not cached
+    """
+    labels = {k: {v} for k, v in (selector.get('matchLabels') or {}).items()}
+    label_keys = set()
+    for exp in selector.get('matchExpressions') or []:
+        key = str(exp['key'])
+        operator = exp['operator'].lower()
+        if operator == constants.K8S_OPERATOR_IN:
+            values = set(exp['values'])
+            labels[key] = labels[key] & values if key in labels else values
+        elif operator == constants.K8S_OPERATOR_EXISTS:
+            label_keys.add(key)
+
+    objs = informer.list_objects(kind, namespace, labels=labels,
+                                 label_keys=label_keys)
+    if objs is None:
+        return None
+    return [o for o in objs
+            if match_selector(selector, o['metadata'].get('labels'))]
+
+
 def format_expression(expression):
     key = expression['key']
     operator = expression['operator'].lower()
@@ -354,13 +410,17 @@ def get_kuryrnetworkpolicy_crds(namespace=None):
 
 
 def get_kuryrloadbalancer_crds(namespace=None):
+    """Yields the KuryrLoadBalancers, listing them in chunks."""
     if namespace:
         klb_path = '{}/{}/kuryrloadbalancers'.format(
             constants.K8S_API_CRD_KURYRLOADBALANCERS, namespace)
     else:
         klb_path = constants.K8S_API_CRD_KURYRLOADBALANCERS
-    klbs = get_k8s_resources(klb_path)
-    return klbs
+    kubernetes = clients.get_kubernetes_client()
+    try:
+        yield from kubernetes.get_items(klb_path)
+    except k_exc.K8sResourceNotFound:
+        LOG.exception('Kubernetes CRD not found')
 
 
 def get_k8s_resources(resource_path):
@@ -386,6 +446,10 @@ def get_k8s_resource(resource_path):
 
 
 def get_networkpolicies(namespace=None):
+    nps = informer.list_objects(constants.K8S_OBJ_POLICY, namespace)
+    if nps is not None:
+        return nps
+
     # FIXME(dulek): This is awful, shouldn't we have list method on k8s_client?
     kubernetes = clients.get_kubernetes_client()
 
@@ -487,10 +551,14 @@ def match_selector(selector, labels):
 def get_namespace_subnet_cidr(namespace):
     kubernetes = clients.get_kubernetes_client()
     try:
-        net_crd_path = (f"{constants.K8S_API_CRD_NAMESPACES}/"
-                        f"{namespace['metadata']['name']}/kuryrnetworks/"
-                        f"{namespace['metadata']['name']}")
-        net_crd = kubernetes.get(net_crd_path)
+        net_crd = informer.get_object(constants.K8S_OBJ_KURYRNETWORK,
+                                      namespace['metadata']['name'],
+                                      namespace['metadata']['name'])
+        if not net_crd:
+            net_crd_path = (f"{constants.K8S_API_CRD_NAMESPACES}/"
+                            f"{namespace['metadata']['name']}/kuryrnetworks/"
+                            f"{namespace['metadata']['name']}")
+            net_crd = kubernetes.get(net_crd_path)
     except k_exc.K8sResourceNotFound:
         LOG.warning('Namespace %s not yet ready',
                     namespace['metadata']['name'])
@@ -529,6 +597,10 @@ def tag_neutron_resources(resources, exceptions=False):
 
 
 def get_services(namespace=None):
+    services = informer.list_objects(constants.K8S_OBJ_SERVICE, namespace)
+    if services is not None:
+        return {'items': services}
+
     kubernetes = clients.get_kubernetes_client()
     try:
         if namespace:
@@ -565,9 +637,15 @@ def service_matches_affected_pods(service, pod_selectors):
 
 
 def get_namespaced_pods(namespace=None):
-    kubernetes = clients.get_kubernetes_client()
     if namespace:
         namespace = namespace['metadata']['name']
+
+    pods = informer.list_objects(constants.K8S_OBJ_POD, namespace)
+    if pods is not None:
+        return {'items': pods}
+
+    kubernetes = clients.get_kubernetes_client()
+    if namespace:
         pods = kubernetes.get(
             '{}/namespaces/{}/pods'.format(
                 constants.K8S_API_BASE, namespace))
@@ -617,6 +695,11 @@ def get_ports(resource, port):
 
 
 def get_namespace(namespace_name):
+    namespace = informer.get_object(constants.K8S_OBJ_NAMESPACE,
+                                    namespace_name)
+    if namespace:
+        return namespace
+
     kubernetes = clients.get_kubernetes_client()
     try:
         return kubernetes.get(
@@ -632,9 +715,12 @@ def get_endpoints_targets(name, namespace):
     kubernetes = clients.get_kubernetes_client()
     target_ips = []
     try:
-        klb_crd = kubernetes.get(
-            f'{constants.K8S_API_CRD_NAMESPACES}/{namespace}/'
-            f'kuryrloadbalancers/{name}')
+        klb_crd = informer.get_object(constants.K8S_OBJ_KURYRLOADBALANCER,
+                                      name, namespace)
+        if not klb_crd:
+            klb_crd = kubernetes.get(
+                f'{constants.K8S_API_CRD_NAMESPACES}/{namespace}/'
+                f'kuryrloadbalancers/{name}')
     except k_exc.K8sResourceNotFound:
         LOG.debug("KuryrLoadBalancer %s not found on Namespace %s.",
                   name, namespace)
@@ -768,3 +854,37 @@ def delete_neutron_port(port):
         # skipped, and which need to be handled/raised.
         return ex
     return None
+
+
+def update_neutron_port(port, **attrs):
+    os_net = clients.get_network_client()
+    try:
+        os_net.update_port(port, **attrs)
+    except Exception as ex:
+        # NOTE: As in delete_neutron_port, the exception is returned for the
+        # caller to handle it, as this is intended to be run in a greenthread.
+        return ex
+    return None
+
+
+def update_neutron_port_sgs(port, security_groups):
+    return update_neutron_port(port, security_groups=security_groups)
+
+
+def get_ports_sgs(ports_id, **attrs):
+    """Returns the current SGs of the given ports, as sorted tuples.
+
+    Only the given ports are fetched, filtering them by ID in chunks to keep
+    the URLs of the requests short. Ports not found are left out.
+
+    :param ports_id: list of Neutron port IDs
+    :param attrs: additional filters for the ports listing
+    :returns: dict mapping the port IDs to the tuples of their SG IDs
+    """
+    os_net = clients.get_network_client()
+    sgs = {}
+    for i in range(0, len(ports_id), PORTS_ID_FILTER_CHUNK):
+        for port in os_net.ports(id=ports_id[i:i + PORTS_ID_FILTER_CHUNK],
+                                 **attrs):
+            sgs[port.id] = tuple(sorted(port.security_group_ids))
+    return sgs
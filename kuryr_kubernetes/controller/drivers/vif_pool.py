@@ -14,26 +14,34 @@
 #    under the License.
 
 import abc
+import bisect
 import collections
+import functools
 import os
 import threading
+import time
 
 import eventlet
 from kuryr.lib._i18n import _
 from kuryr.lib import constants as kl_const
 from openstack import exceptions as os_exc
+from os_vif import objects
 from oslo_cache import core as cache
 from oslo_concurrency import lockutils
 from oslo_config import cfg as oslo_cfg
 from oslo_log import log as logging
 from oslo_log import versionutils
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
 
 from kuryr_kubernetes import clients
 from kuryr_kubernetes import config
 from kuryr_kubernetes import constants
 from kuryr_kubernetes.controller.drivers import base
 from kuryr_kubernetes.controller.drivers import utils as c_utils
+from kuryr_kubernetes.controller.managers import gc
 from kuryr_kubernetes.controller.managers import pool
+from kuryr_kubernetes.controller.managers import prometheus_exporter as exp
 from kuryr_kubernetes import exceptions
 from kuryr_kubernetes import os_vif_util as ovu
 from kuryr_kubernetes import utils
@@ -73,9 +81,47 @@ vif_pool_driver_opts = [
                             "them from the kubernetes driver options for pool "
                             "and pod drivers respectively"),
                      default={}),
+    oslo_cfg.StrOpt('pools_snapshot_dir',
+                    help=_("Directory where a snapshot of the pools content "
+                           "is periodically saved to. On startup, the pools "
+                           "are loaded from it so that pods can be served "
+                           "right away, while the pools are verified against "
+                           "Neutron and K8s in the background. If not set, "
+                           "pools are always recovered from scratch."),
+                    default=''),
+    oslo_cfg.IntOpt('ports_pool_sizing_window',
+                    help=_("Length (in seconds) of the sliding window over "
+                           "which the ports requested from each pool are "
+                           "counted. If set, pools are pre-populated in the "
+                           "background up to the number of ports requested "
+                           "within the window, bounded by ports_pool_min and "
+                           "ports_pool_max, and pools that were not requested "
+                           "from within the window are shrunk back to "
+                           "ports_pool_min. 0 to disable"),
+                    default=0, min=0),
+    oslo_cfg.IntOpt('ports_pool_sg_prepare',
+                    help=_("Number of ports to keep in each pool with each "
+                           "of the groups of security groups recently "
+                           "requested from it. Other ready to use ports of "
+                           "the pool are updated to those security groups in "
+                           "the background, so that pods don't wait for it. "
+                           "0 to disable"),
+                    default=0, min=0),
+    oslo_cfg.IntOpt('ports_pool_warm_up_requests',
+                    help=_("Maximum number of bulk port creation requests "
+                           "sent to Neutron to warm up the pools once they "
+                           "are recovered, e.g. when the controller becomes "
+                           "the leader. The known pools below their target "
+                           "size are filled in rounds of one batch per pool, "
+                           "emptiest pools first, until they reach their "
+                           "target or the requests run out. 0 to disable"),
+                    default=0, min=0),
 ]
 
 oslo_cfg.CONF.register_opts(vif_pool_driver_opts, "vif_pool")
+oslo_cfg.CONF.import_opt(
+    'pod_subnet_pool', 'kuryr_kubernetes.controller.drivers.namespace_subnet',
+    'namespace_subnet')
 
 node_vif_driver_caching_opts = [
     oslo_cfg.BoolOpt('caching', default=True,
@@ -106,6 +152,196 @@ VIF_TYPE_TO_DRIVER_MAPPING = {
 NODE_PORTS_CLEAN_FREQUENCY = 600  # seconds
 POPULATE_POOL_TIMEOUT = 420  # seconds
 BULK_PORTS_CREATION_REQUESTS = 20
+# Bulk port creation requests run in parallel to warm up the pools, out of
+# the BULK_PORTS_CREATION_REQUESTS ones, to leave room for the pods' ones.
+POOLS_WARM_UP_REQUESTS = 5
+POOLS_SNAPSHOT_VERSION = 1
+# Upper bounds (in seconds) of the buckets of the pooled ports age histogram.
+POOL_PORTS_AGE_BUCKETS = (60, 300, 900, 3600)
+HOT_SGS_TTL = 300  # seconds
+
+
+class PortsPool(object):
+    """Ready to use ports of a pool, grouped in buckets by their SGs.
+
+    Each bucket is a deque of port ids keyed by the tuple of SG ids the ports
+    have applied. Buckets are kept in the order they were updated, the ones
+    updated longer ago first, so that ports from them are the first to be
+    reused when a port with different SGs is needed. Empty buckets are
+    dropped, so getting a port from any bucket doesn't need to skip them.
+
+    The number of ports in the pool is maintained on every change, so that
+    len() is O(1), while iterating yields the SG keys of the buckets. The
+    time each port was put into the pool is kept too, to report their age.
+    """
+
+    def __init__(self):
+        self._buckets = collections.OrderedDict()
+        self._size = 0
+        self._added = {}
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._buckets)
+
+    def __contains__(self, sg_key):
+        return sg_key in self._buckets
+
+    def __getitem__(self, sg_key):
+        return self._buckets[sg_key]
+
+    def __setitem__(self, sg_key, ports):
+        # NOTE: As with dicts, replacing a bucket keeps its position.
+        now = time.monotonic()
+        old_ports = self._buckets.get(sg_key, ())
+        self._size -= len(old_ports)
+        added = {port_id: self._added.pop(port_id, now)
+                 for port_id in old_ports}
+        ports = collections.deque(ports)
+        if ports:
+            self._buckets[sg_key] = ports
+            self._size += len(ports)
+            for port_id in ports:
+                self._added[port_id] = added.get(port_id, now)
+        else:
+            self._buckets.pop(sg_key, None)
+
+    def __delitem__(self, sg_key):
+        bucket = self._buckets.pop(sg_key)
+        self._size -= len(bucket)
+        for port_id in bucket:
+            self._added.pop(port_id, None)
+
+    def __eq__(self, other):
+        try:
+            other_items = other.items()
+        except AttributeError:
+            return NotImplemented
+        return ({sg_key: list(ports) for sg_key, ports in self.items()} ==
+                {sg_key: list(ports) for sg_key, ports in other_items})
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self.items()))
+
+    def get(self, sg_key, default=None):
+        return self._buckets.get(sg_key, default)
+
+    def keys(self):
+        return self._buckets.keys()
+
+    def values(self):
+        return self._buckets.values()
+
+    def items(self):
+        return self._buckets.items()
+
+    def move_to_end(self, sg_key, last=True):
+        self._buckets.move_to_end(sg_key, last=last)
+
+    def add(self, sg_key, port_id):
+        """Adds a port and marks its bucket as the most recently updated."""
+        bucket = self._buckets.get(sg_key)
+        if bucket is None:
+            bucket = self._buckets[sg_key] = collections.deque()
+        else:
+            self._buckets.move_to_end(sg_key)
+        bucket.append(port_id)
+        self._size += 1
+        self._added[port_id] = time.monotonic()
+
+    def remove(self, sg_key, port_id):
+        """Removes a port, raising KeyError or ValueError if it's missing."""
+        bucket = self._buckets[sg_key]
+        bucket.remove(port_id)
+        self._size -= 1
+        self._added.pop(port_id, None)
+        if not bucket:
+            del self._buckets[sg_key]
+
+    def pop(self, sg_key):
+        """Takes a port from the bucket of the given SGs.
+
+        :raises KeyError: if there are no ports with those SGs
+        """
+        bucket = self._buckets[sg_key]
+        port_id = bucket.pop()
+        self._size -= 1
+        self._added.pop(port_id, None)
+        if not bucket:
+            del self._buckets[sg_key]
+        return port_id
+
+    def pop_oldest(self, exclude=()):
+        """Takes a port from the bucket updated longer ago.
+
+        :param exclude: SG keys of the buckets not to take the port from
+        :returns: tuple with the SG key of the bucket and the port id
+        :raises KeyError: if the pool has no ports out of excluded buckets
+        """
+        for sg_key in self._buckets:
+            if sg_key not in exclude:
+                return sg_key, self.pop(sg_key)
+        raise KeyError('pop_oldest(): pool is empty')
+
+    def get_ages(self):
+        """Returns the seconds each port has been in the pool for."""
+        now = time.monotonic()
+        return [now - added for added in self._added.values()]
+
+
+class PoolSizer(object):
+    """Sizes the pools of ports after their recent demand.
+
+    The ports requested from each pool are counted over a sliding window of
+    ports_pool_sizing_window seconds. The target size of a pool is the number
+    of ports requested within the window, bounded by ports_pool_min and
+    ports_pool_max (if enabled), so that a burst of pods on a node finds
+    enough ready to use ports when it repeats. The parameters of the last
+    request are kept too, as they are needed to populate the pool later on.
+    """
+
+    def __init__(self, window):
+        self._window = window
+        self._requests = collections.defaultdict(collections.deque)
+        self._params = {}
+
+    def record(self, pool_key, pod, subnets, security_groups):
+        now = time.monotonic()
+        self._requests[pool_key].append(now)
+        self._params[pool_key] = (pod, subnets, security_groups)
+        self._expire(pool_key, now)
+
+    def _expire(self, pool_key, now):
+        requests = self._requests.get(pool_key)
+        if requests is None:
+            return
+        while requests and requests[0] <= now - self._window:
+            requests.popleft()
+
+    def get_demand(self, pool_key):
+        """Returns the number of ports requested within the window."""
+        self._expire(pool_key, time.monotonic())
+        return len(self._requests.get(pool_key, ()))
+
+    def get_target(self, pool_key):
+        ports_pool_max = oslo_cfg.CONF.vif_pool.ports_pool_max
+        target = max(oslo_cfg.CONF.vif_pool.ports_pool_min,
+                     self.get_demand(pool_key))
+        if ports_pool_max:
+            target = min(target, ports_pool_max)
+        return target
+
+    def get_params(self, pool_key):
+        return self._params.get(pool_key)
+
+    def get_pool_keys(self):
+        return list(self._params)
+
+    def forget(self, pool_key):
+        self._requests.pop(pool_key, None)
+        self._params.pop(pool_key, None)
 
 
 class NoopVIFPool(base.VIFPoolDriver):
@@ -139,7 +375,8 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
 
     In order to handle the pools of ports, a few dicts are used:
     _available_ports_pool is a dictionary with the ready to use Neutron ports
-    information. The keys are the 'pool_key' and the values the 'port_id's.
+    information. The keys are the 'pool_key' and the values PortsPool objects
+    with the 'port_id's grouped by their security groups.
     _existing_vifs is a dictionary containing the port vif objects. The keys
     are the 'port_id' and the values are the vif objects.
     _recyclable_ports is a dictionary with the Neutron ports to be
@@ -160,14 +397,41 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
     updates for recycling ports.
     Also, it has a Semaphore _create_ports_semaphore to restrict the number of
     bulk Ports creation calls running in parallel.
+
+    If the pools_snapshot_dir option is set, the content of the pools is
+    saved there after each ports recycling iteration, tagged with an
+    increasing generation. sync_pools then loads the pools from that
+    snapshot and verifies them in the background, instead of recovering them
+    before any pod can be served.
+
+    If the ports_pool_sizing_window option is set, a PoolSizer keeps track
+    of the ports requested from each pool and raises the target size of the
+    pools above ports_pool_min to follow the demand. Pools below their target
+    are populated in the background and the ones not requested from within
+    the window are shrunk back to their target, releasing the ports that
+    were updated longer ago.
+
+    If the ports_pool_sg_prepare option is set, the groups of security groups
+    requested from each pool within the last HOT_SGS_TTL seconds are
+    tracked in _hot_sgs, and ports from other groups are updated to them in
+    the background, so that requests for them find ports ready.
+
+    If the ports_pool_warm_up_requests option is set, the known pools are
+    filled up to their target size in the background once sync_pools
+    recovered them, with at most that many bulk port creation requests.
     """
 
     def __init__(self):
         # Note(ltomasbo) Execute the port recycling periodic actions in a
         # background thread
         self._recovered_pools = False
+        self._snapshot_generation = 0
+        self._snapshot_pools = None
+        self._snapshot_ports = None
+        self._previous_ports_to_remove = []
+        self._next_nodes_cleanup = (time.monotonic() +
+                                    NODE_PORTS_CLEAN_FREQUENCY)
         eventlet.spawn(self._return_ports_to_pool)
-        eventlet.spawn(self._cleanup_removed_nodes)
 
     def set_vif_driver(self, driver):
         self._drv_vif = driver
@@ -179,11 +443,10 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
         self._drv_vif.update_vif_sgs(pod, sgs)
 
     def _get_pool_size(self, pool_key):
-        pool = self._available_ports_pools.get(pool_key, {})
-        pool_members = []
-        for port_list in pool.values():
-            pool_members.extend(port_list)
-        return len(pool_members)
+        pool = self._available_ports_pools.get(pool_key)
+        if pool is None:
+            return 0
+        return len(pool)
 
     def _get_host_addr(self, pod):
         return pod['status']['hostIP']
@@ -208,6 +471,13 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
             return None
 
         pool_key = self._get_pool_key(host_addr, project_id, None, subnets)
+        if oslo_cfg.CONF.vif_pool.ports_pool_sizing_window:
+            self._pool_sizer.record(pool_key, pod, subnets,
+                                    tuple(sorted(security_groups)))
+        if oslo_cfg.CONF.vif_pool.ports_pool_sg_prepare:
+            hot_sgs = self._hot_sgs[pool_key]
+            hot_sgs[tuple(sorted(security_groups))] = time.monotonic()
+            hot_sgs.move_to_end(tuple(sorted(security_groups)))
 
         # NOTE(maysams): It's possible that more recent Pods will retrieve
         # the Ports from the pool that older Pods were waiting for. In case
@@ -237,21 +507,23 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
         except (KeyError, AttributeError):
             raise exceptions.ResourceNotReady(pod)
 
-        try:
-            port_id = pool_ports[security_groups].pop()
-        except (KeyError, IndexError):
-            # Get another port from the pool and update the SG to the
-            # appropriate one. It uses a port from the group that was updated
-            # longer ago - these will be at the front of the OrderedDict.
-            for sg_group, ports in pool_ports.items():
+        while True:
+            try:
+                port_id = pool_ports.pop(security_groups)
+                update_sg = False
+            except KeyError:
+                # Get another port from the pool and update the SG to the
+                # appropriate one. It uses a port from the group that was
+                # updated longer ago - these will be at the front of the pool.
                 try:
-                    port_id = pool_ports[sg_group].pop()
-                    break
-                except (IndexError, KeyError):
-                    continue
-            else:
-                # pool is empty, no port to reuse
-                raise exceptions.ResourceNotReady(pod)
+                    _, port_id = pool_ports.pop_oldest()
+                except KeyError:
+                    # pool is empty, no port to reuse
+                    raise exceptions.ResourceNotReady(pod)
+                update_sg = True
+            if self._is_snapshot_port_available(pool_key, port_id):
+                break
+        if update_sg:
             os_net = clients.get_network_client()
             os_net.update_port(port_id, security_groups=list(security_groups))
         if config.CONF.kubernetes.port_debug:
@@ -267,6 +539,31 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
             raise exceptions.ResourceNotReady(pod)
         return port
 
+    def _is_snapshot_port_available(self, pool_key, port_id):
+        """Checks a port loaded from the snapshot can be handed out.
+
+        Until the snapshot is verified, the ports loaded from it may have
+        been deleted or moved since it got saved, so each one is looked up
+        on Neutron before handing it out. The ones not available anymore are
+        dropped.
+        """
+        if not self._snapshot_ports or port_id not in self._snapshot_ports:
+            return True
+        self._snapshot_ports.discard(port_id)
+        os_net = clients.get_network_client()
+        try:
+            port = os_net.get_port(port_id)
+        except os_exc.NotFoundException:
+            port = None
+        if (port and port.network_id == self._get_pool_key_net(pool_key) and
+                port.device_owner in (kl_const.DEVICE_OWNER,
+                                      'trunk:subport')):
+            return True
+        LOG.debug("Port %s loaded from the pools snapshot is not available "
+                  "anymore, dropping it.", port_id)
+        self._existing_vifs.pop(port_id, None)
+        return False
+
     def _populate_pool(self, pool_key, pod, subnets, security_groups):
         # REVISIT(ltomasbo): Drop the subnets parameter and get the information
         # from the pool_key, which will be required when multi-network is
@@ -276,16 +573,18 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
         if not self._recovered_pools:
             LOG.debug("Kuryr-controller not yet ready to populate pools.")
             return False
-        ports_pool_min = oslo_cfg.CONF.vif_pool.ports_pool_min
+        pool_target = oslo_cfg.CONF.vif_pool.ports_pool_min
+        if oslo_cfg.CONF.vif_pool.ports_pool_sizing_window:
+            pool_target = self._pool_sizer.get_target(pool_key)
         lock = self._get_populate_pool_lock(pool_key)
         # NOTE(maysams): Only allow one request vifs per pool and times out
         # if takes 420 sec.
         if lock.acquire(timeout=POPULATE_POOL_TIMEOUT):
             pool_size = self._get_pool_size(pool_key)
             try:
-                if pool_size < ports_pool_min:
+                if pool_size < pool_target:
                     num_ports = max(oslo_cfg.CONF.vif_pool.ports_pool_batch,
-                                    ports_pool_min - pool_size)
+                                    pool_target - pool_size)
                     try:
                         vifs = self._drv_vif.request_vifs(
                             pod=pod,
@@ -303,12 +602,9 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
 
                     for vif in vifs:
                         self._existing_vifs[vif.id] = vif
-                        self._available_ports_pools[pool_key].setdefault(
-                                security_groups, []).append(vif.id)
-                    if vifs:
-                        # Mark it as updated most recently.
-                        self._available_ports_pools[pool_key].move_to_end(
-                            security_groups)
+                        # This marks the SGs as updated most recently.
+                        self._available_ports_pools[pool_key].add(
+                            security_groups, vif.id)
             finally:
                 lock.release()
         else:
@@ -336,15 +632,14 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
     def _return_ports_to_pool(self):
         raise NotImplementedError()
 
-    def _recover_precreated_ports(self):
+    def _recover_precreated_ports(self, pools=None, vifs=None):
         raise NotImplementedError()
 
     def _get_in_use_ports_info(self):
         kubernetes = clients.get_kubernetes_client()
         in_use_ports = []
         networks = {}
-        kuryr_ports = kubernetes.get(constants.K8S_API_CRD_KURYRPORTS)
-        for kp in kuryr_ports['items']:
+        for kp in kubernetes.get_items(constants.K8S_API_CRD_KURYRPORTS):
             vifs = c_utils.get_vifs(kp)
             for data in vifs.values():
                 in_use_ports.append(data.id)
@@ -357,11 +652,312 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
     def show_pool(self, pool_key):
         return self._available_ports_pools.get(pool_key)
 
+    def list_pool_sizes(self):
+        """Returns the current and target sizes of the pools.
+
+        The demand is the number of ports requested from the pool within the
+        sizing window, None if adaptive pool sizing is disabled.
+        """
+        sizes = {}
+        for pool_key in list(self._available_ports_pools):
+            target = oslo_cfg.CONF.vif_pool.ports_pool_min
+            demand = None
+            if oslo_cfg.CONF.vif_pool.ports_pool_sizing_window:
+                target = self._pool_sizer.get_target(pool_key)
+                demand = self._pool_sizer.get_demand(pool_key)
+            sizes[pool_key] = {'size': self._get_pool_size(pool_key),
+                               'target': target,
+                               'demand': demand}
+        return sizes
+
+    def list_pools_stats(self):
+        """Returns the sizes, SG buckets and ports age of the pools.
+
+        On top of the list_pool_sizes() values, each pool has the number of
+        ports per SG bucket, a histogram of the seconds the ports have been
+        in the pool for, with POOL_PORTS_AGE_BUCKETS as upper bounds, and if
+        it is being populated at the moment.
+        """
+        stats = self.list_pool_sizes()
+        for pool_key, pool_stats in stats.items():
+            pool_ports = self._available_ports_pools.get(pool_key)
+            if pool_ports is None:
+                continue
+            pool_stats['security_groups'] = [
+                {'ids': list(sg_key), 'ports': len(ports)}
+                for sg_key, ports in list(pool_ports.items())]
+            histogram = [0] * (len(POOL_PORTS_AGE_BUCKETS) + 1)
+            for age in pool_ports.get_ages():
+                histogram[bisect.bisect_left(POOL_PORTS_AGE_BUCKETS,
+                                             age)] += 1
+            pool_stats['age_histogram'] = [
+                {'max_age': max_age, 'ports': ports}
+                for max_age, ports in zip(POOL_PORTS_AGE_BUCKETS + (None,),
+                                          histogram)]
+            lock = self._populate_pool_lock.get(pool_key)
+            pool_stats['populating'] = bool(lock and lock.locked())
+        return stats
+
+    def _resize_pools(self):
+        """Adjusts the pools to the demand tracked by the pool sizer."""
+        if not oslo_cfg.CONF.vif_pool.ports_pool_sizing_window:
+            return
+        try:
+            self._trigger_pools_resize()
+        except Exception:
+            LOG.exception(
+                'Error while resizing the pools. '
+                'It will be retried in %s seconds',
+                oslo_cfg.CONF.vif_pool.ports_pool_update_frequency)
+
+    def _trigger_pools_resize(self):
+        if not self._recovered_pools:
+            LOG.debug("Kuryr-controller not yet ready to resize pools.")
+            return
+        exporter = exp.ControllerPrometheusExporter.get_instance()
+        for pool_key in self._pool_sizer.get_pool_keys():
+            if pool_key not in self._available_ports_pools:
+                # The pool got deleted along with its network.
+                self._pool_sizer.forget(pool_key)
+                exporter.remove_pool_size(pool_key)
+                continue
+            pool_size = self._get_pool_size(pool_key)
+            pool_target = self._pool_sizer.get_target(pool_key)
+            exporter.record_pool_size(pool_key, pool_size, pool_target)
+            if pool_size < pool_target:
+                LOG.debug("Pre-populating pool %s up to %d ports.", pool_key,
+                          pool_target)
+                pod, subnets, security_groups = self._pool_sizer.get_params(
+                    pool_key)
+                eventlet.spawn(self._populate_pool, pool_key, pod, subnets,
+                               security_groups)
+            elif (pool_size > pool_target and
+                    not self._pool_sizer.get_demand(pool_key)):
+                LOG.debug("Shrinking idle pool %s down to %d ports.",
+                          pool_key, pool_target)
+                self._shrink_pool(pool_key, pool_size - pool_target)
+
+    def _shrink_pool(self, pool_key, num_ports):
+        lock = self._get_populate_pool_lock(pool_key)
+        if not lock.acquire(blocking=False):
+            # The pool is being populated, it will be retried later on.
+            return
+        try:
+            pool_ports = self._available_ports_pools[pool_key]
+            ports_id = []
+            # NOTE: Ports are taken from the groups of SGs that were updated
+            # longer ago, as they are the least likely to be reused as they
+            # are.
+            while pool_ports and len(ports_id) < num_ports:
+                ports_id.append(pool_ports.pop_oldest()[1])
+        finally:
+            lock.release()
+        if ports_id:
+            self._delete_pool_ports(pool_key, ports_id)
+
+    def _delete_pool_ports(self, pool_key, ports_id):
+        """Deletes ports already taken out of the given pool."""
+        raise NotImplementedError()
+
+    def _start_pools_warm_up(self):
+        if oslo_cfg.CONF.vif_pool.ports_pool_warm_up_requests:
+            eventlet.spawn(self._warm_up_pools)
+
+    def _warm_up_pools(self):
+        """Fills the known pools up to their target size after a sync."""
+        try:
+            self._trigger_pools_warm_up()
+        except Exception:
+            LOG.exception('Error while warming up the pools.')
+
+    def _get_pools_warm_up_plan(self):
+        """Returns the (pool_key, num_ports) bulk requests to warm up pools.
+
+        The pools get one batch per round, emptiest pools first, so that the
+        requests budget is spread over as many nodes as possible instead of
+        filling a few pools completely.
+        """
+        budget = oslo_cfg.CONF.vif_pool.ports_pool_warm_up_requests
+        batch = oslo_cfg.CONF.vif_pool.ports_pool_batch
+        sizing = oslo_cfg.CONF.vif_pool.ports_pool_sizing_window
+        pool_keys = set(self._available_ports_pools)
+        if sizing:
+            pool_keys.update(self._pool_sizer.get_pool_keys())
+
+        sizes = {}
+        deficits = {}
+        for pool_key in pool_keys:
+            target = oslo_cfg.CONF.vif_pool.ports_pool_min
+            if sizing:
+                target = self._pool_sizer.get_target(pool_key)
+            sizes[pool_key] = self._get_pool_size(pool_key)
+            if sizes[pool_key] < target:
+                deficits[pool_key] = target - sizes[pool_key]
+
+        pending = sorted(deficits, key=lambda k: (sizes[k], -deficits[k]))
+        plan = []
+        while pending and len(plan) < budget:
+            for pool_key in pending[:budget - len(plan)]:
+                num_ports = min(batch, deficits[pool_key])
+                plan.append((pool_key, num_ports))
+                deficits[pool_key] -= num_ports
+            pending = [k for k in pending if deficits[k]]
+        return plan
+
+    def _trigger_pools_warm_up(self):
+        if not self._recovered_pools:
+            LOG.debug("Kuryr-controller not yet ready to warm up pools.")
+            return
+        plan = self._get_pools_warm_up_plan()
+        if not plan:
+            return
+        LOG.info("PORTS POOL: warming up %d pools with %d bulk port creation "
+                 "requests.", len({pool_key for pool_key, _n in plan}),
+                 len(plan))
+        subnets_cache = {}
+        epool = eventlet.GreenPool(POOLS_WARM_UP_REQUESTS)
+        created = sum(epool.imap(
+            functools.partial(self._warm_up_pool, subnets_cache=subnets_cache),
+            [pool_key for pool_key, _n in plan],
+            [num_ports for _k, num_ports in plan]))
+        LOG.info("PORTS POOL: pools warmed up with %d ports.", created)
+
+    def _warm_up_pool(self, pool_key, num_ports, subnets_cache=None):
+        """Adds up to num_ports ports to a pool being warmed up.
+
+        :returns: the number of ports added
+        """
+        lock = self._get_populate_pool_lock(pool_key)
+        if not lock.acquire(blocking=False):
+            # It is already being populated for the pods.
+            return 0
+        try:
+            params = self._get_pool_params(pool_key, subnets_cache)
+            if params is None:
+                LOG.debug("Not enough information to warm up pool %s.",
+                          pool_key)
+                return 0
+            pod, subnets, security_groups = params
+            vifs = self._request_pool_vifs(pool_key, pod, subnets,
+                                           security_groups, num_ports)
+            for vif in vifs:
+                self._existing_vifs[vif.id] = vif
+                self._available_ports_pools[pool_key].add(security_groups,
+                                                          vif.id)
+            return len(vifs)
+        except Exception:
+            LOG.exception("Error warming up pool %s.", pool_key)
+            return 0
+        finally:
+            lock.release()
+
+    def _get_pool_params(self, pool_key, subnets_cache=None):
+        """Returns the pod, subnets and SGs to create ports for a pool.
+
+        The parameters of the last request to the pool are used if known.
+        Otherwise the subnets are the ones of the pool network matching the
+        pooled ports, and the SGs are the ones of the ports updated last, or
+        the default pod SGs for empty pools. The pod is None in that case.
+        """
+        if oslo_cfg.CONF.vif_pool.ports_pool_sizing_window:
+            params = self._pool_sizer.get_params(pool_key)
+            if params is not None:
+                return params
+
+        pool_ports = self._available_ports_pools.get(pool_key)
+        security_groups = None
+        cidrs = None
+        if pool_ports:
+            security_groups = list(pool_ports.keys())[-1]
+            vif = self._existing_vifs.get(pool_ports[security_groups][-1])
+            if vif is not None:
+                cidrs = {str(subnet.cidr)
+                         for subnet in vif.network.subnets.objects}
+        if security_groups is None:
+            security_groups = tuple(sorted(
+                config.CONF.neutron_defaults.pod_security_groups))
+
+        net_id = self._get_pool_key_net(pool_key)
+        if subnets_cache is None:
+            subnets_cache = {}
+        if net_id not in subnets_cache:
+            os_net = clients.get_network_client()
+            subnets_cache[net_id] = list(os_net.subnets(network_id=net_id))
+        subnets = {subnet.id: utils.get_subnet(subnet.id)
+                   for subnet in subnets_cache[net_id]
+                   if cidrs is None or subnet.cidr in cidrs}
+        if not subnets:
+            return None
+        return None, subnets, security_groups
+
+    def _request_pool_vifs(self, pool_key, pod, subnets, security_groups,
+                           num_ports):
+        """Creates ports for a pool, regardless of the pods requests."""
+        raise NotImplementedError()
+
+    def _prepare_pools_sgs(self):
+        """Updates pooled ports to the recently requested SGs."""
+        if not oslo_cfg.CONF.vif_pool.ports_pool_sg_prepare:
+            return
+        try:
+            self._trigger_pools_sgs_prepare()
+        except Exception:
+            LOG.exception(
+                'Error while preparing ports with the requested security '
+                'groups. It will be retried in %s seconds',
+                oslo_cfg.CONF.vif_pool.ports_pool_update_frequency)
+
+    def _trigger_pools_sgs_prepare(self):
+        if not self._recovered_pools:
+            LOG.debug("Kuryr-controller not yet ready to prepare ports.")
+            return
+        num_ports = oslo_cfg.CONF.vif_pool.ports_pool_sg_prepare
+        expired = time.monotonic() - HOT_SGS_TTL
+        updates = []
+        for pool_key, hot_sgs in list(self._hot_sgs.items()):
+            for sg_key, last_requested in list(hot_sgs.items()):
+                if last_requested < expired:
+                    del hot_sgs[sg_key]
+            if not hot_sgs or pool_key not in self._available_ports_pools:
+                del self._hot_sgs[pool_key]
+                continue
+            # NOTE: Ports are taken out of the pool while being updated, so
+            # that they are not handed to pods in the meantime. The most
+            # recently requested SGs are served first.
+            pool_ports = self._available_ports_pools[pool_key]
+            for sg_key in reversed(hot_sgs):
+                missing = num_ports - len(pool_ports.get(sg_key, ()))
+                while missing > 0:
+                    try:
+                        port_id = pool_ports.pop_oldest(exclude=hot_sgs)[1]
+                    except KeyError:
+                        break
+                    updates.append((pool_key, sg_key, port_id))
+                    missing -= 1
+        if not updates:
+            return
+
+        epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+        results = epool.imap(c_utils.update_neutron_port_sgs,
+                             [update[2] for update in updates],
+                             [list(update[1]) for update in updates])
+        for (pool_key, sg_key, port_id), result in zip(updates, results):
+            if result:
+                LOG.warning('Error updating the security groups of port %s: '
+                            '%s', port_id, result)
+                # NOTE: The recycling loop puts it back into the pool with
+                # whatever SGs it ended up with.
+                self._recyclable_ports[port_id] = pool_key
+                continue
+            self._available_ports_pools[pool_key].add(sg_key, port_id)
+        LOG.debug("Updated %d pooled ports to the recently requested "
+                  "security groups.", len(updates))
+
     def delete_network_pools(self, net_id):
         raise NotImplementedError()
 
     def remove_sg_from_pools(self, sg_id, net_id):
-        os_net = clients.get_network_client()
+        updates = []
         for pool_key, pool_ports in list(self._available_ports_pools.items()):
             if self._get_pool_key_net(pool_key) != net_id:
                 continue
@@ -376,17 +972,192 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
                               "already re-used, no need to change their "
                               "associated SGs.")
                     continue
+                updates.extend((pool_key, sg_key, port_id)
+                               for port_id in ports)
+        if not updates:
+            return
+
+        # remove all SGs from the ports to be reused, concurrently
+        epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+        results = epool.imap(c_utils.update_neutron_port_sgs,
+                             [update[2] for update in updates],
+                             [None] * len(updates))
+        error = None
+        for (pool_key, sg_key, port_id), result in zip(updates, results):
+            if result:
+                LOG.error('Error removing the security groups of port %s: '
+                          '%s', port_id, result)
+                error = result
+                # Put it back, so that it is retried along with the SG.
+                self._available_ports_pools[pool_key].add(sg_key, port_id)
+                continue
+            # add the port to the default pool
+            self._available_ports_pools[pool_key].add((), port_id)
+            # NOTE(ltomasbo): as this ports were not created for this
+            # pool, ensuring they are used first, marking them as the
+            # most outdated
+            self._available_ports_pools[pool_key].move_to_end((), last=False)
+        if error:
+            raise error
+
+    def _get_pools_snapshot_path(self):
+        snapshot_dir = oslo_cfg.CONF.vif_pool.pools_snapshot_dir
+        if not snapshot_dir:
+            return None
+        # NOTE: MultiVIFPool may run several pool drivers at once, each of
+        # them needs its own snapshot.
+        return os.path.join(snapshot_dir, '%s-%s.json' % (
+            type(self).__name__, type(self._drv_vif).__name__))
+
+    def _save_pools_snapshot(self):
+        """Saves the content of the pools if it changed since last time."""
+        path = self._get_pools_snapshot_path()
+        if not path or not self._recovered_pools:
+            return
+        if self._snapshot_ports is not None:
+            # Loaded snapshot is still being verified.
+            return
+
+        pools = [{'key': list(pool_key),
+                  'ports': [[sg_key, list(ports)]
+                            for sg_key, ports in sg_pools.items() if ports]}
+                 for pool_key, sg_pools in self._available_ports_pools.items()]
+        if pools == self._snapshot_pools:
+            return
+
+        vifs = {}
+        for snapshot_pool in pools:
+            for sg_key, ports in snapshot_pool['ports']:
                 for port_id in ports:
-                    # remove all SGs from the port to be reused
-                    os_net.update_port(port_id, security_groups=None)
-                    # add the port to the default pool
-                    self._available_ports_pools[pool_key].setdefault(
-                        (), []).append(port_id)
-                # NOTE(ltomasbo): as this ports were not created for this
-                # pool, ensuring they are used first, marking them as the
-                # most outdated
-                self._available_ports_pools[pool_key].move_to_end(
-                    (), last=False)
+                    vif = self._existing_vifs.get(port_id)
+                    if vif:
+                        vifs[port_id] = vif.obj_to_primitive()
+        snapshot = {
+            'version': POOLS_SNAPSHOT_VERSION,
+            'generation': self._snapshot_generation + 1,
+            'timestamp': timeutils.utcnow().isoformat(),
+            'pools': pools,
+            'vifs': vifs,
+        }
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(jsonutils.dumps(snapshot))
+            os.replace(tmp_path, path)
+        except (IOError, OSError):
+            LOG.exception("Error saving the pools snapshot to %s.", path)
+            return
+        self._snapshot_generation += 1
+        self._snapshot_pools = pools
+        LOG.debug("PORTS POOL: saved snapshot generation %d with %d ports.",
+                  self._snapshot_generation, len(vifs))
+
+    def _load_pools_snapshot(self):
+        """Loads the pools content from the snapshot, if there is one.
+
+        :returns: True if the pools got loaded, False otherwise
+        """
+        path = self._get_pools_snapshot_path()
+        if not path or not os.path.exists(path):
+            return False
+
+        pools = collections.defaultdict(PortsPool)
+        vifs = {}
+        try:
+            with open(path, 'r') as f:
+                snapshot = jsonutils.loads(f.read())
+            if snapshot['version'] != POOLS_SNAPSHOT_VERSION:
+                LOG.info("Ignoring pools snapshot %s of unknown version %s.",
+                         path, snapshot['version'])
+                return False
+            for port_id, vif in snapshot['vifs'].items():
+                vifs[port_id] = (
+                    objects.base.VersionedObject.obj_from_primitive(vif))
+            # NOTE: Ports handed out to pods after the snapshot got saved
+            # would not be available anymore, so the KuryrPorts are checked.
+            in_use_ports, _ = self._get_in_use_ports_info()
+            for port_id in in_use_ports:
+                vifs.pop(port_id, None)
+            for snapshot_pool in snapshot['pools']:
+                pool_key = tuple(snapshot_pool['key'])
+                for sg_key, ports in snapshot_pool['ports']:
+                    if sg_key is not None:
+                        sg_key = tuple(sg_key)
+                    pools[pool_key][sg_key] = [p for p in ports if p in vifs]
+        except Exception:
+            LOG.exception("Error loading the pools snapshot from %s, "
+                          "recovering the pools from scratch.", path)
+            return False
+
+        self._available_ports_pools = pools
+        self._existing_vifs.update(vifs)
+        self._snapshot_generation = snapshot['generation']
+        self._snapshot_ports = set(vifs)
+        LOG.info("PORTS POOL: pools loaded from snapshot generation %d "
+                 "with %d ports, checking them on hand-out until they get "
+                 "verified in the background.",
+                 self._snapshot_generation, len(vifs))
+        self._create_healthcheck_file()
+        return True
+
+    @lockutils.synchronized('return_to_pool_baremetal')
+    @lockutils.synchronized('return_to_pool_nested')
+    def _verify_pools_snapshot(self):
+        """Verifies the pools loaded from the snapshot.
+
+        The pools are recovered from Neutron and K8s the same way they are
+        without a snapshot, but into separate dicts. Then the ports loaded
+        from the snapshot that are not available anymore are dropped from
+        the pools, the ones that are in a different pool or SG group are
+        moved and the available ports the snapshot missed are added. Ports
+        requested or created since the snapshot got loaded are left as they
+        are.
+        """
+        pools = collections.defaultdict(PortsPool)
+        vifs = {}
+        try:
+            self._recover_precreated_ports(pools, vifs)
+        except Exception:
+            LOG.exception("Error verifying the pools loaded from snapshot.")
+            self._snapshot_ports = None
+            return
+
+        verified = {port_id: (pool_key, sg_key)
+                    for pool_key, sg_pools in pools.items()
+                    for sg_key, ports in sg_pools.items()
+                    for port_id in ports}
+        outdated = collections.defaultdict(set)
+        for pool_key, sg_pools in self._available_ports_pools.items():
+            for sg_key, ports in sg_pools.items():
+                for port_id in ports:
+                    if (port_id in self._snapshot_ports and
+                            verified.get(port_id) != (pool_key, sg_key)):
+                        outdated[pool_key, sg_key].add(port_id)
+
+        for (pool_key, sg_key), port_ids in outdated.items():
+            sg_pools = self._available_ports_pools[pool_key]
+            sg_pools[sg_key] = [p for p in sg_pools[sg_key]
+                                if p not in port_ids]
+            for port_id in port_ids:
+                if port_id not in verified:
+                    self._existing_vifs.pop(port_id, None)
+
+        moved = set().union(*outdated.values())
+        added = 0
+        for port_id, (pool_key, sg_key) in verified.items():
+            if port_id in self._snapshot_ports and port_id not in moved:
+                continue
+            if port_id not in moved and port_id in self._existing_vifs:
+                # Requested or created since the snapshot got loaded.
+                continue
+            self._existing_vifs[port_id] = vifs[port_id]
+            self._available_ports_pools[pool_key].add(sg_key, port_id)
+            added += 1
+
+        LOG.info("PORTS POOL: pools snapshot verified, %d ports dropped and "
+                 "%d ports added or moved.",
+                 len(moved) - len(moved.intersection(verified)), added)
+        self._snapshot_ports = None
 
     def _create_healthcheck_file(self):
         # Note(ltomasbo): Create a health check file when the pre-created
@@ -410,14 +1181,16 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
         except OSError:
             pass
 
-        self._available_ports_pools = collections.defaultdict(
-            collections.OrderedDict)
+        self._available_ports_pools = collections.defaultdict(PortsPool)
         self._existing_vifs = collections.defaultdict()
         self._recyclable_ports = collections.defaultdict()
         self._lock = threading.Lock()
         self._populate_pool_lock = collections.defaultdict(threading.Lock)
         semaphore = eventlet.semaphore.Semaphore(BULK_PORTS_CREATION_REQUESTS)
         self._create_ports_semaphore = semaphore
+        self._pool_sizer = PoolSizer(
+            oslo_cfg.CONF.vif_pool.ports_pool_sizing_window)
+        self._hot_sgs = collections.defaultdict(collections.OrderedDict)
 
     def _get_trunks_info(self):
         """Returns information about trunks and their subports.
@@ -494,58 +1267,56 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
                                 subnet_id: utils.get_subnet(subnet_id)}
         return parent_ports, subports, subnets
 
-    def _cleanup_leftover_ports(self):
-        os_net = clients.get_network_client()
-        existing_ports = os_net.ports(device_owner=kl_const.DEVICE_OWNER,
-                                      status='DOWN')
-
-        tags = config.CONF.neutron_defaults.resource_tags
-        if tags:
-            nets = os_net.networks(tags=tags)
-            nets_ids = [n.id for n in nets]
-            for port in existing_ports:
-                net_id = port.network_id
-                if net_id in nets_ids:
-                    if port.binding_host_id:
-                        if set(tags).difference(set(port.tags)):
-                            # delete the port if it has binding details, it
-                            # belongs to the deployment subnet and it does not
-                            # have the right tags
-                            try:
-                                os_net.delete_port(port.id)
-                            except os_exc.SDKException:
-                                LOG.debug("Problem deleting leftover port %s. "
-                                          "Skipping.", port.id)
-                    else:
-                        # delete port if they have no binding but belong to the
-                        # deployment networks, regardless of their tagging
-                        try:
-                            os_net.delete_port(port.id)
-                        except os_exc.SDKException:
-                            LOG.debug("Problem deleting leftover port %s. "
-                                      "Skipping.", port.id)
-                            continue
+    def _cleanup_leftover_ports(self, snapshot=None):
+        if snapshot is None:
+            snapshot = gc.NeutronSnapshot()
+        existing_ports = snapshot.get_ports(device_owner=kl_const.DEVICE_OWNER)
+
+        if snapshot.tags:
+            nets_ids = {n.id for n in snapshot.get_networks(tagged=True)}
+            # delete the ports that belong to the deployment networks if they
+            # have no binding, regardless of their tagging, or if they have
+            # binding details but not the right tags
+            leftover_ports = [p for p in existing_ports
+                              if p.network_id in nets_ids and
+                              (not p.binding_host_id or
+                               not snapshot.is_tagged(p))]
         else:
-            c_utils.delete_ports([p for p in existing_ports
-                                  if not p.binding_host_id])
-
-    def _cleanup_removed_nodes(self):
-        """Remove ports associated to removed nodes."""
-        previous_ports_to_remove = []
-        while True:
-            # NOTE(ltomasbo): Nodes are not expected to be removed
-            # frequently, so there is no need to execute this frequently
-            # either
-            eventlet.sleep(NODE_PORTS_CLEAN_FREQUENCY)
+            leftover_ports = [p for p in existing_ports
+                              if not p.binding_host_id]
+        if leftover_ports:
+            self._forget_ports([p.id for p in leftover_ports])
+            c_utils.delete_ports(leftover_ports)
+
+    def _forget_ports(self, ports_id):
+        """Drops the VIFs of the ports being deleted by the cleanups."""
+        for port_id in ports_id:
             try:
-                self._trigger_removed_nodes_ports_cleanup(
-                    previous_ports_to_remove)
-            except Exception:
-                LOG.exception('Error while removing the ports associated to '
-                              'deleted nodes. It will be retried in %s '
-                              'seconds', NODE_PORTS_CLEAN_FREQUENCY)
+                del self._existing_vifs[port_id]
+            except KeyError:
+                LOG.debug('Port %s is not in the ports list.', port_id)
+
+    def cleanup_removed_nodes(self, snapshot):
+        """Remove ports associated to removed nodes.
 
-    def _trigger_removed_nodes_ports_cleanup(self, previous_ports_to_remove):
+        This is run as a garbage collector policy, registered once by the
+        controller service, but only every NODE_PORTS_CLEAN_FREQUENCY
+        seconds, as nodes are not expected to be removed frequently.
+        """
+        now = time.monotonic()
+        if now < self._next_nodes_cleanup:
+            return
+        self._next_nodes_cleanup = now + NODE_PORTS_CLEAN_FREQUENCY
+        try:
+            self._trigger_removed_nodes_ports_cleanup(
+                self._previous_ports_to_remove, snapshot)
+        except Exception:
+            LOG.exception('Error while removing the ports associated to '
+                          'deleted nodes. It will be retried in %s '
+                          'seconds', NODE_PORTS_CLEAN_FREQUENCY)
+
+    def _trigger_removed_nodes_ports_cleanup(self, previous_ports_to_remove,
+                                             snapshot):
         """Remove ports associated to removed nodes.
 
         There are two types of ports pool, one for neutron and one for nested.
@@ -563,25 +1334,24 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
             LOG.debug("Kuryr-controller not yet ready to perform nodes"
                       " cleanup.")
             return
-        os_net = clients.get_network_client()
-        tags = config.CONF.neutron_defaults.resource_tags
-        if tags:
+        ports_to_remove = []
+        if snapshot.tags:
             subnetpool_id = config.CONF.namespace_subnet.pod_subnet_pool
             if subnetpool_id:
-                subnets = os_net.subnets(tags=tags,
-                                         subnetpool_id=subnetpool_id)
-                subnets_ids = [s.id for s in subnets]
+                subnets_ids = [s.id for s in snapshot.get_subnets()
+                               if s.subnet_pool_id == subnetpool_id and
+                               snapshot.is_tagged(s)]
             else:
                 subnets_ids = [config.CONF.neutron_defaults.pod_subnet]
 
             # NOTE(ltomasbo): Detached subports gets their device_owner unset
-            detached_subports = os_net.ports(status='DOWN', tags=tags)
+            # FIXME(ltomasbo): Looking for trunk:subport is only needed
+            # due to a bug in neutron that does not reset the
+            # device_owner after the port is detached from the trunk
+            detached_subports = (
+                snapshot.get_ports(device_owner='', tagged=True) +
+                snapshot.get_ports(device_owner='trunk:subport', tagged=True))
             for subport in detached_subports:
-                # FIXME(ltomasbo): Looking for trunk:subport is only needed
-                # due to a bug in neutron that does not reset the
-                # device_owner after the port is detached from the trunk
-                if subport.device_owner not in ['', 'trunk:subport']:
-                    continue
                 if subport.id not in previous_ports_to_remove:
                     # FIXME(ltomasbo): Until the above problem is there,
                     # we need to add protection for recently created ports
@@ -597,24 +1367,15 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
                     continue
                 if subport.fixed_ips[0].get('subnet_id') not in subnets_ids:
                     continue
-                try:
-                    del self._existing_vifs[subport.id]
-                except KeyError:
-                    LOG.debug('Port %s is not in the ports list.', subport.id)
-                port_deleted = c_utils.delete_port(subport)
-                if port_deleted:
-                    previous_ports_to_remove.remove(subport.id)
+                ports_to_remove.append(subport)
 
             # normal ports, or subports not yet attached
-            existing_ports = os_net.ports(
-                device_owner=kl_const.DEVICE_OWNER,
-                status='DOWN',
-                tags=tags)
+            existing_ports = snapshot.get_ports(
+                device_owner=kl_const.DEVICE_OWNER, tagged=True)
         else:
             # normal ports, or subports not yet attached
-            existing_ports = os_net.ports(
-                device_owner=kl_const.DEVICE_OWNER,
-                status='DOWN')
+            existing_ports = snapshot.get_ports(
+                device_owner=kl_const.DEVICE_OWNER)
 
         for port in existing_ports:
             # NOTE(ltomasbo): It may be that the port got just created and it
@@ -624,17 +1385,15 @@ class BaseVIFPool(base.VIFPoolDriver, metaclass=abc.ABCMeta):
                 continue
 
             if not port.binding_host_id:
-                try:
-                    del self._existing_vifs[port.id]
-                except KeyError:
-                    LOG.debug('Port %s is not in the ports list.', port.id)
-                try:
-                    os_net.delete_port(port.id)
-                except os_exc.SDKException:
-                    LOG.debug("Problem deleting leftover port %s. "
-                              "Skipping.", port.id)
-                else:
-                    previous_ports_to_remove.remove(port.id)
+                ports_to_remove.append(port)
+
+        self._forget_ports([port.id for port in ports_to_remove])
+        epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+        for port, deleted in zip(ports_to_remove,
+                                 epool.imap(c_utils.delete_port,
+                                            ports_to_remove)):
+            if deleted:
+                previous_ports_to_remove.remove(port.id)
 
 
 class NeutronVIFPool(BaseVIFPool):
@@ -668,6 +1427,9 @@ class NeutronVIFPool(BaseVIFPool):
                     'Error while returning ports to pool. '
                     'It will be retried in %s seconds',
                     oslo_cfg.CONF.vif_pool.ports_pool_update_frequency)
+            self._resize_pools()
+            self._prepare_pools_sgs()
+            self._save_pools_snapshot()
 
     @lockutils.synchronized('return_to_pool_baremetal')
     def _trigger_return_to_pool(self):
@@ -675,60 +1437,93 @@ class NeutronVIFPool(BaseVIFPool):
             LOG.debug("Kuryr-controller not yet ready to return ports to "
                       "pools.")
             return
-        os_net = clients.get_network_client()
+        if not self._recyclable_ports:
+            return
         sg_current = {}
         if not config.CONF.kubernetes.port_debug:
             attrs = {'device_owner': kl_const.DEVICE_OWNER}
             tags = config.CONF.neutron_defaults.resource_tags
             if tags:
                 attrs['tags'] = tags
+            sg_current = c_utils.get_ports_sgs(list(self._recyclable_ports),
+                                               **attrs)
 
-            for port in os_net.ports(**attrs):
-                if port.id in self._recyclable_ports:
-                    sg_current[port.id] = tuple(sorted(
-                        port.security_group_ids))
-
+        pool_max = oslo_cfg.CONF.vif_pool.ports_pool_max
+        reused = []
+        deleted = collections.defaultdict(list)
+        pending = collections.Counter()
         for port_id, pool_key in list(self._recyclable_ports.items()):
-            if (not oslo_cfg.CONF.vif_pool.ports_pool_max or
-                self._get_pool_size(pool_key) <
-                    oslo_cfg.CONF.vif_pool.ports_pool_max):
-                port_name = (constants.KURYR_PORT_NAME
-                             if config.CONF.kubernetes.port_debug
-                             else '')
-                if config.CONF.kubernetes.port_debug:
-                    try:
-                        os_net.update_port(port_id, name=port_name,
-                                           device_id='')
-                    except os_exc.SDKException:
-                        LOG.warning("Error changing name for port %s to be "
-                                    "reused, put back on the cleanable "
-                                    "pool.", port_id)
-                        continue
-                sg = sg_current.get(port_id)
-                self._available_ports_pools[pool_key].setdefault(
-                        sg, []).append(port_id)
-                # Move it to the end of ports to update the SG.
-                self._available_ports_pools[pool_key].move_to_end(sg)
+            if (not pool_max or
+                    self._get_pool_size(pool_key) + pending[pool_key] <
+                    pool_max):
+                reused.append((port_id, pool_key))
+                pending[pool_key] += 1
             else:
-                try:
-                    del self._existing_vifs[port_id]
-                    os_net.delete_port(port_id)
-                except KeyError:
-                    LOG.debug('Port %s is not in the ports list.', port_id)
+                deleted[pool_key].append(port_id)
+                del self._recyclable_ports[port_id]
+
+        results = [None] * len(reused)
+        if config.CONF.kubernetes.port_debug and reused:
+            epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+            results = epool.imap(
+                functools.partial(c_utils.update_neutron_port,
+                                  name=constants.KURYR_PORT_NAME,
+                                  device_id=''),
+                [port[0] for port in reused])
+        for (port_id, pool_key), result in zip(reused, results):
+            if result:
+                LOG.warning("Error changing name for port %s to be reused, "
+                            "put back on the cleanable pool.", port_id)
+                continue
+            sg = sg_current.get(port_id)
+            # This moves it to the end of ports to update the SG.
+            self._available_ports_pools[pool_key].add(sg, port_id)
             try:
                 del self._recyclable_ports[port_id]
             except KeyError:
                 LOG.debug('Port already recycled: %s', port_id)
+        for pool_key, ports_id in deleted.items():
+            try:
+                self._delete_pool_ports(pool_key, ports_id)
+            except Exception:
+                LOG.exception('Error deleting the ports over the limit of '
+                              'pool %s, put back on the cleanable pool.',
+                              pool_key)
+                for port_id in ports_id:
+                    self._recyclable_ports[port_id] = pool_key
 
     def sync_pools(self):
         super(NeutronVIFPool, self).sync_pools()
+        if self._load_pools_snapshot():
+            self._recovered_pools = True
+            eventlet.spawn(self._cleanup_leftover_ports)
+            eventlet.spawn(self._verify_pools_snapshot)
+            self._start_pools_warm_up()
+            return
         # NOTE(ltomasbo): Ensure previously created ports are recovered into
         # their respective pools
         self._cleanup_leftover_ports()
         self._recover_precreated_ports()
         self._recovered_pools = True
+        self._start_pools_warm_up()
+
+    def _request_pool_vifs(self, pool_key, pod, subnets, security_groups,
+                           num_ports):
+        if pod is None:
+            # NOTE: The pod is needed to bind the ports to its node, so only
+            # the pools requested from since the sync can be warmed up.
+            LOG.debug("No pod requested ports from pool %s yet, not warming "
+                      "it up.", pool_key)
+            return []
+        return self._drv_vif.request_vifs(
+            pod=pod,
+            project_id=pool_key[1],
+            subnets=subnets,
+            security_groups=list(security_groups),
+            num_ports=num_ports,
+            semaphore=self._create_ports_semaphore)
 
-    def _recover_precreated_ports(self):
+    def _recover_precreated_ports(self, pools=None, vifs=None):
         os_net = clients.get_network_client()
         attrs = {'device_owner': kl_const.DEVICE_OWNER}
         tags = config.CONF.neutron_defaults.resource_tags
@@ -745,6 +1540,11 @@ class NeutronVIFPool(BaseVIFPool):
                                if port.id not in in_use_ports]
 
         _, available_subports, _ = self._get_trunks_info()
+        if available_ports:
+            if pools is None:
+                pools = self._available_ports_pools
+            if vifs is None:
+                vifs = self._existing_vifs
         for port in available_ports:
             # NOTE(ltomasbo): ensure subports are not considered for
             # recovering in the case of multi pools
@@ -766,13 +1566,26 @@ class NeutronVIFPool(BaseVIFPool):
                                           port.project_id,
                                           net_obj.id, None)
 
-            self._existing_vifs[port.id] = vif
-            self._available_ports_pools[pool_key].setdefault(
-                    tuple(sorted(port.security_group_ids)), []).append(port.id)
+            vifs[port.id] = vif
+            pools[pool_key].add(tuple(sorted(port.security_group_ids)),
+                                port.id)
 
         LOG.info("PORTS POOL: pools updated with pre-created ports")
         self._create_healthcheck_file()
 
+    def _delete_pool_ports(self, pool_key, ports_id):
+        for port_id in ports_id:
+            try:
+                del self._existing_vifs[port_id]
+            except KeyError:
+                LOG.debug('Port %s is not in the ports list.', port_id)
+
+        epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+        for result in epool.imap(c_utils.delete_neutron_port, ports_id):
+            if result:
+                LOG.error('During Neutron port deletion an error occured: %s',
+                          result)
+
     def delete_network_pools(self, net_id):
         if not self._recovered_pools:
             LOG.debug("Kuryr-controller not yet ready to delete network "
@@ -835,6 +1648,24 @@ class NestedVIFPool(BaseVIFPool):
     def set_vif_driver(self, driver):
         self._drv_vif = driver
 
+    def _forget_ports(self, ports_id):
+        """Also releases the VLAN IDs of the ports, if their trunk is known.
+
+        The trunk is looked up from the pool the port is in, as Neutron does
+        not tell it for the detached subports the cleanups find.
+        """
+        pool_keys = {port_id: pool_key
+                     for pool_key, sg_pools in list(
+                         self._available_ports_pools.items())
+                     for ports in sg_pools.values()
+                     for port_id in ports}
+        for port_id in ports_id:
+            vif = self._existing_vifs.get(port_id)
+            trunk_id = self._known_trunk_ids.get(pool_keys.get(port_id))
+            if vif is not None and trunk_id:
+                self._drv_vif._release_vlan_id(trunk_id, vif.vlan_id)
+        super(NestedVIFPool, self)._forget_ports(ports_id)
+
     def release_vif(self, pod, vif, project_id):
         if not self._recovered_pools:
             LOG.debug("Kuryr-controller not yet ready to remove pods.")
@@ -884,6 +1715,9 @@ class NestedVIFPool(BaseVIFPool):
                     'Error while returning ports to pool. '
                     'It will be retried in %s seconds',
                     oslo_cfg.CONF.vif_pool.ports_pool_update_frequency)
+            self._resize_pools()
+            self._prepare_pools_sgs()
+            self._save_pools_snapshot()
 
     @lockutils.synchronized('return_to_pool_nested')
     def _trigger_return_to_pool(self):
@@ -891,56 +1725,61 @@ class NestedVIFPool(BaseVIFPool):
             LOG.debug("Kuryr-controller not yet ready to return ports to "
                       "pools.")
             return
-        os_net = clients.get_network_client()
+        if not self._recyclable_ports:
+            return
         sg_current = {}
         if not config.CONF.kubernetes.port_debug:
             attrs = {'device_owner': ['trunk:subport', kl_const.DEVICE_OWNER]}
             tags = config.CONF.neutron_defaults.resource_tags
             if tags:
                 attrs['tags'] = tags
-            kuryr_subports = os_net.ports(**attrs)
-            for subport in kuryr_subports:
-                if subport.id in self._recyclable_ports:
-                    sg_current[subport.id] = tuple(sorted(
-                        subport.security_group_ids))
+            sg_current = c_utils.get_ports_sgs(list(self._recyclable_ports),
+                                               **attrs)
 
+        pool_max = oslo_cfg.CONF.vif_pool.ports_pool_max
+        reused = []
+        deleted = collections.defaultdict(list)
+        pending = collections.Counter()
         for port_id, pool_key in list(self._recyclable_ports.items()):
-            if (not oslo_cfg.CONF.vif_pool.ports_pool_max or
-                self._get_pool_size(pool_key) <
-                    oslo_cfg.CONF.vif_pool.ports_pool_max):
-                port_name = (constants.KURYR_PORT_NAME
-                             if config.CONF.kubernetes.port_debug
-                             else '')
-                if config.CONF.kubernetes.port_debug:
-                    try:
-                        os_net.update_port(port_id, name=port_name)
-                    except os_exc.SDKException:
-                        LOG.warning("Error changing name for port %s to be "
-                                    "reused, put back on the cleanable "
-                                    "pool.", port_id)
-                        continue
-                sg = sg_current.get(port_id)
-                self._available_ports_pools[pool_key].setdefault(
-                    sg, []).append(port_id)
-                # Move it to the end of ports to update the SG.
-                self._available_ports_pools[pool_key].move_to_end(sg)
+            if (not pool_max or
+                    self._get_pool_size(pool_key) + pending[pool_key] <
+                    pool_max):
+                reused.append((port_id, pool_key))
+                pending[pool_key] += 1
             else:
-                trunk_id = self._get_trunk_id(pool_key)
-                try:
-                    self._drv_vif._remove_subport(trunk_id, port_id)
-                    self._drv_vif._release_vlan_id(
-                        self._existing_vifs[port_id].vlan_id)
-                    del self._existing_vifs[port_id]
-                    os_net.delete_port(port_id)
-                except KeyError:
-                    LOG.debug('Port %s is not in the ports list.', port_id)
-                except (os_exc.SDKException, os_exc.HttpException):
-                    LOG.warning('Error removing the subport %s', port_id)
-                    continue
+                deleted[pool_key].append(port_id)
+                del self._recyclable_ports[port_id]
+
+        results = [None] * len(reused)
+        if config.CONF.kubernetes.port_debug and reused:
+            epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+            results = epool.imap(
+                functools.partial(c_utils.update_neutron_port,
+                                  name=constants.KURYR_PORT_NAME),
+                [port[0] for port in reused])
+        for (port_id, pool_key), result in zip(reused, results):
+            if result:
+                LOG.warning("Error changing name for port %s to be reused, "
+                            "put back on the cleanable pool.", port_id)
+                continue
+            sg = sg_current.get(port_id)
+            # This moves it to the end of ports to update the SG.
+            self._available_ports_pools[pool_key].add(sg, port_id)
             try:
                 del self._recyclable_ports[port_id]
             except KeyError:
                 LOG.debug('Port already recycled: %s', port_id)
+        # NOTE: The subports are detached from each trunk in a single call,
+        # the ones failing to be detached are put back for a retry.
+        for pool_key, ports_id in deleted.items():
+            try:
+                self._delete_pool_ports(pool_key, ports_id)
+            except Exception:
+                LOG.exception('Error deleting the ports over the limit of '
+                              'pool %s, put back on the cleanable pool.',
+                              pool_key)
+                for port_id in ports_id:
+                    self._recyclable_ports[port_id] = pool_key
 
     def _get_trunk_id(self, pool_key):
         trunk_id = self._known_trunk_ids.get(pool_key, None)
@@ -952,21 +1791,42 @@ class NestedVIFPool(BaseVIFPool):
 
     def sync_pools(self):
         super(NestedVIFPool, self).sync_pools()
+        if self._load_pools_snapshot():
+            self._recovered_pools = True
+            eventlet.spawn(self._cleanup_leftover_ports)
+            eventlet.spawn(self._verify_pools_snapshot)
+            self._start_pools_warm_up()
+            return
         # NOTE(ltomasbo): Ensure previously created ports are recovered into
         # their respective pools
         self._recover_precreated_ports()
         self._recovered_pools = True
         eventlet.spawn(self._cleanup_leftover_ports)
+        self._start_pools_warm_up()
+
+    def _request_pool_vifs(self, pool_key, pod, subnets, security_groups,
+                           num_ports):
+        # NOTE: Subports are attached to the trunk of the pool node, which
+        # is known from the pool key, so no pod is needed.
+        return self._drv_vif.request_vifs(
+            pod=[],
+            project_id=pool_key[1],
+            subnets=subnets,
+            security_groups=list(security_groups),
+            num_ports=num_ports,
+            trunk_ip=pool_key[0],
+            semaphore=self._create_ports_semaphore)
 
-    def _recover_precreated_ports(self):
-        self._precreated_ports(action='recover')
+    def _recover_precreated_ports(self, pools=None, vifs=None):
+        self._precreated_ports(action='recover', pools=pools, vifs=vifs)
         LOG.info("PORTS POOL: pools updated with pre-created ports")
         self._create_healthcheck_file()
 
     def _remove_precreated_ports(self, trunk_ips=None):
         self._precreated_ports(action='free', trunk_ips=trunk_ips)
 
-    def _precreated_ports(self, action, trunk_ips=None):
+    def _precreated_ports(self, action, trunk_ips=None, pools=None,
+                          vifs=None):
         """Removes or recovers pre-created subports at given pools
 
         This function handles the pre-created ports based on the given action:
@@ -974,9 +1834,13 @@ class NestedVIFPool(BaseVIFPool):
         trunk ports, or from all the trunk ports if no trunk_ips are passed.
         - If action is `recover` it will discover the existing subports in the
         given trunk ports (or in all of them if none are passed) and will add
-        them (and the needed information) to the respective pools.
+        them (and the needed information) to the respective pools, or to the
+        `pools` and `vifs` dicts if they are passed.
         """
-        os_net = clients.get_network_client()
+        if pools is None:
+            pools = self._available_ports_pools
+        if vifs is None:
+            vifs = self._existing_vifs
         # Note(ltomasbo): ML2/OVS changes the device_owner to trunk:subport
         # when a port is attached to a trunk. However, that is not the case
         # for other ML2 drivers, such as ODL. So we also need to look for
@@ -996,11 +1860,8 @@ class NestedVIFPool(BaseVIFPool):
                               if p_id not in trunks_subports]
         for port_id in port_ids_to_delete:
             LOG.debug("Deleting port with wrong status: %s", port_id)
-            try:
-                os_net.delete_port(port_id)
-            except os_exc.SDKException:
-                LOG.exception('Error removing the port %s', port_id)
 
+        subports_to_free = collections.defaultdict(list)
         for trunk_id, parent_port in parent_ports.items():
             host_addr = parent_port.get('ip')
             if trunk_ips and host_addr not in trunk_ips:
@@ -1022,31 +1883,59 @@ class NestedVIFPool(BaseVIFPool):
                     vif = ovu.neutron_to_osvif_vif_nested_vlan(
                         kuryr_subport, subnet, subport['segmentation_id'])
 
-                    self._existing_vifs[kuryr_subport.id] = vif
-                    self._available_ports_pools[pool_key].setdefault(
+                    vifs[kuryr_subport.id] = vif
+                    pools[pool_key].add(
                         tuple(sorted(kuryr_subport.security_group_ids)),
-                        []).append(kuryr_subport.id)
+                        kuryr_subport.id)
 
                 elif action == 'free':
+                    sg_key = tuple(sorted(kuryr_subport.security_group_ids))
+                    # Take it out of the pool first, so that it is not handed
+                    # to a pod while being removed.
                     try:
-                        self._drv_vif._remove_subport(trunk_id,
-                                                      kuryr_subport.id)
-                        os_net.delete_port(kuryr_subport.id)
-                        self._drv_vif._release_vlan_id(
-                            subport['segmentation_id'])
-                        del self._existing_vifs[kuryr_subport.id]
-                        self._available_ports_pools[pool_key][
-                            tuple(sorted(kuryr_subport.security_group_ids
-                                         ))].remove(kuryr_subport.id)
-                    except KeyError:
-                        LOG.debug('Port %s is not in the ports list.',
-                                  kuryr_subport.id)
-                    except (os_exc.SDKException, os_exc.HttpException):
-                        LOG.warning('Error removing the subport %s',
-                                    kuryr_subport.id)
-                    except ValueError:
+                        self._available_ports_pools[pool_key].remove(
+                            sg_key, kuryr_subport.id)
+                    except (KeyError, ValueError):
                         LOG.debug('Port %s is not in the available ports '
                                   'pool.', kuryr_subport.id)
+                        sg_key = None
+                    subports_to_free[trunk_id].append(
+                        (kuryr_subport.id, subport['segmentation_id'],
+                         pool_key, sg_key))
+
+        # NOTE: The subports of each trunk are detached with a single call and
+        # all the ports are then deleted concurrently.
+        for trunk_id, subports in subports_to_free.items():
+            try:
+                self._drv_vif._remove_subports(
+                    trunk_id, [subport[0] for subport in subports])
+            except os_exc.NotFoundException:
+                # We don't know which subport was already removed, but we'll
+                # attempt a manual detach on DELETE error, so just continue.
+                pass
+            except (os_exc.SDKException, os_exc.HttpException):
+                LOG.warning('Error removing the subports of trunk %s',
+                            trunk_id)
+                for port_id, _vlan_id, pool_key, sg_key in subports:
+                    if sg_key is not None:
+                        self._available_ports_pools[pool_key].add(sg_key,
+                                                                  port_id)
+                continue
+
+            for port_id, vlan_id, _pool_key, _sg_key in subports:
+                self._drv_vif._release_vlan_id(trunk_id, vlan_id)
+                try:
+                    del self._existing_vifs[port_id]
+                except KeyError:
+                    LOG.debug('Port %s is not in the ports list.', port_id)
+                port_ids_to_delete.append(port_id)
+
+        epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+        for result in epool.imap(c_utils.delete_neutron_port,
+                                 port_ids_to_delete):
+            if result:
+                LOG.error('During Neutron port deletion an error occured: %s',
+                          result)
 
     @lockutils.synchronized('return_to_pool_nested')
     def populate_pool(self, trunk_ip, project_id, subnets, security_groups):
@@ -1098,8 +1987,38 @@ class NestedVIFPool(BaseVIFPool):
         pool_key = self._get_pool_key(trunk_ip, project_id, None, subnets)
         for vif in vifs:
             self._existing_vifs[vif.id] = vif
-            self._available_ports_pools[pool_key].setdefault(
-                tuple(sorted(security_groups)), []).append(vif.id)
+            self._available_ports_pools[pool_key].add(
+                tuple(sorted(security_groups)), vif.id)
+
+    def _delete_pool_ports(self, pool_key, ports_id):
+        trunk_id = self._get_trunk_id(pool_key)
+        try:
+            self._drv_vif._remove_subports(trunk_id, ports_id)
+        except os_exc.NotFoundException:
+            # We don't know which subport was already removed, but we'll
+            # attempt a manual detach on DELETE error, so just continue.
+            pass
+        except (os_exc.SDKException, os_exc.HttpException):
+            LOG.exception('Error removing subports from trunk: %s', trunk_id)
+            # NOTE: Hand the ports over to the recycling loop, which puts
+            # them back into the pool with their current SGs.
+            for port_id in ports_id:
+                self._recyclable_ports[port_id] = pool_key
+            return
+
+        for port_id in ports_id:
+            try:
+                self._drv_vif._release_vlan_id(
+                    trunk_id, self._existing_vifs[port_id].vlan_id)
+                del self._existing_vifs[port_id]
+            except KeyError:
+                LOG.debug('Port %s is not in the ports list.', port_id)
+
+        epool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+        for result in epool.imap(c_utils.delete_neutron_port, ports_id):
+            if result:
+                LOG.error('During Neutron port deletion an error occured: %s',
+                          result)
 
     def free_pool(self, trunk_ips=None):
         """Removes subports from the pool and deletes neutron port resource.
@@ -1144,7 +2063,7 @@ class NestedVIFPool(BaseVIFPool):
             for port_id in ports_id:
                 try:
                     self._drv_vif._release_vlan_id(
-                        self._existing_vifs[port_id].vlan_id)
+                        trunk_id, self._existing_vifs[port_id].vlan_id)
                     del self._existing_vifs[port_id]
                 except KeyError:
                     LOG.debug('Port %s is not in the ports list.', port_id)
@@ -1245,6 +2164,28 @@ class MultiVIFPool(base.VIFPoolDriver):
         for vif_drv in self._vif_drvs.values():
             vif_drv.sync_pools()
 
+    def cleanup_removed_nodes(self, snapshot):
+        for vif_drv in self._vif_drvs.values():
+            if str(vif_drv) == 'NoopVIFPool':
+                continue
+            vif_drv.cleanup_removed_nodes(snapshot)
+
+    def list_pool_sizes(self):
+        sizes = {}
+        for vif_drv in self._vif_drvs.values():
+            if str(vif_drv) == 'NoopVIFPool':
+                continue
+            sizes.update(vif_drv.list_pool_sizes())
+        return sizes
+
+    def list_pools_stats(self):
+        stats = {}
+        for vif_drv in self._vif_drvs.values():
+            if str(vif_drv) == 'NoopVIFPool':
+                continue
+            stats.update(vif_drv.list_pools_stats())
+        return stats
+
     def _get_pod_vif_type(self, pod):
         node_name = pod['spec']['nodeName']
         return self._get_node_vif_driver(node_name)
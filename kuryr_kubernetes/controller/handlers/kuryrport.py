@@ -27,6 +27,7 @@ from kuryr_kubernetes.controller.drivers import utils as driver_utils
 from kuryr_kubernetes.controller.managers import prometheus_exporter as exp
 from kuryr_kubernetes import exceptions as k_exc
 from kuryr_kubernetes.handlers import k8s_base
+from kuryr_kubernetes import informer
 from kuryr_kubernetes import utils
 
 
@@ -266,10 +267,7 @@ class KuryrPortHandler(k8s_base.ResourceEventHandler):
 
     def get_vifs(self, kuryrport_crd):
         try:
-            pod = self.k8s.get(f"{constants.K8S_API_NAMESPACES}"
-                               f"/{kuryrport_crd['metadata']['namespace']}"
-                               f"/pods"
-                               f"/{kuryrport_crd['metadata']['name']}")
+            pod = self._get_cached_pod(kuryrport_crd)
             if pod['metadata']['uid'] != kuryrport_crd['spec']['podUid']:
                 # Seems like this is KuryrPort created for an old Pod, deleting
                 # it anyway.
@@ -389,12 +387,18 @@ class KuryrPortHandler(k8s_base.ResourceEventHandler):
                 pod_creation_sec = (pod_creation_time).total_seconds()
                 exporter.record_pod_creation_metric(pod_creation_sec)
 
+    def _get_cached_pod(self, kuryrport_crd):
+        name = kuryrport_crd['metadata']['name']
+        namespace = kuryrport_crd['metadata']['namespace']
+        pod = informer.get_object(constants.K8S_OBJ_POD, name, namespace)
+        if pod:
+            return pod
+        return self.k8s.get(f"{constants.K8S_API_NAMESPACES}"
+                            f"/{namespace}/pods/{name}")
+
     def _get_pod(self, kuryrport_crd):
         try:
-            name = kuryrport_crd['metadata']['name']
-            namespace = kuryrport_crd['metadata']['namespace']
-            return self.k8s.get(f"{constants.K8S_API_NAMESPACES}"
-                                f"/{namespace}/pods/{name}")
+            return self._get_cached_pod(kuryrport_crd)
         except k_exc.K8sResourceNotFound as ex:
             self.k8s.add_event(kuryrport_crd, 'KuryrFailedGettingPod'
                                f'Failed to get corresponding pod: {ex}',
@@ -16,6 +16,7 @@
 import time
 
 from oslo_log import log as logging
+from oslo_utils import excutils
 
 from kuryr_kubernetes import clients
 from kuryr_kubernetes import config
@@ -167,13 +168,13 @@ class KuryrLoadBalancerHandler(k8s_base.ResourceEventHandler):
                     self._patch_status(loadbalancer_crd)
 
     def reconcile(self):
-        loadbalancer_crds = []
+        # NOTE: KuryrLoadBalancers are listed in chunks while they're
+        # being processed, so listing errors surface from the reconciliation.
+        loadbalancer_crds = driver_utils.get_kuryrloadbalancer_crds()
         try:
-            loadbalancer_crds = driver_utils.get_kuryrloadbalancer_crds()
+            self._trigger_reconciliation(loadbalancer_crds)
         except k_exc.K8sClientException:
             LOG.warning("Error retriving KuryrLoadBalanders CRDs")
-        try:
-            self._trigger_reconciliation(loadbalancer_crds)
         except Exception:
             LOG.exception('Error while running loadbalancers reconciliation.')
 
@@ -455,9 +456,13 @@ class KuryrLoadBalancerHandler(k8s_base.ResourceEventHandler):
             except KeyError:
                 continue
 
-        current_targets = [(str(m['ip']), m['port'], m['pool_id'])
+        current_targets = {(str(m['ip']), m['port'], m['pool_id'])
                            for m in loadbalancer_crd['status'].get(
-                               'members', [])]
+                               'members', [])}
+
+        # Members are collected per pool first, so that they can be created
+        # in bulk and the status is only patched once.
+        new_members = {}
 
         for ep_slice in loadbalancer_crd['spec']['endpointSlices']:
             ep_slices_ports = ep_slice.get('ports', [])
@@ -468,19 +473,13 @@ class KuryrLoadBalancerHandler(k8s_base.ResourceEventHandler):
                     target_namespace = None
                     if target_ref:
                         target_namespace = target_ref['namespace']
-                    # Avoid to point to a Pod on hostNetwork
-                    # that isn't the one to be added as Member.
-                    if not target_ref and utils.get_subnet_by_ip(
-                            self._get_nodes_subnets(),
-                            target_ip):
-                        target_pod = {}
-                    else:
-                        target_pod = utils.get_pod_by_ip(
-                            target_ip, target_namespace)
                 except KeyError:
                     continue
                 if not pool_by_tgt_name:
                     continue
+                # NOTE: The Pod is only looked up once it's known that a
+                #       member needs to be created for the endpoint.
+                target_pod = None
                 for ep_slice_port in ep_slices_ports:
                     target_port = ep_slice_port['port']
                     port_name = ep_slice_port.get('name')
@@ -493,6 +492,10 @@ class KuryrLoadBalancerHandler(k8s_base.ResourceEventHandler):
                     if (target_ip, target_port, pool['id']) in current_targets:
                         continue
 
+                    if target_pod is None:
+                        target_pod = self._get_target_pod(
+                            target_ip, target_ref, target_namespace)
+
                     member_subnet_id = self._get_subnet_by_octavia_mode(
                         target_pod, target_ip, loadbalancer_crd)
 
@@ -510,42 +513,55 @@ class KuryrLoadBalancerHandler(k8s_base.ResourceEventHandler):
                     target_name, target_namespace = self._get_target_info(
                         target_ref, loadbalancer_crd)
 
-                    first_member_of_the_pool = True
-                    for member in loadbalancer_crd['status'].get(
-                            'members', []):
-                        if pool['id'] == member['pool_id']:
-                            first_member_of_the_pool = False
-                            break
-                    if first_member_of_the_pool:
-                        listener_port = lsnr_by_id[pool['listener_id']][
-                            'port']
-                    else:
-                        listener_port = None
-                    loadbalancer = loadbalancer_crd['status']['loadbalancer']
-                    member = self._drv_lbaas.ensure_member(
-                        loadbalancer=loadbalancer,
-                        pool=pool,
-                        subnet_id=member_subnet_id,
-                        ip=target_ip,
-                        port=target_port,
-                        target_ref_namespace=target_namespace,
-                        target_ref_name=target_name,
-                        listener_port=listener_port)
-                    if not member:
-                        continue
-                    members = loadbalancer_crd['status'].get('members', [])
-                    if members:
-                        loadbalancer_crd['status'].get('members', []).append(
-                            member)
-                    else:
-                        loadbalancer_crd['status']['members'] = []
-                        loadbalancer_crd['status'].get('members', []).append(
-                            member)
-                    if not self._patch_status(loadbalancer_crd):
-                        return False
-                    changed = True
+                    current_targets.add((target_ip, target_port, pool['id']))
+                    new_members.setdefault(pool['id'], (pool, []))[1].append({
+                        'subnet_id': member_subnet_id,
+                        'ip': target_ip,
+                        'port': target_port,
+                        'target_ref_namespace': target_namespace,
+                        'target_ref_name': target_name})
+
+        for pool, members in new_members.values():
+            first_member_of_the_pool = True
+            for member in loadbalancer_crd['status'].get('members', []):
+                if pool['id'] == member['pool_id']:
+                    first_member_of_the_pool = False
+                    break
+            if first_member_of_the_pool:
+                listener_port = lsnr_by_id[pool['listener_id']]['port']
+            else:
+                listener_port = None
+            loadbalancer = loadbalancer_crd['status']['loadbalancer']
+            try:
+                members = self._drv_lbaas.ensure_members(
+                    loadbalancer=loadbalancer,
+                    pool=pool,
+                    members=members,
+                    listener_port=listener_port)
+            except Exception:
+                # Save the members already created for the other pools, so
+                # that the retry doesn't need to look them up again.
+                with excutils.save_and_reraise_exception():
+                    if changed:
+                        self._patch_status(loadbalancer_crd)
+            if not members:
+                continue
+            loadbalancer_crd['status'].setdefault('members', []).extend(
+                members)
+            changed = True
+
+        if changed and not self._patch_status(loadbalancer_crd):
+            return False
         return changed
 
+    def _get_target_pod(self, target_ip, target_ref, target_namespace):
+        # Avoid to point to a Pod on hostNetwork that isn't the one to be
+        # added as Member.
+        if not target_ref and utils.get_subnet_by_ip(
+                self._get_nodes_subnets(), target_ip):
+            return {}
+        return utils.get_pod_by_ip(target_ip, target_namespace)
+
     def _get_target_info(self, target_ref, loadbalancer_crd):
         if target_ref:
             target_namespace = target_ref['namespace']
@@ -16,13 +16,14 @@
 from requests import exceptions as requests_exc
 
 from keystoneauth1 import exceptions as key_exc
+from oslo_config import cfg
 
 from kuryr_kubernetes import exceptions
-from kuryr_kubernetes.handlers import asynchronous as h_async
 from kuryr_kubernetes.handlers import dispatch as h_dis
 from kuryr_kubernetes.handlers import k8s_base as h_k8s
 from kuryr_kubernetes.handlers import logging as h_log
 from kuryr_kubernetes.handlers import retry as h_retry
+from kuryr_kubernetes.handlers import workqueue as h_workqueue
 
 
 class ControllerPipeline(h_dis.EventPipeline):
@@ -48,8 +49,11 @@ class ControllerPipeline(h_dis.EventPipeline):
 
       - events for different Kubernetes objects can be handled concurrently
 
-      - events for the same Kubernetes object are handled sequentially in
-        the order of arrival
+      - events for the same Kubernetes object are handled sequentially and
+        only the latest event queued for an object is handled
+
+      - failing handlers are retried by requeuing the event rather than by
+        sleeping, so they don't hold a worker while backing off
     """
 
     def __init__(self, thread_group):
@@ -67,6 +71,6 @@ class ControllerPipeline(h_dis.EventPipeline):
             ignore_exceptions=(exceptions.KuryrLoadBalancerNotCreated,))
 
     def _wrap_dispatcher(self, dispatcher):
-        return h_log.LogExceptions(h_async.Async(dispatcher, self._tg,
-                                                 h_k8s.object_uid,
-                                                 h_k8s.object_info))
+        return h_log.LogExceptions(h_workqueue.WorkQueue(
+            dispatcher, self._tg, h_k8s.object_uid, h_k8s.object_info,
+            workers=cfg.CONF.kubernetes.event_workers))
@@ -0,0 +1,291 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import eventlet
+from kuryr.lib import constants as kl_const
+from openstack import exceptions as os_exc
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from kuryr_kubernetes import clients
+from kuryr_kubernetes import constants
+from kuryr_kubernetes.controller.drivers import utils as c_utils
+from kuryr_kubernetes import exceptions
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+# Seconds a resource has to stay unchanged to be considered a dead one.
+ZOMBIE_AGE = 600
+# Maximum number of network IDs sent as filter in a single request.
+NETWORKS_ID_FILTER_CHUNK = 100
+
+
+def _chunks(items, size):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _delete_neutron_resources(delete, resources):
+    """Deletes resources concurrently, logging the ones that failed."""
+    def _delete(resource):
+        try:
+            delete(resource)
+        except os_exc.SDKException as ex:
+            LOG.warning('There was an issue with removing %s: %s',
+                        resource, ex)
+
+    pool = eventlet.GreenPool(constants.LEFTOVER_RM_POOL_SIZE)
+    for resource in resources:
+        pool.spawn_n(_delete, resource)
+    pool.waitall()
+
+
+class NeutronSnapshot(object):
+    """Neutron resources listed once for a garbage collection cycle.
+
+    The DOWN ports, the networks created by Kuryr, i.e. the ones tagged or
+    described with the resource_tags, and their subnets are each listed with
+    a single request the first time a cleanup policy needs them, and indexed
+    in memory. All the policies of a cycle then run against the same data
+    instead of listing overlapping sets of resources on their own.
+
+    The snapshot is not updated by the policies, so the resources one of
+    them deletes are still seen by the next ones, which need to cope with
+    deleting them again.
+    """
+
+    def __init__(self):
+        self.tags = set(CONF.neutron_defaults.resource_tags)
+        self.taken_at = timeutils.utcnow(True)
+        self._ports = None
+        self._by_network = None
+        self._by_owner = None
+        self._by_binding = None
+        self._networks = None
+        self._tagged_net_ids = None
+        self._subnets = None
+        self._used_network_ids = {}
+        self._kuryrnetwork_net_ids = None
+
+    def _load_ports(self):
+        os_net = clients.get_network_client()
+        self._ports = {p.id: p for p in os_net.ports(status='DOWN')}
+        self._by_network = {}
+        self._by_owner = {}
+        self._by_binding = {True: {}, False: {}}
+        for port_id, port in self._ports.items():
+            self._by_network.setdefault(port.network_id, {})[port_id] = port
+            self._by_owner.setdefault(port.device_owner, {})[port_id] = port
+            self._by_binding[bool(port.binding_host_id)][port_id] = port
+
+    def get_ports(self, network_id=None, device_owner=None, bound=None,
+                  tagged=None):
+        """Returns the DOWN ports meeting all the passed conditions.
+
+        :param network_id: ID of the network of the ports
+        :param device_owner: device_owner of the ports, '' for none
+        :param bound: if the ports need to have binding details or not
+        :param tagged: if the ports need to have all the resource_tags or not
+        """
+        if self._ports is None:
+            self._load_ports()
+
+        indexes = []
+        if network_id is not None:
+            indexes.append(self._by_network.get(network_id, {}))
+        if device_owner is not None:
+            indexes.append(self._by_owner.get(device_owner, {}))
+        if bound is not None:
+            indexes.append(self._by_binding[bool(bound)])
+        if not indexes:
+            indexes.append(self._ports)
+
+        # Start from the smallest index to keep the intersection cheap.
+        indexes.sort(key=len)
+        ports = [p for port_id, p in indexes[0].items()
+                 if all(port_id in index for index in indexes[1:])]
+        if tagged is not None:
+            ports = [p for p in ports if self.is_tagged(p) == tagged]
+        return ports
+
+    def is_tagged(self, resource):
+        return self.tags.issubset(resource.tags or ())
+
+    def is_zombie(self, resource):
+        """Checks if the resource was not updated for ZOMBIE_AGE seconds."""
+        updated_at = timeutils.parse_isotime(resource.updated_at)
+        return (self.taken_at - updated_at).total_seconds() > ZOMBIE_AGE
+
+    def get_networks(self, tagged=None, described=None):
+        """Returns the networks created by Kuryr.
+
+        :param tagged: if the networks need to have all the resource_tags
+        :param described: if the networks need to have the resource_tags as
+                          description, as it's set before tagging them
+        """
+        if not self.tags:
+            return []
+        if self._networks is None:
+            os_net = clients.get_network_client()
+            desc = ','.join(CONF.neutron_defaults.resource_tags)
+            self._networks = {n.id: n for n in os_net.networks(
+                tags=CONF.neutron_defaults.resource_tags)}
+            self._tagged_net_ids = set(self._networks)
+            self._networks.update((n.id, n) for n in os_net.networks(
+                description=desc))
+
+        networks = list(self._networks.values())
+        if tagged is not None:
+            networks = [n for n in networks
+                        if (n.id in self._tagged_net_ids) == tagged]
+        if described is not None:
+            desc = ','.join(CONF.neutron_defaults.resource_tags)
+            networks = [n for n in networks
+                        if (n.description == desc) == described]
+        return networks
+
+    def get_subnets(self, network_id=None):
+        """Returns the subnets of the networks created by Kuryr."""
+        if self._subnets is None:
+            os_net = clients.get_network_client()
+            self._subnets = {}
+            net_ids = [n.id for n in self.get_networks()]
+            for chunk in _chunks(net_ids, NETWORKS_ID_FILTER_CHUNK):
+                for subnet in os_net.subnets(network_id=chunk):
+                    self._subnets.setdefault(subnet.network_id,
+                                             []).append(subnet)
+        if network_id is not None:
+            return list(self._subnets.get(network_id, ()))
+        return [s for subnets in self._subnets.values() for s in subnets]
+
+    def get_used_network_ids(self, network_ids):
+        """Returns which of the networks have ports, in any status.
+
+        Only the network of each port is fetched, and only for the networks
+        not checked before within this snapshot.
+        """
+        os_net = clients.get_network_client()
+        unknown = [n for n in set(network_ids)
+                   if n not in self._used_network_ids]
+        for chunk in _chunks(unknown, NETWORKS_ID_FILTER_CHUNK):
+            used = {p.network_id for p in os_net.ports(
+                network_id=chunk, fields=['network_id'])}
+            for net_id in chunk:
+                self._used_network_ids[net_id] = net_id in used
+        return {n for n in network_ids if self._used_network_ids[n]}
+
+    def get_kuryrnetwork_net_ids(self):
+        """Returns the IDs of the networks of the KuryrNetworks.
+
+        :raises K8sClientException: if the KuryrNetworks can't be listed
+        """
+        if self._kuryrnetwork_net_ids is None:
+            k8s = clients.get_kubernetes_client()
+            self._kuryrnetwork_net_ids = {
+                item['status']['netId']
+                for item in k8s.get_items(constants.K8S_API_CRD_KURYRNETWORKS)
+                if item.get('status', {}).get('netId')}
+        return self._kuryrnetwork_net_ids
+
+
+def cleanup_dead_ports(snapshot):
+    """Deletes the untagged Kuryr ports DOWN for long in Kuryr networks."""
+    if not snapshot.tags:
+        # NOTE(gryf): there is no reliable way for removing kuryr-related
+        # ports if there are no tags enabled - without tags there is a chance,
+        # that ports are down, created by someone/something else and would
+        # be deleted.
+        # Perhaps a be better idea to would be to have some mark in other
+        # field during port creation to identify "our" ports.
+        return
+
+    try:
+        network_ids = snapshot.get_kuryrnetwork_net_ids()
+    except exceptions.K8sClientException as ex:
+        LOG.exception('Error fetching KuryrNetworks: %s', ex)
+        return
+
+    dead_ports = [port for net_id in network_ids
+                  for port in snapshot.get_ports(
+                      network_id=net_id, device_owner=kl_const.DEVICE_OWNER,
+                      tagged=False)
+                  if snapshot.is_zombie(port)]
+    if dead_ports:
+        c_utils.delete_ports(dead_ports)
+
+
+def cleanup_dead_networks(snapshot):
+    """Cleanup all the dead networks and subnets without ports"""
+    if not snapshot.tags:
+        return
+
+    try:
+        kuryr_net_ids = snapshot.get_kuryrnetwork_net_ids()
+    except exceptions.K8sClientException as ex:
+        LOG.exception('Error fetching KuryrNetworks: %s', ex)
+        return
+
+    os_net = clients.get_network_client()
+    networks = snapshot.get_networks(described=True)
+
+    # Find out, if there are more subnets than expected, which suppose to
+    # not have tags.
+    dead_subnets = [subnet for net in networks if net.id in kuryr_net_ids
+                    for subnet in snapshot.get_subnets(net.id)
+                    if not snapshot.is_tagged(subnet) and
+                    snapshot.is_zombie(subnet)]
+    _delete_neutron_resources(os_net.delete_subnet, dead_subnets)
+
+    # NOTE(gryf): if network hanging more than 10 minutes consider it as a
+    # orphaned.
+    candidates = [net for net in networks if snapshot.is_zombie(net)]
+    used_net_ids = snapshot.get_used_network_ids([n.id for n in candidates])
+    _delete_neutron_resources(
+        os_net.delete_network,
+        [net for net in candidates if net.id not in used_net_ids])
+
+
+class GarbageCollector(object):
+    """Cleans up the Neutron resources left behind by Kuryr.
+
+    Each cycle takes a single `NeutronSnapshot` and runs all the registered
+    cleanup policies against it. A policy is a callable getting the snapshot,
+    expected to delete the resources it finds dead concurrently, up to
+    LEFTOVER_RM_POOL_SIZE at a time. Policies that need to run less often
+    than the cycles are expected to skip them on their own.
+    """
+
+    instance = None
+
+    def __init__(self):
+        self._policies = [cleanup_dead_ports, cleanup_dead_networks]
+
+    @classmethod
+    def get_instance(cls):
+        if not GarbageCollector.instance:
+            GarbageCollector.instance = cls()
+        return GarbageCollector.instance
+
+    def register(self, policy):
+        self._policies.append(policy)
+
+    def run(self):
+        snapshot = NeutronSnapshot()
+        for policy in list(self._policies):
+            try:
+                policy(snapshot)
+            except Exception:
+                LOG.exception('Error running the %s cleanup policy.',
+                              getattr(policy, '__name__', policy))
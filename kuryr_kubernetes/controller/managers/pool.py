@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 from http import server
 import os
 import socketserver
 import threading
-
+import time
+import uuid
 
 from openstack import exceptions as os_exc
 from oslo_config import cfg as oslo_cfg
@@ -40,24 +42,123 @@ pool_manager_opts = [
 
 oslo_cfg.CONF.register_opts(pool_manager_opts, "pool_manager")
 
+# Number of finished jobs kept for their status to be polled.
+MAX_FINISHED_JOBS = 100
+
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+
+class PoolJobs(object):
+    """Tracks the populate and free requests run in the background.
+
+    Asynchronous requests are run in their own thread and registered as jobs
+    that clients can poll for their status, instead of having to keep the
+    request open until the ports are created or deleted. Running jobs are
+    always kept, while only the last MAX_FINISHED_JOBS finished ones are.
+    """
+
+    instance = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = collections.OrderedDict()
+
+    @classmethod
+    def get_instance(cls):
+        if not PoolJobs.instance:
+            PoolJobs.instance = cls()
+        return PoolJobs.instance
+
+    def start(self, action, params, func, *args):
+        """Runs func(*args) in the background and returns its job."""
+        job = {'id': str(uuid.uuid4()),
+               'action': action,
+               'params': params,
+               'status': JOB_RUNNING,
+               'error': None,
+               'started_at': time.time(),
+               'finished_at': None}
+        with self._lock:
+            self._jobs[job['id']] = job
+        thread = threading.Thread(target=self._run, args=(job, func) + args)
+        thread.daemon = True
+        thread.start()
+        return dict(job)
+
+    def _run(self, job, func, *args):
+        try:
+            func(*args)
+        except Exception as ex:
+            LOG.exception('Pool manager job %s failed.', job['id'])
+            status, error = JOB_FAILED, str(ex) or type(ex).__name__
+        else:
+            status, error = JOB_SUCCEEDED, None
+        with self._lock:
+            job.update(status=status, error=error, finished_at=time.time())
+            self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job['status'] != JOB_RUNNING]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, running_only=False):
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()
+                    if not running_only or job['status'] == JOB_RUNNING]
+
 
 class UnixDomainHttpServer(socketserver.ThreadingUnixStreamServer):
     pass
 
 
 class RequestHandler(server.BaseHTTPRequestHandler):
+    """Handles the pool manager requests.
+
+    populatePool, freePool, listPools, showPool and poolSizes reply with
+    text. Passing `"async": true` to populatePool or freePool runs them as a
+    background job instead and replies with the job in JSON, whose status is
+    then available through poolJobs. poolStats replies with the stats of the
+    pools and the running jobs in JSON too.
+    """
     protocol = "HTTP/1.0"
 
-    def do_POST(self):
+    def _get_params(self):
         content_length = int(self.headers.get('Content-Length', 0))
 
         body = self.rfile.read(content_length)
-        params = dict(jsonutils.loads(body))
+        if not body:
+            return {}
+        return dict(jsonutils.loads(body))
+
+    def _send_json(self, data, code=200):
+        response = jsonutils.dump_as_bytes(data)
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', len(response))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def do_POST(self):
+        params = self._get_params()
 
         if self.path.endswith(constants.VIF_POOL_POPULATE):
             trunk_ips = params.get('trunks', None)
             num_ports = params.get('num_ports', 1)
-            if trunk_ips:
+            if trunk_ips and params.get('async'):
+                job = PoolJobs.get_instance().start(
+                    'populate', {'trunks': trunk_ips, 'num_ports': num_ports},
+                    self._create_subports, num_ports, trunk_ips)
+                self._send_json({'job': job}, code=202)
+            elif trunk_ips:
                 try:
                     self._create_subports(num_ports, trunk_ips)
                 except Exception:
@@ -83,6 +184,13 @@ class RequestHandler(server.BaseHTTPRequestHandler):
             else:
                 pool = trunk_ips
 
+            if params.get('async'):
+                job = PoolJobs.get_instance().start(
+                    'free', {'trunks': trunk_ips}, self._delete_subports,
+                    trunk_ips)
+                self._send_json({'job': job}, code=202)
+                return
+
             try:
                 self._delete_subports(trunk_ips)
             except Exception:
@@ -102,10 +210,7 @@ class RequestHandler(server.BaseHTTPRequestHandler):
             self.wfile.write(response.encode())
 
     def do_GET(self):
-        content_length = int(self.headers.get('Content-Length', 0))
-
-        body = self.rfile.read(content_length)
-        params = dict(jsonutils.loads(body))
+        params = self._get_params()
 
         if self.path.endswith(constants.VIF_POOL_LIST):
             try:
@@ -139,6 +244,42 @@ class RequestHandler(server.BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(response.encode())
 
+        elif self.path.endswith(constants.VIF_POOL_SIZES):
+            try:
+                sizes_info = self._list_pool_sizes()
+            except Exception:
+                response = 'Error listing the pool sizes.'
+            else:
+                response = 'Pool sizes:\n{0}'.format(sizes_info)
+
+            self.send_header('Content-Length', len(response))
+            self.end_headers()
+            self.wfile.write(response.encode())
+
+        elif self.path.endswith(constants.VIF_POOL_STATS):
+            try:
+                pools_stats = self._list_pools_stats()
+            except Exception:
+                LOG.exception('Error getting the pools stats.')
+                self._send_json({'error': 'Error getting the pools stats.'},
+                                code=500)
+            else:
+                self._send_json({
+                    'pools': pools_stats,
+                    'jobs': PoolJobs.get_instance().list(running_only=True)})
+
+        elif self.path.endswith(constants.VIF_POOL_JOBS):
+            job_id = params.get('job_id')
+            if job_id is None:
+                self._send_json({'jobs': PoolJobs.get_instance().list()})
+                return
+            job = PoolJobs.get_instance().get(job_id)
+            if job is None:
+                self._send_json({'error': 'Job {0} not found.'.format(job_id)},
+                                code=404)
+            else:
+                self._send_json({'job': job})
+
         else:
             response = 'Method not allowed.'
             self.send_header('Content-Length', len(response))
@@ -203,6 +344,45 @@ class RequestHandler(server.BaseHTTPRequestHandler):
             return pools_info
         return "There are no pools"
 
+    def _list_pool_sizes(self):
+        try:
+            drv_vif = drivers.PodVIFDriver.get_instance()
+            drv_vif_pool = drivers.VIFPoolDriver.get_instance()
+            drv_vif_pool.set_vif_driver(drv_vif)
+
+            pool_sizes = drv_vif_pool.list_pool_sizes()
+        except TypeError:
+            LOG.error("Invalid driver type")
+            raise
+
+        sizes_info = ""
+        for pool_key, sizes in pool_sizes.items():
+            sizes_info += (jsonutils.dumps(pool_key) + " has "
+                           + str(sizes['size']) + " ports, target is "
+                           + str(sizes['target']))
+            if sizes['demand'] is not None:
+                sizes_info += (" (" + str(sizes['demand'])
+                               + " ports recently requested)")
+            sizes_info += "\n"
+        if sizes_info:
+            return sizes_info
+        return "There are no pools"
+
+    def _list_pools_stats(self):
+        try:
+            drv_vif = drivers.PodVIFDriver.get_instance()
+            drv_vif_pool = drivers.VIFPoolDriver.get_instance()
+            drv_vif_pool.set_vif_driver(drv_vif)
+
+            pools_stats = drv_vif_pool.list_pools_stats()
+        except TypeError:
+            LOG.error("Invalid driver type")
+            raise
+
+        # NOTE: Pool keys are tuples, which can't be JSON object keys.
+        return [dict(stats, pool_key=pool_key)
+                for pool_key, stats in pools_stats.items()]
+
     def _show_pool(self, pool_key):
         try:
             drv_vif = drivers.PodVIFDriver.get_instance()
@@ -70,6 +70,38 @@ class ControllerPrometheusExporter(object):
         """Increase failure count to Port readiness"""
         self.port_readiness.inc()
 
+    def record_avoided_existence_check(self):
+        """Increase count of K8s API existence checks avoided"""
+        self.avoided_existence_checks.inc()
+
+    def record_watch_resume(self, path):
+        """Increase count of watches resumed from last resourceVersion"""
+        self.watch_resumes.labels(resource=path).inc()
+
+    def record_watch_relist(self, path):
+        """Increase count of full lists done to (re)start a watch"""
+        self.watch_relists.labels(resource=path).inc()
+
+    def record_pool_size(self, pool_key, size, target):
+        """Records the current and target sizes of a pool of ports"""
+        labels = self._get_pool_labels(pool_key)
+        self.pool_size.labels(**labels).set(size)
+        self.pool_target_size.labels(**labels).set(target)
+
+    def remove_pool_size(self, pool_key):
+        """Stops reporting the sizes of a deleted pool of ports"""
+        for metric in (self.pool_size, self.pool_target_size):
+            try:
+                metric.remove(*pool_key)
+            except KeyError:
+                pass
+
+    @staticmethod
+    def _get_pool_labels(pool_key):
+        host, project_id, network_id = pool_key
+        return {'host': host, 'project_id': project_id,
+                'network_id': network_id}
+
     @classmethod
     def get_instance(cls):
         if not ControllerPrometheusExporter.instance:
@@ -190,3 +222,30 @@ class ControllerPrometheusExporter(object):
             'kuryr_port_readiness', 'This counter is increased when Kuryr '
             'times out waiting for Neutron to move port to ACTIVE',
             registry=self.registry)
+
+        self.avoided_existence_checks = prometheus_client.Counter(
+            'kuryr_avoided_existence_checks', 'This counter is increased '
+            'when Kuryr handles an event without sending a GET to K8s API '
+            'to check if the object still exists', registry=self.registry)
+
+        self.watch_resumes = prometheus_client.Counter(
+            'kuryr_watch_resumes', 'This counter is increased when a K8s '
+            'watch is resumed from the last resourceVersion seen',
+            labelnames={'resource'}, registry=self.registry)
+
+        self.watch_relists = prometheus_client.Counter(
+            'kuryr_watch_relists', 'This counter is increased when a K8s '
+            'resource is fully listed to start or restart watching it',
+            labelnames={'resource'}, registry=self.registry)
+
+        # NOTE: Labels are given in the order of the pool key elements, so
+        # that the pool key can be used to remove the metrics.
+        pool_labels = ('host', 'project_id', 'network_id')
+        self.pool_size = prometheus_client.Gauge(
+            'kuryr_pool_size', 'Amount of ready to use ports in a pool',
+            labelnames=pool_labels, registry=self.registry)
+
+        self.pool_target_size = prometheus_client.Gauge(
+            'kuryr_pool_target_size', 'Amount of ports a pool is populated '
+            'up to, following the recent demand of ports on it',
+            labelnames=pool_labels, registry=self.registry)
@@ -28,8 +28,10 @@ from kuryr_kubernetes import clients
 from kuryr_kubernetes import config
 from kuryr_kubernetes.controller.drivers import base as drivers
 from kuryr_kubernetes.controller.handlers import pipeline as h_pipeline
+from kuryr_kubernetes.controller.managers import gc
 from kuryr_kubernetes.controller.managers import health
 from kuryr_kubernetes.controller.managers import prometheus_exporter as exp
+from kuryr_kubernetes import informer
 from kuryr_kubernetes import objects
 from kuryr_kubernetes import utils
 from kuryr_kubernetes import watcher
@@ -83,9 +85,14 @@ class KuryrK8sService(service.Service, periodic_task.PeriodicTasks,
 
         objects.register_locally_defined_vifs()
         pipeline = h_pipeline.ControllerPipeline(self.tg)
-        self.watcher = watcher.Watcher(pipeline, self.tg)
-        self.health_manager = health.HealthServer()
+        store = None
+        if CONF.kubernetes.use_object_cache:
+            store = informer.ObjectStore.get_instance()
         self.exporter = exp.ControllerPrometheusExporter.get_instance()
+        self.watcher = watcher.Watcher(
+            pipeline, self.tg, store=store, exporter=self.exporter,
+            versions=informer.HandledVersions.get_instance())
+        self.health_manager = health.HealthServer()
         self.current_leader = None
         self.node_name = utils.get_node_name()
 
@@ -96,6 +103,8 @@ class KuryrK8sService(service.Service, periodic_task.PeriodicTasks,
         self.pool_driver = drivers.VIFPoolDriver.get_instance(
             specific_driver='multi_pool')
         self.pool_driver.set_vif_driver()
+        gc.GarbageCollector.get_instance().register(
+            self.pool_driver.cleanup_removed_nodes)
 
     def is_leader(self):
         return self.current_leader == self.node_name
@@ -174,8 +183,7 @@ class KuryrK8sService(service.Service, periodic_task.PeriodicTasks,
 
     @periodic_task.periodic_task(spacing=90, run_immediately=False)
     def cleanup_dead_resources(self, context):
-        utils.cleanup_dead_ports()
-        utils.cleanup_dead_networks()
+        gc.GarbageCollector.get_instance().run()
 
 
 def start():
@@ -73,6 +73,14 @@ class K8sResourceNotFound(K8sClientException):
                                                   "found: %r" % resource)
 
 
+class K8sWatchExpired(K8sClientException):
+    # This is raised when the resourceVersion a watch is started or resumed
+    # from is too old and K8s API responds with 410 Gone.
+    def __init__(self, message):
+        super(K8sWatchExpired, self).__init__(
+            "Watch resourceVersion expired: %r" % message)
+
+
 class K8sConflict(K8sClientException):
     def __init__(self, message):
         super(K8sConflict, self).__init__("Conflict: %r" % message)
@@ -186,6 +194,14 @@ class CNIPodGone(Exception):
             f'Pod {name} got deleted while processing the CNI ADD request.')
 
 
+class CNIRegistryFull(Exception):
+    """Exception raised when there is no room for a new registry entry"""
+    def __init__(self, size):
+        super().__init__(
+            f'All the {size} entries of the kuryr-daemon registry are in use. '
+            f'Increase [cni_daemon]registry_size.')
+
+
 class UnreachableOctavia(Exception):
     """Exception indicates Octavia API failure and can not be reached
 
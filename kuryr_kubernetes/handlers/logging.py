@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+
 from oslo_log import log as logging
 
 from kuryr_kubernetes.handlers import base
@@ -26,6 +28,10 @@ class LogExceptions(base.EventHandler):
     LogExceptions wraps `handler` passed as an initialization parameter by
     suppressing `exceptions` it raises and sending them to logging facility
     instead.
+
+    If `handler` requeues itself with the `requeue` function it gets, e.g.
+    from a `WorkQueue`, `LogExceptions` is requeued instead, so that the
+    next attempt is handled the same way.
     """
 
     def __init__(self, handler, exceptions=Exception, ignore_exceptions=None):
@@ -34,6 +40,9 @@ class LogExceptions(base.EventHandler):
         self._ignore_exceptions = ignore_exceptions or ()
 
     def __call__(self, event, *args, **kwargs):
+        requeue = kwargs.get('requeue')
+        if requeue is not None:
+            kwargs['requeue'] = functools.partial(self._requeue, requeue)
         try:
             self._handler(event, *args, **kwargs)
         except self._ignore_exceptions:
@@ -47,3 +56,8 @@ class LogExceptions(base.EventHandler):
             if hasattr(ex, 'request_id'):
                 req_id = f' [{ex.request_id}]'
             LOG.exception("Failed to handle event%s: %s", req_id, event)
+
+    def _requeue(self, requeue, delay, handler, event, *args, **kwargs):
+        if handler is self._handler:
+            handler = self
+        requeue(delay, handler, event, *args, **kwargs)
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import itertools
 import time
 
@@ -26,6 +27,7 @@ from kuryr_kubernetes import clients
 from kuryr_kubernetes.controller.managers import prometheus_exporter
 from kuryr_kubernetes import exceptions
 from kuryr_kubernetes.handlers import base
+from kuryr_kubernetes import informer
 from kuryr_kubernetes import utils
 
 LOG = logging.getLogger(__name__)
@@ -42,7 +44,18 @@ class Retry(base.EventHandler):
     exceed the `timeout` depending on responsiveness of the `handler`.
 
     `handler` is retried for the same `event` (expected backoff E(c) =
-    interval * 2 ** c / 2).
+    interval * 2 ** c / 2). If `Retry` is called with a `requeue` function,
+    as `WorkQueue` does, the next attempt is requeued with it instead of
+    sleeping until it's due.
+
+    Before retrying the `handler` for an ADDED or MODIFIED event, `Retry`
+    checks if the object still exists, using the controller cache if the
+    object kind is synced there and K8s API otherwise. The first attempt
+    is made without the check, as the event has just been received.
+
+    When the `handler` eventually fails, the object version is forgotten in
+    `informer.HandledVersions`, so that the object gets injected again on
+    the next reconciliation.
     """
 
     def __init__(self, handler, exceptions=Exception,
@@ -55,29 +68,34 @@ class Retry(base.EventHandler):
         self._k8s = clients.get_kubernetes_client()
 
     def __call__(self, event, *args, **kwargs):
-        start_time = time.time()
-        deadline = time.time() + self._timeout
-        for attempt in itertools.count(1):
+        try:
+            self._call(event, *args, **kwargs)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                obj = event.get('object')
+                if obj:
+                    informer.HandledVersions.get_instance().forget(obj)
+
+    def _call(self, event, *args, requeue=None, retry_state=None, **kwargs):
+        if retry_state:
+            first_attempt, start_time, deadline = retry_state
+        else:
+            first_attempt = 1
+            start_time = time.time()
+            deadline = time.time() + self._timeout
+        if requeue is None:
+            sleep = self._sleep
+        else:
+            sleep = functools.partial(self._requeue, requeue, event, args,
+                                      kwargs, start_time)
+        for attempt in itertools.count(first_attempt):
             if event.get('type') in ['MODIFIED', 'ADDED']:
                 obj = event.get('object')
                 if obj:
-                    try:
-                        obj_link = utils.get_res_link(obj)
-                    except KeyError:
-                        LOG.debug("Unknown object, skipping: %s", obj)
-                    else:
-                        try:
-                            self._k8s.get(obj_link)
-                        except exceptions.K8sResourceNotFound:
-                            LOG.debug("There is no need to process the "
-                                      "retry as the object %s has already "
-                                      "been deleted.", obj_link)
-                            return
-                        except (exceptions.K8sClientException,
-                                requests.ConnectionError):
-                            LOG.debug("Kubernetes client error getting the "
-                                      "object. Continuing with handler "
-                                      "execution.")
+                    if attempt == 1:
+                        self._record_avoided_existence_check()
+                    elif self._is_deleted(obj):
+                        return
             try:
                 info = {
                     'elapsed': time.time() - start_time
@@ -89,7 +107,7 @@ class Retry(base.EventHandler):
                 cls_map = {'LoadBalancerNotReady': 'record_lb_failure',
                            'PortNotReady': 'record_port_failure'}
                 with excutils.save_and_reraise_exception() as ex:
-                    if self._sleep(deadline, attempt, ex.value):
+                    if sleep(deadline, attempt, ex.value):
                         ex.reraise = False
                     else:
                         exporter = (prometheus_exporter
@@ -99,17 +117,17 @@ class Retry(base.EventHandler):
                         method()
             except exceptions.KuryrLoadBalancerNotCreated:
                 with excutils.save_and_reraise_exception() as ex:
-                    if self._sleep(deadline, attempt, ex.value):
+                    if sleep(deadline, attempt, ex.value):
                         ex.reraise = False
             except os_exc.ConflictException:
                 with excutils.save_and_reraise_exception() as ex:
                     error_type = clients.get_neutron_error_type(ex.value)
                     if error_type == 'OverQuota':
-                        if self._sleep(deadline, attempt, ex.value):
+                        if sleep(deadline, attempt, ex.value):
                             ex.reraise = False
             except self._exceptions:
                 with excutils.save_and_reraise_exception() as ex:
-                    if self._sleep(deadline, attempt, ex.value):
+                    if sleep(deadline, attempt, ex.value):
                         ex.reraise = False
                     else:
                         LOG.exception('Report handler unhealthy %s',
@@ -119,6 +137,45 @@ class Retry(base.EventHandler):
                 LOG.exception('Report handler unhealthy %s', self._handler)
                 self._handler.set_liveness(alive=False, exc=ex)
                 raise
+            if requeue is not None:
+                # Next attempt got requeued.
+                return
+
+    def _record_avoided_existence_check(self):
+        exporter = (prometheus_exporter.ControllerPrometheusExporter
+                    .get_instance())
+        exporter.record_avoided_existence_check()
+
+    def _is_deleted(self, obj):
+        try:
+            obj_link = utils.get_res_link(obj)
+        except KeyError:
+            LOG.debug("Unknown object, skipping: %s", obj)
+            return False
+
+        kind = obj.get('kind')
+        if informer.is_synced(kind):
+            self._record_avoided_existence_check()
+            metadata = obj['metadata']
+            deleted = informer.get_object(kind, metadata['name'],
+                                          metadata.get('namespace')) is None
+        else:
+            try:
+                self._k8s.get(obj_link)
+                deleted = False
+            except exceptions.K8sResourceNotFound:
+                deleted = True
+            except (exceptions.K8sClientException,
+                    requests.ConnectionError):
+                LOG.debug("Kubernetes client error getting the "
+                          "object. Continuing with handler "
+                          "execution.")
+                deleted = False
+
+        if deleted:
+            LOG.debug("There is no need to process the retry as the object "
+                      "%s has already been deleted.", obj_link)
+        return deleted
 
     def _sleep(self, deadline, attempt, exception):
         LOG.debug("Handler %s failed (attempt %s; %s)",
@@ -135,3 +192,21 @@ class Retry(base.EventHandler):
         LOG.debug("Resumed after %s seconds. Retry handler %s", interval,
                   self._handler)
         return interval
+
+    def _requeue(self, requeue, event, args, kwargs, start_time, deadline,
+                 attempt, exception):
+        LOG.debug("Handler %s failed (attempt %s; %s)",
+                  self._handler, attempt, exceptions.format_msg(exception))
+        interval = utils.exponential_delay(deadline, attempt, self._interval)
+        if not interval:
+            LOG.debug("Handler %s failed (attempt %s; %s), "
+                      "timeout exceeded (%s seconds)",
+                      self._handler, attempt, exceptions.format_msg(exception),
+                      self._timeout)
+            return 0
+
+        LOG.debug("Retrying handler %s in %s seconds", self._handler,
+                  interval)
+        requeue(interval, self, event, *args,
+                retry_state=(attempt + 1, start_time, deadline), **kwargs)
+        return interval
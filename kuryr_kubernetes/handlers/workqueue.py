@@ -0,0 +1,173 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+import functools
+import heapq
+import itertools
+import time
+
+import eventlet
+from oslo_log import log as logging
+
+from kuryr_kubernetes.handlers import base
+from kuryr_kubernetes import informer
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 100
+
+
+class WorkQueue(base.EventHandler):
+    """Handles events asynchronously on a bounded pool of workers.
+
+    `WorkQueue` can be used to decorate another `handler` to be run
+    asynchronously using the specified `thread_group`. Events are grouped
+    by the result of `group_by`(`event`) function, which gives the following
+    behavior:
+
+      - events of different groups are handled concurrently, but by no more
+        than `workers` greenthreads at the same time,
+
+      - events of the same group are never handled concurrently,
+
+      - only the most recent event of a group waiting to be handled is
+        handled, the older ones are dropped as the handlers always act on
+        the latest known state of the object,
+
+      - the `handler` receives a `requeue` function as a keyword argument.
+        Calling it with a `delay`, a handler and the arguments to call the
+        handler with gets that call done after `delay` seconds, without
+        holding a greenthread while waiting. Calls requeued for different
+        handlers are kept apart, so that several consumers of an object can
+        be retried at once. A requeued call is dropped if a newer event of
+        the group arrives in the meantime.
+    """
+
+    def __init__(self, handler, thread_group, group_by, info_func,
+                 workers=DEFAULT_WORKERS):
+        self._handler = handler
+        self._thread_group = thread_group
+        self._group_by = group_by
+        self._info_func = info_func
+        self._max_workers = workers
+        self._workers = 0
+        # Groups ready to be handled, in the order they got ready. A group is
+        # there when it has an item and it is not being handled already.
+        self._ready = collections.deque()
+        # Calls waiting to be made for each group, by handler. A new event
+        # replaces all of them, requeued calls only the one of their handler.
+        self._items = {}
+        self._processing = set()
+        # Heap of the (due time, sequence, group, item) of requeued calls.
+        # Only the latest requeued call of a group and handler is valid, the
+        # sequence of which is kept in _requeued[group][handler].
+        self._delayed = []
+        self._requeued = {}
+        self._seq = itertools.count()
+        self._timer = None
+        self._timer_due = None
+
+    def __call__(self, event, *args, **kwargs):
+        group = self._group_by(event)
+        if kwargs.get('injected', False) and (group in self._items or
+                                              group in self._processing or
+                                              group in self._requeued):
+            # We don't want to risk injecting an outdated state if events
+            # for that resource are being handled. The injected version is
+            # forgotten, so that the next reconciliation injects it again in
+            # case it's newer than the one being handled.
+            obj = event.get('object')
+            if obj:
+                informer.HandledVersions.get_instance().forget(obj)
+            return
+        self._requeued.pop(group, None)
+        if group in self._items:
+            # The new event supersedes all the calls waiting for the group.
+            self._items[group].clear()
+        self._put(group, (self._handler, event, args, kwargs))
+
+    def _put(self, group, item):
+        queued = group in self._items
+        self._items.setdefault(group, {})[item[0]] = item
+        if queued or group in self._processing:
+            return
+        self._ready.append(group)
+        if self._workers < self._max_workers:
+            self._workers += 1
+            self._thread_group.add_thread(self._run)
+
+    def _run(self):
+        try:
+            while self._ready:
+                group = self._ready.popleft()
+                items = self._items.pop(group)
+                self._processing.add(group)
+                try:
+                    for handler, event, args, kwargs in items.values():
+                        self._handle(group, handler, event, args, kwargs)
+                finally:
+                    self._processing.discard(group)
+                    # Newer event arrived while this one was being handled.
+                    if group in self._items:
+                        self._ready.append(group)
+        finally:
+            self._workers -= 1
+            if not self._workers:
+                LOG.trace("Work queue is idle")
+
+    def _handle(self, group, handler, event, args, kwargs):
+        try:
+            handler(event, *args,
+                    requeue=functools.partial(self._requeue, group),
+                    **kwargs)
+        except Exception:
+            LOG.exception("Failed to handle event %s (%s)", group,
+                          self._info_func(event))
+
+    def _requeue(self, group, delay, handler, event, *args, **kwargs):
+        if self._handler in self._items.get(group, ()):
+            LOG.debug("Not requeuing %s (%s) as a newer event is queued.",
+                      group, self._info_func(event))
+            return
+        seq = next(self._seq)
+        self._requeued.setdefault(group, {})[handler] = seq
+        heapq.heappush(self._delayed, (time.monotonic() + delay, seq, group,
+                                       (handler, event, args, kwargs)))
+        self._schedule()
+
+    def _schedule(self):
+        if not self._delayed:
+            return
+        due = self._delayed[0][0]
+        if self._timer is not None:
+            if self._timer_due <= due:
+                return
+            self._timer.cancel()
+        self._timer = eventlet.spawn_after(max(due - time.monotonic(), 0),
+                                           self._pop_due)
+        self._timer_due = due
+
+    def _pop_due(self):
+        self._timer = None
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, seq, group, item = heapq.heappop(self._delayed)
+            requeued = self._requeued.get(group, {})
+            if requeued.get(item[0]) != seq:
+                # Superseded by a newer event or requeued call.
+                continue
+            del requeued[item[0]]
+            if not requeued:
+                del self._requeued[group]
+            self._put(group, item)
+        self._schedule()
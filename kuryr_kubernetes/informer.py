@@ -0,0 +1,398 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import copy
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+
+def _get_key(name, namespace=None):
+    return f'{namespace}/{name}' if namespace else name
+
+
+def _get_version(obj):
+    try:
+        return int(obj['metadata']['resourceVersion'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _get_pod_ip(obj):
+    return obj.get('status', {}).get('podIP')
+
+
+def _get_node_name(obj):
+    return obj.get('spec', {}).get('nodeName')
+
+
+# Field indexes maintained for the given kinds, on top of the namespace and
+# labels indexes maintained for all of them.
+FIELD_INDEXES = {
+    'Pod': {
+        'podIP': _get_pod_ip,
+        'nodeName': _get_node_name,
+    },
+}
+
+
+class _Index(object):
+    """Secondary indexes of the objects of a single kind."""
+
+    def __init__(self, kind):
+        self._extractors = FIELD_INDEXES.get(kind, {})
+        self.namespaces = {}
+        self.labels = {}
+        self.label_keys = {}
+        self.fields = {field: {} for field in self._extractors}
+
+    @staticmethod
+    def _add(index, value, key):
+        index.setdefault(value, set()).add(key)
+
+    @staticmethod
+    def _remove(index, value, key):
+        keys = index.get(value)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del index[value]
+
+    def _entries(self, obj):
+        metadata = obj['metadata']
+        yield self.namespaces, metadata.get('namespace')
+        for label, value in (metadata.get('labels') or {}).items():
+            yield self.labels, (label, value)
+            yield self.label_keys, label
+        for field, extractor in self._extractors.items():
+            yield self.fields[field], extractor(obj)
+
+    def add(self, key, obj):
+        for index, value in self._entries(obj):
+            if value is not None:
+                self._add(index, value, key)
+
+    def remove(self, key, obj):
+        for index, value in self._entries(obj):
+            if value is not None:
+                self._remove(index, value, key)
+
+
+class ObjectStore(object):
+    """In-memory cache of the K8s objects observed by the `Watcher`.
+
+    The `ObjectStore` is kept up to date by the list+watch streams the
+    `Watcher` already runs for the enabled handlers, so that handlers and
+    drivers can look up objects locally instead of sending a GET to the K8s
+    API for each of them.
+
+    A kind is considered *synced* once a full list of its objects was put
+    into the store and until the watch for it is stopped or restarted. Single
+    object lookups may be answered for any kind, but callers should always
+    fall back to the K8s API when the object is not found. Listing is only
+    answered for synced kinds, otherwise `None` is returned.
+
+    Besides the primary namespace/name key, objects are indexed by namespace,
+    by labels (both key/value pairs and keys alone) and by the fields listed
+    in `FIELD_INDEXES`, so that label selectors and field lookups are
+    resolved without scanning all the objects of a kind.
+
+    Objects are copied on the way in and on the way out, as both the handlers
+    and the callers of the lookup methods are free to modify what they got.
+    All the methods are run without yielding, which is enough to keep the
+    store consistent with eventlet green threads.
+    """
+
+    instance = None
+
+    def __init__(self):
+        self._objects = {}
+        self._indexes = {}
+        self._paths = {}
+
+    @classmethod
+    def get_instance(cls):
+        if not ObjectStore.instance:
+            ObjectStore.instance = cls()
+        return ObjectStore.instance
+
+    def is_synced(self, kind):
+        return kind in self._paths.values()
+
+    def get(self, kind, name, namespace=None):
+        """Returns a copy of the cached object or None if it is not cached.
+
+        :param kind: K8s object kind, e.g. 'Pod'
+        :param name: name of the object
+        :param namespace: namespace of the object, None for cluster-scoped
+                          objects
+        """
+        obj = self._objects.get(kind, {}).get(_get_key(name, namespace))
+        if obj is None:
+            return None
+        return copy.deepcopy(obj)
+
+    def list(self, kind, namespace=None, labels=None, label_keys=None,
+             **fields):
+        """Returns copies of the cached objects of a given kind.
+
+        All the passed conditions need to be met by the returned objects.
+
+        :param kind: K8s object kind, e.g. 'Pod'
+        :param namespace: only return objects from this namespace
+        :param labels: dict mapping label keys to collections of accepted
+                       values of the label
+        :param label_keys: collection of label keys that need to be set
+        :param fields: values of the fields indexed for the kind, e.g.
+                       podIP='10.0.0.1' for pods
+        :returns: list of objects or None if the kind is not synced
+        """
+        if not self.is_synced(kind):
+            return None
+
+        objs = self._objects.get(kind, {})
+        index = self._indexes.get(kind)
+        if index is None:
+            return []
+
+        candidates = []
+        if namespace:
+            candidates.append(index.namespaces.get(namespace, set()))
+        for label, values in (labels or {}).items():
+            keys = set()
+            for value in values:
+                keys.update(index.labels.get((label, value), ()))
+            candidates.append(keys)
+        for label in label_keys or ():
+            candidates.append(index.label_keys.get(label, set()))
+        for field, value in fields.items():
+            candidates.append(index.fields[field].get(value, set()))
+
+        if not candidates:
+            return [copy.deepcopy(o) for o in objs.values()]
+
+        # Start from the smallest set to keep the intersection cheap.
+        candidates.sort(key=len)
+        keys = candidates[0].intersection(*candidates[1:])
+        return [copy.deepcopy(objs[key]) for key in keys]
+
+    def update(self, event):
+        """Applies a K8s watch event to the store."""
+        obj = event.get('object')
+        event_type = event.get('type')
+        try:
+            kind = obj['kind']
+            key = _get_key(obj['metadata']['name'],
+                           obj['metadata'].get('namespace'))
+        except (KeyError, TypeError):
+            return
+
+        if event_type == 'DELETED':
+            self._delete(kind, key)
+        elif event_type in ('ADDED', 'MODIFIED'):
+            self._put(kind, key, obj)
+
+    def replace(self, path, pages):
+        """Replaces the cached objects of a kind with a full K8s list.
+
+        The list is diffed against the objects cached so far and the changes
+        are returned as watch events, so that the caller can process what
+        was missed while it was not watching, e.g. after the watch expired.
+
+        The list is consumed page by page, so that it is never held in memory
+        as a whole on top of the new objects of the kind. The cached objects
+        are only replaced once the last page was consumed.
+
+        :param path: K8s resource URL path the list was fetched from
+        :param pages: iterable of the pages of a K8s list, as yielded by
+                      `K8sClient.get_paginated`
+        :returns: tuple of the list of ADDED, MODIFIED and DELETED events,
+                  one for each object that is new, got a different
+                  resourceVersion or is gone when compared to the cache, and
+                  the resourceVersion of the list, None if it had no pages
+        """
+        kind = None
+        resource_version = None
+        current = {}
+        objs = {}
+        events = []
+        for page in pages:
+            if kind is None:
+                kind = page['kind']
+                if kind.endswith('List'):
+                    kind = kind[:-4]
+                current = self._objects.get(kind, {})
+            resource_version = page.get('metadata', {}).get(
+                'resourceVersion', resource_version)
+            for item in page.get('items') or []:
+                key = _get_key(item['metadata']['name'],
+                               item['metadata'].get('namespace'))
+                old = current.get(key)
+                # Watch events might have been applied while the list was
+                # being fetched, make sure we don't go back in time.
+                if self._is_stale(old, item):
+                    objs[key] = old
+                    continue
+                if old is None:
+                    events.append({'type': 'ADDED', 'object': item})
+                elif _get_version(old) != _get_version(item):
+                    events.append({'type': 'MODIFIED', 'object': item})
+                else:
+                    # Nobody else gets the unchanged items, no need to copy.
+                    objs[key] = item
+                    continue
+                objs[key] = copy.deepcopy(item)
+        if kind is None:
+            LOG.warning('Got no pages listing %s, not syncing it.', path)
+            return [], None
+
+        for key, old in current.items():
+            if key not in objs:
+                events.append({'type': 'DELETED', 'object': old})
+
+        index = _Index(kind)
+        for key, obj in objs.items():
+            index.add(key, obj)
+        self._objects[kind] = objs
+        self._indexes[kind] = index
+        self._paths[path] = kind
+        LOG.debug('Synced %d %s objects into the cache, %d changed.',
+                  len(objs), kind, len(events))
+        return events, resource_version
+
+    def invalidate(self, path):
+        """Drops the objects fetched from the path and marks it not synced."""
+        kind = self._paths.pop(path, None)
+        if kind and not self.is_synced(kind):
+            self._objects.pop(kind, None)
+            self._indexes.pop(kind, None)
+
+    def clear(self):
+        self._objects = {}
+        self._indexes = {}
+        self._paths = {}
+
+    @staticmethod
+    def _is_stale(old, new):
+        old_version = _get_version(old)
+        new_version = _get_version(new)
+        return (old_version is not None and new_version is not None and
+                new_version < old_version)
+
+    def _put(self, kind, key, obj):
+        objs = self._objects.setdefault(kind, {})
+        index = self._indexes.setdefault(kind, _Index(kind))
+        old = objs.get(key)
+        if self._is_stale(old, obj):
+            return
+        if old is not None:
+            index.remove(key, old)
+        objs[key] = copy.deepcopy(obj)
+        index.add(key, objs[key])
+
+    def _delete(self, kind, key):
+        old = self._objects.get(kind, {}).pop(key, None)
+        if old is not None:
+            self._indexes[kind].remove(key, old)
+
+
+class HandledVersions(object):
+    """Tracks the resourceVersions of the K8s objects passed to handlers.
+
+    The `Watcher` records the version of each object it passes to the
+    handlers, per watched path, while `Retry` forgets the objects it
+    eventually failed to handle and `WorkQueue` the injected ones it dropped.
+    Reconciliation then only needs to inject the listed objects that are not
+    recorded in the same or a newer version, i.e. the ones that changed
+    without the controller noticing or the ones that failed to be handled.
+    """
+
+    instance = None
+
+    def __init__(self):
+        self._versions = {}
+
+    @classmethod
+    def get_instance(cls):
+        if not HandledVersions.instance:
+            HandledVersions.instance = cls()
+        return HandledVersions.instance
+
+    def record(self, path, event):
+        """Records the object of an event as passed to the handlers."""
+        try:
+            metadata = event['object']['metadata']
+            uid = metadata['uid']
+        except (KeyError, TypeError):
+            return
+
+        versions = self._versions.setdefault(path, {})
+        if event.get('type') == 'DELETED':
+            versions.pop(uid, None)
+        else:
+            versions[uid] = _get_version(event['object'])
+
+    def forget(self, obj):
+        """Forgets the object version if handling it failed."""
+        try:
+            uid = obj['metadata']['uid']
+        except (KeyError, TypeError):
+            return
+
+        version = _get_version(obj)
+        for versions in self._versions.values():
+            if uid in versions and versions[uid] == version:
+                del versions[uid]
+
+    def is_handled(self, path, obj):
+        """Checks if the object was handled in the same or newer version."""
+        handled = self._versions.get(path, {}).get(obj['metadata'].get('uid'))
+        version = _get_version(obj)
+        return (handled is not None and version is not None and
+                version <= handled)
+
+    def prune(self, path, uids):
+        """Drops the objects of a path that are not in `uids` anymore."""
+        versions = self._versions.get(path, {})
+        for uid in set(versions) - uids:
+            del versions[uid]
+
+    def clear(self, path=None):
+        if path is None:
+            self._versions = {}
+        else:
+            self._versions.pop(path, None)
+
+
+def get_object(kind, name, namespace=None):
+    """Returns the object from the controller cache, if it is enabled."""
+    if not CONF.kubernetes.use_object_cache:
+        return None
+    return ObjectStore.get_instance().get(kind, name, namespace)
+
+
+def is_synced(kind):
+    """Checks if the controller cache holds all the objects of a kind."""
+    if not CONF.kubernetes.use_object_cache:
+        return False
+    return ObjectStore.get_instance().is_synced(kind)
+
+
+def list_objects(kind, namespace=None, **kwargs):
+    """Returns objects from the controller cache or None if not available."""
+    if not CONF.kubernetes.use_object_cache:
+        return None
+    return ObjectStore.get_instance().list(kind, namespace, **kwargs)
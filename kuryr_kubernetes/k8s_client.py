@@ -157,6 +157,40 @@ class K8sClient(object):
 
         return result
 
+    def get_paginated(self, path, limit=None):
+        """Lists a K8s collection in chunks, yielding each page of it.
+
+        The `limit` and `continue` list parameters are used, so that neither
+        the K8s API nor kuryr need to handle the whole collection in a single
+        response. All the pages belong to the same consistent list snapshot
+        and are returned the same way `get` returns lists.
+
+        :param path: K8s collection URL path, may include a query string
+        :param limit: maximum number of items in a page, defaults to
+                      `[kubernetes]list_chunk_size`. 0 disables chunking.
+        """
+        if limit is None:
+            limit = CONF.kubernetes.list_chunk_size
+        separator = '&' if '?' in path else '?'
+        params = {'limit': limit} if limit else {}
+
+        while True:
+            page_path = path
+            if params:
+                page_path += separator + parse.urlencode(params)
+            page = self.get(page_path)
+            yield page
+
+            token = page.get('metadata', {}).get('continue')
+            if not (limit and token):
+                return
+            params['continue'] = token
+
+    def get_items(self, path, limit=None):
+        """Yields the items of a K8s collection, listing it in chunks."""
+        for page in self.get_paginated(path, limit):
+            yield from page['items']
+
     def _get_url_and_header(self, path, content_type):
         url = self._base_url + path
         header = {'Content-Type': content_type,
@@ -361,31 +395,62 @@ class K8sClient(object):
 
             self._raise_from_response(response)
 
-    def watch(self, path):
+    def watch(self, path, resource_version=None, on_resume=None):
+        """Watches a K8s resource, yielding the events observed.
+
+        The watch requests bookmarks and, whenever the connection is closed
+        or broken, it is resumed from the last resourceVersion seen.
+        Bookmark events are not yielded.
+
+        :param path: K8s resource URL path
+        :param resource_version: resourceVersion to start watching from,
+                                 e.g. the one of a list of the resource
+        :param on_resume: function called each time the watch was resumed
+        :raises K8sWatchExpired: when the resourceVersion to start or resume
+                                 from is no longer available. The resource
+                                 needs to be listed again then.
+        """
         url = self._base_url + path
-        resource_version = None
 
         attempt = 0
+        resuming = False
         while True:
             try:
-                params = {'watch': 'true'}
+                params = {'watch': 'true', 'allowWatchBookmarks': 'true'}
                 if resource_version:
                     params['resourceVersion'] = resource_version
                 with contextlib.closing(
                         self.session.get(
                             url, params=params, stream=True)) as response:
+                    if response.status_code == requests.codes.gone:
+                        raise exc.K8sWatchExpired(response.text)
                     if not response.ok:
                         raise exc.K8sClientException(response.text)
                     attempt = 0
+                    if resuming and resource_version and on_resume:
+                        on_resume()
+                    resuming = True
                     for line in response.iter_lines():
                         line = line.decode('utf-8').strip()
-                        if line:
-                            line_dict = jsonutils.loads(line)
-                            yield line_dict
-                            # Saving the resourceVersion in case of a restart.
-                            # At this point it's safely passed to handler.
-                            m = line_dict.get('object', {}).get('metadata', {})
-                            resource_version = m.get('resourceVersion', None)
+                        if not line:
+                            continue
+                        line_dict = jsonutils.loads(line)
+                        event_type = line_dict.get('type')
+                        obj = line_dict.get('object', {})
+                        if (event_type == 'ERROR' and
+                                obj.get('code') == requests.codes.gone):
+                            raise exc.K8sWatchExpired(obj.get('message'))
+                        m = obj.get('metadata', {})
+                        if event_type == 'BOOKMARK':
+                            # Bookmarks only carry the current resourceVersion
+                            # so that we can resume from it.
+                            resource_version = m.get('resourceVersion',
+                                                     resource_version)
+                            continue
+                        yield line_dict
+                        # Saving the resourceVersion in case of a restart.
+                        # At this point it's safely passed to handler.
+                        resource_version = m.get('resourceVersion', None)
             except (requests.ReadTimeout, requests.ConnectionError,
                     ssl.SSLError, requests.exceptions.ChunkedEncodingError,
                     urllib3.exceptions.SSLError):
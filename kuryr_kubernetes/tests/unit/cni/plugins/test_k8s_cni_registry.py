@@ -17,7 +17,9 @@ from unittest import mock
 from oslo_config import cfg
 
 from kuryr_kubernetes.cni.plugins import k8s_cni_registry
+from kuryr_kubernetes.cni import registry as cni_registry
 from kuryr_kubernetes.cni import utils
+from kuryr_kubernetes import constants as k_const
 from kuryr_kubernetes import exceptions
 from kuryr_kubernetes.tests import base
 from kuryr_kubernetes.tests import fake
@@ -36,10 +38,11 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
                                 'namespace': 'default'},
                    'spec': {'podUid': 'bar', 'podStatic': False}}
         self.vifs = fake._fake_vifs()
-        registry = {'default/foo': {'kp': self.kp, 'vifs': self.vifs,
-                                    'containerid': None,
-                                    'vif_unplugged': False,
-                                    'del_received': False}}
+        registry = cni_registry.SharedRegistry(size=16)
+        registry['default/foo'] = {'kp': self.kp, 'vifs': self.vifs,
+                                   'containerid': None,
+                                   'vif_unplugged': False,
+                                   'del_received': False}
         healthy = mock.Mock()
         self.plugin = k8s_cni_registry.K8sCNIRegistryPlugin(registry, healthy)
         self.params = mock.Mock(
@@ -116,6 +119,7 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
         self.params.args = utils.CNIArgs(
             'K8S_POD_NAME=foo;K8S_POD_NAMESPACE=default;K8S_POD_UID=blob')
         self.kp['spec']['podStatic'] = True
+        self.plugin.registry.set_fields('default/foo', kp=self.kp)
         self.plugin.add(self.params)
 
         m_lock.assert_called_with('default/foo', external=True)
@@ -146,6 +150,7 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
         self.params.args = utils.CNIArgs(
             'K8S_POD_NAME=foo;K8S_POD_NAMESPACE=default;K8S_POD_UID=blob')
         del self.kp['spec']['podStatic']
+        self.plugin.registry.set_fields('default/foo', kp=self.kp)
         self.plugin.add(self.params)
 
         m_lock.assert_called_with('default/foo', external=True)
@@ -183,7 +188,7 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
     @mock.patch('oslo_concurrency.lockutils.lock')
     @mock.patch('kuryr_kubernetes.cni.binding.base.disconnect')
     def test_remove_pod_from_registry_after_del(self, m_disconnect, m_lock):
-        self.plugin.registry['default/foo']['del_received'] = True
+        self.plugin.registry.set_fields('default/foo', del_received=True)
         self.plugin.delete(self.params)
 
         m_lock.assert_called_with('default/foo', external=True)
@@ -200,8 +205,9 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
     @mock.patch('oslo_concurrency.lockutils.lock')
     @mock.patch('kuryr_kubernetes.cni.binding.base.disconnect')
     def test_del_wrong_container_id(self, m_disconnect, m_lock):
-        registry = {'default/foo': {'kp': self.kp, 'vifs': self.vifs,
-                                    'containerid': 'different'}}
+        registry = cni_registry.SharedRegistry(size=16)
+        registry['default/foo'] = {'kp': self.kp, 'vifs': self.vifs,
+                                   'containerid': 'different'}
         healthy = mock.Mock()
         self.plugin = k8s_cni_registry.K8sCNIRegistryPlugin(registry, healthy)
         self.plugin.delete(self.params)
@@ -210,30 +216,22 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
         m_lock.assert_called_with('default/foo', external=True)
 
     @mock.patch('oslo_concurrency.lockutils.lock')
-    @mock.patch('time.sleep', mock.Mock())
     @mock.patch('kuryr_kubernetes.cni.binding.base.connect')
     def test_add_present_on_5_try(self, m_connect, m_lock):
-        se = [KeyError] * 5
-        se.append({'kp': self.kp, 'vifs': self.vifs, 'containerid': None,
-                   'vif_unplugged': False, 'del_received': False})
-        se.append({'kp': self.kp, 'vifs': self.vifs, 'containerid': None,
-                   'vif_unplugged': False, 'del_received': False})
-        se.append({'kp': self.kp, 'vifs': self.vifs, 'containerid': None,
-                   'vif_unplugged': False, 'del_received': False})
-        m_getitem = mock.Mock(side_effect=se)
-        m_setitem = mock.Mock()
-        m_registry = mock.Mock(__getitem__=m_getitem, __setitem__=m_setitem,
-                               __contains__=mock.Mock(return_value=False))
+        entry = {'kp': self.kp, 'vifs': self.vifs, 'containerid': None,
+                 'vif_unplugged': False, 'del_received': False}
+        m_registry = mock.Mock()
+        m_registry.get_versioned.side_effect = (
+            [(0, None)] * 5 + [(1, entry), (2, entry)])
+        m_registry.wait.return_value = 1
         self.plugin.registry = m_registry
         self.plugin.add(self.params)
 
         m_lock.assert_called_with('default/foo', external=True)
-        m_setitem.assert_called_once_with('default/foo',
-                                          {'kp': self.kp,
-                                           'vifs': self.vifs,
-                                           'containerid': 'cont_id',
-                                           'vif_unplugged': False,
-                                           'del_received': False})
+        self.assertEqual(5, m_registry.wait.call_count)
+        m_registry.wait.assert_called_with('default/foo', 0, mock.ANY)
+        m_registry.set_fields.assert_called_once_with('default/foo',
+                                                      containerid='cont_id')
         m_connect.assert_any_call(mock.ANY, mock.ANY, self.default_iface,
                                   123, report_health=mock.ANY,
                                   is_default_gateway=True,
@@ -243,6 +241,37 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
                                   is_default_gateway=False,
                                   container_id='cont_id')
 
+    @mock.patch('oslo_concurrency.lockutils.lock', mock.MagicMock())
+    @mock.patch('kuryr_kubernetes.cni.binding.base.connect', mock.Mock())
+    def test_add_wait_for_active(self):
+        inactive = fake._fake_vifs()
+        inactive[k_const.DEFAULT_IFNAME].active = False
+        entry = {'kp': self.kp, 'vifs': inactive, 'containerid': None,
+                 'vif_unplugged': False, 'del_received': False}
+        active = dict(entry, vifs=self.vifs)
+        m_registry = mock.Mock()
+        m_registry.get_versioned.side_effect = [(1, entry), (2, entry),
+                                                (3, active)]
+        self.plugin.registry = m_registry
+
+        vif = self.plugin.add(self.params)
+
+        self.assertEqual(self.vifs[k_const.DEFAULT_IFNAME], vif)
+        m_registry.wait.assert_called_once_with('default/foo', 2, mock.ANY)
+
+    @mock.patch('oslo_concurrency.lockutils.lock', mock.MagicMock())
+    @mock.patch('kuryr_kubernetes.cni.binding.base.connect', mock.Mock())
+    def test_add_active_timeout(self):
+        cfg.CONF.set_override('vif_annotation_timeout', 0, group='cni_daemon')
+        self.addCleanup(cfg.CONF.clear_override, 'vif_annotation_timeout',
+                        group='cni_daemon')
+        inactive = fake._fake_vifs()
+        inactive[k_const.DEFAULT_IFNAME].active = False
+        self.plugin.registry.set_fields('default/foo', vifs=inactive)
+
+        self.assertRaises(exceptions.CNINeutronPortActivationTimeout,
+                          self.plugin.add, self.params)
+
     @mock.patch('time.sleep', mock.Mock())
     @mock.patch('oslo_concurrency.lockutils.lock', mock.Mock(
         return_value=mock.Mock(__enter__=mock.Mock(), __exit__=mock.Mock())))
@@ -251,8 +280,8 @@ class TestK8sCNIRegistryPlugin(base.TestCase):
         self.addCleanup(cfg.CONF.set_override, 'vif_annotation_timeout', 120,
                         group='cni_daemon')
 
-        m_getitem = mock.Mock(side_effect=KeyError)
-        m_registry = mock.Mock(__getitem__=m_getitem, __contains__=False)
+        m_registry = mock.Mock()
+        m_registry.get_versioned.return_value = (0, None)
         self.plugin.registry = m_registry
         self.assertRaises(exceptions.CNIKuryrPortTimeout, self.plugin.add,
                           self.params)
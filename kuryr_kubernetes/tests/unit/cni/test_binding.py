@@ -13,7 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import collections
+import errno
 import os
+import socket
 from unittest import mock
 import uuid
 
@@ -22,8 +24,10 @@ from os_vif import objects as osv_objects
 from os_vif.objects import fields as osv_fields
 from oslo_config import cfg
 from oslo_utils import uuidutils
+import pyroute2
 
 from kuryr_kubernetes.cni.binding import base
+from kuryr_kubernetes.cni.binding import bridge
 from kuryr_kubernetes.cni.binding import nested
 from kuryr_kubernetes.cni.binding import vhostuser
 from kuryr_kubernetes import exceptions
@@ -34,6 +38,46 @@ from kuryr_kubernetes.tests import fake
 CONF = cfg.CONF
 
 
+class FakeLink(dict):
+    """Link message as returned by pyroute2."""
+
+    def __init__(self, index, ifname, flags=0, **attrs):
+        super(FakeLink, self).__init__(index=index, flags=flags)
+        self.attrs = dict(attrs, IFLA_IFNAME=ifname)
+
+    def get_attr(self, name):
+        return self.attrs.get(name)
+
+
+def _mock_netlink(links):
+    """Returns a mocked IPRoute handle knowing about the given links."""
+    def link(command, ifname=None, index=None, **kwargs):
+        if command != 'get':
+            return ()
+        for link in links:
+            if link.get_attr('IFLA_IFNAME') == ifname or (
+                    index is not None and link['index'] == index):
+                return (link,)
+        raise pyroute2.NetlinkError(errno.ENODEV)
+
+    ipr = mock.Mock()
+    ipr.link.side_effect = link
+    ipr.get_links.return_value = links
+    return ipr
+
+
+def _link_changes(ipr):
+    """Returns the link calls of the handle, skipping the lookups."""
+    return [c for c in ipr.link.call_args_list if c[0][0] != 'get']
+
+
+def _vlan_link(index, ifname, vlan_id, link=1):
+    linkinfo = FakeLink(0, None, IFLA_INFO_KIND='vlan',
+                        IFLA_INFO_DATA=FakeLink(0, None,
+                                                IFLA_VLAN_ID=vlan_id))
+    return FakeLink(index, ifname, IFLA_LINK=link, IFLA_LINKINFO=linkinfo)
+
+
 class TestDriverMixin(test_base.TestCase):
     def setUp(self):
         super(TestDriverMixin, self).setUp()
@@ -42,80 +86,113 @@ class TestDriverMixin(test_base.TestCase):
         self.ifname = 'c_interface'
         self.netns = '/proc/netns/1234'
 
-        # Mock IPDB context managers
-        self.ipdbs = {}
-        self.m_bridge_iface = mock.Mock(__exit__=mock.Mock(return_value=None))
-        self.m_c_iface = mock.Mock()
-        self.m_h_iface = mock.Mock()
-        self.h_ipdb, self.h_ipdb_exit = self._mock_ipdb_context_manager(None)
-        self.c_ipdb, self.c_ipdb_exit = self._mock_ipdb_context_manager(
-            self.netns)
-        self.m_create = mock.Mock()
-        self.h_ipdb.create = mock.Mock(
-            return_value=mock.Mock(
-                __enter__=mock.Mock(return_value=self.m_create),
-                __exit__=mock.Mock(return_value=None)))
-        self.c_ipdb.create = mock.Mock(
-            return_value=mock.Mock(
-                __enter__=mock.Mock(return_value=self.m_create),
-                __exit__=mock.Mock(return_value=None)))
-
-    def _mock_ipdb_context_manager(self, netns):
-        mock_ipdb = mock.Mock(
-            interfaces={
-                'bridge': mock.Mock(
-                    __enter__=mock.Mock(return_value=self.m_bridge_iface),
-                    __exit__=mock.Mock(return_value=None),
-                    mtu=1,
-                ),
-                'c_interface': mock.Mock(
-                    __enter__=mock.Mock(return_value=self.m_c_iface),
-                    __exit__=mock.Mock(return_value=None),
-                ),
-                'h_interface': mock.Mock(
-                    __enter__=mock.Mock(return_value=self.m_h_iface),
-                    __exit__=mock.Mock(return_value=None),
-                ),
-            }
-        )
-        mock_exit = mock.Mock(return_value=None)
-        mock_ipdb.__exit__ = mock_exit
-        mock_ipdb.__enter__ = mock.Mock(return_value=mock_ipdb)
-        self.ipdbs[netns] = mock_ipdb
-
-        return mock_ipdb, mock_exit
+        # Mock the netlink handles of the host and the pod netns
+        self.h_ipr = _mock_netlink([FakeLink(1, 'bridge', IFLA_MTU=1),
+                                    FakeLink(2, 'h_interface')])
+        self.c_ipr = _mock_netlink([FakeLink(3, 'c_interface'),
+                                    FakeLink(4, 'h_interface')])
+        self.iprs = {None: self.h_ipr, self.netns: self.c_ipr}
 
+    @mock.patch('kuryr_kubernetes.cni.binding.base.release_netlink')
     @mock.patch('kuryr_kubernetes.cni.binding.base._need_configure_l3')
-    @mock.patch('kuryr_kubernetes.cni.binding.base.get_ipdb')
+    @mock.patch('kuryr_kubernetes.cni.binding.base.get_netlink')
     @mock.patch('os_vif.plug')
-    def _test_connect(self, m_vif_plug, m_get_ipdb, m_need_l3, report=None):
-        def get_ipdb(netns=None):
-            return self.ipdbs[netns]
+    def _test_connect(self, m_vif_plug, m_get_netlink, m_need_l3,
+                      m_release_netlink, report=None):
+        def get_netlink(netns=None):
+            return self.iprs[netns]
 
-        m_get_ipdb.side_effect = get_ipdb
+        m_get_netlink.side_effect = get_netlink
         m_need_l3.return_value = True
 
         base.connect(self.vif, self.instance_info, self.ifname, self.netns,
                      report)
         m_vif_plug.assert_called_once_with(self.vif, self.instance_info)
-        self.m_c_iface.add_ip.assert_called_once_with('192.168.0.2/24')
+        self.c_ipr.addr.assert_called_once_with(
+            'add', index=3, address='192.168.0.2', mask=24,
+            family=socket.AF_INET)
+        self.c_ipr.route.assert_called_once_with(
+            'add', dst='default', gateway='192.168.0.1',
+            family=socket.AF_INET)
+        m_release_netlink.assert_called_once_with(self.netns)
         if report:
             report.assert_called_once()
 
-    @mock.patch('kuryr_kubernetes.cni.binding.base.get_ipdb')
+    @mock.patch('kuryr_kubernetes.cni.binding.base.release_netlink')
+    @mock.patch('kuryr_kubernetes.cni.binding.base.get_netlink')
     @mock.patch('os_vif.unplug')
-    def _test_disconnect(self, m_vif_unplug, m_get_ipdb, report=None):
-        def get_ipdb(netns=None):
-            return self.ipdbs[netns]
-        m_get_ipdb.side_effect = get_ipdb
+    def _test_disconnect(self, m_vif_unplug, m_get_netlink,
+                         m_release_netlink, report=None):
+        def get_netlink(netns=None):
+            return self.iprs[netns]
+        m_get_netlink.side_effect = get_netlink
 
         base.disconnect(self.vif, self.instance_info, self.ifname, self.netns,
                         report)
         m_vif_unplug.assert_called_once_with(self.vif, self.instance_info)
+        m_release_netlink.assert_called_once_with(self.netns)
         if report:
             report.assert_called_once()
 
 
+class TestNetlinkHandles(test_base.TestCase):
+    def setUp(self):
+        super(TestNetlinkHandles, self).setUp()
+        self.addCleanup(base._netlink_handles.clear)
+
+    @mock.patch('pyroute2.NetNS')
+    @mock.patch('pyroute2.IPRoute')
+    def test_get_netlink(self, m_iproute, m_netns):
+        self.assertEqual(m_iproute.return_value, base.get_netlink())
+        self.assertEqual(m_iproute.return_value, base.get_netlink())
+        self.assertEqual(m_netns.return_value,
+                         base.get_netlink('/proc/1234/ns/net'))
+        self.assertEqual(m_netns.return_value,
+                         base.get_netlink('/proc/1234/ns/net'))
+
+        m_iproute.assert_called_once_with()
+        m_netns.assert_called_once_with('/proc/1234/ns/net')
+
+    @mock.patch('pyroute2.NetNS')
+    @mock.patch('pyroute2.IPRoute')
+    def test_release_netlink(self, m_iproute, m_netns):
+        h_ipr = base.get_netlink()
+        c_ipr = base.get_netlink('/proc/1234/ns/net')
+
+        base.release_netlink('/proc/1234/ns/net')
+        base.release_netlink('/proc/1234/ns/net')
+        base.release_netlink(None)
+
+        c_ipr.close.assert_called_once_with()
+        h_ipr.close.assert_not_called()
+        self.assertEqual({None: h_ipr}, base._netlink_handles)
+
+    def test_get_link(self):
+        ipr = _mock_netlink([FakeLink(1, 'eth0')])
+
+        self.assertEqual(1, base.get_link(ipr, 'eth0')['index'])
+        self.assertIsNone(base.get_link(ipr, 'eth1'))
+        ipr.link.assert_called_with('get', ifname='eth1')
+
+    def test_get_link_error(self):
+        ipr = mock.Mock()
+        ipr.link.side_effect = pyroute2.NetlinkError(errno.EPERM)
+
+        self.assertRaises(pyroute2.NetlinkError, base.get_link, ipr, 'eth0')
+
+    @mock.patch('kuryr_kubernetes.cni.binding.base.release_netlink')
+    @mock.patch('kuryr_kubernetes.cni.binding.base.get_netlink')
+    def test_cleanup(self, m_get_netlink, m_release_netlink):
+        ipr = _mock_netlink([FakeLink(1, 'eth0')])
+        m_get_netlink.return_value = ipr
+
+        base.cleanup('eth0', '/proc/1234/ns/net')
+
+        m_get_netlink.assert_called_once_with('/proc/1234/ns/net')
+        ipr.link.assert_called_with('del', index=1)
+        m_release_netlink.assert_called_once_with('/proc/1234/ns/net')
+
+
 class TestOpenVSwitchDriver(TestDriverMixin, test_base.TestCase):
     def setUp(self):
         super(TestOpenVSwitchDriver, self).setUp()
@@ -127,17 +204,11 @@ class TestOpenVSwitchDriver(TestDriverMixin, test_base.TestCase):
     @mock.patch('kuryr_kubernetes.linux_net_utils.create_ovs_vif_port')
     def test_connect(self, mock_create_ovs, m_report):
         self._test_connect(report=m_report)
-        self.assertEqual(3, self.h_ipdb_exit.call_count)
-        self.assertEqual(2, self.c_ipdb_exit.call_count)
-        self.c_ipdb.create.assert_called_once_with(
-            ifname=self.ifname, peer='h_interface', kind='veth')
-        self.assertEqual(1, self.m_create.mtu)
-        self.assertEqual(str(self.vif.address),
-                         self.m_create.address)
-        self.m_create.up.assert_called_once_with()
-        self.assertEqual(123, self.m_h_iface.net_ns_pid)
-        self.assertEqual(1, self.m_h_iface.mtu)
-        self.m_h_iface.up.assert_called_once_with()
+        self.c_ipr.link.assert_any_call(
+            'add', ifname=self.ifname, kind='veth',
+            peer={'ifname': 'h_interface', 'mtu': 1, 'net_ns_pid': 123},
+            mtu=1, address=str(self.vif.address), state='up')
+        self.h_ipr.link.assert_any_call('set', index=2, state='up')
 
         mock_create_ovs.assert_called_once_with(
             'bridge', 'h_interface', '89eccd45-43e9-43d8-b4cc-4c13db13f782',
@@ -150,6 +221,18 @@ class TestOpenVSwitchDriver(TestDriverMixin, test_base.TestCase):
         self._test_disconnect(report=m_report)
         mock_delete_ovs.assert_called_once_with('bridge', 'h_interface')
 
+    @mock.patch('kuryr_kubernetes.cni.binding.base.get_netlink')
+    def test_is_alive(self, m_get_netlink):
+        m_get_netlink.return_value = self.h_ipr
+        CONF.set_override('ovs_bridge', 'bridge', group='neutron_defaults')
+        self.addCleanup(CONF.clear_override, 'ovs_bridge',
+                        group='neutron_defaults')
+        driver = bridge.VIFOpenVSwitchDriver()
+
+        self.assertTrue(driver.is_alive())
+        CONF.set_override('ovs_bridge', 'br-missing', group='neutron_defaults')
+        self.assertFalse(driver.is_alive())
+
 
 class TestBridgeDriver(TestDriverMixin, test_base.TestCase):
     def setUp(self):
@@ -160,21 +243,17 @@ class TestBridgeDriver(TestDriverMixin, test_base.TestCase):
     def test_connect(self):
         self._test_connect()
 
-        self.m_h_iface.remove.assert_called_once_with()
-
-        self.assertEqual(3, self.h_ipdb_exit.call_count)
-        self.assertEqual(2, self.c_ipdb_exit.call_count)
-        self.c_ipdb.create.assert_called_once_with(
-            ifname=self.ifname, peer='h_interface', kind='veth')
-        self.assertEqual(1, self.m_create.mtu)
-        self.assertEqual(str(self.vif.address),
-                         self.m_create.address)
-        self.m_create.up.assert_called_once_with()
-        self.assertEqual(123, self.m_h_iface.net_ns_pid)
-        self.assertEqual(1, self.m_h_iface.mtu)
-        self.m_h_iface.up.assert_called_once_with()
-
-        self.m_bridge_iface.add_port.assert_called_once_with('h_interface')
+        self.assertEqual([
+            mock.call('del', index=2),
+            mock.call('set', index=2, state='up'),
+            mock.call('set', index=2, master=1)],
+            _link_changes(self.h_ipr))
+        self.c_ipr.link.assert_any_call(
+            'add', ifname=self.ifname, kind='veth',
+            peer={'ifname': 'h_interface', 'mtu': 1, 'net_ns_pid': 123},
+            mtu=1, address=str(self.vif.address), state='up')
+        self.h_ipr.get_links.assert_not_called()
+        self.c_ipr.get_links.assert_not_called()
 
     def test_disconnect(self):
         self._test_disconnect()
@@ -183,14 +262,12 @@ class TestBridgeDriver(TestDriverMixin, test_base.TestCase):
 class TestNestedDriver(TestDriverMixin, test_base.TestCase):
     def setUp(self):
         super(TestNestedDriver, self).setUp()
-        ifaces = {
-            'lo': {'flags': 0x8, 'ipaddr': (('127.0.0.1', 8),)},
-            'first': {'flags': 0, 'ipaddr': (('192.168.0.1', 8),)},
-            'kubelet': {'flags': 0, 'ipaddr': (('192.168.1.1', 8),)},
-            'bridge': {'flags': 0, 'ipaddr': (('192.168.2.1', 8),)},
-        }
-        self.h_ipdb = mock.Mock(interfaces=ifaces)
-        self.h_ipdb_loopback = mock.Mock(interfaces=ifaces)
+        self.h_ipr = _mock_netlink([
+            FakeLink(1, 'lo', flags=0x8),
+            FakeLink(2, 'first'),
+            FakeLink(3, 'kubelet'),
+            FakeLink(4, 'bridge'),
+        ])
         self.sconn = collections.namedtuple(
             'sconn', ['fd', 'family', 'type', 'laddr', 'raddr', 'status',
                       'pid'])
@@ -201,8 +278,9 @@ class TestNestedDriver(TestDriverMixin, test_base.TestCase):
         driver = nested.NestedDriver()
         self.addCleanup(CONF.clear_override, 'link_iface', group='binding')
         CONF.set_override('link_iface', 'bridge', group='binding')
-        iface = driver._detect_iface_name(self.h_ipdb)
+        iface = driver._detect_iface_name(self.h_ipr)
         self.assertEqual('bridge', iface)
+        self.h_ipr.get_links.assert_not_called()
 
     @mock.patch.multiple(nested.NestedDriver, __abstractmethods__=set())
     @mock.patch('psutil.net_connections')
@@ -216,8 +294,13 @@ class TestNestedDriver(TestDriverMixin, test_base.TestCase):
             self.sconn(-1, 2, 2, laddr=self.addr(ip='192.168.1.1', port=10250),
                        raddr=(), status='LISTEN', pid=None),
         ]
-        iface = driver._detect_iface_name(self.h_ipdb)
+        self.h_ipr.get_addr.return_value = [{'index': 3}]
+
+        iface = driver._detect_iface_name(self.h_ipr)
+
         self.assertEqual('kubelet', iface)
+        self.h_ipr.get_addr.assert_called_once_with(address='192.168.1.1')
+        self.h_ipr.get_links.assert_not_called()
 
     @mock.patch.multiple(nested.NestedDriver, __abstractmethods__=set())
     @mock.patch('psutil.net_connections')
@@ -225,7 +308,7 @@ class TestNestedDriver(TestDriverMixin, test_base.TestCase):
         driver = nested.NestedDriver()
         m_net_connections.return_value = []
 
-        iface = driver._detect_iface_name(self.h_ipdb)
+        iface = driver._detect_iface_name(self.h_ipr)
         self.assertEqual('first', iface)
 
     @mock.patch.multiple(nested.NestedDriver, __abstractmethods__=set())
@@ -234,11 +317,47 @@ class TestNestedDriver(TestDriverMixin, test_base.TestCase):
         driver = nested.NestedDriver()
         m_net_connections.return_value = []
 
-        self.h_ipdb.interfaces = {
-            'lo': {'flags': 0x8, 'ipaddr': (('127.0.0.1', 8),)},
-        }
+        self.h_ipr.get_links.return_value = [FakeLink(1, 'lo', flags=0x8)]
         self.assertRaises(exceptions.CNIBindingFailure,
-                          driver._detect_iface_name, self.h_ipdb)
+                          driver._detect_iface_name, self.h_ipr)
+
+
+class TestVlanIndex(test_base.TestCase):
+    def setUp(self):
+        super(TestVlanIndex, self).setUp()
+        self.index = nested.VlanIndex()
+
+    def test_add_get(self):
+        self.index.add(7, '/proc/1/ns/net', 'eth0')
+
+        self.assertEqual(('/proc/1/ns/net', 'eth0'), self.index.get(7))
+        self.assertIsNone(self.index.get(8))
+
+    def test_remove(self):
+        self.index.add(7, '/proc/1/ns/net', 'eth0')
+
+        self.index.remove(7, '/proc/2/ns/net')
+        self.assertEqual(('/proc/1/ns/net', 'eth0'), self.index.get(7))
+        self.index.remove(7, '/proc/1/ns/net')
+        self.assertIsNone(self.index.get(7))
+        self.index.remove(7, '/proc/1/ns/net')
+
+    def test_add_long_netns(self):
+        netns = '/var/run/netns/cni-' + str(uuid.uuid4())
+
+        self.index.add(4095, netns, 'eth0')
+        self.index.add(7, '/proc/1/ns/net', 'x' * 256)
+
+        self.assertEqual((netns, 'eth0'), self.index.get(4095))
+        self.assertIsNone(self.index.get(7))
+
+    def test_get_instance(self):
+        self.addCleanup(setattr, nested.VlanIndex, 'instance', None)
+        nested.VlanIndex.instance = None
+
+        index = nested.VlanIndex.get_instance()
+
+        self.assertIs(index, nested.VlanIndex.get_instance())
 
 
 class TestNestedVlanDriver(TestDriverMixin, test_base.TestCase):
@@ -248,25 +367,102 @@ class TestNestedVlanDriver(TestDriverMixin, test_base.TestCase):
         self.vif.vlan_id = 7
         CONF.set_override('link_iface', 'bridge', group='binding')
         self.addCleanup(CONF.clear_override, 'link_iface', group='binding')
+        self.addCleanup(setattr, nested.VlanIndex, 'instance', None)
+        self.index = nested.VlanIndex()
+        nested.VlanIndex.instance = self.index
 
     def test_connect(self):
         self._test_connect()
 
-        self.assertEqual(2, self.h_ipdb_exit.call_count)
-        self.assertEqual(3, self.c_ipdb_exit.call_count)
-
-        self.assertEqual(self.ifname, self.m_h_iface.ifname)
-        self.assertEqual(1, self.m_h_iface.mtu)
-        self.assertEqual(str(self.vif.address), self.m_h_iface.address)
-        self.m_h_iface.up.assert_called_once_with()
+        self.assertEqual([
+            mock.call('del', index=2),
+            mock.call('add', ifname='h_interface', link=1,
+                      net_ns_fd=self.netns, kind='vlan', vlan_id=7)],
+            _link_changes(self.h_ipr))
+        self.assertEqual([
+            mock.call('del', index=4),
+            mock.call('del', index=3),
+            mock.call('set', index=4, ifname=self.ifname, mtu=1,
+                      address=str(self.vif.address), state='up')],
+            _link_changes(self.c_ipr))
+        self.h_ipr.get_links.assert_not_called()
+        self.c_ipr.get_links.assert_not_called()
+        self.assertEqual((self.netns, self.ifname), self.index.get(7))
 
     def test_connect_mtu_mismatch(self):
         self.vif.network.mtu = 2
         self.assertRaises(exceptions.CNIBindingFailure, self._test_connect)
+        self.assertIsNone(self.index.get(7))
+
+    @mock.patch.object(nested.VlanDriver, '_cleanup_conflicting_vlan')
+    @mock.patch.object(nested.NestedDriver, 'connect')
+    def test_connect_conflict(self, m_connect, m_cleanup):
+        m_connect.side_effect = [pyroute2.NetlinkError(errno.EEXIST), None]
+        driver = nested.VlanDriver()
+
+        driver.connect(self.vif, self.ifname, self.netns, None)
+
+        m_cleanup.assert_called_once_with(self.netns, 7)
+        self.assertEqual(2, m_connect.call_count)
+        self.assertEqual((self.netns, self.ifname), self.index.get(7))
 
     def test_disconnect(self):
+        self.index.add(7, self.netns, self.ifname)
+
         self._test_disconnect()
 
+        self.assertEqual([mock.call('del', index=4),
+                          mock.call('del', index=3)],
+                         _link_changes(self.c_ipr))
+        self.assertIsNone(self.index.get(7))
+
+    @mock.patch('os.listdir')
+    @mock.patch('pyroute2.NetNS')
+    @mock.patch('kuryr_kubernetes.cni.binding.base.get_netlink')
+    def test_cleanup_conflicting_vlan(self, m_get_netlink, m_netns,
+                                      m_listdir):
+        m_get_netlink.return_value = self.h_ipr
+        ns1_ipr = _mock_netlink([FakeLink(1, 'lo'), _vlan_link(2, 'eth0', 7)])
+        m_netns.return_value.__enter__.return_value = ns1_ipr
+        self.index.add(7, '/var/run/netns/ns1', 'eth0')
+        driver = nested.VlanDriver()
+
+        driver._cleanup_conflicting_vlan('/var/run/netns/ns3', 7)
+
+        m_netns.assert_called_once_with('/var/run/netns/ns1')
+        self.assertEqual([mock.call('del', index=2)], _link_changes(ns1_ipr))
+        ns1_ipr.get_links.assert_not_called()
+        m_listdir.assert_not_called()
+
+    @mock.patch('os.listdir')
+    @mock.patch('os.stat')
+    @mock.patch('pyroute2.NetNS')
+    @mock.patch('kuryr_kubernetes.cni.binding.base.get_netlink')
+    def test_cleanup_conflicting_vlan_rebuild(self, m_get_netlink, m_netns,
+                                              m_stat, m_listdir):
+        m_get_netlink.return_value = self.h_ipr
+        m_listdir.return_value = ['ns1', 'ns2']
+        m_stat.side_effect = [mock.Mock(st_dev=1, st_ino=1),
+                              mock.Mock(st_dev=1, st_ino=2)]
+        # The indexed interface is gone and its VLAN ID got reused.
+        self.index.add(7, '/var/run/netns/ns1', 'eth0')
+        ns1_ipr = _mock_netlink([FakeLink(1, 'lo'), _vlan_link(2, 'eth0', 8),
+                                 _vlan_link(3, 'eth1', 7, link=5)])
+        ns2_ipr = _mock_netlink([_vlan_link(2, 'eth0', 7)])
+        m_netns.return_value.__enter__.side_effect = [ns1_ipr, ns1_ipr,
+                                                      ns2_ipr]
+        driver = nested.VlanDriver()
+
+        driver._cleanup_conflicting_vlan('/var/run/netns/ns3', 7)
+
+        m_netns.assert_has_calls([mock.call('/var/run/netns/ns1'),
+                                  mock.call('/var/run/netns/ns2')],
+                                 any_order=True)
+        self.assertEqual([], _link_changes(ns1_ipr))
+        self.assertEqual([mock.call('del', index=2)], _link_changes(ns2_ipr))
+        self.assertEqual(('/var/run/netns/ns1', 'eth0'), self.index.get(8))
+        self.assertIsNone(self.index.get(7))
+
 
 class TestNestedMacvlanDriver(TestDriverMixin, test_base.TestCase):
     def setUp(self):
@@ -278,13 +474,12 @@ class TestNestedMacvlanDriver(TestDriverMixin, test_base.TestCase):
     def test_connect(self):
         self._test_connect()
 
-        self.assertEqual(2, self.h_ipdb_exit.call_count)
-        self.assertEqual(3, self.c_ipdb_exit.call_count)
-
-        self.assertEqual(self.ifname, self.m_h_iface.ifname)
-        self.assertEqual(1, self.m_h_iface.mtu)
-        self.assertEqual(str(self.vif.address), self.m_h_iface.address)
-        self.m_h_iface.up.assert_called_once_with()
+        self.h_ipr.link.assert_any_call(
+            'add', ifname='h_interface', link=1, net_ns_fd=self.netns,
+            kind='macvlan', macvlan_mode='bridge')
+        self.c_ipr.link.assert_any_call(
+            'set', index=4, ifname=self.ifname, mtu=1,
+            address=str(self.vif.address), state='up')
 
     def test_connect_mtu_mismatch(self):
         self.vif.network.mtu = 2
@@ -15,13 +15,14 @@
 from unittest import mock
 
 from kuryr_kubernetes.cni import handlers
+from kuryr_kubernetes.cni import registry
 from kuryr_kubernetes.tests import base
 
 
 class TestCNIDaemonHandlers(base.TestCase):
     def setUp(self):
         super().setUp()
-        self.registry = {}
+        self.registry = registry.SharedRegistry(size=16)
         self.pod = {'metadata': {'namespace': 'testing',
                                  'name': 'default'},
                     'vif_unplugged': False,
@@ -46,7 +47,7 @@ class TestCNIDaemonHandlers(base.TestCase):
         self.registry[pod_name] = pod
         self.port_handler.on_deleted(pod)
         self.assertIn(pod_name, self.registry)
-        self.assertIs(True, pod['del_received'])
+        self.assertIs(True, self.registry[pod_name]['del_received'])
 
     @mock.patch('oslo_concurrency.lockutils.lock')
     def test_pod_on_finalize(self, m_lock):
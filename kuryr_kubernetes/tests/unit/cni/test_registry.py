@@ -0,0 +1,142 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import multiprocessing
+from unittest import mock
+
+from kuryr_kubernetes.cni import registry
+from kuryr_kubernetes import exceptions
+from kuryr_kubernetes.tests import base
+
+
+def _set_key(reg, key, value):
+    reg[key] = value
+
+
+class TestSharedRegistry(base.TestCase):
+    def setUp(self):
+        super(TestSharedRegistry, self).setUp()
+        self.registry = registry.SharedRegistry(size=8, entry_size=1024)
+
+    def test_set_get(self):
+        self.registry['ns/pod1'] = {'containerid': None}
+        self.registry['ns/pod2'] = None
+
+        self.assertEqual({'containerid': None}, self.registry['ns/pod1'])
+        self.assertIsNone(self.registry['ns/pod2'])
+        self.assertIn('ns/pod2', self.registry)
+        self.assertNotIn('ns/pod3', self.registry)
+        self.assertRaises(KeyError, self.registry.__getitem__, 'ns/pod3')
+        self.assertEqual({'ns/pod1', 'ns/pod2'}, set(self.registry))
+        self.assertEqual(2, len(self.registry))
+
+    def test_get_copy(self):
+        self.registry['ns/pod1'] = {'containerid': None}
+
+        self.registry['ns/pod1']['containerid'] = 'foo'
+
+        self.assertIsNone(self.registry['ns/pod1']['containerid'])
+
+    def test_delete(self):
+        self.registry['ns/pod1'] = 'foo'
+
+        del self.registry['ns/pod1']
+
+        self.assertNotIn('ns/pod1', self.registry)
+        self.assertRaises(KeyError, self.registry.__delitem__, 'ns/pod1')
+
+    @mock.patch('zlib.crc32', return_value=7)
+    def test_delete_colliding(self, m_crc32):
+        # All the keys collide on the last slot and wrap around the table.
+        for i in range(4):
+            self.registry[f'ns/pod{i}'] = i
+
+        del self.registry['ns/pod0']
+        del self.registry['ns/pod2']
+
+        self.assertEqual({'ns/pod1': 1, 'ns/pod3': 3}, dict(self.registry))
+        self.registry['ns/pod4'] = 4
+        self.assertEqual(4, self.registry['ns/pod4'])
+
+    def test_full(self):
+        for i in range(8):
+            self.registry[f'ns/pod{i}'] = i
+
+        self.assertRaises(exceptions.CNIRegistryFull,
+                          self.registry.__setitem__, 'ns/pod8', 8)
+        self.registry['ns/pod7'] = 'foo'
+        self.assertEqual('foo', self.registry['ns/pod7'])
+
+    def test_entry_too_big(self):
+        self.assertRaises(ValueError, self.registry.__setitem__, 'ns/pod1',
+                          'x' * 1024)
+        self.assertNotIn('ns/pod1', self.registry)
+
+    def test_max_key_length(self):
+        reg = registry.SharedRegistry(size=8, entry_size=64, max_key_length=4)
+
+        reg['4095'] = 'x' * 30
+
+        self.assertEqual('x' * 30, reg['4095'])
+        self.assertRaises(KeyError, reg.__setitem__, '40960', 'foo')
+        self.assertRaises(ValueError, reg.__setitem__, '1', 'x' * 64)
+
+    def test_set_fields(self):
+        self.registry['ns/pod1'] = {'containerid': None, 'vifs': {}}
+        self.registry['ns/pod2'] = None
+
+        self.registry.set_fields('ns/pod1', containerid='foo')
+
+        self.assertEqual({'containerid': 'foo', 'vifs': {}},
+                         self.registry['ns/pod1'])
+        self.assertRaises(KeyError, self.registry.set_fields, 'ns/pod2',
+                          containerid='foo')
+        self.assertRaises(KeyError, self.registry.set_fields, 'ns/pod3',
+                          containerid='foo')
+
+    def test_get_version(self):
+        self.assertEqual(0, self.registry.get_version('ns/pod1'))
+
+        self.registry['ns/pod1'] = 'foo'
+        version = self.registry.get_version('ns/pod1')
+        self.registry['ns/pod2'] = 'foo'
+
+        self.assertGreater(version, 0)
+        self.assertEqual(version, self.registry.get_version('ns/pod1'))
+        self.registry['ns/pod1'] = 'bar'
+        self.assertGreater(self.registry.get_version('ns/pod1'), version)
+
+    def test_get_versioned(self):
+        self.assertEqual((0, None), self.registry.get_versioned('ns/pod1'))
+
+        self.registry['ns/pod1'] = 'foo'
+
+        self.assertEqual((self.registry.get_version('ns/pod1'), 'foo'),
+                         self.registry.get_versioned('ns/pod1'))
+
+    def test_wait(self):
+        self.registry['ns/pod1'] = 'foo'
+        version = self.registry.get_version('ns/pod1')
+
+        self.assertEqual(version, self.registry.wait('ns/pod1', version, 0))
+        self.assertEqual(version, self.registry.wait('ns/pod1', 0, 10))
+
+    def test_wait_other_process(self):
+        process = multiprocessing.Process(
+            target=_set_key, args=(self.registry, 'ns/pod1', 'foo'))
+        process.start()
+        self.addCleanup(process.join)
+
+        version = self.registry.wait('ns/pod1', 0, 10)
+
+        self.assertGreater(version, 0)
+        self.assertEqual('foo', self.registry['ns/pod1'])
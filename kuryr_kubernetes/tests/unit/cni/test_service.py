@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import math
 import queue
+import socket
 from unittest import mock
 
+from oslo_config import cfg
 from oslo_serialization import jsonutils
 
 from kuryr_kubernetes.cni.daemon import service
@@ -107,3 +110,63 @@ class TestDaemonServer(base.TestCase):
 
         m_delete.assert_called_once_with(mock.ANY)
         self.assertEqual(500, resp.status_code)
+
+    @mock.patch('kuryr_kubernetes.cni.plugins.k8s_cni_registry.'
+                'K8sCNIRegistryPlugin.delete')
+    def test_active_requests(self, m_delete):
+        active = []
+        m_delete.side_effect = lambda params: active.append(
+            self.srv.active_requests.value)
+
+        self.test_client.post('/delNetwork', data=self.params_str,
+                              content_type='application/json')
+
+        self.assertEqual([1], active)
+        self.assertEqual(0, self.srv.active_requests.value)
+
+    @mock.patch('werkzeug.serving.make_server')
+    def test_run(self, m_make_server):
+        sock = mock.Mock()
+
+        self.srv.run(sock)
+
+        m_make_server.assert_called_once_with(
+            '127.0.0.1', 5036, self.srv.application, threaded=False,
+            request_handler=service.CNIRequestHandler,
+            fd=sock.fileno.return_value)
+        m_make_server.return_value.serve_forever.assert_called_once_with()
+
+
+class TestServerSocket(base.TestCase):
+    def setUp(self):
+        super(TestServerSocket, self).setUp()
+        cfg.CONF.set_override('bind_address', '127.0.0.1:0',
+                              group='cni_daemon')
+        self.addCleanup(cfg.CONF.clear_override, 'bind_address',
+                        group='cni_daemon')
+
+    def test_bind_server_socket(self):
+        sock = service.bind_server_socket()
+        self.addCleanup(sock.close)
+
+        conn = socket.create_connection(sock.getsockname())
+        self.addCleanup(conn.close)
+
+        self.assertEqual(1, service.get_queued_requests(sock))
+        accepted, _ = sock.accept()
+        accepted.close()
+        self.assertEqual(0, service.get_queued_requests(sock))
+
+    def test_bind_server_socket_one_worker(self):
+        cfg.CONF.set_override('worker_num', 1, group='cni_daemon')
+        self.addCleanup(cfg.CONF.clear_override, 'worker_num',
+                        group='cni_daemon')
+
+        self.assertRaises(exceptions.InvalidKuryrConfiguration,
+                          service.bind_server_socket)
+
+    def test_get_queued_requests_error(self):
+        sock = mock.Mock()
+        sock.getsockopt.side_effect = OSError
+
+        self.assertTrue(math.isnan(service.get_queued_requests(sock)))
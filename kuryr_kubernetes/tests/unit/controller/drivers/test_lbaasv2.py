@@ -374,6 +374,152 @@ class TestLBaaSv2Driver(test_base.TestCase):
         self.assertEqual(port, member['port'])
         self.assertEqual(expected_resp, resp)
 
+    def _get_members_args(self, count):
+        return [{'subnet_id': 'D3FA400A-F543-4B91-9CD3-047AF0CE42D1',
+                 'ip': '1.2.3.%d' % i,
+                 'port': 1234,
+                 'target_ref_namespace': 'TEST_NAMESPACE',
+                 'target_ref_name': 'TEST_NAME%d' % i}
+                for i in range(count)]
+
+    def test_ensure_members(self):
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        m_driver._octavia_batch_members = True
+        m_driver._provisioning_timer.return_value = [100]
+        loadbalancer = {'id': '00EE9E11-91C2-41CF-8FD4-7970579E5C4C',
+                        'project_id': 'TEST_PROJECT'}
+        pool = {'id': 'D4F35594-27EB-4F4C-930C-31DD40F53B77'}
+        members = self._get_members_args(3)
+        found = [mock.sentinel.member1, mock.sentinel.member2]
+        m_driver._find_members.return_value = (found, [members[2]])
+        m_driver._ensure_members_one_by_one.return_value = [
+            mock.sentinel.member3]
+
+        resp = cls.ensure_members(m_driver, loadbalancer, pool, members,
+                                  listener_port=80)
+
+        self.assertEqual([mock.sentinel.member1, mock.sentinel.member2,
+                          mock.sentinel.member3], resp)
+        requested = m_driver._create_members.call_args[0][1]
+        self.assertEqual(['TEST_NAMESPACE/TEST_NAME%d:1234' % i
+                          for i in range(3)], [m['name'] for m in requested])
+        m_driver._create_members.assert_called_once_with(pool, requested)
+        m_driver._find_members.assert_called_once_with(pool, requested,
+                                                       members)
+        m_driver._ensure_members_one_by_one.assert_called_once_with(
+            loadbalancer, pool, [members[2]])
+        m_driver._apply_pool_members_security_groups.assert_called_once_with(
+            loadbalancer, pool, 80, 1234)
+
+    def test_ensure_members_not_supported(self):
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        m_driver._octavia_batch_members = False
+        loadbalancer = mock.sentinel.loadbalancer
+        pool = mock.sentinel.pool
+        members = self._get_members_args(2)
+
+        resp = cls.ensure_members(m_driver, loadbalancer, pool, members,
+                                  listener_port=80)
+
+        self.assertEqual(m_driver._ensure_members_one_by_one.return_value,
+                         resp)
+        m_driver._ensure_members_one_by_one.assert_called_once_with(
+            loadbalancer, pool, members, 80)
+        m_driver._create_members.assert_not_called()
+
+    def test_ensure_members_batch_failed(self):
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        m_driver._octavia_batch_members = True
+        m_driver._provisioning_timer.return_value = [100, 90]
+        m_driver._create_members.side_effect = [
+            os_exc.ConflictException(), os_exc.BadRequestException()]
+        loadbalancer = {'id': '00EE9E11-91C2-41CF-8FD4-7970579E5C4C',
+                        'project_id': 'TEST_PROJECT'}
+        pool = {'id': 'D4F35594-27EB-4F4C-930C-31DD40F53B77'}
+        members = self._get_members_args(2)
+
+        resp = cls.ensure_members(m_driver, loadbalancer, pool, members)
+
+        self.assertEqual(m_driver._ensure_members_one_by_one.return_value,
+                         resp)
+        self.assertEqual(2, m_driver._create_members.call_count)
+        m_driver._ensure_members_one_by_one.assert_called_once_with(
+            loadbalancer, pool, members, None)
+        m_driver._find_members.assert_not_called()
+
+    def test_ensure_members_one_by_one(self):
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        m_driver.ensure_member.side_effect = [None, mock.sentinel.member2,
+                                              mock.sentinel.member3]
+        members = self._get_members_args(3)
+
+        resp = cls._ensure_members_one_by_one(
+            m_driver, mock.sentinel.loadbalancer, mock.sentinel.pool,
+            members, 80)
+
+        self.assertEqual([mock.sentinel.member2, mock.sentinel.member3],
+                         resp)
+        m_driver.ensure_member.assert_has_calls([
+            mock.call(mock.sentinel.loadbalancer, mock.sentinel.pool,
+                      listener_port=80, **members[0]),
+            mock.call(mock.sentinel.loadbalancer, mock.sentinel.pool,
+                      listener_port=80, **members[1]),
+            mock.call(mock.sentinel.loadbalancer, mock.sentinel.pool,
+                      listener_port=None, **members[2])])
+
+    def test_create_members(self):
+        lbaas = self.useFixture(k_fix.MockLBaaSClient()).client
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        pool = {'id': 'D4F35594-27EB-4F4C-930C-31DD40F53B77'}
+        members = [{'name': 'TEST_NAMESPACE/TEST_NAME:1234',
+                    'project_id': 'TEST_PROJECT',
+                    'pool_id': pool['id'],
+                    'subnet_id': 'D3FA400A-F543-4B91-9CD3-047AF0CE42D1',
+                    'ip': '1.2.3.4',
+                    'port': 1234}]
+        lbaas.put.return_value = mock.Mock(status_code=202)
+
+        cls._create_members(m_driver, pool, members)
+
+        lbaas.put.assert_called_once_with(
+            '/lbaas/pools/D4F35594-27EB-4F4C-930C-31DD40F53B77/members'
+            '?additive_only=True',
+            json={'members': [{
+                'name': 'TEST_NAMESPACE/TEST_NAME:1234',
+                'subnet_id': 'D3FA400A-F543-4B91-9CD3-047AF0CE42D1',
+                'address': '1.2.3.4',
+                'protocol_port': 1234}]},
+            raise_exc=False)
+        m_driver.add_tags.assert_called_once_with('member', mock.ANY)
+
+    def test_find_members(self):
+        lbaas = self.useFixture(k_fix.MockLBaaSClient()).client
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        pool = {'id': 'D4F35594-27EB-4F4C-930C-31DD40F53B77'}
+        args = self._get_members_args(3)
+        requested = [{'name': str(i), 'ip': a['ip'], 'port': a['port']}
+                     for i, a in enumerate(args)]
+        lbaas.members.return_value = iter([
+            o_mem.Member(id='id0', address='1.2.3.0', protocol_port=1234,
+                         provisioning_status='ACTIVE'),
+            o_mem.Member(id='id1', address='1.2.3.1', protocol_port=1234,
+                         provisioning_status='ERROR'),
+            o_mem.Member(id='id4', address='1.2.3.4', protocol_port=1234,
+                         provisioning_status='ACTIVE')])
+
+        found, missing = cls._find_members(m_driver, pool, requested, args)
+
+        self.assertEqual([{'name': '0', 'ip': '1.2.3.0', 'port': 1234,
+                           'id': 'id0'}], found)
+        self.assertEqual(args[1:], missing)
+        lbaas.members.assert_called_once_with(pool['id'])
+
     def test_release_member(self):
         lbaas = self.useFixture(k_fix.MockLBaaSClient()).client
         cls = d_lbaasv2.LBaaSv2Driver
@@ -971,8 +1117,7 @@ class TestLBaaSv2Driver(test_base.TestCase):
                           loadbalancer, obj, create, find)
 
         m_driver._wait_for_provisioning.assert_has_calls(
-            [mock.call(loadbalancer, t, d_lbaasv2._LB_STS_POLL_FAST_INTERVAL)
-             for t in timer])
+            [mock.call(loadbalancer, t) for t in timer])
         m_driver._ensure.assert_has_calls(
             [mock.call(create, find, obj, loadbalancer) for _ in timer])
 
@@ -992,8 +1137,7 @@ class TestLBaaSv2Driver(test_base.TestCase):
                           loadbalancer, obj, create, find)
 
         m_driver._wait_for_provisioning.assert_has_calls(
-            [mock.call(loadbalancer, t, d_lbaasv2._LB_STS_POLL_FAST_INTERVAL)
-             for t in timer])
+            [mock.call(loadbalancer, t) for t in timer])
         m_driver._ensure.assert_has_calls(
             [mock.call(create, find, obj, loadbalancer) for _ in timer])
 
@@ -1060,11 +1204,8 @@ class TestLBaaSv2Driver(test_base.TestCase):
                          m_driver._wait_for_provisioning.call_count)
         self.assertEqual(call_count, m_delete.call_count)
 
-    def test_wait_for_provisioning(self):
-        lbaas = self.useFixture(k_fix.MockLBaaSClient()).client
-        cls = d_lbaasv2.LBaaSv2Driver
-        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
-        loadbalancer = {
+    def _get_loadbalancer(self):
+        return {
             'name': 'TEST_NAME',
             'project_id': 'TEST_PROJECT',
             'subnet_id': 'D3FA400A-F543-4B91-9CD3-047AF0CE42D1',
@@ -1072,44 +1213,131 @@ class TestLBaaSv2Driver(test_base.TestCase):
             'provider': None,
             'id': '00EE9E11-91C2-41CF-8FD4-7970579E5C4C'
         }
-        timeout = mock.sentinel.timeout
-        timer = [mock.sentinel.t0, mock.sentinel.t1]
-        m_driver._provisioning_timer.return_value = timer
-        resp = o_lb.LoadBalancer(provisioning_status='ACTIVE')
-        lbaas.get_load_balancer.return_value = resp
 
-        cls._wait_for_provisioning(m_driver, loadbalancer, timeout)
+    @mock.patch('kuryr_kubernetes.controller.drivers.lbaasv2.'
+                'LoadBalancerStatusWatcher.get_instance')
+    def test_wait_for_provisioning(self, m_get_watcher):
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        loadbalancer = self._get_loadbalancer()
+        m_watcher = m_get_watcher.return_value
+        m_watcher.wait.side_effect = ['PENDING_UPDATE', 'ACTIVE']
+
+        resp = cls._wait_for_provisioning(m_driver, loadbalancer, 100)
 
-        lbaas.get_load_balancer.assert_called_once_with(loadbalancer['id'])
+        self.assertEqual(loadbalancer, resp)
+        m_watcher.wait.assert_has_calls([
+            mock.call(loadbalancer, mock.ANY),
+            mock.call(loadbalancer, mock.ANY)])
 
-    def test_wait_for_provisioning_not_ready(self):
-        lbaas = self.useFixture(k_fix.MockLBaaSClient()).client
+    @mock.patch('kuryr_kubernetes.utils.clean_lb_crd_status')
+    @mock.patch('kuryr_kubernetes.controller.drivers.lbaasv2.'
+                'LoadBalancerStatusWatcher.get_instance')
+    def test_wait_for_provisioning_deleted(self, m_get_watcher, m_clean):
         cls = d_lbaasv2.LBaaSv2Driver
         m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
-        loadbalancer = {
-            'name': 'TEST_NAME',
-            'project_id': 'TEST_PROJECT',
-            'subnet_id': 'D3FA400A-F543-4B91-9CD3-047AF0CE42D1',
-            'ip': '1.2.3.4',
-            'provider': None,
-            'id': '00EE9E11-91C2-41CF-8FD4-7970579E5C4C'
-        }
-        timeout = mock.sentinel.timeout
-        timer = [mock.sentinel.t0, mock.sentinel.t1]
-        m_driver._provisioning_timer.return_value = timer
-        resp = o_lb.LoadBalancer(provisioning_status='NOT_ACTIVE')
-        lbaas.get_load_balancer.return_value = resp
+        loadbalancer = self._get_loadbalancer()
+        m_get_watcher.return_value.wait.return_value = 'DELETED'
+
+        self.assertIsNone(cls._wait_for_provisioning(m_driver, loadbalancer,
+                                                     100))
+        m_clean.assert_called_once_with(loadbalancer['name'])
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.lbaasv2.'
+                'LoadBalancerStatusWatcher.get_instance')
+    def test_wait_for_provisioning_not_ready(self, m_get_watcher):
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        loadbalancer = self._get_loadbalancer()
+        m_watcher = m_get_watcher.return_value
+        m_watcher.wait.side_effect = ['NOT_ACTIVE', None]
 
         self.assertRaises(k_exc.ResourceNotReady, cls._wait_for_provisioning,
-                          m_driver, loadbalancer, timeout)
+                          m_driver, loadbalancer, 100)
 
-        self.assertEqual(len(timer), lbaas.get_load_balancer.call_count)
+        self.assertEqual(2, m_watcher.wait.call_count)
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.lbaasv2.'
+                'LoadBalancerStatusWatcher.get_instance')
+    def test_wait_for_deletion(self, m_get_watcher):
+        cls = d_lbaasv2.LBaaSv2Driver
+        m_driver = mock.Mock(spec=d_lbaasv2.LBaaSv2Driver)
+        loadbalancer = self._get_loadbalancer()
+        m_watcher = m_get_watcher.return_value
+        m_watcher.wait.side_effect = ['PENDING_DELETE', 'DELETED']
+
+        cls._wait_for_deletion(m_driver, loadbalancer, 100)
+
+        self.assertEqual(2, m_watcher.wait.call_count)
 
     def test_provisioning_timer(self):
         # REVISIT(ivc): add test if _provisioning_timer is to stay
         self.skipTest("not implemented")
 
 
+class TestLoadBalancerStatusWatcher(test_base.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.lbaas = self.useFixture(k_fix.MockLBaaSClient()).client
+        self.watcher = d_lbaasv2.LoadBalancerStatusWatcher()
+
+    @mock.patch('time.sleep')
+    def test_poll(self, m_sleep):
+        self.lbaas.load_balancers.return_value = [
+            o_lb.LoadBalancer(id='lb1', provisioning_status='ACTIVE'),
+            o_lb.LoadBalancer(id='lb2', provisioning_status='PENDING_UPDATE')]
+        events = {key: {mock.Mock(), mock.Mock()}
+                  for key in (('project', 'lb1'), ('project', 'lb2'),
+                              ('project', 'lb3'))}
+        self.watcher._waiters = dict(events)
+
+        self.watcher._poll()
+
+        self.lbaas.load_balancers.assert_called_once_with(
+            project_id='project')
+        for (_, lb_id), status in ((('project', 'lb1'), 'ACTIVE'),
+                                   (('project', 'lb2'), 'PENDING_UPDATE'),
+                                   (('project', 'lb3'), 'DELETED')):
+            for event in events['project', lb_id]:
+                event.send.assert_called_once_with(status)
+        m_sleep.assert_called_once_with(self.watcher._interval)
+        self.assertEqual({}, self.watcher._waiters)
+        self.assertIsNone(self.watcher._poller)
+
+    @mock.patch('time.sleep')
+    def test_poll_failed(self, m_sleep):
+        ex = os_exc.SDKException()
+        self.lbaas.load_balancers.side_effect = ex
+        event = mock.Mock()
+        self.watcher._waiters = {('project', 'lb1'): {event}}
+
+        self.watcher._poll()
+
+        event.send_exception.assert_called_once_with(ex)
+        event.send.assert_not_called()
+
+    @mock.patch('eventlet.spawn')
+    def test_wait(self, m_spawn):
+        loadbalancer = {'id': 'lb1', 'project_id': 'project'}
+
+        def poll():
+            self.watcher._poller = None
+            for event in self.watcher._waiters[('project', 'lb1')]:
+                event.send('ACTIVE')
+
+        m_spawn.side_effect = lambda f: poll()
+
+        self.assertEqual('ACTIVE', self.watcher.wait(loadbalancer, 10))
+        self.assertEqual({}, self.watcher._waiters)
+
+    def test_wait_timeout(self):
+        self.watcher._poller = mock.sentinel.poller
+        loadbalancer = {'id': 'lb1', 'project_id': 'project'}
+
+        self.assertIsNone(self.watcher.wait(loadbalancer, 0.01))
+        self.assertEqual({}, self.watcher._waiters)
+
+
 class TestLBaaSv2AppyMembersSecurityGroup(test_base.TestCase):
 
     def setUp(self):
@@ -27,8 +27,66 @@ from kuryr_kubernetes.tests import base as test_base
 from kuryr_kubernetes.tests.unit import kuryr_fixtures as k_fix
 
 
+class TestTrunkVlanIds(test_base.TestCase):
+
+    def test_allocate(self):
+        vlan_ids = nested_vlan_vif.TrunkVlanIds([10, 12])
+        vlan_ids._next = 10
+
+        self.assertEqual([11, 13, 14],
+                         [vlan_ids.allocate() for _i in range(3)])
+        self.assertEqual(5, len(vlan_ids))
+
+    def test_allocate_round_robin(self):
+        vlan_ids = nested_vlan_vif.TrunkVlanIds([kl_const.MIN_VLAN_TAG])
+        vlan_ids._next = kl_const.MAX_VLAN_TAG
+
+        self.assertEqual(kl_const.MAX_VLAN_TAG, vlan_ids.allocate())
+        vlan_ids.release(kl_const.MAX_VLAN_TAG)
+        self.assertEqual(kl_const.MIN_VLAN_TAG + 1, vlan_ids.allocate())
+        self.assertNotIn(kl_const.MAX_VLAN_TAG, vlan_ids)
+
+    def test_allocate_exhausted(self):
+        vlan_ids = nested_vlan_vif.TrunkVlanIds(
+            range(kl_const.MIN_VLAN_TAG, kl_const.MAX_VLAN_TAG + 1))
+
+        self.assertRaises(kl_exc.SegmentationIdAllocationFailure,
+                          vlan_ids.allocate)
+
+        vlan_ids.release(100)
+        self.assertEqual(100, vlan_ids.allocate())
+
+    def test_reset(self):
+        vlan_ids = nested_vlan_vif.TrunkVlanIds([10, 11])
+        vlan_ids._next = 12
+        self.assertEqual(12, vlan_ids.allocate())
+        self.assertEqual(13, vlan_ids.allocate())
+        vlan_ids.reserve(20)
+        vlan_ids.attached([13])
+
+        vlan_ids.reset(['11', 15])
+
+        self.assertEqual(4, len(vlan_ids))
+        for vlan_id in (11, 12, 15, 20):
+            self.assertIn(vlan_id, vlan_ids)
+
+    def test_update(self):
+        vlan_ids = nested_vlan_vif.TrunkVlanIds()
+
+        vlan_ids.update([5, '6'])
+
+        self.assertIn(5, vlan_ids)
+        self.assertIn(6, vlan_ids)
+        self.assertNotIn(7, vlan_ids)
+
+
 class TestNestedVlanPodVIFDriver(test_base.TestCase):
 
+    def setUp(self):
+        super(TestNestedVlanPodVIFDriver, self).setUp()
+        nested_vlan_vif.VlanIdAllocator.get_instance().clear()
+        self.addCleanup(nested_vlan_vif.VlanIdAllocator.get_instance().clear)
+
     @mock.patch(
         'kuryr_kubernetes.os_vif_util.neutron_to_osvif_vif_nested_vlan')
     def test_request_vif(self, m_to_vif):
@@ -413,8 +471,7 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
                                     m_get_network_id, m_get_port_name,
                                     unbound=True)
 
-    @mock.patch('kuryr.lib.segmentation_type_drivers.allocate_segmentation_id')
-    def test__create_subports_info(self, m_allocate_seg_id):
+    def test__create_subports_info(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
         m_driver = mock.Mock(spec=cls)
 
@@ -424,16 +481,16 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         security_groups = mock.sentinel.security_groups
         trunk_id = mock.sentinel.trunk_id
         num_ports = 2
-        in_use_vlan = set([1])
         port = mock.sentinel.port
+        vlan_ids = nested_vlan_vif.TrunkVlanIds([1])
+        vlan_ids._next = 1
         subports_info = [{'segmentation_id': i + 2,
                           'port_id': '',
                           'segmentation_type': 'vlan'}
                          for i in range(num_ports)]
 
-        m_driver._get_in_use_vlan_ids_set.return_value = in_use_vlan
+        m_driver._get_vlan_ids.return_value = vlan_ids
         m_driver._get_port_request.return_value = port
-        m_allocate_seg_id.side_effect = [2, 3]
 
         port_res, subports_res = cls._create_subports_info(
             m_driver, pod, project_id, subnets, security_groups, trunk_id,
@@ -442,13 +499,12 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         self.assertEqual(port_res, port)
         self.assertEqual(subports_res, subports_info)
 
-        m_driver._get_in_use_vlan_ids_set.assert_called_once_with(trunk_id)
+        m_driver._get_vlan_ids.assert_called_once_with(trunk_id)
         m_driver._get_port_request.assert_called_once_with(
             pod, project_id, subnets, security_groups, False)
-        self.assertEqual(m_allocate_seg_id.call_count, 2)
+        self.assertEqual(3, len(vlan_ids))
 
-    @mock.patch('kuryr.lib.segmentation_type_drivers.allocate_segmentation_id')
-    def test__create_subports_info_not_enough_vlans(self, m_allocate_seg_id):
+    def test__create_subports_info_not_enough_vlans(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
         m_driver = mock.Mock(spec=cls)
 
@@ -458,17 +514,15 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         security_groups = mock.sentinel.security_groups
         trunk_id = mock.sentinel.trunk_id
         num_ports = 2
-        in_use_vlan = set([1])
         port = mock.sentinel.port
-        subports_info = [{'segmentation_id': 2,
+        vlan_ids = nested_vlan_vif.TrunkVlanIds(
+            range(kl_const.MIN_VLAN_TAG, kl_const.MAX_VLAN_TAG))
+        subports_info = [{'segmentation_id': kl_const.MAX_VLAN_TAG,
                           'port_id': '',
                           'segmentation_type': 'vlan'}]
 
-        m_driver._get_in_use_vlan_ids_set.return_value = in_use_vlan
+        m_driver._get_vlan_ids.return_value = vlan_ids
         m_driver._get_port_request.return_value = port
-        m_allocate_seg_id.side_effect = [
-            2, kl_exc.SegmentationIdAllocationFailure
-        ]
 
         port_res, subports_res = cls._create_subports_info(
             m_driver, pod, project_id, subnets, security_groups, trunk_id,
@@ -477,13 +531,11 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         self.assertEqual(port_res, port)
         self.assertEqual(subports_res, subports_info)
 
-        m_driver._get_in_use_vlan_ids_set.assert_called_once_with(trunk_id)
+        m_driver._get_vlan_ids.assert_called_once_with(trunk_id)
         m_driver._get_port_request.assert_called_once_with(
             pod, project_id, subnets, security_groups, False)
-        self.assertEqual(m_allocate_seg_id.call_count, 2)
 
-    @mock.patch('kuryr.lib.segmentation_type_drivers.allocate_segmentation_id')
-    def test__create_subports_info_no_vlans(self, m_allocate_seg_id):
+    def test__create_subports_info_no_vlans(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
         m_driver = mock.Mock(spec=cls)
 
@@ -493,12 +545,12 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         security_groups = mock.sentinel.security_groups
         trunk_id = mock.sentinel.trunk_id
         num_ports = 2
-        in_use_vlan = set([1])
         port = mock.sentinel.port
+        vlan_ids = nested_vlan_vif.TrunkVlanIds(
+            range(kl_const.MIN_VLAN_TAG, kl_const.MAX_VLAN_TAG + 1))
 
-        m_driver._get_in_use_vlan_ids_set.return_value = in_use_vlan
+        m_driver._get_vlan_ids.return_value = vlan_ids
         m_driver._get_port_request.return_value = port
-        m_allocate_seg_id.side_effect = kl_exc.SegmentationIdAllocationFailure
 
         port_res, subports_res = cls._create_subports_info(
             m_driver, pod, project_id, subnets, security_groups, trunk_id,
@@ -507,10 +559,9 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         self.assertEqual(port_res, port)
         self.assertEqual(subports_res, [])
 
-        m_driver._get_in_use_vlan_ids_set.assert_called_once_with(trunk_id)
+        m_driver._get_vlan_ids.assert_called_once_with(trunk_id)
         m_driver._get_port_request.assert_called_once_with(
             pod, project_id, subnets, security_groups, False)
-        self.assertEqual(m_allocate_seg_id.call_count, 1)
 
     def test_get_trunk_id(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
@@ -578,6 +629,41 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         os_net.add_trunk_subports.assert_called_once_with(trunk_id,
                                                           subport_dict)
 
+    @mock.patch.object(nested_vlan_vif, 'DEFAULT_MAX_RETRY_COUNT', 2)
+    def test_add_subport_with_vlan_id_conflict_retried(self):
+        cls = nested_vlan_vif.NestedVlanPodVIFDriver
+        m_driver = mock.Mock(spec=cls)
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        trunk_id = mock.sentinel.trunk_id
+        subport = mock.sentinel.subport
+        m_driver._get_vlan_id.side_effect = [100, 101]
+        os_net.add_trunk_subports.side_effect = [os_exc.ConflictException,
+                                                 None]
+
+        self.assertEqual(101, cls._add_subport(m_driver, trunk_id, subport))
+
+        m_driver._release_vlan_id.assert_called_once_with(trunk_id, 100)
+        m_driver._resync_vlan_ids.assert_called_once_with(trunk_id)
+        self.assertEqual(2, os_net.add_trunk_subports.call_count)
+
+    def test_add_subport_attached(self):
+        cls = nested_vlan_vif.NestedVlanPodVIFDriver
+        m_driver = mock.Mock(spec=cls)
+        self.useFixture(k_fix.MockNetworkClient())
+        trunk_id = mock.sentinel.trunk_id
+        vlan_ids = nested_vlan_vif.VlanIdAllocator.get_instance().seed(
+            trunk_id, [])
+        vlan_ids._next = 100
+        m_driver._get_vlan_id.side_effect = lambda _: vlan_ids.allocate()
+
+        self.assertEqual(100, cls._add_subport(m_driver, trunk_id,
+                                               mock.sentinel.subport))
+
+        # Not pending anymore, so a resync drops it if Neutron doesn't have
+        # it attached.
+        vlan_ids.reset([])
+        self.assertNotIn(100, vlan_ids)
+
     def test__remove_subports(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
         m_driver = mock.Mock(spec=cls)
@@ -602,38 +688,78 @@ class TestNestedVlanPodVIFDriver(test_base.TestCase):
         os_net.delete_trunk_subports.assert_called_once_with(trunk_id,
                                                              subportid_dict)
 
-    @mock.patch('kuryr.lib.segmentation_type_drivers.allocate_segmentation_id')
-    def test_get_vlan_id(self, mock_alloc_seg_id):
+    def test_get_vlan_id(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
         m_driver = mock.Mock(spec=cls)
-        vlanid_set = mock.sentinel.vlanid_set
         trunk_id = mock.sentinel.trunk_id
-        m_driver._get_in_use_vlan_ids_set.return_value = vlanid_set
-        cls._get_vlan_id(m_driver, trunk_id)
+        vlan_ids = nested_vlan_vif.TrunkVlanIds([1, 2])
+        vlan_ids._next = 1
+        m_driver._get_vlan_ids.return_value = vlan_ids
 
-        mock_alloc_seg_id.assert_called_once_with(vlanid_set)
+        self.assertEqual(3, cls._get_vlan_id(m_driver, trunk_id))
+        m_driver._get_vlan_ids.assert_called_once_with(trunk_id)
 
-    @mock.patch('kuryr.lib.segmentation_type_drivers.allocate_segmentation_id')
-    def test_get_vlan_id_exhausted(self, mock_alloc_seg_id):
+    def test_get_vlan_id_exhausted(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
         m_driver = mock.Mock(spec=cls)
-        vlanid_set = mock.sentinel.vlanid_set
         trunk_id = mock.sentinel.trunk_id
-        m_driver._get_in_use_vlan_ids_set.return_value = vlanid_set
-        mock_alloc_seg_id.side_effect = kl_exc.SegmentationIdAllocationFailure
+        m_driver._get_vlan_ids.return_value = nested_vlan_vif.TrunkVlanIds(
+            range(kl_const.MIN_VLAN_TAG, kl_const.MAX_VLAN_TAG + 1))
+
         self.assertRaises(kl_exc.SegmentationIdAllocationFailure,
                           cls._get_vlan_id, m_driver, trunk_id)
 
-        mock_alloc_seg_id.assert_called_once_with(vlanid_set)
+    def test_release_vlan_id(self):
+        cls = nested_vlan_vif.NestedVlanPodVIFDriver
+        m_driver = mock.Mock(spec=cls)
+        trunk_id = mock.sentinel.trunk_id
+        allocator = nested_vlan_vif.VlanIdAllocator.get_instance()
+        vlan_ids = allocator.seed(trunk_id, [100])
+
+        cls._release_vlan_id(m_driver, trunk_id, 100)
 
-    @mock.patch('kuryr.lib.segmentation_type_drivers.release_segmentation_id')
-    def test_release_vlan_id(self, mock_rel_seg_id):
+        self.assertNotIn(100, vlan_ids)
+
+    def test_release_vlan_id_unknown_trunk(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
         m_driver = mock.Mock(spec=cls)
-        vlanid = mock.sentinel.vlanid
-        cls._release_vlan_id(m_driver, vlanid)
 
-        mock_rel_seg_id.assert_called_once_with(vlanid)
+        cls._release_vlan_id(m_driver, mock.sentinel.trunk_id, 100)
+
+        self.assertIsNone(nested_vlan_vif.VlanIdAllocator.get_instance().get(
+            mock.sentinel.trunk_id))
+
+    def test_get_vlan_ids(self):
+        cls = nested_vlan_vif.NestedVlanPodVIFDriver
+        m_driver = mock.Mock(spec=cls)
+        trunk_id = mock.sentinel.trunk_id
+        m_driver._get_in_use_vlan_ids_set.return_value = {100, 200}
+
+        vlan_ids = cls._get_vlan_ids(m_driver, trunk_id)
+
+        self.assertIn(100, vlan_ids)
+        self.assertIn(200, vlan_ids)
+        self.assertIs(vlan_ids, cls._get_vlan_ids(m_driver, trunk_id))
+        m_driver._get_in_use_vlan_ids_set.assert_called_once_with(trunk_id)
+
+    def test_resync_vlan_ids(self):
+        cls = nested_vlan_vif.NestedVlanPodVIFDriver
+        m_driver = mock.Mock(spec=cls)
+        trunk_id = mock.sentinel.trunk_id
+        vlan_ids = nested_vlan_vif.VlanIdAllocator.get_instance().seed(
+            trunk_id, [100])
+        vlan_ids._next = 300
+        vlan_ids.allocate()
+        m_driver._get_in_use_vlan_ids_set.return_value = {200}
+
+        cls._resync_vlan_ids(m_driver, trunk_id)
+
+        # IDs allocated locally, but not attached yet, are kept, while the
+        # ones freed in Neutron without being released are not.
+        self.assertEqual(2, len(vlan_ids))
+        self.assertIn(200, vlan_ids)
+        self.assertIn(300, vlan_ids)
+        self.assertNotIn(100, vlan_ids)
 
     def test_get_in_use_vlan_ids_set(self):
         cls = nested_vlan_vif.NestedVlanPodVIFDriver
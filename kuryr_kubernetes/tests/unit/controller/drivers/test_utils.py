@@ -170,3 +170,83 @@ class TestUtils(test_base.TestCase):
         new_name = utils.get_resource_name(name, uid, prefix, suffix)
 
         self.assertEqual(new_name, f'{prefix}{uid}/{name}{suffix}')
+
+    @mock.patch('kuryr_kubernetes.informer.list_objects')
+    def test_get_cached_by_selector(self, m_list_objects):
+        pod1 = {'metadata': {'name': 'pod1',
+                             'labels': {'app': 'a', 'tier': 'db'}}}
+        pod2 = {'metadata': {'name': 'pod2',
+                             'labels': {'app': 'a', 'tier': 'web'}}}
+        m_list_objects.return_value = [pod1, pod2]
+        selector = {
+            'matchLabels': {'app': 'a'},
+            'matchExpressions': [
+                {'key': 'tier', 'operator': 'In', 'values': ['db', 'web']},
+                {'key': 'tier', 'operator': 'NotIn', 'values': ['web']},
+                {'key': 'app', 'operator': 'Exists'}]}
+
+        resp = utils.get_cached_by_selector('Pod', selector, 'default')
+
+        self.assertEqual([pod1], resp)
+        m_list_objects.assert_called_once_with(
+            'Pod', 'default', labels={'app': {'a'}, 'tier': {'db', 'web'}},
+            label_keys={'app'})
+
+    @mock.patch('kuryr_kubernetes.informer.list_objects')
+    def test_get_cached_by_selector_not_synced(self, m_list_objects):
+        m_list_objects.return_value = None
+
+        self.assertIsNone(utils.get_cached_by_selector('Pod', {}))
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.'
+                'get_cached_by_selector')
+    def test_get_pods_cached(self, m_get_cached):
+        kubernetes = self.useFixture(k_fix.MockK8sClient()).client
+        pod = mock.sentinel.pod
+        m_get_cached.return_value = [pod]
+        selector = {'matchLabels': {'app': 'a', 'pod-template-hash': 'x'}}
+
+        resp = utils.get_pods(selector, 'default')
+
+        self.assertEqual({'items': [pod]}, resp)
+        m_get_cached.assert_called_once_with(
+            'Pod', {'matchLabels': {'app': 'a'}}, 'default')
+        kubernetes.get.assert_not_called()
+
+    def test_update_neutron_port_sgs(self):
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+
+        self.assertIsNone(utils.update_neutron_port_sgs('port', ['sg']))
+        os_net.update_port.assert_called_once_with('port',
+                                                   security_groups=['sg'])
+
+    def test_update_neutron_port_sgs_error(self):
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        error = Exception()
+        os_net.update_port.side_effect = error
+
+        self.assertIs(error, utils.update_neutron_port_sgs('port', None))
+
+    def test_update_neutron_port(self):
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+
+        self.assertIsNone(utils.update_neutron_port('port', name='name',
+                                                    device_id=''))
+        os_net.update_port.assert_called_once_with('port', name='name',
+                                                   device_id='')
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.'
+                'PORTS_ID_FILTER_CHUNK', 2)
+    def test_get_ports_sgs(self):
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        port1 = mock.Mock(id='port1', security_group_ids=['sg2', 'sg1'])
+        port3 = mock.Mock(id='port3', security_group_ids=[])
+        os_net.ports.side_effect = [[port1], [port3]]
+
+        sgs = utils.get_ports_sgs(['port1', 'port2', 'port3'],
+                                  device_owner='owner')
+
+        self.assertEqual({'port1': ('sg1', 'sg2'), 'port3': ()}, sgs)
+        os_net.ports.assert_has_calls([
+            mock.call(id=['port1', 'port2'], device_owner='owner'),
+            mock.call(id=['port3'], device_owner='owner')])
@@ -15,17 +15,21 @@
 import collections
 import eventlet
 import functools
+import os
 import threading
 from unittest import mock
 import uuid
 
 import ddt
+import fixtures
+from kuryr.lib import constants as kl_const
 from openstack import exceptions as os_exc
 from openstack.network.v2 import network as os_network
 from openstack.network.v2 import port as os_port
 from oslo_config import cfg as oslo_cfg
 
 from os_vif.objects import network as osv_network
+from os_vif.objects import subnet as osv_subnet
 from os_vif.objects import vif as osv_vif
 
 from kuryr_kubernetes import constants
@@ -33,6 +37,7 @@ from kuryr_kubernetes.controller.drivers import nested_vlan_vif
 from kuryr_kubernetes.controller.drivers import neutron_vif
 from kuryr_kubernetes.controller.drivers import utils
 from kuryr_kubernetes.controller.drivers import vif_pool
+from kuryr_kubernetes.controller.managers import gc
 from kuryr_kubernetes import exceptions
 from kuryr_kubernetes import os_vif_util as ovu
 from kuryr_kubernetes.tests import base as test_base
@@ -72,7 +77,7 @@ def get_pod_name(pod):
 
 
 AVAILABLE_PORTS_TYPE = functools.partial(collections.defaultdict,
-                                         collections.OrderedDict)
+                                         vif_pool.PortsPool)
 
 
 @ddt.ddt
@@ -169,6 +174,24 @@ class BaseVIFPool(test_base.TestCase):
                                security_groups)
         self.assertIsNone(resp)
 
+    def test_cleanup_removed_nodes_multi_vif(self):
+        cls = vif_pool.MultiVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        neutron_pool = mock.MagicMock(spec=vif_pool.NeutronVIFPool)
+        nested_pool = mock.MagicMock(spec=vif_pool.NestedVIFPool)
+        noop_pool = mock.MagicMock(spec=vif_pool.NoopVIFPool)
+        noop_pool.__str__.return_value = 'NoopVIFPool'
+        m_driver._vif_drvs = {'neutron-vif': neutron_pool,
+                              'nested-vlan': nested_pool,
+                              'nested-macvlan': noop_pool}
+
+        cls.cleanup_removed_nodes(m_driver, mock.sentinel.snapshot)
+
+        neutron_pool.cleanup_removed_nodes.assert_called_once_with(
+            mock.sentinel.snapshot)
+        nested_pool.cleanup_removed_nodes.assert_called_once_with(
+            mock.sentinel.snapshot)
+
     @mock.patch('kuryr_kubernetes.clients.get_kubernetes_client')
     @mock.patch('time.time', return_value=50)
     @ddt.data((neutron_vif.NeutronPodVIFDriver),
@@ -333,7 +356,7 @@ class BaseVIFPool(test_base.TestCase):
         pod_vif = osv_vif.VIFBase(id=port_id, network=port_network)
         get_vifs.return_value = {'eth0': pod_vif}
         items = [pod]
-        kubernetes.get.return_value = {'items': items}
+        kubernetes.get_items.return_value = iter(items)
         network = {}
 
         resp = cls._get_in_use_ports_info(m_driver)
@@ -346,7 +369,7 @@ class BaseVIFPool(test_base.TestCase):
 
         kubernetes = self.useFixture(k_fix.MockK8sClient()).client
         items = []
-        kubernetes.get.return_value = {'items': items}
+        kubernetes.get_items.return_value = iter(items)
 
         resp = cls._get_in_use_ports_info(m_driver)
 
@@ -359,7 +382,8 @@ class BaseVIFPool(test_base.TestCase):
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
         port_id = str(uuid.uuid4())
-        port = fake.get_port_obj(port_id=port_id)
+        port = fake.get_port_obj(port_id=port_id,
+                                 device_owner=kl_const.DEVICE_OWNER)
         net_id = port.network_id
         tags = 'clusterTest'
         port.tags = [tags]
@@ -383,7 +407,8 @@ class BaseVIFPool(test_base.TestCase):
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
         port_id = str(uuid.uuid4())
-        port = fake.get_port_obj(port_id=port_id)
+        port = fake.get_port_obj(port_id=port_id,
+                                 device_owner=kl_const.DEVICE_OWNER)
         tags = 'clusterTest'
         port.tags = [tags]
         os_net.ports.return_value = [port]
@@ -405,7 +430,8 @@ class BaseVIFPool(test_base.TestCase):
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
         port_id = str(uuid.uuid4())
-        port = fake.get_port_obj(port_id=port_id)
+        port = fake.get_port_obj(port_id=port_id,
+                                 device_owner=kl_const.DEVICE_OWNER)
         net_id = port.network_id
         tags = 'clusterTest'
         port.tags = [tags]
@@ -430,7 +456,8 @@ class BaseVIFPool(test_base.TestCase):
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
         port_id = str(uuid.uuid4())
-        port = fake.get_port_obj(port_id=port_id)
+        port = fake.get_port_obj(port_id=port_id,
+                                 device_owner=kl_const.DEVICE_OWNER)
         net_id = port.network_id
         tags = 'clusterTest'
         os_net.ports.return_value = [port]
@@ -453,7 +480,8 @@ class BaseVIFPool(test_base.TestCase):
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
         port_id = str(uuid.uuid4())
-        port = fake.get_port_obj(port_id=port_id)
+        port = fake.get_port_obj(port_id=port_id,
+                                 device_owner=kl_const.DEVICE_OWNER)
         os_net.ports.return_value = [port]
 
         cls._cleanup_leftover_ports(m_driver)
@@ -468,7 +496,8 @@ class BaseVIFPool(test_base.TestCase):
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
         port_id = str(uuid.uuid4())
-        port = fake.get_port_obj(port_id=port_id)
+        port = fake.get_port_obj(port_id=port_id,
+                                 device_owner=kl_const.DEVICE_OWNER)
         port.binding_host_id = None
         os_net.ports.return_value = [port]
 
@@ -476,6 +505,862 @@ class BaseVIFPool(test_base.TestCase):
         os_net.networks.assert_not_called()
         m_del_ports.assert_called_once_with([port])
 
+    @mock.patch('time.monotonic', return_value=100)
+    def test_cleanup_removed_nodes(self, m_monotonic):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._next_nodes_cleanup = 200
+        m_driver._previous_ports_to_remove = []
+
+        cls.cleanup_removed_nodes(m_driver, mock.sentinel.snapshot)
+        m_driver._trigger_removed_nodes_ports_cleanup.assert_not_called()
+
+        m_monotonic.return_value = 200
+        cls.cleanup_removed_nodes(m_driver, mock.sentinel.snapshot)
+        m_driver._trigger_removed_nodes_ports_cleanup.assert_called_once_with(
+            [], mock.sentinel.snapshot)
+        self.assertEqual(200 + vif_pool.NODE_PORTS_CLEAN_FREQUENCY,
+                         m_driver._next_nodes_cleanup)
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.delete_port')
+    def test__trigger_removed_nodes_ports_cleanup(self, m_delete_port):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._recovered_pools = True
+        oslo_cfg.CONF.set_override('resource_tags', ['foo'],
+                                   group='neutron_defaults')
+        self.addCleanup(oslo_cfg.CONF.clear_override, 'resource_tags',
+                        group='neutron_defaults')
+        oslo_cfg.CONF.set_override('pod_subnet', 'subnet1',
+                                   group='neutron_defaults')
+        self.addCleanup(oslo_cfg.CONF.clear_override, 'pod_subnet',
+                        group='neutron_defaults')
+        subport = os_port.Port(id='sp1', device_owner='',
+                               fixed_ips=[{'subnet_id': 'subnet1'}])
+        other_subport = os_port.Port(id='sp2', device_owner='trunk:subport',
+                                     fixed_ips=[{'subnet_id': 'subnet2'}])
+        new_subport = os_port.Port(id='sp3', device_owner='',
+                                   fixed_ips=[{'subnet_id': 'subnet1'}])
+        port = os_port.Port(id='p1', binding_host_id=None)
+        bound_port = os_port.Port(id='p2', binding_host_id='node1')
+        snapshot = mock.Mock(spec=gc.NeutronSnapshot)
+        snapshot.tags = {'foo'}
+        snapshot.get_ports.side_effect = [[subport, new_subport],
+                                          [other_subport],
+                                          [port, bound_port]]
+        m_driver._existing_vifs = {'sp1': mock.sentinel.vif}
+        previous = ['sp1', 'sp2', 'p1', 'p2']
+        m_delete_port.return_value = True
+
+        cls._trigger_removed_nodes_ports_cleanup(m_driver, previous, snapshot)
+
+        snapshot.get_ports.assert_has_calls([
+            mock.call(device_owner='', tagged=True),
+            mock.call(device_owner='trunk:subport', tagged=True),
+            mock.call(device_owner=kl_const.DEVICE_OWNER, tagged=True)])
+        m_delete_port.assert_has_calls([mock.call(subport), mock.call(port)])
+        self.assertEqual(2, m_delete_port.call_count)
+        m_driver._forget_ports.assert_called_once_with(['sp1', 'p1'])
+        self.assertEqual(['sp2', 'p2', 'sp3'], previous)
+
+    def test__forget_ports(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._existing_vifs = {'p1': mock.sentinel.vif,
+                                   'p2': mock.sentinel.vif}
+
+        cls._forget_ports(m_driver, ['p1', 'p3'])
+
+        self.assertEqual({'p2': mock.sentinel.vif}, m_driver._existing_vifs)
+
+    def _get_snapshot_driver(self, path):
+        m_driver = mock.MagicMock(spec=vif_pool.BaseVIFPool)
+        m_driver._get_pools_snapshot_path.return_value = path
+        m_driver._recovered_pools = True
+        m_driver._snapshot_generation = 0
+        m_driver._snapshot_pools = None
+        m_driver._snapshot_ports = None
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._existing_vifs = {}
+        m_driver._get_in_use_ports_info.return_value = ([], {})
+        return m_driver
+
+    def test_pools_snapshot(self):
+        cls = vif_pool.BaseVIFPool
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'snapshot.json')
+        m_driver = self._get_snapshot_driver(path)
+        pool_key = ('node', 'project', 'net')
+        sg_key = ('sg1', 'sg2')
+        vif = fake._fake_vif()
+        m_driver._available_ports_pools[pool_key][sg_key] = [vif.id]
+        m_driver._available_ports_pools[pool_key][None] = []
+        m_driver._existing_vifs[vif.id] = vif
+
+        cls._save_pools_snapshot(m_driver)
+        cls._save_pools_snapshot(m_driver)
+
+        self.assertEqual(1, m_driver._snapshot_generation)
+        loaded = self._get_snapshot_driver(path)
+        self.assertTrue(cls._load_pools_snapshot(loaded))
+        self.assertEqual({pool_key: {sg_key: [vif.id]}},
+                         loaded._available_ports_pools)
+        self.assertEqual(vif, loaded._existing_vifs[vif.id])
+        self.assertEqual({vif.id}, loaded._snapshot_ports)
+        self.assertEqual(1, loaded._snapshot_generation)
+        loaded._create_healthcheck_file.assert_called_once_with()
+
+    def test_pools_snapshot_in_use(self):
+        cls = vif_pool.BaseVIFPool
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'snapshot.json')
+        m_driver = self._get_snapshot_driver(path)
+        pool_key = ('node', 'project', 'net')
+        vif = fake._fake_vif()
+        in_use_vif = fake._fake_vif()
+        m_driver._available_ports_pools[pool_key][('sg1',)] = [
+            vif.id, in_use_vif.id]
+        m_driver._existing_vifs = {vif.id: vif, in_use_vif.id: in_use_vif}
+        cls._save_pools_snapshot(m_driver)
+
+        loaded = self._get_snapshot_driver(path)
+        loaded._get_in_use_ports_info.return_value = ([in_use_vif.id], {})
+        self.assertTrue(cls._load_pools_snapshot(loaded))
+
+        self.assertEqual({pool_key: {('sg1',): [vif.id]}},
+                         loaded._available_ports_pools)
+        self.assertNotIn(in_use_vif.id, loaded._existing_vifs)
+        self.assertEqual({vif.id}, loaded._snapshot_ports)
+
+    def test_pools_snapshot_disabled(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_snapshot_driver(None)
+
+        cls._save_pools_snapshot(m_driver)
+
+        self.assertFalse(cls._load_pools_snapshot(m_driver))
+        self.assertEqual(0, m_driver._snapshot_generation)
+
+    def test_load_pools_snapshot_invalid(self):
+        cls = vif_pool.BaseVIFPool
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'snapshot.json')
+        with open(path, 'w') as f:
+            f.write('{"version": 1, "pools": ')
+        m_driver = self._get_snapshot_driver(path)
+
+        self.assertFalse(cls._load_pools_snapshot(m_driver))
+        self.assertEqual({}, m_driver._available_ports_pools)
+        m_driver._create_healthcheck_file.assert_not_called()
+
+    def test_verify_pools_snapshot(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_snapshot_driver(None)
+        pool_key = ('node', 'project', 'net')
+        # p1 is fine, p2 got its SGs changed, p3 got created after loading
+        # the snapshot, p4 got requested after loading it, p5 got missed by
+        # the snapshot and p6 is gone.
+        m_driver._available_ports_pools[pool_key]['sg1'] = [
+            'p1', 'p2', 'p3', 'p6']
+        m_driver._existing_vifs = {p: mock.sentinel.old
+                                   for p in ('p1', 'p2', 'p3', 'p4', 'p6')}
+        m_driver._snapshot_ports = {'p1', 'p2', 'p4', 'p6'}
+
+        def recover(pools, vifs):
+            pools[pool_key]['sg1'] = ['p1', 'p4', 'p5']
+            pools[pool_key]['sg2'] = ['p2']
+            vifs.update({p: mock.sentinel.new
+                         for p in ('p1', 'p2', 'p4', 'p5')})
+        m_driver._recover_precreated_ports.side_effect = recover
+
+        cls._verify_pools_snapshot(m_driver)
+
+        self.assertEqual({'sg1': ['p1', 'p3', 'p5'], 'sg2': ['p2']},
+                         m_driver._available_ports_pools[pool_key])
+        self.assertNotIn('p6', m_driver._existing_vifs)
+        self.assertEqual(mock.sentinel.new, m_driver._existing_vifs['p5'])
+        self.assertEqual(mock.sentinel.old, m_driver._existing_vifs['p4'])
+        self.assertIsNone(m_driver._snapshot_ports)
+
+    def test__is_snapshot_port_available(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_snapshot_driver(None)
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        pool_key = ('node', 'project', 'net')
+        m_driver._get_pool_key_net.return_value = 'net'
+        m_driver._existing_vifs = {p: mock.sentinel.vif
+                                   for p in ('p1', 'p2', 'p3', 'p4')}
+        m_driver._snapshot_ports = {'p1', 'p2', 'p3'}
+        # p1 is fine, p2 is gone, p3 got moved to another network and p4
+        # was not loaded from the snapshot.
+        ports = {
+            'p1': os_port.Port(id='p1', network_id='net',
+                               device_owner='trunk:subport'),
+            'p3': os_port.Port(id='p3', network_id='net2',
+                               device_owner=kl_const.DEVICE_OWNER),
+        }
+
+        def get_port(port_id):
+            try:
+                return ports[port_id]
+            except KeyError:
+                raise os_exc.NotFoundException()
+        os_net.get_port.side_effect = get_port
+
+        for port_id, available in (('p1', True), ('p2', False),
+                                   ('p3', False), ('p4', True)):
+            self.assertEqual(available, cls._is_snapshot_port_available(
+                m_driver, pool_key, port_id))
+
+        self.assertEqual(set(), m_driver._snapshot_ports)
+        self.assertEqual({'p1', 'p4'}, set(m_driver._existing_vifs))
+        self.assertEqual(3, os_net.get_port.call_count)
+
+    def _set_sizing_window(self, window):
+        oslo_cfg.CONF.set_override('ports_pool_sizing_window', window,
+                                   group='vif_pool')
+        self.addCleanup(oslo_cfg.CONF.clear_override,
+                        'ports_pool_sizing_window', group='vif_pool')
+
+    @mock.patch('kuryr_kubernetes.clients.get_kubernetes_client')
+    def test__populate_pool_sizing(self, m_get_kubernetes_client):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        vif_driver = mock.MagicMock(spec=neutron_vif.NeutronPodVIFDriver)
+        m_driver._drv_vif = vif_driver
+
+        pod = mock.sentinel.pod
+        subnets = mock.sentinel.subnets
+        pool_key = ('node', 'project', 'net')
+        m_driver._existing_vifs = {}
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._recovered_pools = True
+        m_driver._lock = threading.Lock()
+        m_driver._populate_pool_lock = {
+            pool_key: mock.MagicMock(spec=threading.Lock())}
+        m_driver._pool_sizer = mock.MagicMock(spec=vif_pool.PoolSizer)
+        m_driver._pool_sizer.get_target.return_value = 30
+        m_driver._create_ports_semaphore = mock.sentinel.semaphore
+        self._set_sizing_window(60)
+        oslo_cfg.CONF.set_override('ports_pool_batch', 10, group='vif_pool')
+        m_driver._get_pool_size.return_value = 8
+        vif_driver.request_vifs.return_value = []
+
+        cls._populate_pool(m_driver, pool_key, pod, subnets, ('sg',))
+
+        m_driver._pool_sizer.get_target.assert_called_once_with(pool_key)
+        vif_driver.request_vifs.assert_called_once_with(
+            pod=pod, project_id='project', subnets=subnets,
+            security_groups=('sg',), num_ports=22,
+            semaphore=mock.sentinel.semaphore)
+
+    def test_request_vif_sizing(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._pool_sizer = mock.MagicMock(spec=vif_pool.PoolSizer)
+        m_driver._recovered_pools = True
+        m_driver._get_pool_key.return_value = mock.sentinel.pool_key
+        self._set_sizing_window(60)
+        pod = get_pod_obj()
+
+        cls.request_vif(m_driver, pod, 'project', mock.sentinel.subnets,
+                        ['sg2', 'sg1'])
+
+        m_driver._pool_sizer.record.assert_called_once_with(
+            mock.sentinel.pool_key, pod, mock.sentinel.subnets,
+            ('sg1', 'sg2'))
+
+    def _get_resize_driver(self, pool_size, target, demand):
+        m_driver = mock.MagicMock(spec=vif_pool.BaseVIFPool)
+        m_driver._recovered_pools = True
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._pool_sizer = mock.MagicMock(spec=vif_pool.PoolSizer)
+        m_driver._pool_sizer.get_target.return_value = target
+        m_driver._pool_sizer.get_demand.return_value = demand
+        m_driver._pool_sizer.get_params.return_value = (
+            mock.sentinel.pod, mock.sentinel.subnets, ('sg',))
+        m_driver._get_pool_size.return_value = pool_size
+        return m_driver
+
+    @mock.patch('eventlet.spawn')
+    @mock.patch('kuryr_kubernetes.controller.managers.prometheus_exporter.'
+                'ControllerPrometheusExporter.get_instance')
+    def test__trigger_pools_resize_populate(self, m_get_exporter, m_spawn):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_resize_driver(2, 10, 10)
+        pool_key = ('node', 'project', 'net')
+        m_driver._available_ports_pools[pool_key]['sg'] = ['p1', 'p2']
+        m_driver._pool_sizer.get_pool_keys.return_value = [pool_key]
+
+        cls._trigger_pools_resize(m_driver)
+
+        m_get_exporter.return_value.record_pool_size.assert_called_once_with(
+            pool_key, 2, 10)
+        m_spawn.assert_called_once_with(
+            m_driver._populate_pool, pool_key, mock.sentinel.pod,
+            mock.sentinel.subnets, ('sg',))
+        m_driver._shrink_pool.assert_not_called()
+
+    @mock.patch('eventlet.spawn')
+    @mock.patch('kuryr_kubernetes.controller.managers.prometheus_exporter.'
+                'ControllerPrometheusExporter.get_instance')
+    def test__trigger_pools_resize_shrink(self, m_get_exporter, m_spawn):
+        cls = vif_pool.BaseVIFPool
+        pool_key = ('node', 'project', 'net')
+
+        m_driver = self._get_resize_driver(12, 5, 3)
+        m_driver._available_ports_pools[pool_key]['sg'] = []
+        m_driver._pool_sizer.get_pool_keys.return_value = [pool_key]
+        cls._trigger_pools_resize(m_driver)
+        m_driver._shrink_pool.assert_not_called()
+
+        m_driver = self._get_resize_driver(12, 5, 0)
+        m_driver._available_ports_pools[pool_key]['sg'] = []
+        m_driver._pool_sizer.get_pool_keys.return_value = [pool_key]
+        cls._trigger_pools_resize(m_driver)
+        m_driver._shrink_pool.assert_called_once_with(pool_key, 7)
+
+        m_spawn.assert_not_called()
+
+    @mock.patch('kuryr_kubernetes.controller.managers.prometheus_exporter.'
+                'ControllerPrometheusExporter.get_instance')
+    def test__trigger_pools_resize_deleted_pool(self, m_get_exporter):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_resize_driver(0, 5, 0)
+        pool_key = ('node', 'project', 'net')
+        m_driver._pool_sizer.get_pool_keys.return_value = [pool_key]
+
+        cls._trigger_pools_resize(m_driver)
+
+        m_driver._pool_sizer.forget.assert_called_once_with(pool_key)
+        m_get_exporter.return_value.remove_pool_size.assert_called_once_with(
+            pool_key)
+        m_get_exporter.return_value.record_pool_size.assert_not_called()
+        self.assertNotIn(pool_key, m_driver._available_ports_pools)
+
+    def test__shrink_pool(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        pool_key = ('node', 'project', 'net')
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._available_ports_pools[pool_key]['old'] = ['p1', 'p2']
+        m_driver._available_ports_pools[pool_key]['new'] = ['p3', 'p4']
+        lock = threading.Lock()
+        m_driver._get_populate_pool_lock.return_value = lock
+
+        cls._shrink_pool(m_driver, pool_key, 3)
+
+        m_driver._delete_pool_ports.assert_called_once_with(
+            pool_key, ['p2', 'p1', 'p4'])
+        self.assertEqual({'new': ['p3']},
+                         m_driver._available_ports_pools[pool_key])
+        self.assertFalse(lock.locked())
+
+    def test__shrink_pool_populating(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        pool_key = ('node', 'project', 'net')
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._available_ports_pools[pool_key]['sg'] = ['p1', 'p2']
+        lock = threading.Lock()
+        lock.acquire()
+        m_driver._get_populate_pool_lock.return_value = lock
+
+        cls._shrink_pool(m_driver, pool_key, 1)
+
+        m_driver._delete_pool_ports.assert_not_called()
+        self.assertEqual({'sg': ['p1', 'p2']},
+                         m_driver._available_ports_pools[pool_key])
+
+    def _set_warm_up(self, requests, batch=10, pool_min=5):
+        for name, value in (('ports_pool_warm_up_requests', requests),
+                            ('ports_pool_batch', batch),
+                            ('ports_pool_min', pool_min)):
+            oslo_cfg.CONF.set_override(name, value, group='vif_pool')
+            self.addCleanup(oslo_cfg.CONF.clear_override, name,
+                            group='vif_pool')
+
+    def _get_warm_up_driver(self):
+        m_driver = mock.MagicMock(spec=vif_pool.BaseVIFPool)
+        m_driver._recovered_pools = True
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._existing_vifs = {}
+        m_driver._get_pool_size.side_effect = (
+            lambda k: len(m_driver._available_ports_pools.get(k, ())))
+        m_driver._get_pool_key_net.side_effect = lambda k: k[2]
+        return m_driver
+
+    def test__get_pools_warm_up_plan(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        self._set_sizing_window(0)
+        self._set_warm_up(4, batch=2, pool_min=5)
+        empty = ('node1', 'project', 'net')
+        low = ('node2', 'project', 'net')
+        full = ('node3', 'project', 'net')
+        m_driver._available_ports_pools[empty] = vif_pool.PortsPool()
+        m_driver._available_ports_pools[low]['sg'] = ['p1', 'p2', 'p3']
+        m_driver._available_ports_pools[full]['sg'] = ['p%d' % i
+                                                       for i in range(4, 9)]
+
+        plan = cls._get_pools_warm_up_plan(m_driver)
+
+        self.assertEqual([(empty, 2), (low, 2), (empty, 2), (empty, 1)],
+                         plan)
+
+    def test__get_pools_warm_up_plan_budget(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        self._set_sizing_window(0)
+        self._set_warm_up(2, batch=10, pool_min=5)
+        pool_keys = [('node%d' % i, 'project', 'net') for i in range(3)]
+        for i, pool_key in enumerate(pool_keys):
+            m_driver._available_ports_pools[pool_key]['sg'] = [
+                'p%d' % i] * i
+
+        plan = cls._get_pools_warm_up_plan(m_driver)
+
+        self.assertEqual([(pool_keys[0], 5), (pool_keys[1], 4)], plan)
+
+    def test__trigger_pools_warm_up(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        pool_key1 = ('node1', 'project', 'net')
+        pool_key2 = ('node2', 'project', 'net')
+        m_driver._get_pools_warm_up_plan.return_value = [
+            (pool_key1, 2), (pool_key2, 3), (pool_key1, 1)]
+        m_driver._warm_up_pool.return_value = 1
+
+        cls._trigger_pools_warm_up(m_driver)
+
+        m_driver._warm_up_pool.assert_has_calls([
+            mock.call(pool_key1, 2, subnets_cache={}),
+            mock.call(pool_key2, 3, subnets_cache={}),
+            mock.call(pool_key1, 1, subnets_cache={})], any_order=True)
+
+    def test__trigger_pools_warm_up_not_recovered(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        m_driver._recovered_pools = False
+
+        cls._trigger_pools_warm_up(m_driver)
+
+        m_driver._get_pools_warm_up_plan.assert_not_called()
+        m_driver._warm_up_pool.assert_not_called()
+
+    def test__warm_up_pool(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        pool_key = ('node', 'project', 'net')
+        lock = threading.Lock()
+        m_driver._get_populate_pool_lock.return_value = lock
+        m_driver._get_pool_params.return_value = (
+            None, mock.sentinel.subnets, ('sg',))
+        vifs = [mock.Mock(id='p1'), mock.Mock(id='p2')]
+        m_driver._request_pool_vifs.return_value = vifs
+        subnets_cache = {}
+
+        self.assertEqual(2, cls._warm_up_pool(m_driver, pool_key, 2,
+                                              subnets_cache=subnets_cache))
+
+        m_driver._get_pool_params.assert_called_once_with(pool_key,
+                                                          subnets_cache)
+        m_driver._request_pool_vifs.assert_called_once_with(
+            pool_key, None, mock.sentinel.subnets, ('sg',), 2)
+        self.assertEqual({'p1': vifs[0], 'p2': vifs[1]},
+                         m_driver._existing_vifs)
+        self.assertEqual({('sg',): ['p1', 'p2']},
+                         m_driver._available_ports_pools[pool_key])
+        self.assertFalse(lock.locked())
+
+    def test__warm_up_pool_populating(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        lock = threading.Lock()
+        lock.acquire()
+        m_driver._get_populate_pool_lock.return_value = lock
+
+        self.assertEqual(0, cls._warm_up_pool(
+            m_driver, ('node', 'project', 'net'), 2))
+
+        m_driver._request_pool_vifs.assert_not_called()
+
+    def test__warm_up_pool_error(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        lock = threading.Lock()
+        m_driver._get_populate_pool_lock.return_value = lock
+        m_driver._get_pool_params.return_value = (
+            None, mock.sentinel.subnets, ('sg',))
+        m_driver._request_pool_vifs.side_effect = os_exc.SDKException
+
+        self.assertEqual(0, cls._warm_up_pool(
+            m_driver, ('node', 'project', 'net'), 2))
+        self.assertFalse(lock.locked())
+
+    @mock.patch('kuryr_kubernetes.utils.get_subnet')
+    def test__get_pool_params(self, m_get_subnet):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        self._set_sizing_window(0)
+        pool_key = ('node', 'project', 'net')
+        m_driver._available_ports_pools[pool_key]['sg1'] = ['p1']
+        m_driver._available_ports_pools[pool_key]['sg2'] = ['p2']
+        network = osv_network.Network(id='net')
+        network.subnets = osv_subnet.SubnetList(
+            objects=[osv_subnet.Subnet(cidr='10.0.0.0/24')])
+        m_driver._existing_vifs['p2'] = osv_vif.VIFBase(network=network)
+        os_net.subnets.return_value = [
+            mock.Mock(id='subnet1', cidr='10.0.0.0/24'),
+            mock.Mock(id='subnet2', cidr='10.0.1.0/24')]
+        m_get_subnet.return_value = mock.sentinel.subnet
+        subnets_cache = {}
+
+        params = cls._get_pool_params(m_driver, pool_key, subnets_cache)
+
+        self.assertEqual((None, {'subnet1': mock.sentinel.subnet}, 'sg2'),
+                         params)
+        os_net.subnets.assert_called_once_with(network_id='net')
+        m_get_subnet.assert_called_once_with('subnet1')
+
+        cls._get_pool_params(m_driver, pool_key, subnets_cache)
+        os_net.subnets.assert_called_once()
+
+    @mock.patch('kuryr_kubernetes.utils.get_subnet')
+    def test__get_pool_params_empty_pool(self, m_get_subnet):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_warm_up_driver()
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        self._set_sizing_window(0)
+        oslo_cfg.CONF.set_override('pod_security_groups', ['sg2', 'sg1'],
+                                   group='neutron_defaults')
+        self.addCleanup(oslo_cfg.CONF.clear_override, 'pod_security_groups',
+                        group='neutron_defaults')
+        os_net.subnets.return_value = [mock.Mock(id='subnet1',
+                                                 cidr='10.0.0.0/24')]
+        m_get_subnet.return_value = mock.sentinel.subnet
+
+        params = cls._get_pool_params(m_driver, ('node', 'project', 'net'))
+
+        self.assertEqual(
+            (None, {'subnet1': mock.sentinel.subnet}, ('sg1', 'sg2')),
+            params)
+
+    def test__get_pool_params_sizing(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_resize_driver(0, 5, 5)
+        self._set_sizing_window(60)
+
+        self.assertEqual(
+            (mock.sentinel.pod, mock.sentinel.subnets, ('sg',)),
+            cls._get_pool_params(m_driver, ('node', 'project', 'net')))
+
+    def test_list_pool_sizes(self):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_resize_driver(4, 12, 12)
+        pool_key = ('node', 'project', 'net')
+        m_driver._available_ports_pools[pool_key]['sg'] = []
+        oslo_cfg.CONF.set_override('ports_pool_min', 5, group='vif_pool')
+
+        self.assertEqual(
+            {pool_key: {'size': 4, 'target': 5, 'demand': None}},
+            cls.list_pool_sizes(m_driver))
+
+        self._set_sizing_window(60)
+        self.assertEqual(
+            {pool_key: {'size': 4, 'target': 12, 'demand': 12}},
+            cls.list_pool_sizes(m_driver))
+
+    @mock.patch('time.monotonic')
+    def test_list_pools_stats(self, m_monotonic):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_resize_driver(3, 5, None)
+        pool_key = ('node', 'project', 'net')
+        m_monotonic.return_value = 0
+        m_driver._available_ports_pools[pool_key].add(('sg1',), 'p1')
+        m_monotonic.return_value = 1000
+        m_driver._available_ports_pools[pool_key].add(('sg2',), 'p2')
+        m_driver._available_ports_pools[pool_key].add(('sg2',), 'p3')
+        m_monotonic.return_value = 1100
+        lock = threading.Lock()
+        lock.acquire()
+        m_driver._populate_pool_lock = {pool_key: lock}
+        m_driver.list_pool_sizes.return_value = {
+            pool_key: {'size': 3, 'target': 5, 'demand': None}}
+
+        self.assertEqual(
+            {pool_key: {
+                'size': 3, 'target': 5, 'demand': None,
+                'security_groups': [{'ids': ['sg1'], 'ports': 1},
+                                    {'ids': ['sg2'], 'ports': 2}],
+                'age_histogram': [{'max_age': 60, 'ports': 0},
+                                  {'max_age': 300, 'ports': 2},
+                                  {'max_age': 900, 'ports': 0},
+                                  {'max_age': 3600, 'ports': 1},
+                                  {'max_age': None, 'ports': 0}],
+                'populating': True}},
+            cls.list_pools_stats(m_driver))
+
+    def _set_sg_prepare(self, num_ports):
+        oslo_cfg.CONF.set_override('ports_pool_sg_prepare', num_ports,
+                                   group='vif_pool')
+        self.addCleanup(oslo_cfg.CONF.clear_override,
+                        'ports_pool_sg_prepare', group='vif_pool')
+
+    @mock.patch('time.monotonic', return_value=100)
+    def test_request_vif_hot_sgs(self, m_monotonic):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._hot_sgs = collections.defaultdict(collections.OrderedDict)
+        m_driver._recovered_pools = True
+        m_driver._get_pool_key.return_value = mock.sentinel.pool_key
+        self._set_sg_prepare(2)
+
+        cls.request_vif(m_driver, get_pod_obj(), 'project',
+                        mock.sentinel.subnets, ['sg2', 'sg1'])
+        m_monotonic.return_value = 110
+        cls.request_vif(m_driver, get_pod_obj(), 'project',
+                        mock.sentinel.subnets, ['sg3'])
+
+        self.assertEqual(
+            [(('sg1', 'sg2'), 100), (('sg3',), 110)],
+            list(m_driver._hot_sgs[mock.sentinel.pool_key].items()))
+
+    def _get_sgs_prepare_driver(self):
+        m_driver = mock.MagicMock(spec=vif_pool.BaseVIFPool)
+        m_driver._recovered_pools = True
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._recyclable_ports = {}
+        m_driver._hot_sgs = collections.defaultdict(collections.OrderedDict)
+        return m_driver
+
+    @mock.patch('time.monotonic', return_value=1000)
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.'
+                'update_neutron_port_sgs')
+    def test__trigger_pools_sgs_prepare(self, m_update_sgs, m_monotonic):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_sgs_prepare_driver()
+        pool_key = ('node', 'project', 'net')
+        pool = m_driver._available_ports_pools[pool_key]
+        pool[('old',)] = ['p1', 'p2', 'p3']
+        pool[('hot1',)] = ['p4']
+        m_driver._hot_sgs[pool_key][('hot1',)] = 900
+        m_driver._hot_sgs[pool_key][('hot2',)] = 950
+        error = os_exc.SDKException()
+        m_update_sgs.side_effect = lambda port, sgs: (
+            error if port == 'p1' else None)
+        self._set_sg_prepare(2)
+
+        cls._trigger_pools_sgs_prepare(m_driver)
+
+        m_update_sgs.assert_has_calls([mock.call('p3', ['hot2']),
+                                       mock.call('p2', ['hot2']),
+                                       mock.call('p1', ['hot1'])])
+        self.assertEqual({('hot1',): ['p4'], ('hot2',): ['p3', 'p2']}, pool)
+        self.assertEqual({'p1': pool_key}, m_driver._recyclable_ports)
+
+    @mock.patch('time.monotonic', return_value=1000)
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.'
+                'update_neutron_port_sgs')
+    def test__trigger_pools_sgs_prepare_expired(self, m_update_sgs,
+                                                m_monotonic):
+        cls = vif_pool.BaseVIFPool
+        m_driver = self._get_sgs_prepare_driver()
+        pool_key = ('node', 'project', 'net')
+        m_driver._available_ports_pools[pool_key][('old',)] = ['p1']
+        m_driver._hot_sgs[pool_key][('hot',)] = 1000 - vif_pool.HOT_SGS_TTL - 1
+        m_driver._hot_sgs[('other', 'project', 'net')][('hot',)] = 1000
+        self._set_sg_prepare(2)
+
+        cls._trigger_pools_sgs_prepare(m_driver)
+
+        m_update_sgs.assert_not_called()
+        self.assertEqual({}, m_driver._hot_sgs)
+        self.assertEqual({('old',): ['p1']},
+                         m_driver._available_ports_pools[pool_key])
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.'
+                'update_neutron_port_sgs')
+    def test_remove_sg_from_pools(self, m_update_sgs):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        pool_key = ('node', 'project', 'net')
+        other_key = ('node', 'project', 'other')
+        m_driver._get_pool_key_net.side_effect = lambda key: key[2]
+        pool = m_driver._available_ports_pools[pool_key]
+        pool[()] = ['p1']
+        pool[('sg1', 'sg2')] = ['p2', 'p3']
+        pool[('sg2',)] = ['p4']
+        m_driver._available_ports_pools[other_key][('sg1',)] = ['p5']
+        m_update_sgs.return_value = None
+
+        cls.remove_sg_from_pools(m_driver, 'sg1', 'net')
+
+        m_update_sgs.assert_has_calls([mock.call('p2', None),
+                                       mock.call('p3', None)])
+        self.assertEqual(2, m_update_sgs.call_count)
+        self.assertEqual({(): ['p1', 'p2', 'p3'], ('sg2',): ['p4']}, pool)
+        self.assertEqual([(), ('sg2',)], list(pool))
+        self.assertEqual({('sg1',): ['p5']},
+                         m_driver._available_ports_pools[other_key])
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.'
+                'update_neutron_port_sgs')
+    def test_remove_sg_from_pools_error(self, m_update_sgs):
+        cls = vif_pool.BaseVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        pool_key = ('node', 'project', 'net')
+        m_driver._get_pool_key_net.return_value = 'net'
+        pool = m_driver._available_ports_pools[pool_key]
+        pool[('sg1',)] = ['p1', 'p2']
+        error = os_exc.SDKException()
+        m_update_sgs.side_effect = lambda port, sgs: (
+            error if port == 'p2' else None)
+
+        self.assertRaises(os_exc.SDKException, cls.remove_sg_from_pools,
+                          m_driver, 'sg1', 'net')
+
+        self.assertEqual({(): ['p1'], ('sg1',): ['p2']}, pool)
+
+
+class PoolSizer(test_base.TestCase):
+
+    def setUp(self):
+        super(PoolSizer, self).setUp()
+        self.sizer = vif_pool.PoolSizer(60)
+        self.pool_key = ('node', 'project', 'net')
+        oslo_cfg.CONF.set_override('ports_pool_min', 5, group='vif_pool')
+        oslo_cfg.CONF.set_override('ports_pool_max', 0, group='vif_pool')
+
+    def _record(self, num_requests):
+        for _ in range(num_requests):
+            self.sizer.record(self.pool_key, mock.sentinel.pod,
+                              mock.sentinel.subnets, ('sg',))
+
+    @mock.patch('time.monotonic')
+    def test_get_demand(self, m_monotonic):
+        m_monotonic.return_value = 100
+        self._record(3)
+        m_monotonic.return_value = 130
+        self._record(2)
+
+        self.assertEqual(5, self.sizer.get_demand(self.pool_key))
+        m_monotonic.return_value = 160
+        self.assertEqual(2, self.sizer.get_demand(self.pool_key))
+        m_monotonic.return_value = 190
+        self.assertEqual(0, self.sizer.get_demand(self.pool_key))
+        self.assertEqual(0, self.sizer.get_demand(('other', 'p', 'n')))
+
+    def test_get_target(self):
+        self._record(3)
+        self.assertEqual(5, self.sizer.get_target(self.pool_key))
+
+        self._record(5)
+        self.assertEqual(8, self.sizer.get_target(self.pool_key))
+
+        oslo_cfg.CONF.set_override('ports_pool_max', 6, group='vif_pool')
+        self.assertEqual(6, self.sizer.get_target(self.pool_key))
+
+    def test_forget(self):
+        self._record(1)
+        self.assertEqual([self.pool_key], self.sizer.get_pool_keys())
+        self.assertEqual((mock.sentinel.pod, mock.sentinel.subnets, ('sg',)),
+                         self.sizer.get_params(self.pool_key))
+
+        self.sizer.forget(self.pool_key)
+
+        self.assertEqual([], self.sizer.get_pool_keys())
+        self.assertIsNone(self.sizer.get_params(self.pool_key))
+
+
+class PortsPool(test_base.TestCase):
+
+    def setUp(self):
+        super(PortsPool, self).setUp()
+        self.pool = vif_pool.PortsPool()
+        self.pool.add(('sg1',), 'p1')
+        self.pool.add(('sg2',), 'p2')
+        self.pool.add(('sg1',), 'p3')
+
+    def test_add(self):
+        self.assertEqual(3, len(self.pool))
+        self.assertEqual([('sg2',), ('sg1',)], list(self.pool))
+        self.assertEqual({('sg1',): ['p1', 'p3'], ('sg2',): ['p2']},
+                         self.pool)
+
+    def test_pop(self):
+        self.assertEqual('p3', self.pool.pop(('sg1',)))
+        self.assertEqual('p2', self.pool.pop(('sg2',)))
+
+        self.assertEqual(1, len(self.pool))
+        self.assertNotIn(('sg2',), self.pool)
+        self.assertRaises(KeyError, self.pool.pop, ('sg2',))
+
+    def test_pop_oldest(self):
+        self.assertEqual((('sg2',), 'p2'), self.pool.pop_oldest())
+        self.assertEqual((('sg1',), 'p3'), self.pool.pop_oldest())
+        self.assertEqual((('sg1',), 'p1'), self.pool.pop_oldest())
+
+        self.assertEqual(0, len(self.pool))
+        self.assertFalse(self.pool)
+        self.assertRaises(KeyError, self.pool.pop_oldest)
+
+    def test_remove(self):
+        self.pool.remove(('sg2',), 'p2')
+
+        self.assertEqual({('sg1',): ['p1', 'p3']}, self.pool)
+        self.assertEqual(2, len(self.pool))
+        self.assertRaises(KeyError, self.pool.remove, ('sg2',), 'p2')
+        self.assertRaises(ValueError, self.pool.remove, ('sg1',), 'p2')
+
+    def test_setitem(self):
+        self.pool[('sg2',)] = ['p4', 'p5']
+        self.pool[('sg1',)] = []
+        self.pool[('sg3',)] = ['p6']
+
+        self.assertEqual([('sg2',), ('sg3',)], list(self.pool))
+        self.assertEqual(3, len(self.pool))
+
+    def test_delitem(self):
+        del self.pool[('sg1',)]
+
+        self.assertEqual({('sg2',): ['p2']}, self.pool)
+        self.assertEqual(1, len(self.pool))
+
+    def test_move_to_end(self):
+        self.pool.move_to_end(('sg1',), last=False)
+
+        self.assertEqual((('sg1',), 'p3'), self.pool.pop_oldest())
+
+    @mock.patch('time.monotonic')
+    def test_get_ages(self, m_monotonic):
+        m_monotonic.return_value = 10
+        pool = vif_pool.PortsPool()
+        pool.add(('sg1',), 'p1')
+        m_monotonic.return_value = 20
+        pool[('sg1',)] = ['p1', 'p2']
+        pool.add(('sg2',), 'p3')
+        m_monotonic.return_value = 30
+
+        self.assertEqual([20, 10, 10], pool.get_ages())
+
+        pool.pop(('sg2',))
+        pool.remove(('sg1',), 'p2')
+        self.assertEqual([20], pool.get_ages())
+
+        del pool[('sg1',)]
+        self.assertEqual([], pool.get_ages())
+
+    def test_pop_oldest_exclude(self):
+        self.assertEqual((('sg1',), 'p3'),
+                         self.pool.pop_oldest(exclude={('sg2',)}))
+        self.assertEqual((('sg1',), 'p1'),
+                         self.pool.pop_oldest(exclude={('sg2',)}))
+        self.assertRaises(KeyError, self.pool.pop_oldest, {('sg2',)})
+
 
 @ddt.ddt
 class NeutronVIFPool(test_base.TestCase):
@@ -511,8 +1396,8 @@ class NeutronVIFPool(test_base.TestCase):
 
         os_net.update_port.assert_called_once_with(
             port_id, name=get_pod_name(pod), device_id=pod['metadata']['uid'])
-        # 2 calls from the constructor, so no calls in _get_port_from_pool()
-        self.assertEqual(3, m_eventlet.call_count)
+        # 1 call from the constructor, so 1 call in _get_port_from_pool()
+        self.assertEqual(2, m_eventlet.call_count)
 
     @mock.patch('kuryr_kubernetes.controller.drivers.utils.get_port_name')
     @mock.patch('eventlet.spawn')
@@ -543,8 +1428,37 @@ class NeutronVIFPool(test_base.TestCase):
 
         os_net.update_port.assert_called_once_with(
             port_id, name=get_pod_name(pod), device_id=pod['metadata']['uid'])
-        # 2 calls come from the constructor, so 1 call in _get_port_from_pool()
-        self.assertEqual(3, m_eventlet.call_count)
+        # 1 call comes from the constructor, so 1 call in _get_port_from_pool()
+        self.assertEqual(2, m_eventlet.call_count)
+
+    @mock.patch('eventlet.spawn')
+    def test__get_port_from_pool_snapshot_port_gone(self, m_eventlet):
+        m_driver = vif_pool.NeutronVIFPool()
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+
+        pool_key = ('node', 'project', 'net')
+        port = mock.sentinel.port
+        subnets = mock.sentinel.subnets
+        sgs = ('test-sg',)
+        pod = get_pod_obj()
+
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._available_ports_pools[pool_key][sgs] = ['p1', 'p2']
+        m_driver._existing_vifs = {'p1': port, 'p2': mock.sentinel.gone}
+        m_driver._snapshot_ports = {'p1', 'p2'}
+        oslo_cfg.CONF.set_override('port_debug', False, group='kubernetes')
+        os_net.get_port.side_effect = [
+            os_exc.NotFoundException(),
+            os_port.Port(id='p1', network_id='net',
+                         device_owner=kl_const.DEVICE_OWNER)]
+
+        self.assertEqual(port, m_driver._get_port_from_pool(
+            pool_key, pod, subnets, sgs))
+
+        os_net.get_port.assert_has_calls([mock.call('p2'), mock.call('p1')])
+        self.assertEqual({'p1': port}, m_driver._existing_vifs)
+        self.assertEqual(set(), m_driver._snapshot_ports)
+        os_net.update_port.assert_not_called()
 
     def test__get_port_from_pool_empty_pool(self):
         cls = vif_pool.NeutronVIFPool
@@ -697,15 +1611,16 @@ class NeutronVIFPool(test_base.TestCase):
         pool_key = ('node_ip', 'project_id')
         port_id = str(uuid.uuid4())
         pool_length = 10
-        vif = mock.sentinel.vif
 
         m_driver._recyclable_ports = {port_id: pool_key}
         m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
-        m_driver._existing_vifs = {port_id: vif}
         m_driver._recovered_pools = True
         oslo_cfg.CONF.set_override('ports_pool_max',
                                    10,
                                    group='vif_pool')
+        oslo_cfg.CONF.set_override('port_debug',
+                                   False,
+                                   group='kubernetes')
         os_net.ports.return_value = [
             os_port.Port(
                 id=port_id,
@@ -717,7 +1632,9 @@ class NeutronVIFPool(test_base.TestCase):
         cls._trigger_return_to_pool(m_driver)
 
         os_net.update_port.assert_not_called()
-        os_net.delete_port.assert_called_once_with(port_id)
+        m_driver._delete_pool_ports.assert_called_once_with(pool_key,
+                                                            [port_id])
+        self.assertEqual({}, m_driver._recyclable_ports)
 
     def test__trigger_return_to_pool_update_exception(self):
         cls = vif_pool.NeutronVIFPool
@@ -755,8 +1672,10 @@ class NeutronVIFPool(test_base.TestCase):
         os_net.update_port.assert_called_once_with(
             port_id, name=constants.KURYR_PORT_NAME, device_id='')
         os_net.delete_port.assert_not_called()
+        self.assertEqual({port_id: pool_key}, m_driver._recyclable_ports)
+        self.assertEqual(0, len(m_driver._available_ports_pools[pool_key]))
 
-    def test__trigger_return_to_pool_delete_exception(self):
+    def test__trigger_return_to_pool_max(self):
         cls = vif_pool.NeutronVIFPool
         m_driver = mock.MagicMock(spec=cls)
 
@@ -764,58 +1683,46 @@ class NeutronVIFPool(test_base.TestCase):
 
         pool_key = ('node_ip', 'project_id')
         port_id = str(uuid.uuid4())
-        pool_length = 10
-        vif = mock.sentinel.vif
+        port_id2 = str(uuid.uuid4())
 
-        m_driver._recyclable_ports = {port_id: pool_key}
+        m_driver._recyclable_ports = {port_id: pool_key, port_id2: pool_key}
         m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
-        m_driver._existing_vifs = {port_id: vif}
         m_driver._recovered_pools = True
         oslo_cfg.CONF.set_override('ports_pool_max',
                                    5,
                                    group='vif_pool')
+        oslo_cfg.CONF.set_override('port_debug',
+                                   False,
+                                   group='kubernetes')
         os_net.ports.return_value = [
-            os_port.Port(
-                id=port_id,
-                security_group_ids=['security_group_modified'],
-            ),
+            os_port.Port(id=port_id, security_group_ids=['sg2', 'sg1']),
+            os_port.Port(id=port_id2, security_group_ids=['sg1']),
         ]
-        m_driver._get_pool_size.return_value = pool_length
+        m_driver._get_pool_size.return_value = 4
 
         cls._trigger_return_to_pool(m_driver)
 
-        os_net.update_port.assert_not_called()
-        os_net.delete_port.assert_called_once_with(port_id)
+        os_net.ports.assert_called_once_with(
+            id=[port_id, port_id2], device_owner=kl_const.DEVICE_OWNER)
+        self.assertEqual({('sg1', 'sg2'): [port_id]},
+                         m_driver._available_ports_pools[pool_key])
+        m_driver._delete_pool_ports.assert_called_once_with(pool_key,
+                                                            [port_id2])
+        self.assertEqual({}, m_driver._recyclable_ports)
 
-    def test__trigger_return_to_pool_delete_key_error(self):
+    def test__trigger_return_to_pool_nothing_to_recycle(self):
         cls = vif_pool.NeutronVIFPool
         m_driver = mock.MagicMock(spec=cls)
 
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
-        pool_key = ('node_ip', 'project_id')
-        port_id = str(uuid.uuid4())
-        pool_length = 10
-
-        m_driver._recyclable_ports = {port_id: pool_key}
-        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
-        m_driver._existing_vifs = {}
+        m_driver._recyclable_ports = {}
         m_driver._recovered_pools = True
-        oslo_cfg.CONF.set_override('ports_pool_max',
-                                   5,
-                                   group='vif_pool')
-        os_net.ports.return_value = [
-            os_port.Port(
-                id=port_id,
-                security_group_ids=['security_group_modified'],
-            ),
-        ]
-        m_driver._get_pool_size.return_value = pool_length
 
         cls._trigger_return_to_pool(m_driver)
 
-        os_net.update_port.assert_not_called()
-        os_net.delete_port.assert_not_called()
+        os_net.ports.assert_not_called()
+        m_driver._delete_pool_ports.assert_not_called()
 
     @mock.patch('kuryr_kubernetes.os_vif_util.neutron_to_osvif_vif')
     @mock.patch('kuryr_kubernetes.utils.get_subnet')
@@ -962,6 +1869,47 @@ class NeutronVIFPool(test_base.TestCase):
         m_pool.imap.assert_called_once_with(utils.delete_neutron_port,
                                             [port_id])
 
+    @mock.patch('eventlet.GreenPool')
+    def test__delete_pool_ports(self, m_green_pool):
+        cls = vif_pool.NeutronVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_pool = mock.MagicMock()
+        m_green_pool.return_value = m_pool
+        m_pool.imap.return_value = [None]
+        port_id = str(uuid.uuid4())
+        m_driver._existing_vifs = {port_id: mock.sentinel.vif}
+
+        cls._delete_pool_ports(m_driver, mock.sentinel.pool_key, [port_id])
+
+        self.assertEqual({}, m_driver._existing_vifs)
+        m_pool.imap.assert_called_once_with(utils.delete_neutron_port,
+                                            [port_id])
+
+    def test__request_pool_vifs_no_pod(self):
+        cls = vif_pool.NeutronVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._drv_vif = mock.Mock()
+
+        self.assertEqual([], cls._request_pool_vifs(
+            m_driver, ('node', 'project', 'net'), None, mock.sentinel.subnets,
+            ('sg',), 2))
+        m_driver._drv_vif.request_vifs.assert_not_called()
+
+    def test__request_pool_vifs(self):
+        cls = vif_pool.NeutronVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._drv_vif = mock.Mock()
+        m_driver._create_ports_semaphore = mock.sentinel.semaphore
+
+        cls._request_pool_vifs(m_driver, ('node', 'project', 'net'),
+                               mock.sentinel.pod, mock.sentinel.subnets,
+                               ('sg',), 2)
+
+        m_driver._drv_vif.request_vifs.assert_called_once_with(
+            pod=mock.sentinel.pod, project_id='project',
+            subnets=mock.sentinel.subnets, security_groups=['sg'],
+            num_ports=2, semaphore=mock.sentinel.semaphore)
+
 
 @ddt.ddt
 class NestedVIFPool(test_base.TestCase):
@@ -1001,6 +1949,26 @@ class NestedVIFPool(test_base.TestCase):
                 'subports': trunk_obj['sub_ports']}
         return parent_ports
 
+    def test__forget_ports(self):
+        cls = vif_pool.NestedVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        pool_key = ('node', 'project', 'net')
+        vif = mock.Mock(vlan_id=100)
+        other_vif = mock.Mock(vlan_id=200)
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        m_driver._available_ports_pools[pool_key][('sg1',)] = ['p1']
+        m_driver._known_trunk_ids = {pool_key: 'trunk1'}
+        m_driver._existing_vifs = {'p1': vif, 'p2': other_vif}
+        cls_vif_driver = nested_vlan_vif.NestedVlanPodVIFDriver
+        vif_driver = mock.MagicMock(spec=cls_vif_driver)
+        m_driver._drv_vif = vif_driver
+
+        cls._forget_ports(m_driver, ['p1', 'p2', 'p3'])
+
+        # p2 is not in a pool, so its trunk is unknown.
+        vif_driver._release_vlan_id.assert_called_once_with('trunk1', 100)
+        self.assertEqual({}, m_driver._existing_vifs)
+
     @mock.patch('kuryr_kubernetes.controller.drivers.utils.get_port_name')
     @mock.patch('eventlet.spawn')
     def test__get_port_from_pool(self, m_eventlet, m_get_port_name):
@@ -1029,7 +1997,7 @@ class NestedVIFPool(test_base.TestCase):
 
         os_net.update_port.assert_called_once_with(
             port_id, name=get_pod_name(pod))
-        self.assertEqual(3, m_eventlet.call_count)
+        self.assertEqual(2, m_eventlet.call_count)
 
     @mock.patch('kuryr_kubernetes.controller.drivers.utils.get_port_name')
     @mock.patch('eventlet.spawn')
@@ -1060,8 +2028,8 @@ class NestedVIFPool(test_base.TestCase):
 
         os_net.update_port.assert_called_once_with(
             port_id, name=get_pod_name(pod))
-        # 2 calls come from the constructor, so 1 call in _get_port_from_pool()
-        self.assertEqual(3, m_eventlet.call_count)
+        # 1 call comes from the constructor, so 1 call in _get_port_from_pool()
+        self.assertEqual(2, m_eventlet.call_count)
 
     def test__get_port_from_pool_empty_pool(self):
         cls = vif_pool.NestedVIFPool
@@ -1213,38 +2181,34 @@ class NestedVIFPool(test_base.TestCase):
 
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
-        cls_vif_driver = nested_vlan_vif.NestedVlanPodVIFDriver
-        vif_driver = mock.MagicMock(spec=cls_vif_driver)
-        m_driver._drv_vif = vif_driver
-
         pool_key = ('node_ip', 'project_id')
         port_id = str(uuid.uuid4())
+        port_id2 = str(uuid.uuid4())
         pool_length = 10
-        vif = mock.MagicMock()
-        vif.vlan_id = mock.sentinel.vlan_id
-        trunk_id = str(uuid.uuid4())
 
-        m_driver._recyclable_ports = {port_id: pool_key}
+        m_driver._recyclable_ports = {port_id: pool_key, port_id2: pool_key}
         m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
-        m_driver._existing_vifs = {port_id: vif}
         oslo_cfg.CONF.set_override('ports_pool_max',
                                    10,
                                    group='vif_pool')
+        oslo_cfg.CONF.set_override('port_debug',
+                                   False,
+                                   group='kubernetes')
         port = fake.get_port_obj(port_id=port_id)
         port.security_group_ids = ['security_group_modified']
         os_net.ports.return_value = [port]
         m_driver._get_pool_size.return_value = pool_length
-        m_driver._get_trunk_id.return_value = trunk_id
-        m_driver._known_trunk_ids = {}
         m_driver._recovered_pools = True
 
         cls._trigger_return_to_pool(m_driver)
 
+        os_net.ports.assert_called_once_with(
+            id=[port_id, port_id2],
+            device_owner=['trunk:subport', kl_const.DEVICE_OWNER])
         os_net.update_port.assert_not_called()
-        os_net.delete_port.assert_called_once_with(port_id)
-        m_driver._get_trunk_id.assert_called_once()
-        m_driver._drv_vif._remove_subport.assert_called_once_with(trunk_id,
-                                                                  port_id)
+        m_driver._delete_pool_ports.assert_called_once_with(
+            pool_key, [port_id, port_id2])
+        self.assertEqual({}, m_driver._recyclable_ports)
 
     def test__trigger_return_to_pool_update_exception(self):
         cls = vif_pool.NestedVIFPool
@@ -1276,78 +2240,39 @@ class NestedVIFPool(test_base.TestCase):
         os_net.update_port.assert_called_once_with(
             port_id, name=constants.KURYR_PORT_NAME)
         os_net.delete_port.assert_not_called()
+        self.assertEqual({port_id: pool_key}, m_driver._recyclable_ports)
 
     def test__trigger_return_to_pool_delete_exception(self):
         cls = vif_pool.NestedVIFPool
         m_driver = mock.MagicMock(spec=cls)
-        os_net = self.useFixture(k_fix.MockNetworkClient()).client
-        cls_vif_driver = nested_vlan_vif.NestedVlanPodVIFDriver
-        vif_driver = mock.MagicMock(spec=cls_vif_driver)
-        m_driver._drv_vif = vif_driver
-
-        pool_key = ('node_ip', 'project_id')
-        port_id = str(uuid.uuid4())
-        pool_length = 10
-        vif = mock.MagicMock()
-        vif.vlan_id = mock.sentinel.vlan_id
-        trunk_id = str(uuid.uuid4())
-
-        m_driver._recyclable_ports = {port_id: pool_key}
-        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
-        m_driver._existing_vifs = {port_id: vif}
-        oslo_cfg.CONF.set_override('ports_pool_max',
-                                   5,
-                                   group='vif_pool')
-        port = fake.get_port_obj(port_id=port_id)
-        port.security_group_ids = ['security_group_modified']
-        os_net.ports.return_value = [port]
-        m_driver._get_pool_size.return_value = pool_length
-        m_driver._get_trunk_id.return_value = trunk_id
-        m_driver._known_trunk_ids = {}
-        m_driver._recovered_pools = True
-
-        cls._trigger_return_to_pool(m_driver)
 
-        os_net.update_port.assert_not_called()
-        m_driver._get_trunk_id.assert_called_once()
-        m_driver._drv_vif._remove_subport.assert_called_once_with(trunk_id,
-                                                                  port_id)
-        os_net.delete_port.assert_called_once_with(port_id)
-
-    def test__trigger_return_to_pool_delete_key_error(self):
-        cls = vif_pool.NestedVIFPool
-        m_driver = mock.MagicMock(spec=cls)
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
-        cls_vif_driver = nested_vlan_vif.NestedVlanPodVIFDriver
-        vif_driver = mock.MagicMock(spec=cls_vif_driver)
-        m_driver._drv_vif = vif_driver
 
         pool_key = ('node_ip', 'project_id')
+        pool_key2 = ('node_ip2', 'project_id')
         port_id = str(uuid.uuid4())
-        pool_length = 10
-        trunk_id = str(uuid.uuid4())
+        port_id2 = str(uuid.uuid4())
 
-        m_driver._recyclable_ports = {port_id: pool_key}
+        m_driver._recyclable_ports = {port_id: pool_key, port_id2: pool_key2}
         m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
-        m_driver._existing_vifs = {}
         oslo_cfg.CONF.set_override('ports_pool_max',
-                                   5,
+                                   10,
                                    group='vif_pool')
-        port = fake.get_port_obj(port_id=port_id)
-        port.security_group_ids = ['security_group_modified']
-        os_net.ports.return_value = [port]
-        m_driver._get_pool_size.return_value = pool_length
-        m_driver._known_trunk_ids = {}
-        m_driver._get_trunk_id.return_value = trunk_id
+        oslo_cfg.CONF.set_override('port_debug',
+                                   False,
+                                   group='kubernetes')
+        os_net.ports.return_value = []
+        m_driver._get_pool_size.return_value = 10
+        m_driver._delete_pool_ports.side_effect = [
+            exceptions.K8sNodeTrunkPortFailure, None]
         m_driver._recovered_pools = True
 
         cls._trigger_return_to_pool(m_driver)
 
-        os_net.update_port.assert_not_called()
-        m_driver._get_trunk_id.assert_called_once()
-        m_driver._drv_vif._remove_subport.assert_called_once_with(trunk_id,
-                                                                  port_id)
-        os_net.delete_port.assert_not_called()
+        m_driver._delete_pool_ports.assert_has_calls([
+            mock.call(pool_key, [port_id]),
+            mock.call(pool_key2, [port_id2])])
+        self.assertEqual({port_id: pool_key}, m_driver._recyclable_ports)
 
     @mock.patch('kuryr_kubernetes.utils.get_subnet')
     def test__get_trunk_info(self, m_get_subnet):
@@ -1559,13 +2484,83 @@ class NestedVIFPool(test_base.TestCase):
         cls._precreated_ports(m_driver, 'free')
 
         m_driver._get_trunks_info.assert_called_once()
-        m_driver._drv_vif._remove_subport.assert_called_once()
-        os_net.delete_port.assert_called_once()
+        m_driver._drv_vif._remove_subports.assert_called_once_with(
+            trunk_obj['id'], [port_id])
+        os_net.delete_port.assert_called_once_with(port_id)
         m_driver._drv_vif._release_vlan_id.assert_called_once()
 
         self.assertEqual(m_driver._existing_vifs, {})
-        self.assertEqual(m_driver._available_ports_pools[pool_key][tuple(
-            port.security_group_ids)], [])
+        self.assertNotIn(tuple(port.security_group_ids),
+                         m_driver._available_ports_pools[pool_key])
+
+    def _get_free_several_subports_driver(self):
+        cls = vif_pool.NestedVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        cls_vif_driver = nested_vlan_vif.NestedVlanPodVIFDriver
+        m_driver._drv_vif = mock.MagicMock(spec=cls_vif_driver)
+
+        trunk_id = str(uuid.uuid4())
+        ports = [fake.get_port_obj(port_id=str(uuid.uuid4()),
+                                   device_owner='trunk:subport')
+                 for _i in range(3)]
+        trunk_obj = self._get_trunk_obj(subport_id=ports[0].id,
+                                        trunk_id=trunk_id)
+        for port in ports[1:]:
+            trunk_obj['sub_ports'].append({'port_id': port.id,
+                                           'segmentation_type': 'vlan',
+                                           'segmentation_id': 43})
+        p_ports = self._get_parent_ports([trunk_obj])
+        a_subports = {port.id: port for port in ports}
+        subnet_id = ports[0].fixed_ips[0]['subnet_id']
+        net_id = str(uuid.uuid4())
+        network = ovu.neutron_to_osvif_network(os_network.Network(
+            id=net_id, name=None, mtu=None, provider_network_type=None))
+        subnets = {subnet_id: {subnet_id: network}}
+        m_driver._get_trunks_info.return_value = (p_ports, a_subports,
+                                                  subnets)
+
+        pool_key = (ports[0].binding_host_id, ports[0].project_id, net_id)
+        m_driver._get_pool_key.return_value = pool_key
+        m_driver._available_ports_pools = AVAILABLE_PORTS_TYPE()
+        sg_key = tuple(ports[0].security_group_ids)
+        m_driver._existing_vifs = {}
+        for port in ports:
+            m_driver._available_ports_pools[pool_key].add(sg_key, port.id)
+            m_driver._existing_vifs[port.id] = mock.sentinel.vif
+        return m_driver, trunk_id, [port.id for port in ports], pool_key
+
+    def test__precreated_ports_free_several_subports(self):
+        cls = vif_pool.NestedVIFPool
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        m_driver, trunk_id, ports_id, pool_key = (
+            self._get_free_several_subports_driver())
+
+        cls._precreated_ports(m_driver, 'free')
+
+        m_driver._drv_vif._remove_subports.assert_called_once_with(
+            trunk_id, ports_id)
+        m_driver._drv_vif._remove_subport.assert_not_called()
+        self.assertEqual(3, m_driver._drv_vif._release_vlan_id.call_count)
+        self.assertEqual(sorted(ports_id),
+                         sorted(c[0][0] for c in
+                                os_net.delete_port.call_args_list))
+        self.assertEqual({}, m_driver._existing_vifs)
+        self.assertEqual(0, len(m_driver._available_ports_pools[pool_key]))
+
+    def test__precreated_ports_free_remove_subports_error(self):
+        cls = vif_pool.NestedVIFPool
+        os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        m_driver, trunk_id, ports_id, pool_key = (
+            self._get_free_several_subports_driver())
+        m_driver._drv_vif._remove_subports.side_effect = (
+            os_exc.SDKException)
+
+        cls._precreated_ports(m_driver, 'free')
+
+        m_driver._drv_vif._release_vlan_id.assert_not_called()
+        os_net.delete_port.assert_not_called()
+        self.assertEqual(3, len(m_driver._existing_vifs))
+        self.assertEqual(3, len(m_driver._available_ports_pools[pool_key]))
 
     @mock.patch('kuryr_kubernetes.os_vif_util.'
                 'neutron_to_osvif_vif_nested_vlan')
@@ -1778,7 +2773,8 @@ class NestedVIFPool(test_base.TestCase):
         m_driver._get_trunk_id.assert_called_once_with(pool_key)
         m_driver._drv_vif._remove_subports.assert_called_once_with(trunk_id,
                                                                    [port_id])
-        m_driver._drv_vif._release_vlan_id.assert_called_once_with(vlan_id)
+        m_driver._drv_vif._release_vlan_id.assert_called_once_with(trunk_id,
+                                                                   vlan_id)
         m_pool.imap.assert_called_once_with(utils.delete_neutron_port,
                                             [port_id])
 
@@ -1876,3 +2872,68 @@ class NestedVIFPool(test_base.TestCase):
         m_driver._drv_vif._release_vlan_id.assert_not_called()
         m_pool.imap.assert_called_once_with(utils.delete_neutron_port,
                                             [port_id])
+
+    @mock.patch('eventlet.GreenPool')
+    def test__delete_pool_ports(self, m_green_pool):
+        cls = vif_pool.NestedVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        cls_vif_driver = nested_vlan_vif.NestedVlanPodVIFDriver
+        vif_driver = mock.MagicMock(spec=cls_vif_driver)
+        m_driver._drv_vif = vif_driver
+        m_pool = mock.MagicMock()
+        m_green_pool.return_value = m_pool
+        m_pool.imap.return_value = [None]
+
+        pool_key = ('node_ip', 'project_id', 'net_id')
+        port_id = str(uuid.uuid4())
+        trunk_id = str(uuid.uuid4())
+        vif = mock.MagicMock()
+        vif.vlan_id = mock.sentinel.vlan_id
+        m_driver._existing_vifs = {port_id: vif}
+        m_driver._get_trunk_id.return_value = trunk_id
+
+        cls._delete_pool_ports(m_driver, pool_key, [port_id])
+
+        vif_driver._remove_subports.assert_called_once_with(trunk_id,
+                                                            [port_id])
+        vif_driver._release_vlan_id.assert_called_once_with(
+            trunk_id, mock.sentinel.vlan_id)
+        self.assertEqual({}, m_driver._existing_vifs)
+        m_pool.imap.assert_called_once_with(utils.delete_neutron_port,
+                                            [port_id])
+
+    @mock.patch('eventlet.GreenPool')
+    def test__delete_pool_ports_remove_subports_error(self, m_green_pool):
+        cls = vif_pool.NestedVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        cls_vif_driver = nested_vlan_vif.NestedVlanPodVIFDriver
+        vif_driver = mock.MagicMock(spec=cls_vif_driver)
+        m_driver._drv_vif = vif_driver
+        vif_driver._remove_subports.side_effect = os_exc.SDKException
+
+        pool_key = ('node_ip', 'project_id', 'net_id')
+        port_id = str(uuid.uuid4())
+        m_driver._existing_vifs = {port_id: mock.sentinel.vif}
+        m_driver._recyclable_ports = {}
+
+        cls._delete_pool_ports(m_driver, pool_key, [port_id])
+
+        self.assertEqual({port_id: pool_key}, m_driver._recyclable_ports)
+        self.assertEqual({port_id: mock.sentinel.vif},
+                         m_driver._existing_vifs)
+        vif_driver._release_vlan_id.assert_not_called()
+        m_green_pool.return_value.imap.assert_not_called()
+
+    def test__request_pool_vifs(self):
+        cls = vif_pool.NestedVIFPool
+        m_driver = mock.MagicMock(spec=cls)
+        m_driver._drv_vif = mock.Mock()
+        m_driver._create_ports_semaphore = mock.sentinel.semaphore
+
+        cls._request_pool_vifs(m_driver, ('10.0.0.5', 'project', 'net'),
+                               None, mock.sentinel.subnets, ('sg',), 2)
+
+        m_driver._drv_vif.request_vifs.assert_called_once_with(
+            pod=[], project_id='project', subnets=mock.sentinel.subnets,
+            security_groups=['sg'], num_ports=2, trunk_ip='10.0.0.5',
+            semaphore=mock.sentinel.semaphore)
@@ -0,0 +1,168 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Microbenchmarks of the pools of ports handling.
+
+They check the cost per port of returning ports to a pool and of requesting
+them from it, with pools of 1k and 10k ports spread over groups of
+PORTS_PER_SG ports with the same SGs. Both operations are expected to take
+constant time per port, so the number of buckets of ports visited per port is
+asserted not to grow with the size of the pool. The time per port is only
+logged, to ease the comparison between changes, as it depends on the load of
+the machine running the tests.
+"""
+
+import collections
+import functools
+import time
+from unittest import mock
+
+from oslo_config import cfg as oslo_cfg
+from oslo_log import log as logging
+
+from kuryr_kubernetes.controller.drivers import vif_pool
+from kuryr_kubernetes.tests import base as test_base
+from kuryr_kubernetes.tests.unit import kuryr_fixtures as k_fix
+
+LOG = logging.getLogger(__name__)
+
+SMALL_POOL = 1000
+LARGE_POOL = 10000
+PORTS_PER_SG = 10
+# Ports returned to the pool on each recycling round, so that the later rounds
+# find the pool filled by the earlier ones.
+RETURN_BATCH = 100
+# Allowed growth of the buckets visited per port from the small to the large
+# pool, as the ports at the edges of the pools change it a bit. Scanning the
+# buckets for every port makes it grow 10 times.
+MAX_GROWTH = 1.1
+
+FakePort = collections.namedtuple('FakePort', ['id', 'security_group_ids'])
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class _CountingBuckets(collections.OrderedDict):
+    """Buckets of ports counting how many of them are visited."""
+
+    def __init__(self, counter):
+        super(_CountingBuckets, self).__init__()
+        self._counter = counter
+
+    def _count(self, iterable):
+        for item in iterable:
+            self._counter['visits'] += 1
+            yield item
+
+    def __iter__(self):
+        return self._count(super(_CountingBuckets, self).__iter__())
+
+    def keys(self):
+        return self._count(super(_CountingBuckets, self).keys())
+
+    def values(self):
+        return self._count(super(_CountingBuckets, self).values())
+
+    def items(self):
+        return self._count(super(_CountingBuckets, self).items())
+
+
+class _CountingPortsPool(vif_pool.PortsPool):
+
+    def __init__(self, counter):
+        super(_CountingPortsPool, self).__init__()
+        self._buckets = _CountingBuckets(counter)
+
+
+class VIFPoolBenchmark(test_base.TestCase):
+
+    def setUp(self):
+        super(VIFPoolBenchmark, self).setUp()
+        self.os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        # Mocks record their calls, which would be measured too.
+        self.os_net.update_port = _noop
+        oslo_cfg.CONF.set_override('port_debug', False, group='kubernetes')
+        oslo_cfg.CONF.set_override('ports_pool_max', 2 * LARGE_POOL,
+                                   group='vif_pool')
+        self.addCleanup(oslo_cfg.CONF.clear_override, 'port_debug',
+                        group='kubernetes')
+        self.addCleanup(oslo_cfg.CONF.clear_override, 'ports_pool_max',
+                        group='vif_pool')
+        self.pool_key = ('node', 'project', 'net')
+
+    @mock.patch('eventlet.spawn')
+    def _get_driver(self, num_ports, counter, m_spawn):
+        driver = vif_pool.NeutronVIFPool()
+        vif_pool.BaseVIFPool.sync_pools(driver)
+        driver._recovered_pools = True
+        driver._available_ports_pools = collections.defaultdict(
+            functools.partial(_CountingPortsPool, counter))
+        ports = []
+        for i in range(num_ports):
+            port_id = 'port-%d' % i
+            ports.append(FakePort(port_id, ['sg-%d' % (i // PORTS_PER_SG)]))
+            driver._existing_vifs[port_id] = mock.sentinel.vif
+        ports_by_id = {port.id: port for port in ports}
+        # Only the recyclable ports are expected to be fetched, by ID.
+        self.os_net.ports = lambda id, **kwargs: [ports_by_id[p] for p in id]
+        return driver
+
+    def _measure(self, func, num_ports, prepare=None):
+        """Returns the buckets visited and the usecs taken per port."""
+        counter = collections.Counter()
+        driver = self._get_driver(num_ports, counter)
+        if prepare:
+            prepare(driver, num_ports)
+        counter.clear()
+        start = time.perf_counter()
+        func(driver, num_ports)
+        elapsed = time.perf_counter() - start
+        return (counter['visits'] / num_ports,
+                elapsed * 1e6 / num_ports)
+
+    def _return_ports(self, driver, num_ports):
+        for i in range(0, num_ports, RETURN_BATCH):
+            for j in range(i, min(i + RETURN_BATCH, num_ports)):
+                driver._recyclable_ports['port-%d' % j] = self.pool_key
+            driver._trigger_return_to_pool()
+        self.assertEqual(num_ports, driver._get_pool_size(self.pool_key))
+
+    def _request_ports(self, driver, num_ports):
+        # Half of the requests are for SGs no pooled port has, so that both
+        # the hit and the miss paths are used. The hits go to the most
+        # recently updated groups, the misses reuse the least recent ones.
+        with mock.patch('eventlet.spawn', _noop):
+            for i in range(num_ports):
+                if i % 2:
+                    sgs = ('sg-other',)
+                else:
+                    sgs = ('sg-%d' % ((num_ports - i - 1) // PORTS_PER_SG),)
+                driver._get_port_from_pool(self.pool_key, mock.sentinel.pod,
+                                           mock.sentinel.subnets, sgs)
+        self.assertEqual(0, driver._get_pool_size(self.pool_key))
+
+    def _assert_constant_cost(self, name, func, prepare=None):
+        small, small_time = self._measure(func, SMALL_POOL, prepare)
+        large, large_time = self._measure(func, LARGE_POOL, prepare)
+        LOG.info('%s: %.2f usec/port with %d ports, %.2f usec/port with %d '
+                 'ports.', name, small_time, SMALL_POOL, large_time,
+                 LARGE_POOL)
+        self.assertLessEqual(large, small * MAX_GROWTH)
+
+    def test_return_ports(self):
+        self._assert_constant_cost('Return to pool', self._return_ports)
+
+    def test_request_ports(self):
+        self._assert_constant_cost('Request from pool', self._request_ports,
+                                   prepare=self._return_ports)
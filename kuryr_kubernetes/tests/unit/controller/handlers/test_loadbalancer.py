@@ -22,6 +22,7 @@ import os_vif.objects.subnet as osv_subnet
 from kuryr_kubernetes import constants as k_const
 from kuryr_kubernetes.controller.drivers import base as drv_base
 from kuryr_kubernetes.controller.handlers import loadbalancer as h_lb
+from kuryr_kubernetes import exceptions as k_exc
 from kuryr_kubernetes.tests import base as test_base
 from kuryr_kubernetes.tests.unit import kuryr_fixtures as k_fix
 
@@ -317,6 +318,9 @@ class FakeLBaaSDriver(drv_base.LBaaSDriver):
             'id': str(uuid.uuid4())
         }
 
+    def ensure_members(self, loadbalancer, pool, members, listener_port=None):
+        return [self.ensure_member(loadbalancer, pool, **m) for m in members]
+
 
 @mock.patch('kuryr_kubernetes.utils.get_subnets_id_cidrs',
             mock.Mock(return_value=[('id', 'cidr')]))
@@ -647,6 +651,70 @@ class TestKuryrLoadBalancerHandler(test_base.TestCase):
         self.assertEqual(member_added, False)
         m_drv_lbaas.ensure_member.assert_not_called()
 
+    def test_add_new_members(self):
+        crd = get_lb_crd()
+        crd['spec']['ports'][0]['name'] = 'http'
+        ep_slice = crd['spec']['endpointSlices'][0]
+        ep_slice['ports'][0]['name'] = 'http'
+        ep_slice['endpoints'] = [
+            {'addresses': [ip],
+             'targetRef': {'kind': 'Pod', 'name': 'pod', 'namespace': 'ns'}}
+            for ip in ('1.1.1.1', '1.1.1.2', '1.1.1.3', '1.1.1.3')]
+        crd['status']['members'] = []
+        m_handler = mock.Mock(spec=h_lb.KuryrLoadBalancerHandler)
+        m_handler._sync_lbaas_sgs.return_value = crd
+        m_handler._get_subnet_by_octavia_mode.return_value = 'subnet'
+        m_handler._get_target_info.return_value = ('pod', 'ns')
+        m_handler._patch_status.return_value = True
+        m_drv_lbaas = mock.Mock(wraps=FakeLBaaSDriver())
+        m_handler._drv_lbaas = m_drv_lbaas
+
+        changed = h_lb.KuryrLoadBalancerHandler._add_new_members(m_handler,
+                                                                 crd)
+
+        self.assertTrue(changed)
+        m_drv_lbaas.ensure_members.assert_called_once_with(
+            loadbalancer=crd['status']['loadbalancer'],
+            pool=crd['status']['pools'][0],
+            members=[{'subnet_id': 'subnet', 'ip': ip, 'port': 2,
+                      'target_ref_namespace': 'ns', 'target_ref_name': 'pod'}
+                     for ip in ('1.1.1.1', '1.1.1.2', '1.1.1.3')],
+            listener_port=1)
+        self.assertEqual(['1.1.1.1', '1.1.1.2', '1.1.1.3'],
+                         [m['ip'] for m in crd['status']['members']])
+        m_handler._patch_status.assert_called_once_with(crd)
+
+    def test_add_new_members_failed(self):
+        crd = get_lb_crd()
+        crd['spec']['ports'] = [
+            {'name': 'http', 'port': 1, 'protocol': 'TCP'},
+            {'name': 'https', 'port': 2, 'protocol': 'TCP'}]
+        crd['spec']['endpointSlices'][0]['ports'] = [
+            {'name': 'http', 'port': 8080, 'protocol': 'TCP'},
+            {'name': 'https', 'port': 8443, 'protocol': 'TCP'}]
+        crd['status']['listeners'].append(
+            dict(crd['status']['listeners'][0], id='012345678913', port=2))
+        crd['status']['pools'].append(
+            dict(crd['status']['pools'][0], id='1234567891',
+                 listener_id='012345678913'))
+        crd['status']['members'] = []
+        m_handler = mock.Mock(spec=h_lb.KuryrLoadBalancerHandler)
+        m_handler._sync_lbaas_sgs.return_value = crd
+        m_handler._get_subnet_by_octavia_mode.return_value = 'subnet'
+        m_handler._get_target_info.return_value = ('pod', 'ns')
+        m_drv_lbaas = mock.Mock(wraps=FakeLBaaSDriver())
+        member = {'id': 'member', 'pool_id': '1234567890'}
+        m_drv_lbaas.ensure_members.side_effect = [
+            [member], k_exc.ResourceNotReady(crd)]
+        m_handler._drv_lbaas = m_drv_lbaas
+
+        self.assertRaises(k_exc.ResourceNotReady,
+                          h_lb.KuryrLoadBalancerHandler._add_new_members,
+                          m_handler, crd)
+
+        self.assertEqual([member], crd['status']['members'])
+        m_handler._patch_status.assert_called_once_with(crd)
+
     @mock.patch('kuryr_kubernetes.utils.get_res_link')
     @mock.patch('kuryr_kubernetes.clients.get_kubernetes_client')
     @mock.patch('kuryr_kubernetes.controller.drivers.base'
@@ -16,9 +16,11 @@
 from unittest import mock
 
 from kuryr_kubernetes.controller.handlers import pipeline as h_pipeline
+from kuryr_kubernetes import exceptions
 from kuryr_kubernetes.handlers import dispatch as h_dis
 from kuryr_kubernetes.handlers import k8s_base as h_k8s
 from kuryr_kubernetes.tests import base as test_base
+from kuryr_kubernetes.tests.unit import kuryr_fixtures as k_fix
 
 
 class TestControllerPipeline(test_base.TestCase):
@@ -41,13 +43,30 @@ class TestControllerPipeline(test_base.TestCase):
                                           ignore_exceptions=mock.ANY)
         m_retry_type.assert_called_with(consumer, exceptions=mock.ANY)
 
+    def test_wrap_consumer_requeue(self):
+        self.useFixture(k_fix.MockK8sClient())
+        consumer = mock.Mock()
+        consumer.side_effect = exceptions.ResourceNotReady('foo')
+        m_requeue = mock.Mock()
+        event = {'type': 'DELETED', 'object': {}}
+
+        with mock.patch.object(h_dis.EventPipeline, '__init__'):
+            pipeline = h_pipeline.ControllerPipeline(mock.sentinel.tg)
+            handler = pipeline._wrap_consumer(consumer)
+
+        handler(event, requeue=m_requeue)
+
+        # The next attempt goes through the whole chain again.
+        m_requeue.assert_called_once_with(mock.ANY, handler, event,
+                                          retry_state=mock.ANY)
+
     @mock.patch('kuryr_kubernetes.handlers.logging.LogExceptions')
-    @mock.patch('kuryr_kubernetes.handlers.asynchronous.Async')
-    def test_wrap_dispatcher(self, m_async_type, m_logging_type):
+    @mock.patch('kuryr_kubernetes.handlers.workqueue.WorkQueue')
+    def test_wrap_dispatcher(self, m_queue_type, m_logging_type):
         dispatcher = mock.sentinel.dispatcher
-        async_handler = mock.sentinel.async_handler
+        queue_handler = mock.sentinel.queue_handler
         logging_handler = mock.sentinel.logging_handler
-        m_async_type.return_value = async_handler
+        m_queue_type.return_value = queue_handler
         m_logging_type.return_value = logging_handler
         thread_group = mock.sentinel.thread_group
 
@@ -56,6 +75,7 @@ class TestControllerPipeline(test_base.TestCase):
             ret = pipeline._wrap_dispatcher(dispatcher)
 
         self.assertEqual(logging_handler, ret)
-        m_logging_type.assert_called_with(async_handler)
-        m_async_type.assert_called_with(dispatcher, thread_group,
-                                        h_k8s.object_uid, h_k8s.object_info)
+        m_logging_type.assert_called_with(queue_handler)
+        m_queue_type.assert_called_with(dispatcher, thread_group,
+                                        h_k8s.object_uid, h_k8s.object_info,
+                                        workers=100)
@@ -0,0 +1,258 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from unittest import mock
+
+from kuryr.lib import constants as kl_const
+from openstack import exceptions as os_exc
+from openstack.network.v2 import network as os_network
+from openstack.network.v2 import port as os_port
+from openstack.network.v2 import subnet as os_subnet
+from oslo_config import cfg
+from oslo_utils import timeutils
+
+from kuryr_kubernetes.controller.managers import gc
+from kuryr_kubernetes import exceptions
+from kuryr_kubernetes.tests import base as test_base
+from kuryr_kubernetes.tests.unit import kuryr_fixtures as k_fix
+
+OLD = '2022-04-14T09:00:00Z'
+NEW = '2022-04-14T09:15:00Z'
+NOW = '2022-04-14T09:16:00Z'
+
+
+def get_port(port_id, network_id='net1', device_owner=kl_const.DEVICE_OWNER,
+             host='node1', tags=('foo',), updated_at=OLD):
+    return os_port.Port(id=port_id, network_id=network_id,
+                        device_owner=device_owner, binding_host_id=host,
+                        tags=list(tags), updated_at=updated_at, status='DOWN')
+
+
+@mock.patch('oslo_utils.timeutils.utcnow',
+            return_value=timeutils.parse_isotime(NOW))
+class TestNeutronSnapshot(test_base.TestCase):
+
+    def setUp(self):
+        super(TestNeutronSnapshot, self).setUp()
+        self.os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        cfg.CONF.set_override('resource_tags', ['foo'],
+                              group='neutron_defaults')
+        self.addCleanup(cfg.CONF.clear_override, 'resource_tags',
+                        group='neutron_defaults')
+
+    def test_get_ports(self, m_utcnow):
+        ports = [get_port('p1'),
+                 get_port('p2', network_id='net2'),
+                 get_port('p3', host=None),
+                 get_port('p4', device_owner='', tags=()),
+                 get_port('p5', host=None, tags=())]
+        self.os_net.ports.return_value = iter(ports)
+        snapshot = gc.NeutronSnapshot()
+
+        self.assertEqual(ports, snapshot.get_ports())
+        self.assertEqual([ports[0], ports[2], ports[4]],
+                         snapshot.get_ports(
+                             network_id='net1',
+                             device_owner=kl_const.DEVICE_OWNER))
+        self.assertEqual([ports[2]], snapshot.get_ports(bound=False,
+                                                        tagged=True))
+        self.assertEqual([ports[3]], snapshot.get_ports(device_owner=''))
+        self.assertEqual([], snapshot.get_ports(network_id='net3'))
+        self.os_net.ports.assert_called_once_with(status='DOWN')
+
+    def test_is_zombie(self, m_utcnow):
+        snapshot = gc.NeutronSnapshot()
+
+        self.assertTrue(snapshot.is_zombie(get_port('p1', updated_at=OLD)))
+        self.assertFalse(snapshot.is_zombie(get_port('p1', updated_at=NEW)))
+        self.assertTrue(snapshot.is_zombie(
+            get_port('p1', updated_at='2022-04-13T09:16:00Z')))
+
+    def test_get_networks(self, m_utcnow):
+        tagged = os_network.Network(id='net1', description='foo')
+        untagged = os_network.Network(id='net2', description='foo')
+        undescribed = os_network.Network(id='net3', description='')
+        self.os_net.networks.side_effect = [iter([tagged, undescribed]),
+                                            iter([tagged, untagged])]
+        snapshot = gc.NeutronSnapshot()
+
+        self.assertEqual([tagged, undescribed, untagged],
+                         snapshot.get_networks())
+        self.assertEqual([tagged, undescribed],
+                         snapshot.get_networks(tagged=True))
+        self.assertEqual([tagged, untagged],
+                         snapshot.get_networks(described=True))
+        self.os_net.networks.assert_has_calls([mock.call(tags=['foo']),
+                                               mock.call(description='foo')])
+        self.assertEqual(2, self.os_net.networks.call_count)
+
+    def test_get_networks_no_tags(self, m_utcnow):
+        cfg.CONF.set_override('resource_tags', [], group='neutron_defaults')
+        snapshot = gc.NeutronSnapshot()
+
+        self.assertEqual([], snapshot.get_networks())
+        self.os_net.networks.assert_not_called()
+
+    @mock.patch.object(gc, 'NETWORKS_ID_FILTER_CHUNK', 2)
+    def test_get_subnets(self, m_utcnow):
+        self.os_net.networks.side_effect = [
+            iter([os_network.Network(id='net%d' % i) for i in range(3)]),
+            iter([])]
+        subnets = [os_subnet.Subnet(id='s0', network_id='net0'),
+                   os_subnet.Subnet(id='s1', network_id='net0'),
+                   os_subnet.Subnet(id='s2', network_id='net2')]
+        self.os_net.subnets.side_effect = [iter(subnets[:2]),
+                                           iter(subnets[2:])]
+        snapshot = gc.NeutronSnapshot()
+
+        self.assertEqual(subnets[:2], snapshot.get_subnets('net0'))
+        self.assertEqual([], snapshot.get_subnets('net1'))
+        self.assertEqual(subnets, snapshot.get_subnets())
+        self.os_net.subnets.assert_has_calls([
+            mock.call(network_id=['net0', 'net1']),
+            mock.call(network_id=['net2'])])
+
+    def test_get_used_network_ids(self, m_utcnow):
+        self.os_net.ports.return_value = iter(
+            [os_port.Port(network_id='net1'), os_port.Port(network_id='net1')])
+        snapshot = gc.NeutronSnapshot()
+
+        self.assertEqual({'net1'},
+                         snapshot.get_used_network_ids(['net1', 'net2']))
+        self.assertEqual(set(), snapshot.get_used_network_ids(['net2']))
+        self.os_net.ports.assert_called_once_with(
+            network_id=mock.ANY, fields=['network_id'])
+        self.assertEqual(
+            {'net1', 'net2'},
+            set(self.os_net.ports.call_args[1]['network_id']))
+
+    def test_get_kuryrnetwork_net_ids(self, m_utcnow):
+        k8s = self.useFixture(k_fix.MockK8sClient()).client
+        k8s.get_items.return_value = iter([{'status': {'netId': 'net1'}},
+                                           {'status': {}}])
+        snapshot = gc.NeutronSnapshot()
+
+        self.assertEqual({'net1'}, snapshot.get_kuryrnetwork_net_ids())
+        self.assertEqual({'net1'}, snapshot.get_kuryrnetwork_net_ids())
+        k8s.get_items.assert_called_once()
+
+
+class TestCleanupPolicies(test_base.TestCase):
+
+    def setUp(self):
+        super(TestCleanupPolicies, self).setUp()
+        self.os_net = self.useFixture(k_fix.MockNetworkClient()).client
+        cfg.CONF.set_override('resource_tags', ['foo'],
+                              group='neutron_defaults')
+        self.addCleanup(cfg.CONF.clear_override, 'resource_tags',
+                        group='neutron_defaults')
+        self.snapshot = mock.Mock(spec=gc.NeutronSnapshot)
+        self.snapshot.tags = {'foo'}
+        self.snapshot.is_tagged.side_effect = lambda r: 'foo' in r.tags
+        self.snapshot.is_zombie.side_effect = lambda r: r.updated_at == OLD
+
+    def test_cleanup_dead_ports_no_tags(self):
+        self.snapshot.tags = set()
+
+        gc.cleanup_dead_ports(self.snapshot)
+
+        self.snapshot.get_ports.assert_not_called()
+        self.os_net.delete_port.assert_not_called()
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.delete_ports')
+    def test_cleanup_dead_ports(self, m_delete_ports):
+        dead = get_port('p1', tags=())
+        young = get_port('p2', tags=(), updated_at=NEW)
+        self.snapshot.get_kuryrnetwork_net_ids.return_value = {'net1'}
+        self.snapshot.get_ports.return_value = [dead, young]
+
+        gc.cleanup_dead_ports(self.snapshot)
+
+        self.snapshot.get_ports.assert_called_once_with(
+            network_id='net1', device_owner=kl_const.DEVICE_OWNER,
+            tagged=False)
+        m_delete_ports.assert_called_once_with([dead])
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.delete_ports')
+    def test_cleanup_dead_ports_no_networks(self, m_delete_ports):
+        self.snapshot.get_kuryrnetwork_net_ids.return_value = set()
+
+        gc.cleanup_dead_ports(self.snapshot)
+
+        self.snapshot.get_ports.assert_not_called()
+        m_delete_ports.assert_not_called()
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.utils.delete_ports')
+    def test_cleanup_dead_ports_k8s_error(self, m_delete_ports):
+        self.snapshot.get_kuryrnetwork_net_ids.side_effect = (
+            exceptions.K8sClientException)
+
+        gc.cleanup_dead_ports(self.snapshot)
+
+        m_delete_ports.assert_not_called()
+
+    def test_cleanup_dead_networks(self):
+        kuryr_net = os_network.Network(id='net1', updated_at=OLD)
+        dead_net = os_network.Network(id='net2', updated_at=OLD)
+        used_net = os_network.Network(id='net3', updated_at=OLD)
+        young_net = os_network.Network(id='net4', updated_at=NEW)
+        dead_subnet = os_subnet.Subnet(id='s1', network_id='net1', tags=[],
+                                       updated_at=OLD)
+        tagged_subnet = os_subnet.Subnet(id='s2', network_id='net1',
+                                         tags=['foo'], updated_at=OLD)
+        self.snapshot.get_kuryrnetwork_net_ids.return_value = {'net1'}
+        self.snapshot.get_networks.return_value = [kuryr_net, dead_net,
+                                                   used_net, young_net]
+        self.snapshot.get_subnets.return_value = [dead_subnet, tagged_subnet]
+        self.snapshot.get_used_network_ids.return_value = {'net1', 'net3'}
+        self.os_net.delete_subnet.side_effect = os_exc.SDKException
+
+        gc.cleanup_dead_networks(self.snapshot)
+
+        self.snapshot.get_networks.assert_called_once_with(described=True)
+        self.snapshot.get_subnets.assert_called_once_with('net1')
+        self.os_net.delete_subnet.assert_called_once_with(dead_subnet)
+        self.snapshot.get_used_network_ids.assert_called_once_with(
+            ['net1', 'net2', 'net3'])
+        self.os_net.delete_network.assert_called_once_with(dead_net)
+
+    def test_cleanup_dead_networks_no_tags(self):
+        self.snapshot.tags = set()
+
+        gc.cleanup_dead_networks(self.snapshot)
+
+        self.snapshot.get_networks.assert_not_called()
+        self.os_net.delete_network.assert_not_called()
+
+
+class TestGarbageCollector(test_base.TestCase):
+
+    @mock.patch.object(gc, 'NeutronSnapshot')
+    def test_run(self, m_snapshot):
+        collector = gc.GarbageCollector()
+        collector._policies = []
+        failing = mock.Mock(side_effect=Exception)
+        policy = mock.Mock()
+        collector.register(failing)
+        collector.register(policy)
+
+        collector.run()
+
+        m_snapshot.assert_called_once_with()
+        failing.assert_called_once_with(m_snapshot.return_value)
+        policy.assert_called_once_with(m_snapshot.return_value)
+
+    def test_default_policies(self):
+        collector = gc.GarbageCollector()
+
+        self.assertEqual([gc.cleanup_dead_ports, gc.cleanup_dead_networks],
+                         collector._policies)
@@ -80,14 +80,18 @@ class TestRequestHandler(test_base.TestCase):
             mock.patch.object(self._req_handler,
                               '_list_pools') as m_list,\
             mock.patch.object(self._req_handler,
-                              '_show_pool') as m_show:
+                              '_show_pool') as m_show,\
+            mock.patch.object(self._req_handler,
+                              '_list_pool_sizes') as m_sizes:
             m_read.return_value = body
             if trigger_exception:
                 m_list.side_effect = Exception
                 m_show.side_effect = Exception
+                m_sizes.side_effect = Exception
             else:
                 m_list.return_value = method_resp
                 m_show.return_value = method_resp
+                m_sizes.return_value = method_resp
 
             with mock.patch.object(self._req_handler,
                                    'send_header') as m_send_header,\
@@ -99,6 +103,8 @@ class TestRequestHandler(test_base.TestCase):
 
                 if method == 'list':
                     m_list.assert_called_once()
+                if method == 'sizes':
+                    m_sizes.assert_called_once()
                 if method == 'show':
                     if pool_key and len(pool_key) == 3:
                         m_show.assert_called_once_with(
@@ -353,3 +359,232 @@ class TestRequestHandler(test_base.TestCase):
 
         self._do_GET_helper(method, method_resp, path, headers, body,
                             expected_resp, trigger_exception)
+
+    def test_do_GET_sizes(self):
+        method = 'sizes'
+        method_resp = ('["10.0.0.6", "9d2b45c4efaa478481c30340b49fd4d2", '
+                       '"c5bd8f48-1d77-4a86-9c1b-f8ff1f5b3d28"] '
+                       'has 4 ports, target is 12 (12 ports recently '
+                       'requested)')
+
+        path = "http://localhost/poolSizes"
+        body = jsonutils.dumps({})
+        headers = {'Content-Type': 'application/json', 'Connection': 'close'}
+        headers['Content-Length'] = len(body)
+        trigger_exception = False
+
+        expected_resp = ('Pool sizes:\n{0}'.format(method_resp)).encode()
+
+        self._do_GET_helper(method, method_resp, path, headers, body,
+                            expected_resp, trigger_exception)
+
+    def test_do_GET_sizes_exception(self):
+        method = 'sizes'
+        method_resp = ''
+
+        path = "http://localhost/poolSizes"
+        body = jsonutils.dumps({})
+        headers = {'Content-Type': 'application/json', 'Connection': 'close'}
+        headers['Content-Length'] = len(body)
+        trigger_exception = True
+
+        expected_resp = ('Error listing the pool sizes.').encode()
+
+        self._do_GET_helper(method, method_resp, path, headers, body,
+                            expected_resp, trigger_exception)
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.base.VIFPoolDriver.'
+                'get_instance')
+    @mock.patch('kuryr_kubernetes.controller.drivers.base.PodVIFDriver.'
+                'get_instance')
+    def test__list_pool_sizes(self, m_get_vif, m_get_pool):
+        m_get_pool.return_value.list_pool_sizes.return_value = {
+            ('node', 'project', 'net1'): {'size': 4, 'target': 12,
+                                          'demand': 12},
+            ('node', 'project', 'net2'): {'size': 5, 'target': 5,
+                                          'demand': None}}
+
+        self.assertEqual(
+            '["node", "project", "net1"] has 4 ports, target is 12 (12 '
+            'ports recently requested)\n'
+            '["node", "project", "net2"] has 5 ports, target is 5\n',
+            self._req_handler._list_pool_sizes())
+
+    def _do_json_request(self, do_request, path, body):
+        self._req_handler.headers = {'Content-Type': 'application/json',
+                                     'Content-Length': len(body)}
+        self._req_handler.path = path
+        self._req_handler.rfile.read.return_value = body
+
+        with mock.patch.object(self._req_handler,
+                               'send_response') as m_send_response,\
+            mock.patch.object(self._req_handler, 'send_header'),\
+                mock.patch.object(self._req_handler, 'end_headers'):
+            do_request()
+
+        self._req_handler.wfile.write.assert_called_once()
+        response = self._req_handler.wfile.write.call_args[0][0]
+        return m_send_response.call_args[0][0], jsonutils.loads(response)
+
+    @mock.patch.object(m_pool.PoolJobs, 'get_instance')
+    def test_do_POST_populate_async(self, m_get_jobs):
+        trunk_ips = ["10.0.0.6"]
+        m_get_jobs.return_value.start.return_value = {'id': 'job1'}
+        body = jsonutils.dumps({"trunks": trunk_ips, "num_ports": 3,
+                                "async": True})
+
+        with mock.patch.object(self._req_handler,
+                               '_create_subports') as m_create:
+            code, response = self._do_json_request(
+                self._req_handler.do_POST, "http://localhost/populatePool",
+                body)
+
+        self.assertEqual(202, code)
+        self.assertEqual({'job': {'id': 'job1'}}, response)
+        m_get_jobs.return_value.start.assert_called_once_with(
+            'populate', {'trunks': trunk_ips, 'num_ports': 3}, m_create, 3,
+            trunk_ips)
+        m_create.assert_not_called()
+
+    @mock.patch.object(m_pool.PoolJobs, 'get_instance')
+    def test_do_POST_free_async(self, m_get_jobs):
+        m_get_jobs.return_value.start.return_value = {'id': 'job1'}
+        body = jsonutils.dumps({"async": True})
+
+        with mock.patch.object(self._req_handler,
+                               '_delete_subports') as m_delete:
+            code, response = self._do_json_request(
+                self._req_handler.do_POST, "http://localhost/freePool", body)
+
+        self.assertEqual(202, code)
+        self.assertEqual({'job': {'id': 'job1'}}, response)
+        m_get_jobs.return_value.start.assert_called_once_with(
+            'free', {'trunks': None}, m_delete, None)
+        m_delete.assert_not_called()
+
+    @mock.patch.object(m_pool.PoolJobs, 'get_instance')
+    def test_do_GET_stats(self, m_get_jobs):
+        stats = [{'pool_key': ['node', 'project', 'net'], 'size': 4}]
+        m_get_jobs.return_value.list.return_value = [{'id': 'job1'}]
+
+        with mock.patch.object(self._req_handler, '_list_pools_stats',
+                               return_value=stats):
+            code, response = self._do_json_request(
+                self._req_handler.do_GET, "http://localhost/poolStats", '')
+
+        self.assertEqual(200, code)
+        self.assertEqual({'pools': stats, 'jobs': [{'id': 'job1'}]},
+                         response)
+        m_get_jobs.return_value.list.assert_called_once_with(
+            running_only=True)
+
+    def test_do_GET_stats_exception(self):
+        with mock.patch.object(self._req_handler, '_list_pools_stats',
+                               side_effect=Exception):
+            code, response = self._do_json_request(
+                self._req_handler.do_GET, "http://localhost/poolStats", '')
+
+        self.assertEqual(500, code)
+        self.assertIn('error', response)
+
+    @mock.patch.object(m_pool.PoolJobs, 'get_instance')
+    def test_do_GET_jobs(self, m_get_jobs):
+        m_get_jobs.return_value.list.return_value = [{'id': 'job1'}]
+
+        code, response = self._do_json_request(
+            self._req_handler.do_GET, "http://localhost/poolJobs", '{}')
+
+        self.assertEqual(200, code)
+        self.assertEqual({'jobs': [{'id': 'job1'}]}, response)
+
+    @mock.patch.object(m_pool.PoolJobs, 'get_instance')
+    def test_do_GET_job(self, m_get_jobs):
+        m_get_jobs.return_value.get.return_value = {'id': 'job1'}
+
+        code, response = self._do_json_request(
+            self._req_handler.do_GET, "http://localhost/poolJobs",
+            jsonutils.dumps({'job_id': 'job1'}))
+
+        self.assertEqual(200, code)
+        self.assertEqual({'job': {'id': 'job1'}}, response)
+        m_get_jobs.return_value.get.assert_called_once_with('job1')
+
+    @mock.patch.object(m_pool.PoolJobs, 'get_instance')
+    def test_do_GET_job_not_found(self, m_get_jobs):
+        m_get_jobs.return_value.get.return_value = None
+
+        code, response = self._do_json_request(
+            self._req_handler.do_GET, "http://localhost/poolJobs",
+            jsonutils.dumps({'job_id': 'job1'}))
+
+        self.assertEqual(404, code)
+        self.assertIn('error', response)
+
+    @mock.patch('kuryr_kubernetes.controller.drivers.base.VIFPoolDriver.'
+                'get_instance')
+    @mock.patch('kuryr_kubernetes.controller.drivers.base.PodVIFDriver.'
+                'get_instance')
+    def test__list_pools_stats(self, m_get_vif, m_get_pool):
+        m_get_pool.return_value.list_pools_stats.return_value = {
+            ('node', 'project', 'net'): {'size': 4, 'target': 12}}
+
+        self.assertEqual(
+            [{'pool_key': ('node', 'project', 'net'), 'size': 4,
+              'target': 12}],
+            self._req_handler._list_pools_stats())
+
+
+@mock.patch('threading.Thread')
+class TestPoolJobs(test_base.TestCase):
+
+    def setUp(self):
+        super(TestPoolJobs, self).setUp()
+        self.jobs = m_pool.PoolJobs()
+
+    def _run_jobs(self, m_thread):
+        for call in m_thread.call_args_list:
+            call[1]['target'](*call[1]['args'])
+
+    def test_start(self, m_thread):
+        func = mock.Mock()
+
+        job = self.jobs.start('populate', {'num_ports': 3}, func, 3)
+
+        self.assertEqual(m_pool.JOB_RUNNING, job['status'])
+        self.assertEqual('populate', job['action'])
+        self.assertEqual({'num_ports': 3}, job['params'])
+        m_thread.return_value.start.assert_called_once_with()
+        func.assert_not_called()
+        self.assertEqual([job], self.jobs.list(running_only=True))
+
+        self._run_jobs(m_thread)
+
+        func.assert_called_once_with(3)
+        job = self.jobs.get(job['id'])
+        self.assertEqual(m_pool.JOB_SUCCEEDED, job['status'])
+        self.assertIsNone(job['error'])
+        self.assertIsNotNone(job['finished_at'])
+        self.assertEqual([], self.jobs.list(running_only=True))
+
+    def test_start_failed(self, m_thread):
+        func = mock.Mock(side_effect=Exception('boom'))
+
+        job = self.jobs.start('free', {'trunks': None}, func, None)
+        self._run_jobs(m_thread)
+
+        job = self.jobs.get(job['id'])
+        self.assertEqual(m_pool.JOB_FAILED, job['status'])
+        self.assertEqual('boom', job['error'])
+
+    def test_get_unknown(self, m_thread):
+        self.assertIsNone(self.jobs.get('job1'))
+
+    @mock.patch.object(m_pool, 'MAX_FINISHED_JOBS', 2)
+    def test_prune(self, m_thread):
+        running = self.jobs.start('populate', {}, mock.Mock())
+        m_thread.reset_mock()
+        jobs = [self.jobs.start('free', {}, mock.Mock()) for _i in range(3)]
+        self._run_jobs(m_thread)
+
+        self.assertEqual([running['id'], jobs[1]['id'], jobs[2]['id']],
+                         [job['id'] for job in self.jobs.list()])
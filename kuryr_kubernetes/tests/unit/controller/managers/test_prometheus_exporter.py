@@ -184,3 +184,30 @@ class TestControllerPrometheusExporter(base.TestCase):
         self.srv.lbs_state.labels().state.assert_not_called()
         self.srv.lbs_members_count.labels.assert_not_called()
         self.srv.lbs_members_count.labels().set.assert_not_called()
+
+    def test_record_pool_size(self):
+        self.srv.pool_size = mock.MagicMock(spec=prometheus_client.Gauge)
+        self.srv.pool_target_size = mock.MagicMock(
+            spec=prometheus_client.Gauge)
+        self.srv._get_pool_labels = self.cls._get_pool_labels
+        labels = {'host': 'node', 'project_id': 'project',
+                  'network_id': 'net'}
+
+        self.cls.record_pool_size(self.srv, ('node', 'project', 'net'), 4,
+                                  12)
+
+        self.srv.pool_size.labels.assert_called_once_with(**labels)
+        self.srv.pool_size.labels().set.assert_called_once_with(4)
+        self.srv.pool_target_size.labels.assert_called_once_with(**labels)
+        self.srv.pool_target_size.labels().set.assert_called_once_with(12)
+
+    def test_remove_pool_size(self):
+        self.srv.pool_size = mock.MagicMock(spec=prometheus_client.Gauge)
+        self.srv.pool_target_size = mock.MagicMock(
+            spec=prometheus_client.Gauge)
+        self.srv.pool_target_size.remove.side_effect = KeyError
+
+        self.cls.remove_pool_size(self.srv, ('node', 'project', 'net'))
+
+        self.srv.pool_size.remove.assert_called_once_with(
+            'node', 'project', 'net')
@@ -63,3 +63,21 @@ class TestLoggingHandler(test_base.TestCase):
 
         m_handler.assert_called_once_with(mock.sentinel.event)
         m_log.exception.assert_not_called()
+
+    def test_requeue(self):
+        m_handler = mock.Mock()
+        m_requeue = mock.Mock()
+        other = mock.Mock()
+        handler = h_log.LogExceptions(m_handler)
+
+        def handle(event, requeue):
+            requeue(5, m_handler, event, foo='bar')
+            requeue(5, other, event)
+
+        m_handler.side_effect = handle
+
+        handler(mock.sentinel.event, requeue=m_requeue)
+
+        m_requeue.assert_has_calls([
+            mock.call(5, handler, mock.sentinel.event, foo='bar'),
+            mock.call(5, other, mock.sentinel.event)])
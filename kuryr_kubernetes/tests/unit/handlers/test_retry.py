@@ -16,10 +16,12 @@
 from unittest import mock
 
 import fixtures
+from oslo_config import cfg
 import time
 
 from kuryr_kubernetes import exceptions
 from kuryr_kubernetes.handlers import retry as h_retry
+from kuryr_kubernetes import informer
 from kuryr_kubernetes.tests import base as test_base
 from kuryr_kubernetes.tests.unit import kuryr_fixtures as k_fix
 
@@ -50,6 +52,11 @@ class TestRetryHandler(test_base.TestCase):
             'kuryr_kubernetes.clients.get_kubernetes_client'))
         f_k8s.mock.return_value = self.k8s
 
+        f_exporter = self.useFixture(fixtures.MockPatch(
+            'kuryr_kubernetes.controller.managers.prometheus_exporter.'
+            'ControllerPrometheusExporter.get_instance'))
+        self.exporter = f_exporter.mock.return_value
+
     @mock.patch('time.sleep')
     def test_should_not_sleep(self, m_sleep):
         deadline = self.now - 1
@@ -101,8 +108,11 @@ class TestRetryHandler(test_base.TestCase):
     @mock.patch('itertools.count')
     @mock.patch.object(h_retry.Retry, '_sleep')
     def test_call_outdated_event(self, m_sleep, m_count):
+        cfg.CONF.set_override('use_object_cache', False, group='kubernetes')
+        self.addCleanup(cfg.CONF.clear_override, 'use_object_cache',
+                        group='kubernetes')
         m_handler = mock.Mock()
-        m_count.return_value = list(range(1, 5))
+        m_count.return_value = list(range(2, 5))
         self_link = '/api/v1/namespaces/ns1/services/srv1'
         obj = {'apiVersion': 'v1',
                'kind': 'Service',
@@ -112,11 +122,60 @@ class TestRetryHandler(test_base.TestCase):
         self.k8s.get.side_effect = exceptions.K8sResourceNotFound(obj)
 
         retry = h_retry.Retry(m_handler)
-        retry(event)
+        retry(event, retry_state=(2, self.now, self.now + 10))
 
         self.k8s.get.assert_called_once_with(self_link)
         m_handler.assert_not_called()
         m_sleep.assert_not_called()
+        self.exporter.record_avoided_existence_check.assert_not_called()
+
+    def _get_service_event(self):
+        obj = {'apiVersion': 'v1',
+               'kind': 'Service',
+               'metadata': {'name': 'srv1',
+                            'namespace': 'ns1'}}
+        return {'type': 'MODIFIED', 'object': obj}
+
+    def test_call_first_attempt(self):
+        m_handler = mock.Mock()
+        event = self._get_service_event()
+
+        retry = h_retry.Retry(m_handler)
+        retry(event)
+
+        self.k8s.get.assert_not_called()
+        m_handler.assert_called_once_with(event, retry_info=mock.ANY)
+        self.exporter.record_avoided_existence_check.assert_called_once_with()
+
+    def _test_call_cached(self, cached):
+        m_handler = mock.Mock()
+        event = self._get_service_event()
+        cfg.CONF.set_override('use_object_cache', True, group='kubernetes')
+        self.addCleanup(cfg.CONF.clear_override, 'use_object_cache',
+                        group='kubernetes')
+        store = informer.ObjectStore()
+        items = [event['object']] if cached else []
+        store.replace('/api/v1/services', [{'kind': 'ServiceList',
+                                            'items': items}])
+        retry = h_retry.Retry(m_handler)
+
+        with mock.patch.object(informer.ObjectStore, 'get_instance',
+                               return_value=store):
+            retry(event, retry_state=(2, self.now, self.now + 10))
+
+        self.k8s.get.assert_not_called()
+        self.exporter.record_avoided_existence_check.assert_called_once_with()
+        return m_handler
+
+    def test_call_cached(self):
+        m_handler = self._test_call_cached(True)
+
+        m_handler.assert_called_once()
+
+    def test_call_cached_deleted(self):
+        m_handler = self._test_call_cached(False)
+
+        m_handler.assert_not_called()
 
     @mock.patch('itertools.count')
     @mock.patch.object(h_retry.Retry, '_sleep')
@@ -140,6 +199,49 @@ class TestRetryHandler(test_base.TestCase):
             mock.call(deadline, i + 1, failures[i])
             for i in range(len(failures))])
 
+    @mock.patch('random.randint', mock.Mock(return_value=0))
+    @mock.patch('time.sleep')
+    def test_call_requeue(self, m_sleep):
+        timeout = 10
+        deadline = self.now + timeout
+        failure = _EX1()
+        event = {'type': 'DELETED'}
+        m_handler = mock.Mock()
+        m_handler.side_effect = failure
+        m_requeue = mock.Mock()
+        retry = h_retry.Retry(m_handler, timeout=timeout, exceptions=_EX1)
+
+        retry(event, mock.sentinel.arg, requeue=m_requeue, foo='bar')
+
+        m_handler.assert_called_once_with(event, mock.sentinel.arg,
+                                          retry_info=mock.ANY, foo='bar')
+        m_requeue.assert_called_once_with(
+            2, retry, event, mock.sentinel.arg,
+            retry_state=(2, self.now, deadline), foo='bar')
+        m_sleep.assert_not_called()
+
+    @mock.patch('time.sleep')
+    def test_call_requeued(self, m_sleep):
+        start_time = self.now - 5
+        deadline = start_time + 10
+        event = {'type': 'DELETED'}
+        m_handler = mock.Mock()
+        m_handler.side_effect = _EX1()
+        m_requeue = mock.Mock()
+        retry = h_retry.Retry(m_handler, timeout=10, exceptions=_EX1)
+
+        with mock.patch.object(retry, '_requeue') as m_retry_requeue:
+            m_retry_requeue.return_value = 0
+            self.assertRaises(_EX1, retry, event, requeue=m_requeue,
+                              retry_state=(3, start_time, deadline))
+            m_retry_requeue.assert_called_once_with(
+                m_requeue, event, (), {}, start_time, deadline, 3,
+                m_handler.side_effect)
+
+        m_handler.assert_called_once_with(event, retry_info={'elapsed': 5})
+        m_requeue.assert_not_called()
+        m_sleep.assert_not_called()
+
     @mock.patch('itertools.count')
     @mock.patch.object(h_retry.Retry, '_sleep')
     def test_call_retry_raises(self, m_sleep, m_count):
@@ -161,3 +263,15 @@ class TestRetryHandler(test_base.TestCase):
         m_sleep.assert_has_calls([
             mock.call(deadline, i + 1, failures[i])
             for i in range(len(failures))])
+
+    @mock.patch.object(informer.HandledVersions, 'get_instance')
+    def test_call_raises_forgets_version(self, m_get_instance):
+        obj = {'metadata': {'uid': 'uid', 'resourceVersion': '5'}}
+        event = {'type': 'MODIFIED', 'object': obj}
+        m_handler = mock.Mock()
+        m_handler.side_effect = _EX2()
+        retry = h_retry.Retry(m_handler, exceptions=_EX1)
+
+        self.assertRaises(_EX2, retry, event)
+
+        m_get_instance.return_value.forget.assert_called_once_with(obj)
@@ -0,0 +1,234 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from unittest import mock
+
+from kuryr_kubernetes.handlers import workqueue as h_workqueue
+from kuryr_kubernetes import informer
+from kuryr_kubernetes.tests import base as test_base
+
+
+def _get_event(uid, version='1'):
+    return {'type': 'MODIFIED', 'object': {'uid': uid, 'version': version}}
+
+
+class TestWorkQueue(test_base.TestCase):
+    def setUp(self):
+        super(TestWorkQueue, self).setUp()
+        self.handler = mock.Mock()
+        self.tg = mock.Mock()
+        self.queue = h_workqueue.WorkQueue(
+            self.handler, self.tg, lambda e: e['object']['uid'],
+            lambda e: e['object'], workers=2)
+
+    def _run_workers(self):
+        for call in self.tg.add_thread.call_args_list:
+            call[0][0]()
+        self.tg.add_thread.reset_mock()
+
+    def test_call(self):
+        event = _get_event('a')
+
+        self.queue(event, mock.sentinel.arg, kw=mock.sentinel.kw)
+
+        self.handler.assert_not_called()
+        self.tg.add_thread.assert_called_once_with(self.queue._run)
+        self._run_workers()
+        self.handler.assert_called_once_with(
+            event, mock.sentinel.arg, requeue=mock.ANY, kw=mock.sentinel.kw)
+        self.assertEqual(0, self.queue._workers)
+
+    def test_call_coalesce(self):
+        event1 = _get_event('a', '1')
+        event2 = _get_event('a', '2')
+        event3 = _get_event('b')
+
+        self.queue(event1)
+        self.queue(event2)
+        self.queue(event3)
+        self._run_workers()
+
+        self.handler.assert_has_calls([
+            mock.call(event2, requeue=mock.ANY),
+            mock.call(event3, requeue=mock.ANY)])
+        self.assertEqual(2, self.handler.call_count)
+
+    def test_call_max_workers(self):
+        for uid in 'abc':
+            self.queue(_get_event(uid))
+
+        self.assertEqual(2, self.tg.add_thread.call_count)
+        self._run_workers()
+        self.assertEqual(3, self.handler.call_count)
+
+    def test_call_injected(self):
+        event1 = _get_event('a', '1')
+        event2 = _get_event('a', '2')
+
+        self.queue(event1)
+        self.queue(event2, injected=True)
+        self._run_workers()
+
+        self.handler.assert_called_once_with(event1, requeue=mock.ANY)
+
+    def test_call_injected_while_processing(self):
+        self.addCleanup(setattr, informer.HandledVersions, 'instance', None)
+        versions = informer.HandledVersions.get_instance()
+        event1 = {'type': 'MODIFIED', 'object': {
+            'metadata': {'uid': 'a', 'resourceVersion': '5'}}}
+        event2 = {'type': 'MODIFIED', 'object': {
+            'metadata': {'uid': 'a', 'resourceVersion': '6'}}}
+        queue = h_workqueue.WorkQueue(
+            self.handler, self.tg, lambda e: e['object']['metadata']['uid'],
+            lambda e: e['object'], workers=2)
+
+        def handle(event, requeue):
+            # Reconciliation finds a newer version while this one is handled.
+            versions.record('/path', event2)
+            queue(event2, injected=True)
+
+        self.handler.side_effect = handle
+        versions.record('/path', event1)
+        queue(event1)
+        self._run_workers()
+
+        self.handler.assert_called_once_with(event1, requeue=mock.ANY)
+        self.assertFalse(versions.is_handled('/path', event2['object']))
+
+    def test_call_while_processing(self):
+        event1 = _get_event('a', '1')
+        event2 = _get_event('a', '2')
+
+        def handle(event, requeue):
+            if event is event1:
+                self.queue(event2)
+                self.assertFalse(self.queue._ready)
+
+        self.handler.side_effect = handle
+
+        self.queue(event1)
+        self._run_workers()
+
+        self.handler.assert_has_calls([
+            mock.call(event1, requeue=mock.ANY),
+            mock.call(event2, requeue=mock.ANY)])
+
+    def test_run_handler_failed(self):
+        self.handler.side_effect = [Exception(), None]
+
+        self.queue(_get_event('a'))
+        self.queue(_get_event('b'))
+        self._run_workers()
+
+        self.assertEqual(2, self.handler.call_count)
+        self.assertEqual(set(), self.queue._processing)
+
+    @mock.patch('time.monotonic', return_value=100)
+    @mock.patch('eventlet.spawn_after')
+    def test_requeue(self, m_spawn_after, m_monotonic):
+        event = _get_event('a')
+        handler = mock.Mock()
+
+        def handle(event, requeue):
+            requeue(5, handler, event, retry=True)
+
+        self.handler.side_effect = handle
+        self.queue(event)
+        self._run_workers()
+
+        m_spawn_after.assert_called_once_with(5, self.queue._pop_due)
+        handler.assert_not_called()
+
+        m_monotonic.return_value = 105
+        self.queue._pop_due()
+        self._run_workers()
+
+        handler.assert_called_once_with(event, requeue=mock.ANY, retry=True)
+        self.assertEqual({}, self.queue._requeued)
+        self.assertEqual([], self.queue._delayed)
+
+    @mock.patch('time.monotonic', return_value=100)
+    @mock.patch('eventlet.spawn_after')
+    def test_requeue_several_handlers(self, m_spawn_after, m_monotonic):
+        event = _get_event('a')
+        handler1 = mock.Mock()
+        handler2 = mock.Mock()
+
+        def handle(event, requeue):
+            requeue(5, handler1, event)
+            requeue(5, handler2, event)
+
+        self.handler.side_effect = handle
+        self.queue(event)
+        self._run_workers()
+        m_monotonic.return_value = 105
+        self.queue._pop_due()
+        self._run_workers()
+
+        handler1.assert_called_once_with(event, requeue=mock.ANY)
+        handler2.assert_called_once_with(event, requeue=mock.ANY)
+        self.assertEqual({}, self.queue._requeued)
+
+    @mock.patch('time.monotonic', return_value=100)
+    @mock.patch('eventlet.spawn_after')
+    def test_requeue_same_handler(self, m_spawn_after, m_monotonic):
+        event1 = _get_event('a', '1')
+        event2 = _get_event('a', '2')
+        handler = mock.Mock()
+
+        self.queue._requeue('a', 5, handler, event1)
+        self.queue._requeue('a', 5, handler, event2)
+        m_monotonic.return_value = 105
+        self.queue._pop_due()
+        self._run_workers()
+
+        handler.assert_called_once_with(event2, requeue=mock.ANY)
+
+    @mock.patch('time.monotonic', return_value=100)
+    @mock.patch('eventlet.spawn_after')
+    def test_requeue_earlier(self, m_spawn_after, m_monotonic):
+        self.queue._requeue('a', 10, mock.Mock(), _get_event('a'))
+        self.queue._requeue('b', 20, mock.Mock(), _get_event('b'))
+        m_spawn_after.return_value.cancel.assert_not_called()
+
+        self.queue._requeue('c', 5, mock.Mock(), _get_event('c'))
+
+        m_spawn_after.return_value.cancel.assert_called_once_with()
+        self.assertEqual([mock.call(10, self.queue._pop_due),
+                          mock.call(5, self.queue._pop_due)],
+                         m_spawn_after.call_args_list)
+
+    @mock.patch('time.monotonic', return_value=100)
+    @mock.patch('eventlet.spawn_after')
+    def test_requeue_superseded(self, m_spawn_after, m_monotonic):
+        event1 = _get_event('a', '1')
+        event2 = _get_event('a', '2')
+        handler = mock.Mock()
+
+        self.queue._requeue('a', 5, handler, event1)
+        self.queue(event2)
+        self._run_workers()
+        m_monotonic.return_value = 105
+        self.queue._pop_due()
+        self._run_workers()
+
+        handler.assert_not_called()
+        self.handler.assert_called_once_with(event2, requeue=mock.ANY)
+
+    @mock.patch('eventlet.spawn_after')
+    def test_requeue_newer_queued(self, m_spawn_after):
+        self.queue(_get_event('a', '2'))
+
+        self.queue._requeue('a', 5, mock.Mock(), _get_event('a', '1'))
+
+        m_spawn_after.assert_not_called()
+        self.assertEqual({}, self.queue._requeued)
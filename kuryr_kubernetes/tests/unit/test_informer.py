@@ -0,0 +1,290 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from unittest import mock
+
+from oslo_config import cfg
+
+from kuryr_kubernetes import informer
+from kuryr_kubernetes.tests import base as test_base
+
+
+def get_pod(name, namespace='default', version='1', labels=None, ip=None,
+            node=None):
+    pod = {'kind': 'Pod',
+           'apiVersion': 'v1',
+           'metadata': {'name': name,
+                        'namespace': namespace,
+                        'resourceVersion': version},
+           'spec': {},
+           'status': {}}
+    if labels:
+        pod['metadata']['labels'] = labels
+    if ip:
+        pod['status']['podIP'] = ip
+    if node:
+        pod['spec']['nodeName'] = node
+    return pod
+
+
+def get_names(objs):
+    return sorted(o['metadata']['name'] for o in objs)
+
+
+class TestObjectStore(test_base.TestCase):
+    def setUp(self):
+        super(TestObjectStore, self).setUp()
+        self.store = informer.ObjectStore()
+
+    def test_update(self):
+        pod = get_pod('pod1')
+        self.store.update({'type': 'ADDED', 'object': pod})
+
+        self.assertEqual(pod, self.store.get('Pod', 'pod1', 'default'))
+        self.assertIsNone(self.store.get('Pod', 'pod1', 'other'))
+        self.assertIsNone(self.store.get('Pod', 'pod2', 'default'))
+
+    def test_update_deleted(self):
+        pod = get_pod('pod1')
+        self.store.update({'type': 'ADDED', 'object': pod})
+        self.store.update({'type': 'DELETED', 'object': pod})
+
+        self.assertIsNone(self.store.get('Pod', 'pod1', 'default'))
+
+    def test_update_stale(self):
+        self.store.update({'type': 'MODIFIED',
+                           'object': get_pod('pod1', version='5')})
+        self.store.update({'type': 'MODIFIED',
+                           'object': get_pod('pod1', version='4')})
+
+        pod = self.store.get('Pod', 'pod1', 'default')
+        self.assertEqual('5', pod['metadata']['resourceVersion'])
+
+    def test_update_unknown_object(self):
+        self.store.update({'type': 'ERROR', 'object': {'code': 410}})
+
+        self.assertEqual({}, self.store._objects)
+
+    def test_get_copy(self):
+        pod = get_pod('pod1')
+        self.store.update({'type': 'ADDED', 'object': pod})
+
+        pod['metadata']['labels'] = {'foo': 'bar'}
+        cached = self.store.get('Pod', 'pod1', 'default')
+        cached['metadata']['name'] = 'pod2'
+
+        self.assertEqual(get_pod('pod1'),
+                         self.store.get('Pod', 'pod1', 'default'))
+
+    def test_list_not_synced(self):
+        self.store.update({'type': 'ADDED', 'object': get_pod('pod1')})
+
+        self.assertFalse(self.store.is_synced('Pod'))
+        self.assertIsNone(self.store.list('Pod'))
+
+    def test_replace(self):
+        self.store.update({'type': 'ADDED', 'object': get_pod('pod1')})
+        self.store.update({'type': 'ADDED',
+                           'object': get_pod('pod2', version='7')})
+        response = {'kind': 'PodList',
+                    'items': [get_pod('pod2', version='6'),
+                              get_pod('pod3', 'other')]}
+
+        self.store.replace('/api/v1/pods', [response])
+
+        self.assertTrue(self.store.is_synced('Pod'))
+        self.assertIsNone(self.store.get('Pod', 'pod1', 'default'))
+        self.assertEqual('7', self.store.get(
+            'Pod', 'pod2', 'default')['metadata']['resourceVersion'])
+        self.assertEqual(2, len(self.store.list('Pod')))
+        self.assertEqual([get_pod('pod3', 'other')],
+                         self.store.list('Pod', 'other'))
+
+    def test_replace_events(self):
+        self.store.update({'type': 'ADDED', 'object': get_pod('pod1')})
+        self.store.update({'type': 'ADDED', 'object': get_pod('pod2')})
+        self.store.update({'type': 'ADDED',
+                           'object': get_pod('pod3', version='7')})
+        response = {'kind': 'PodList',
+                    'items': [get_pod('pod2', version='2'),
+                              get_pod('pod3', version='6'),
+                              get_pod('pod4')]}
+
+        events, resource_version = self.store.replace('/api/v1/pods',
+                                                      [response])
+
+        self.assertEqual(
+            [{'type': 'MODIFIED', 'object': get_pod('pod2', version='2')},
+             {'type': 'ADDED', 'object': get_pod('pod4')},
+             {'type': 'DELETED', 'object': get_pod('pod1')}],
+            events)
+        self.assertIsNone(resource_version)
+
+    def test_replace_pages(self):
+        self.store.update({'type': 'ADDED', 'object': get_pod('pod1')})
+        pages = [{'kind': 'PodList', 'items': [get_pod('pod2')],
+                  'metadata': {'continue': 'x', 'resourceVersion': '5'}},
+                 {'kind': 'PodList', 'items': [get_pod('pod3')],
+                  'metadata': {'resourceVersion': '5'}}]
+
+        events, resource_version = self.store.replace('/api/v1/pods',
+                                                      iter(pages))
+
+        self.assertEqual(
+            [{'type': 'ADDED', 'object': get_pod('pod2')},
+             {'type': 'ADDED', 'object': get_pod('pod3')},
+             {'type': 'DELETED', 'object': get_pod('pod1')}],
+            events)
+        self.assertEqual('5', resource_version)
+        self.assertEqual([get_pod('pod2'), get_pod('pod3')],
+                         self.store.list('Pod'))
+
+    def test_replace_no_pages(self):
+        self.store.update({'type': 'ADDED', 'object': get_pod('pod1')})
+
+        events, resource_version = self.store.replace('/api/v1/pods', [])
+
+        self.assertEqual([], events)
+        self.assertIsNone(resource_version)
+        self.assertFalse(self.store.is_synced('Pod'))
+        self.assertEqual(get_pod('pod1'),
+                         self.store.get('Pod', 'pod1', 'default'))
+
+    def test_replace_empty(self):
+        self.store.replace('/api/v1/pods', [{'kind': 'PodList',
+                                             'items': None}])
+
+        self.assertEqual([], self.store.list('Pod'))
+
+    def test_invalidate(self):
+        self.store.replace('/api/v1/pods', [{'kind': 'PodList',
+                                             'items': [get_pod('pod1')]}])
+
+        self.store.invalidate('/api/v1/pods')
+
+        self.assertFalse(self.store.is_synced('Pod'))
+        self.assertIsNone(self.store.get('Pod', 'pod1', 'default'))
+
+    def _sync_pods(self, pods):
+        self.store.replace('/api/v1/pods', [{'kind': 'PodList',
+                                             'items': pods}])
+
+    def test_list_labels(self):
+        self._sync_pods([get_pod('pod1', labels={'app': 'a', 'tier': 'db'}),
+                         get_pod('pod2', labels={'app': 'b', 'tier': 'db'}),
+                         get_pod('pod3', labels={'app': 'c'}),
+                         get_pod('pod4', 'other', labels={'app': 'a'})])
+
+        self.assertEqual(['pod1', 'pod4'], get_names(
+            self.store.list('Pod', labels={'app': {'a'}})))
+        self.assertEqual(['pod1'], get_names(
+            self.store.list('Pod', 'default', labels={'app': {'a'}})))
+        self.assertEqual(['pod1', 'pod2'], get_names(
+            self.store.list('Pod', labels={'app': {'a', 'b'}},
+                            label_keys={'tier'})))
+        self.assertEqual([], self.store.list('Pod', labels={'app': {'d'}}))
+
+    def test_list_fields(self):
+        self._sync_pods([get_pod('pod1', ip='10.0.0.1', node='node1'),
+                         get_pod('pod2', ip='10.0.0.2', node='node1')])
+
+        self.assertEqual(['pod2'], get_names(
+            self.store.list('Pod', podIP='10.0.0.2')))
+        self.assertEqual(['pod1', 'pod2'], get_names(
+            self.store.list('Pod', nodeName='node1')))
+        self.assertEqual([], self.store.list('Pod', nodeName='node2'))
+
+    def test_list_reindexed_on_update(self):
+        self._sync_pods([get_pod('pod1', labels={'app': 'a'},
+                                 ip='10.0.0.1')])
+
+        self.store.update({'type': 'MODIFIED',
+                           'object': get_pod('pod1', version='2',
+                                             labels={'app': 'b'},
+                                             ip='10.0.0.2')})
+
+        self.assertEqual([], self.store.list('Pod', labels={'app': {'a'}}))
+        self.assertEqual([], self.store.list('Pod', podIP='10.0.0.1'))
+        self.assertEqual(['pod1'], get_names(
+            self.store.list('Pod', labels={'app': {'b'}},
+                            podIP='10.0.0.2')))
+
+        self.store.update({'type': 'DELETED',
+                           'object': get_pod('pod1', version='2')})
+
+        self.assertEqual([], self.store.list('Pod', labels={'app': {'b'}}))
+        self.assertEqual({}, self.store._indexes['Pod'].labels)
+
+    @mock.patch.object(informer.ObjectStore, 'get_instance')
+    def test_get_object_disabled(self, m_get_instance):
+        cfg.CONF.set_override('use_object_cache', False, group='kubernetes')
+        self.addCleanup(cfg.CONF.clear_override, 'use_object_cache',
+                        group='kubernetes')
+
+        self.assertIsNone(informer.get_object('Pod', 'pod1', 'default'))
+        self.assertIsNone(informer.list_objects('Pod'))
+        m_get_instance.assert_not_called()
+
+
+class TestHandledVersions(test_base.TestCase):
+    def setUp(self):
+        super(TestHandledVersions, self).setUp()
+        self.versions = informer.HandledVersions()
+        self.path = '/api/v1/pods'
+
+    def _get_pod(self, uid, version):
+        pod = get_pod(uid, version=version)
+        pod['metadata']['uid'] = uid
+        return pod
+
+    def test_is_handled(self):
+        self.versions.record(self.path, {'type': 'MODIFIED',
+                                         'object': self._get_pod('a', '5')})
+
+        self.assertTrue(self.versions.is_handled(self.path,
+                                                 self._get_pod('a', '5')))
+        self.assertTrue(self.versions.is_handled(self.path,
+                                                 self._get_pod('a', '4')))
+        self.assertFalse(self.versions.is_handled(self.path,
+                                                  self._get_pod('a', '6')))
+        self.assertFalse(self.versions.is_handled(self.path,
+                                                  self._get_pod('b', '5')))
+        self.assertFalse(self.versions.is_handled('/other',
+                                                  self._get_pod('a', '5')))
+
+    def test_record_deleted(self):
+        pod = self._get_pod('a', '5')
+        self.versions.record(self.path, {'type': 'ADDED', 'object': pod})
+        self.versions.record(self.path, {'type': 'DELETED', 'object': pod})
+
+        self.assertFalse(self.versions.is_handled(self.path, pod))
+
+    def test_forget(self):
+        self.versions.record(self.path, {'type': 'MODIFIED',
+                                         'object': self._get_pod('a', '5')})
+
+        self.versions.forget(self._get_pod('a', '4'))
+        self.assertTrue(self.versions.is_handled(self.path,
+                                                 self._get_pod('a', '5')))
+
+        self.versions.forget(self._get_pod('a', '5'))
+        self.assertFalse(self.versions.is_handled(self.path,
+                                                  self._get_pod('a', '5')))
+
+    def test_prune(self):
+        for uid in 'ab':
+            self.versions.record(self.path, {
+                'type': 'MODIFIED', 'object': self._get_pod(uid, '5')})
+
+        self.versions.prune(self.path, {'b'})
+
+        self.assertEqual({'b': 5}, self.versions._versions[self.path])
@@ -146,6 +146,43 @@ class TestK8sClient(test_base.TestCase):
         self.assertDictEqual(res, self.client.get(path))
         m_get.assert_called_once_with(self.base_url + path, headers=None)
 
+    @mock.patch('kuryr_kubernetes.k8s_client.K8sClient.get')
+    def test_get_paginated(self, m_get):
+        path = '/test?labelSelector=app%3Dfoo'
+        pages = [{'kind': 'PodList', 'metadata': {'continue': 'a b'},
+                  'items': [{'name': 'pod1'}]},
+                 {'kind': 'PodList', 'metadata': {},
+                  'items': [{'name': 'pod2'}]}]
+        m_get.side_effect = pages
+
+        self.assertEqual(pages, list(self.client.get_paginated(path, 1)))
+        self.assertEqual([mock.call(path + '&limit=1'),
+                          mock.call(path + '&limit=1&continue=a+b')],
+                         m_get.call_args_list)
+
+    @mock.patch('kuryr_kubernetes.k8s_client.K8sClient.get')
+    def test_get_paginated_unlimited(self, m_get):
+        path = '/test'
+        page = {'kind': 'PodList', 'metadata': {'continue': 'a'},
+                'items': []}
+        m_get.return_value = page
+
+        self.assertEqual([page], list(self.client.get_paginated(path, 0)))
+        m_get.assert_called_once_with(path)
+
+    @mock.patch('kuryr_kubernetes.k8s_client.K8sClient.get')
+    def test_get_items(self, m_get):
+        path = '/test'
+        m_get.side_effect = [
+            {'kind': 'PodList', 'metadata': {'continue': 'a'},
+             'items': [{'name': 'pod1'}, {'name': 'pod2'}]},
+            {'kind': 'PodList', 'metadata': {}, 'items': [{'name': 'pod3'}]}]
+
+        self.assertEqual([{'name': 'pod1'}, {'name': 'pod2'},
+                          {'name': 'pod3'}],
+                         list(self.client.get_items(path)))
+        m_get.assert_called_with(path + '?limit=500&continue=a')
+
     @mock.patch('requests.sessions.Session.get')
     def test_get_exception(self, m_get):
         path = '/test'
@@ -375,7 +412,8 @@ class TestK8sClient(test_base.TestCase):
         self.assertEqual(cycles, m_get.call_count)
         self.assertEqual(cycles, m_resp.close.call_count)
         m_get.assert_called_with(self.base_url + path, stream=True,
-                                 params={'watch': 'true'})
+                                 params={'watch': 'true',
+                                         'allowWatchBookmarks': 'true'})
 
     @mock.patch('requests.sessions.Session.get')
     def test_watch_restart(self, m_get):
@@ -396,10 +434,83 @@ class TestK8sClient(test_base.TestCase):
         self.assertEqual(3, m_get.call_count)
         self.assertEqual(3, m_resp.close.call_count)
         m_get.assert_any_call(
-            self.base_url + path, stream=True, params={"watch": "true"})
+            self.base_url + path, stream=True,
+            params={"watch": "true", "allowWatchBookmarks": "true"})
         m_get.assert_any_call(
-            self.base_url + path, stream=True, params={"watch": "true",
-                                                       "resourceVersion": 2})
+            self.base_url + path, stream=True,
+            params={"watch": "true", "allowWatchBookmarks": "true",
+                    "resourceVersion": 2})
+
+    @mock.patch('requests.sessions.Session.get')
+    def test_watch_bookmark(self, m_get):
+        path = '/test'
+        event = {'type': 'ADDED',
+                 'object': {'metadata': {'name': 'obj',
+                                         'resourceVersion': '1'}}}
+        bookmark = {'type': 'BOOKMARK',
+                    'object': {'metadata': {'resourceVersion': '7'}}}
+        lines = [jsonutils.dump_as_bytes(i) for i in (event, bookmark)]
+        on_resume = mock.Mock()
+
+        m_resp = mock.MagicMock()
+        m_resp.ok = True
+        m_resp.iter_lines.side_effect = [lines, [], lines]
+        m_get.return_value = m_resp
+
+        self.assertEqual([event, event], list(itertools.islice(
+            self.client.watch(path, on_resume=on_resume), 2)))
+        m_get.assert_called_with(
+            self.base_url + path, stream=True,
+            params={"watch": "true", "allowWatchBookmarks": "true",
+                    "resourceVersion": "7"})
+        self.assertEqual(2, on_resume.call_count)
+
+    @mock.patch('requests.sessions.Session.get')
+    def test_watch_resource_version(self, m_get):
+        path = '/test'
+        on_resume = mock.Mock()
+
+        m_resp = mock.MagicMock()
+        m_resp.ok = True
+        m_resp.iter_lines.return_value = [jsonutils.dump_as_bytes(
+            {'type': 'ADDED', 'object': {}})]
+        m_get.return_value = m_resp
+
+        next(self.client.watch(path, resource_version='5',
+                               on_resume=on_resume))
+
+        m_get.assert_called_once_with(
+            self.base_url + path, stream=True,
+            params={"watch": "true", "allowWatchBookmarks": "true",
+                    "resourceVersion": "5"})
+        on_resume.assert_not_called()
+
+    @mock.patch('requests.sessions.Session.get')
+    def test_watch_gone(self, m_get):
+        path = '/test'
+
+        m_resp = mock.MagicMock()
+        m_resp.status_code = 410
+        m_get.return_value = m_resp
+
+        self.assertRaises(exc.K8sWatchExpired, next,
+                          self.client.watch(path, resource_version='1'))
+
+    @mock.patch('requests.sessions.Session.get')
+    def test_watch_expired_event(self, m_get):
+        path = '/test'
+        error = {'type': 'ERROR',
+                 'object': {'kind': 'Status', 'code': 410,
+                            'message': 'too old resource version'}}
+
+        m_resp = mock.MagicMock()
+        m_resp.ok = True
+        m_resp.iter_lines.return_value = [jsonutils.dump_as_bytes(error)]
+        m_get.return_value = m_resp
+
+        self.assertRaises(exc.K8sWatchExpired, next,
+                          self.client.watch(path, resource_version='1'))
+        self.assertEqual(1, m_get.call_count)
 
     @mock.patch('requests.sessions.Session.get')
     def test_watch_exception(self, m_get):
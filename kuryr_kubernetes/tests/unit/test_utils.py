@@ -20,7 +20,6 @@ from openstack.network.v2 import port as os_port
 from openstack.network.v2 import subnet as os_subnet
 from os_vif import objects
 from oslo_config import cfg
-from oslo_utils import timeutils
 
 from kuryr_kubernetes import constants as k_const
 from kuryr_kubernetes import exceptions as k_exc
@@ -496,75 +495,6 @@ class TestUtils(test_base.TestCase):
         self.assertTrue(utils.is_pod_completed({'status': {'phase':
                         k_const.K8S_POD_STATUS_FAILED}}))
 
-    @mock.patch('kuryr_kubernetes.clients.get_network_client')
-    def test_cleanup_dead_ports_no_tags(self, m_get_net):
-        utils.cleanup_dead_ports()
-        m_get_net.assert_not_called()
-
-    @mock.patch('oslo_utils.timeutils.utcnow')
-    @mock.patch('kuryr_kubernetes.clients.get_network_client')
-    @mock.patch('kuryr_kubernetes.clients.get_kubernetes_client')
-    def test_cleanup_dead_ports(self, m_get_k8s, m_get_net, m_utcnow):
-        cfg.CONF.set_override('resource_tags', ['foo'],
-                              group='neutron_defaults')
-        m_net = mock.Mock()
-        time1 = '2022-04-14T09:00:00Z'
-        now = '2022-04-14T09:00:00Z'
-        m_utcnow.return_value = timeutils.parse_isotime(now)
-        port = os_port.Port(updated_at=time1, tags=['foo'])
-        m_net.ports.return_value = iter((port,))
-        m_get_net.return_value = m_net
-
-        m_k8s = mock.Mock()
-        m_k8s.get.return_value = {'items': [{'status': {'netId': 'netid'}}]}
-        m_get_k8s.return_value = m_k8s
-
-        utils.cleanup_dead_ports()
-
-        m_get_net.assert_called_once()
-
-    @mock.patch('oslo_utils.timeutils.utcnow')
-    @mock.patch('kuryr_kubernetes.clients.get_network_client')
-    @mock.patch('kuryr_kubernetes.clients.get_kubernetes_client')
-    def test_cleanup_dead_no_tagged_ports(self, m_get_k8s, m_get_net,
-                                          m_utcnow):
-        cfg.CONF.set_override('resource_tags', ['foo'],
-                              group='neutron_defaults')
-        m_net = mock.Mock()
-        time1 = '2022-04-14T09:00:00Z'
-        now = '2022-04-14T09:16:00Z'
-        m_utcnow.return_value = timeutils.parse_isotime(now)
-        port = os_port.Port(updated_at=time1, tags=[])
-        m_net.ports.return_value = iter((port,))
-        m_get_net.return_value = m_net
-
-        m_k8s = mock.Mock()
-        m_k8s.get.return_value = {'items': [{'status': {'netId': 'netid'}}]}
-        m_get_k8s.return_value = m_k8s
-
-        utils.cleanup_dead_ports()
-
-        m_get_net.assert_called_once()
-        m_net.delete_port.assert_called_once_with(port)
-
-    @mock.patch('kuryr_kubernetes.clients.get_network_client')
-    @mock.patch('kuryr_kubernetes.clients.get_kubernetes_client')
-    def test_cleanup_dead_no_networks(self, m_get_k8s, m_get_net):
-        cfg.CONF.set_override('resource_tags', ['foo'],
-                              group='neutron_defaults')
-        m_net = mock.Mock()
-        m_net.ports.return_value = iter([])
-        m_get_net.return_value = m_net
-
-        m_k8s = mock.Mock()
-        m_k8s.get.return_value = {'items': []}
-        m_get_k8s.return_value = m_k8s
-
-        utils.cleanup_dead_ports()
-
-        m_get_net.assert_called_once()
-        m_net.delete_port.assert_not_called()
-
     def test__get_parent_port_ip(self):
         os_net = self.useFixture(k_fix.MockNetworkClient()).client
 
@@ -575,3 +505,29 @@ class TestUtils(test_base.TestCase):
         os_net.get_port.return_value = port_obj
 
         self.assertEqual(ip_address, utils.get_parent_port_ip(port_id))
+
+    @mock.patch('kuryr_kubernetes.informer.list_objects')
+    def test_get_pod_by_ip_cached(self, m_list_objects):
+        k8s = self.useFixture(k_fix.MockK8sClient()).client
+        pending = {'metadata': {'name': 'pod1'},
+                   'status': {'phase': 'Pending'}}
+        running = {'metadata': {'name': 'pod2'},
+                   'status': {'phase': 'Running'}}
+        m_list_objects.return_value = [pending, running]
+
+        self.assertEqual(running, utils.get_pod_by_ip('10.0.0.1', 'default'))
+        m_list_objects.assert_called_once_with('Pod', 'default',
+                                               podIP='10.0.0.1')
+        k8s.get.assert_not_called()
+
+    @mock.patch('kuryr_kubernetes.informer.list_objects')
+    def test_get_pod_by_ip_not_cached(self, m_list_objects):
+        k8s = self.useFixture(k_fix.MockK8sClient()).client
+        pod = {'metadata': {'name': 'pod1'}, 'status': {'phase': 'Running'}}
+        k8s.get.return_value = {'items': [pod]}
+        m_list_objects.return_value = None
+
+        self.assertEqual(pod, utils.get_pod_by_ip('10.0.0.1'))
+        k8s.get.assert_called_once_with(
+            f'{k_const.K8S_API_BASE}/pods?fieldSelector=status.phase=Running,'
+            f'status.podIP=10.0.0.1')
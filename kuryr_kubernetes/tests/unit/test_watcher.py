@@ -16,8 +16,11 @@
 from eventlet import greenlet
 from unittest import mock
 
+from kuryr_kubernetes import exceptions as k_exc
+from kuryr_kubernetes import informer
 from kuryr_kubernetes.tests import base as test_base
 from kuryr_kubernetes.tests.unit import kuryr_fixtures
+from kuryr_kubernetes import utils
 from kuryr_kubernetes import watcher
 from requests import exceptions
 
@@ -205,7 +208,7 @@ class TestWatcher(test_base.TestCase):
         m_th.kill.assert_not_called()
 
     def _test_watch_mock_events(self, watcher_obj, events):
-        def client_watch(client_path):
+        def client_watch(client_path, *args, **kwargs):
             for e in events:
                 self.assertTrue(watcher_obj._idle[client_path])
                 yield e
@@ -335,6 +338,142 @@ class TestWatcher(test_base.TestCase):
         m_handler.assert_has_calls([mock.call(e) for e in events])
         m_sys_exit.assert_called_once_with(1)
 
+    @mock.patch('sys.exit')
+    def test_watch_store(self, m_sys_exit):
+        path = '/test'
+        events = [{'type': 'ADDED', 'object': {'e': i}} for i in range(3)]
+        listed = {'type': 'ADDED', 'object': {'e': 'listed'}}
+        m_handler = mock.Mock()
+        m_store = mock.Mock()
+        m_store.replace.return_value = ([listed], '42')
+        m_exporter = mock.Mock()
+        watcher_obj = self._test_watch_create_watcher(path, m_handler)
+        watcher_obj._store = m_store
+        watcher_obj._exporter = m_exporter
+        self._test_watch_mock_events(watcher_obj, events)
+        pages = self.client.get_paginated.return_value
+
+        watcher_obj._watch(path)
+
+        self.client.get_paginated.assert_called_once_with(path)
+        m_store.replace.assert_called_once_with(path, pages)
+        self.client.watch.assert_called_once_with(
+            path, resource_version='42', on_resume=mock.ANY)
+        m_store.update.assert_has_calls([mock.call(e) for e in events])
+        m_handler.assert_has_calls([mock.call(listed)] +
+                                   [mock.call(e) for e in events])
+        m_exporter.record_watch_relist.assert_called_once_with(path)
+
+        self.client.watch.call_args[1]['on_resume']()
+        m_exporter.record_watch_resume.assert_called_once_with(path)
+
+    @mock.patch('sys.exit')
+    def test_watch_store_expired(self, m_sys_exit):
+        path = '/test'
+        event = {'type': 'ADDED', 'object': {'e': 0}}
+        deleted = {'type': 'DELETED', 'object': {'e': 1}}
+        m_handler = mock.Mock()
+        m_store = mock.Mock()
+        m_store.replace.side_effect = [([], '1'), ([deleted], '5')]
+        watcher_obj = self._test_watch_create_watcher(path, m_handler)
+        watcher_obj._store = m_store
+
+        def client_watch(client_path, resource_version, on_resume):
+            if resource_version == '1':
+                raise k_exc.K8sWatchExpired('Gone')
+            yield event
+        self.client.watch.side_effect = client_watch
+
+        with mock.patch.object(utils, 'exponential_sleep') as m_sleep:
+            watcher_obj._watch(path)
+
+        m_sleep.assert_not_called()
+        m_store.invalidate.assert_not_called()
+        self.assertEqual(2, self.client.get_paginated.call_count)
+        self.assertEqual([mock.call(path, resource_version='1',
+                                    on_resume=mock.ANY),
+                          mock.call(path, resource_version='5',
+                                    on_resume=mock.ANY)],
+                         self.client.watch.call_args_list)
+        self.assertEqual([mock.call(deleted), mock.call(event)],
+                         m_handler.call_args_list)
+
+    def test_reconcile_store(self):
+        path = '/test'
+        m_handler = mock.Mock()
+        store = informer.ObjectStore()
+        watcher_obj = watcher.Watcher(m_handler, store=store)
+
+        def pod(name, version):
+            return {'kind': 'Pod',
+                    'metadata': {'name': name, 'namespace': 'ns',
+                                 'resourceVersion': str(version)}}
+        store.replace(path, [{'kind': 'PodList', 'items': [pod('a', 1)]}])
+
+        def get_items(items_path):
+            # First page, then the watch sees a pod added and the listed
+            # one deleted, before the second page, listed before both.
+            yield pod('a', 1)
+            store.update({'type': 'ADDED', 'object': pod('b', 3)})
+            store.update({'type': 'DELETED', 'object': pod('a', 4)})
+        self.client.get_items.side_effect = get_items
+
+        watcher_obj._reconcile(path)
+
+        self.assertIsNone(store.get('Pod', 'a', 'ns'))
+        self.assertEqual(pod('b', 3), store.get('Pod', 'b', 'ns'))
+        self.assertEqual([pod('b', 3)], store.list('Pod', namespace='ns'))
+        m_handler.assert_called_once_with(
+            {'type': 'MODIFIED', 'object': pod('a', 1)}, injected=True)
+
+    def test_reconcile(self):
+        path = '/test'
+        m_handler = mock.Mock()
+        watcher_obj = watcher.Watcher(m_handler)
+        self.client.get_items.return_value = iter([{'e': 0}])
+
+        watcher_obj._reconcile(path)
+
+        self.client.get_items.assert_called_once_with(path)
+        self.client.get.assert_not_called()
+        m_handler.assert_called_once_with(
+            {'type': 'MODIFIED', 'object': {'e': 0}}, injected=True)
+
+    def test_reconcile_versions(self):
+        path = '/test'
+        m_handler = mock.Mock()
+        m_versions = mock.Mock()
+        m_versions.is_handled.side_effect = [True, False]
+        watcher_obj = watcher.Watcher(m_handler, versions=m_versions)
+        resources = [{'metadata': {'uid': 'a', 'resourceVersion': '1'}},
+                     {'metadata': {'uid': 'b', 'resourceVersion': '2'}}]
+        self.client.get_items.return_value = iter(resources)
+
+        watcher_obj._reconcile(path)
+
+        event = {'type': 'MODIFIED', 'object': resources[1]}
+        m_handler.assert_called_once_with(event, injected=True)
+        m_versions.record.assert_called_once_with(path, event)
+        m_versions.prune.assert_called_once_with(path, {'a', 'b'})
+
+    def test_reconcile_versions_failed(self):
+        path = '/test'
+        m_versions = mock.Mock()
+        watcher_obj = watcher.Watcher(mock.Mock(), versions=m_versions)
+        self.client.get_items.side_effect = k_exc.K8sClientException()
+
+        watcher_obj._reconcile(path)
+
+        m_versions.prune.assert_not_called()
+
+    def test_stop_clears_store(self):
+        m_store = mock.Mock()
+        watcher_obj = watcher.Watcher(mock.Mock(), store=m_store)
+
+        watcher_obj.stop()
+
+        m_store.clear.assert_called_once_with()
+
     def test_watch_restart(self):
         tg = mock.Mock()
         w = watcher.Watcher(lambda e: None, tg)
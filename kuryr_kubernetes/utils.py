@@ -20,18 +20,17 @@ import time
 import requests
 
 from kuryr.lib._i18n import _
-from kuryr.lib import constants as kl_const
 from openstack import exceptions as os_exc
 from os_vif import objects
 from oslo_cache import core as cache
 from oslo_config import cfg
 from oslo_log import log
 from oslo_serialization import jsonutils
-from oslo_utils import timeutils
 
 from kuryr_kubernetes import clients
 from kuryr_kubernetes import constants
 from kuryr_kubernetes import exceptions
+from kuryr_kubernetes import informer
 from kuryr_kubernetes.objects import lbaas as obj_lbaas
 from kuryr_kubernetes.objects import vif
 from kuryr_kubernetes import os_vif_util
@@ -51,7 +50,6 @@ DEFAULT_INTERVAL = 1
 DEFAULT_JITTER = 3
 MAX_BACKOFF = 60
 MAX_ATTEMPTS = 10
-ZOMBIE_AGE = 600
 
 
 subnet_caching_opts = [
@@ -205,16 +203,16 @@ def check_suitable_multi_pool_driver_opt(pool_driver, pod_driver):
     return pod_driver in VALID_MULTI_POD_POOLS_OPTS.get(pool_driver, [])
 
 
-def exponential_sleep(deadline, attempt, interval=DEFAULT_INTERVAL,
+def exponential_delay(deadline, attempt, interval=DEFAULT_INTERVAL,
                       max_backoff=MAX_BACKOFF, jitter=DEFAULT_JITTER):
-    """Sleep for exponential duration.
-
-    :param deadline: sleep timeout duration in seconds.
-    :param attempt: attempt count of sleep function.
-    :param interval: minimal time interval to sleep
-    :param max_backoff: maximum time to sleep
-    :param jitter: max value of jitter added to the sleep time
-    :return: the actual time that we've slept
+    """Calculate exponential delay of the next attempt.
+
+    :param deadline: timeout of the attempts, as a time.time() timestamp
+    :param attempt: attempt count
+    :param interval: minimal delay
+    :param max_backoff: maximum delay
+    :param jitter: max value of jitter added to the delay
+    :return: the delay in seconds or 0 if the deadline has passed
     """
     now = time.time()
     seconds_left = deadline - now
@@ -222,16 +220,33 @@ def exponential_sleep(deadline, attempt, interval=DEFAULT_INTERVAL,
     if seconds_left <= 0:
         return 0
 
-    to_sleep = exponential_backoff(attempt, interval, max_backoff=max_backoff,
-                                   jitter=jitter)
+    delay = exponential_backoff(attempt, interval, max_backoff=max_backoff,
+                                jitter=jitter)
+
+    if delay > seconds_left:
+        delay = seconds_left
+
+    if delay < interval:
+        delay = interval
+
+    return delay
 
-    if to_sleep > seconds_left:
-        to_sleep = seconds_left
 
-    if to_sleep < interval:
-        to_sleep = interval
+def exponential_sleep(deadline, attempt, interval=DEFAULT_INTERVAL,
+                      max_backoff=MAX_BACKOFF, jitter=DEFAULT_JITTER):
+    """Sleep for exponential duration.
 
-    time.sleep(to_sleep)
+    :param deadline: sleep timeout duration in seconds.
+    :param attempt: attempt count of sleep function.
+    :param interval: minimal time interval to sleep
+    :param max_backoff: maximum time to sleep
+    :param jitter: max value of jitter added to the sleep time
+    :return: the actual time that we've slept
+    """
+    to_sleep = exponential_delay(deadline, attempt, interval,
+                                 max_backoff=max_backoff, jitter=jitter)
+    if to_sleep:
+        time.sleep(to_sleep)
     return to_sleep
 
 
@@ -573,6 +588,14 @@ def clean_lb_crd_status(loadbalancer_name):
 
 
 def get_pod_by_ip(pod_ip, namespace=None):
+    # NOTE: The podIP index of the controller cache answers this in O(1), the
+    #       fieldSelector LIST below is only sent when the cache misses.
+    pods = informer.list_objects(constants.K8S_OBJ_POD, namespace,
+                                 podIP=pod_ip) or []
+    for pod in pods:
+        if pod['status'].get('phase') == constants.K8S_POD_STATUS_RUNNING:
+            return pod
+
     k8s = clients.get_kubernetes_client()
     pod = {}
     try:
@@ -629,6 +652,11 @@ def get_subnet_by_ip(nodes_subnets, target_ip):
 
 
 def get_kuryrloadbalancer(name, namespace):
+    klb = informer.get_object(constants.K8S_OBJ_KURYRLOADBALANCER, name,
+                              namespace)
+    if klb:
+        return klb
+
     k8s = clients.get_kubernetes_client()
     try:
         return k8s.get(f'{constants.K8S_API_CRD_NAMESPACES}/'
@@ -715,99 +743,6 @@ def get_referenced_object(obj, kind):
                   kind, get_res_unique_name(obj))
 
 
-def cleanup_dead_ports():
-    tags = set(CONF.neutron_defaults.resource_tags)
-    if not tags:
-        # NOTE(gryf): there is no reliable way for removing kuryr-related
-        # ports if there are no tags enabled - without tags there is a chance,
-        # that ports are down, created by someone/something else and would
-        # be deleted.
-        # Perhaps a be better idea to would be to have some mark in other
-        # field during port creation to identify "our" ports.
-        return
-
-    os_net = clients.get_network_client()
-    k8s = clients.get_kubernetes_client()
-
-    try:
-        crds = k8s.get(constants.K8S_API_CRD_KURYRNETWORKS)
-    except exceptions.K8sClientException as ex:
-        LOG.exception('Error fetching KuryrNetworks: %s', ex)
-        return
-
-    for item in crds['items']:
-        network_id = item.get('status', {}).get('netId')
-        if not network_id:
-            continue
-
-        for port in os_net.ports(status='DOWN', network_id=network_id,
-                                 device_owner=kl_const.DEVICE_OWNER,
-                                 not_tags=list(tags)):
-            now = timeutils.utcnow(True)
-            port_time = timeutils.parse_isotime(port.updated_at)
-            # NOTE(gryf): if port hanging more than 10 minutes already in DOWN
-            # state, consider it as a dead one.
-            if (now - port_time).seconds > ZOMBIE_AGE:
-                try:
-                    os_net.delete_port(port)
-                except os_exc.SDKException as ex:
-                    LOG.warning('There was an issue with port "%s" '
-                                'removal: %s', port, ex)
-
-
-def cleanup_dead_networks():
-    """Cleanup all the dead networks and subnets without ports"""
-
-    tags = set(CONF.neutron_defaults.resource_tags)
-    if not tags:
-        return
-
-    os_net = clients.get_network_client()
-    k8s = clients.get_kubernetes_client()
-
-    desc = ",".join(CONF.neutron_defaults.resource_tags)
-
-    try:
-        crds = k8s.get(constants.K8S_API_CRD_KURYRNETWORKS)
-    except exceptions.K8sClientException as ex:
-        LOG.exception('Error fetching KuryrNetworks: %s', ex)
-        return
-
-    kuryr_net_ids = [i['status']['netId'] for i in crds['items']
-                     if i.get('status', {}).get('netId')]
-
-    for net in os_net.networks(description=desc):
-
-        if net.id in kuryr_net_ids:
-            # Find out, if there are more subnets than expected, which suppose
-            # to not have tags.
-            for subnet in os_net.subnets(network_id=net.id,
-                                         not_tags=list(tags)):
-                now = timeutils.utcnow(True)
-                subnet_time = timeutils.parse_isotime(subnet.updated_at)
-                if (now - subnet_time).seconds > ZOMBIE_AGE:
-                    try:
-                        os_net.delete_subnet(subnet)
-                    except os_exc.SDKException as ex:
-                        LOG.warning('There was an issue with removing subnet '
-                                    '"%s": %s', subnet, ex)
-                        continue
-
-        if len(list(os_net.ports(network_id=net.id))) > 0:
-            continue
-
-        now = timeutils.utcnow(True)
-        net_time = timeutils.parse_isotime(net.updated_at)
-        # NOTE(gryf): if network hanging more than 10 minutes consider it as a
-        # orphaned.
-        if (now - net_time).seconds > ZOMBIE_AGE:
-            try:
-                os_net.delete_network(net)
-            except os_exc.SDKException as ex:
-                LOG.warning('There was an issue with network "%s" '
-                            'removal: %s', net, ex)
-
-
 def get_parent_port_id(vif_obj):
     os_net = clients.get_network_client()
     tags = []
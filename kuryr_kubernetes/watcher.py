@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import sys
 import time
 
@@ -58,7 +59,8 @@ class Watcher(health.HealthHandler):
     graceful=False)` for asynchronous `Watcher`).
     """
 
-    def __init__(self, handler, thread_group=None, timeout=None):
+    def __init__(self, handler, thread_group=None, timeout=None, store=None,
+                 exporter=None, versions=None):
         """Initializes a new Watcher instance.
 
         :param handler: a `callable` object to be invoked for each observed
@@ -72,6 +74,20 @@ class Watcher(health.HealthHandler):
                              asynchronously. If `thread_group` is not
                              specified, the `Watcher` will operate in a
                              synchronous mode.
+        :param store: a `kuryr_kubernetes.informer.ObjectStore` object to be
+                      kept up to date with the watched K8s resources. If
+                      `store` is specified, a full list of each resource is
+                      fetched into it before the watch is started and the
+                      watch is started from the resourceVersion of the list.
+                      When the watch expires, the resource is listed again
+                      and only the differences from the store are handled.
+        :param exporter: a `ControllerPrometheusExporter` object used to
+                         record watch resumes and relists.
+        :param versions: a `kuryr_kubernetes.informer.HandledVersions`
+                         object to record the versions of the objects
+                         passed to `handler` in. If `versions` is specified,
+                         reconciliation only injects the objects that are
+                         not recorded in their listed version.
         """
         super(Watcher, self).__init__()
         self._client = clients.get_kubernetes_client()
@@ -82,6 +98,9 @@ class Watcher(health.HealthHandler):
         self._watching = {}
         self._timers = {}
         self._idle = {}
+        self._store = store
+        self._exporter = exporter
+        self._versions = versions
 
         if timeout is None:
             timeout = CONF.kubernetes.watch_retry_timeout
@@ -133,28 +152,46 @@ class Watcher(health.HealthHandler):
         self._running = False
         for path in list(self._watching):
             self._stop_watch(path)
+        if self._store:
+            self._store.clear()
+        if self._versions:
+            self._versions.clear()
 
     def _reconcile(self, path):
         LOG.debug(f'Getting {path} for reconciliation.')
         try:
-            response = self._client.get(path)
-            resources = response['items']
+            # NOTE: The resources are streamed, so that the whole collection
+            # is never held in memory at once. They are not put into the
+            # store, as the watch runs concurrently and the list would take
+            # it back in time, only the watch and _relist feed it.
+            resources = self._client.get_items(path)
+            uids = set()
+            count = injected = 0
+            for resource in resources:
+                count += 1
+                if self._versions:
+                    uids.add(resource['metadata'].get('uid'))
+                    if self._versions.is_handled(path, resource):
+                        continue
+                event = {
+                    'type': 'MODIFIED',
+                    'object': resource,
+                }
+                self._handle(path, event, injected=True)
+                injected += 1
         except exceptions.K8sClientException:
             LOG.exception(f'Error getting path when reconciling.')
             return
 
-        # NOTE(gryf): For some resources (like pods) we could observe that
-        # 'items' is set to None. I'm not sure if that's a K8s issue, since
-        # accroding to the documentation is should be list.
-        if not resources:
-            return
+        if self._versions:
+            self._versions.prune(path, uids)
+        LOG.debug('Reconciled %s, injected %d out of %d objects.', path,
+                  injected, count)
 
-        for resource in resources:
-            event = {
-                'type': 'MODIFIED',
-                'object': resource,
-            }
-            self._handler(event, injected=True)
+    def _handle(self, path, event, **kwargs):
+        if self._versions:
+            self._versions.record(path, event)
+        self._handler(event, **kwargs)
 
     def _start_watch(self, path):
         tg = self._thread_group
@@ -184,6 +221,10 @@ class Watcher(health.HealthHandler):
                     self._timers.pop(path, None)
                 self._watching.pop(path, None)
                 self._idle.pop(path, None)
+                if self._store:
+                    self._store.invalidate(path)
+                if self._versions:
+                    self._versions.clear(path)
 
     def _graceful_watch_exit(self, path):
         try:
@@ -200,6 +241,25 @@ class Watcher(health.HealthHandler):
                 LOG.info("No remaining active watchers, Exiting...")
                 sys.exit(1)
 
+    def _relist(self, path):
+        """Syncs the store with a full list and handles what has changed.
+
+        :returns: resourceVersion of the list, to start watching from
+        """
+        events, resource_version = self._store.replace(
+            path, self._client.get_paginated(path))
+        for event in events:
+            self._idle[path] = False
+            self._handle(path, event)
+            self._idle[path] = True
+        if self._exporter:
+            self._exporter.record_watch_relist(path)
+        return resource_version
+
+    def _on_resume(self, path):
+        if self._exporter:
+            self._exporter.record_watch_resume(path)
+
     def _watch(self, path):
         attempts = 0
         deadline = 0
@@ -215,18 +275,33 @@ class Watcher(health.HealthHandler):
                     self._alive = False
                     return
 
+                resource_version = None
+                if self._store:
+                    resource_version = self._relist(path)
+
                 LOG.info("Started watching '%s'", path)
-                for event in self._client.watch(path):
+                for event in self._client.watch(
+                        path, resource_version=resource_version,
+                        on_resume=functools.partial(self._on_resume, path)):
                     # NOTE(esevan): Watcher retries watching for
                     # `self._timeout` duration with exponential backoff
                     # algorithm to tolerate against temporal exception such as
                     # temporal disconnection to the k8s api server.
                     attempts = 0
                     self._idle[path] = False
-                    self._handler(event)
+                    if self._store:
+                        self._store.update(event)
+                    self._handle(path, event)
                     self._idle[path] = True
                     if not (self._running and path in self._resources):
                         return
+            except exceptions.K8sWatchExpired:
+                # NOTE: The watch can't be resumed, but this is expected
+                # and does not count as a failure. The next iteration lists
+                # the resource once and handles only what changed since.
+                LOG.info("Watch of '%s' expired, relisting it.", path)
+                retry = True
+                self._idle[path] = True
             except Exception:
                 LOG.exception("Caught exception while watching.")
                 LOG.warning("Restarting(%s) watching '%s'.",
@@ -234,6 +309,10 @@ class Watcher(health.HealthHandler):
                 attempts += 1
                 retry = True
                 self._idle[path] = True
+                if self._store:
+                    # Events might get lost until the watch is restarted,
+                    # don't serve lookups from a stale cache in the meantime.
+                    self._store.invalidate(path)
             finally:
                 if not retry:
                     self._graceful_watch_exit(path)